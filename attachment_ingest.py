@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+附件导入模块
+以增量方式解析 GitHub 事件文件，client_payload.attachments 中的附件内容不整体读入内存，
+而是边解析边按块解码 base64 写入附件目录，同时检查大小上限并计算 sha256。
+25MB 的附件在导入时占用的内存与块大小相当，而不是文件大小的数倍
+"""
+
+import base64
+import binascii
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from notification_handler import AttachmentInfo
+
+logger = logging.getLogger(__name__)
+
+# 默认单个附件的大小上限，与 SMTP 通知器的附件上限一致
+DEFAULT_MAX_BYTES = 25 * 1024 * 1024
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r'\s+')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?')
+# 数字中可能出现的字符，用于判断数字是否到达缓冲末尾
+_NUMBER_CHARS = re.compile(r'[0-9.eE+-]*')
+_LITERALS = {'true': True, 'false': False, 'null': None}
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class EventParseError(ValueError):
+    """事件文件不是有效的 JSON"""
+
+
+@dataclass
+class AttachmentIngestConfig:
+    """附件导入配置"""
+    max_bytes: int = DEFAULT_MAX_BYTES      # 单个附件解码后的大小上限（字节）
+    chunk_size: int = DEFAULT_CHUNK_SIZE    # 每次从事件文件读取的字符数
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'AttachmentIngestConfig':
+        """从 notification_config.json 的 attachments 配置创建"""
+        data = data or {}
+        default = cls()
+        return cls(
+            max_bytes=max(1, int(data.get('max_bytes', default.max_bytes))),
+            chunk_size=max(1024, int(data.get('chunk_size', default.chunk_size))),
+        )
+
+
+@dataclass
+class IngestedEvent:
+    """导入结果"""
+    event: Dict[str, Any]                   # 事件数据，附件的 content 已替换为空字符串
+    attachments: List[AttachmentInfo]       # 已写入附件目录的附件
+
+
+def _safe_filename(filename: Any, index: int) -> str:
+    """只保留文件名部分，防止写到附件目录之外"""
+    name = os.path.basename(str(filename or '').replace('\\', '/'))
+    if name in ('', '.', '..'):
+        name = f'attachment_{index}'
+    return name
+
+
+class _AttachmentWriter:
+    """
+    把一个附件的内容写入附件目录
+
+    内容之前已经出现 encoding 字段时直接按该编码写入；否则先把原始文本写入临时文件，
+    对象解析完后再按块解码，两种情况占用的内存都只与块大小有关。
+    """
+
+    def __init__(self, directory: str, encoding: Optional[str], config: AttachmentIngestConfig):
+        self.directory = directory
+        self.config = config
+        # base64 / text 直接写入，raw 表示编码未知，先保存原始文本
+        self.mode = 'raw' if encoding is None else ('base64' if encoding == 'base64' else 'text')
+        self.error: Optional[str] = None
+        self.size = 0
+        self._raw_size = 0
+        self._digest = hashlib.sha256()
+        self._pending = ''
+        fd, self.path = tempfile.mkstemp(dir=directory, prefix='.ingest-', suffix='.part')
+        self._file = os.fdopen(fd, 'wb')
+
+    def write(self, text: str) -> None:
+        """写入一段已反转义的字符串内容"""
+        if self.error is not None:
+            return
+        try:
+            if self.mode == 'raw':
+                # 解码后的大小在对象结束时精确检查，这里只防止原始文本无限增长
+                self._raw_size += len(text)
+                if self._raw_size > self.config.max_bytes * 2 + self.config.chunk_size:
+                    self._fail(f'超过大小上限 {self.config.max_bytes} 字节')
+                    return
+                self._file.write(text.encode('utf-8'))
+            elif self.mode == 'base64':
+                self._write_base64(text)
+            else:
+                self._emit(text.encode('utf-8'))
+        except (binascii.Error, ValueError) as e:
+            self._fail(f'base64 解码失败: {e}')
+
+    def finish(self, encoding: str) -> Optional[Tuple[str, int, str]]:
+        """
+        结束写入
+
+        Args:
+            encoding: 附件对象中的 encoding 字段
+
+        Returns:
+            Optional[Tuple[str, int, str]]: (临时文件路径, 大小, sha256)，失败时返回 None
+        """
+        try:
+            if self.error is None:
+                if self.mode == 'raw':
+                    self._file.close()
+                    self._convert_raw(encoding)
+                elif self.mode == 'base64':
+                    self._write_base64('', final=True)
+            if self.error is None and self.mode != 'raw':
+                self._file.close()
+        except (binascii.Error, ValueError) as e:
+            self._fail(f'base64 解码失败: {e}')
+        except OSError as e:
+            self._fail(f'写入失败: {e}')
+        if self.error is not None:
+            return None
+        return self.path, self.size, self._digest.hexdigest()
+
+    def abort(self) -> None:
+        """删除临时文件"""
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def _write_base64(self, text: str, final: bool = False) -> None:
+        """按 4 个字符一组解码，不足一组的部分留到下一段"""
+        data = self._pending + _WHITESPACE.sub('', text)
+        usable = len(data) if final else len(data) - len(data) % 4
+        self._pending = data[usable:]
+        if usable:
+            self._emit(base64.b64decode(data[:usable], validate=True))
+
+    def _emit(self, data: bytes) -> None:
+        self.size += len(data)
+        if self.size > self.config.max_bytes:
+            self._fail(f'超过大小上限 {self.config.max_bytes} 字节')
+            return
+        self._digest.update(data)
+        self._file.write(data)
+
+    def _convert_raw(self, encoding: str) -> None:
+        """编码在内容之后才出现时，把原始文本转换为最终内容"""
+        raw_path = self.path
+        if encoding != 'base64':
+            # 原始文本就是文本附件的内容，只需计算大小和摘要
+            with open(raw_path, 'rb') as f:
+                for block in iter(lambda: f.read(self.config.chunk_size), b''):
+                    self.size += len(block)
+                    self._digest.update(block)
+            if self.size > self.config.max_bytes:
+                self._fail(f'超过大小上限 {self.config.max_bytes} 字节')
+            return
+
+        self.mode = 'base64'
+        fd, self.path = tempfile.mkstemp(dir=self.directory, prefix='.ingest-', suffix='.part')
+        self._file = os.fdopen(fd, 'wb')
+        try:
+            with open(raw_path, 'r', encoding='utf-8') as f:
+                for block in iter(lambda: f.read(self.config.chunk_size), ''):
+                    self._write_base64(block)
+                    if self.error is not None:
+                        return
+            self._write_base64('', final=True)
+        finally:
+            os.unlink(raw_path)
+
+    def _fail(self, error: str) -> None:
+        self.error = error
+        self.abort()
+
+
+class _EventParser:
+    """
+    增量 JSON 解析器
+
+    按块读取事件文件，除附件内容外的值都正常构造为 Python 对象；
+    client_payload.attachments[i].content 的字符串内容直接交给 _AttachmentWriter。
+    """
+
+    def __init__(self, stream, directory: Optional[str], config: AttachmentIngestConfig):
+        self._stream = stream
+        self._directory = directory
+        self._config = config
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self.attachments: List[AttachmentInfo] = []
+
+    def parse(self) -> Any:
+        value = self._value(())
+        if self._peek() is not None:
+            raise self._error('事件数据后有多余的内容')
+        return value
+
+    # ---- 读取 ----
+
+    def _fill(self) -> bool:
+        """读取下一块，文件结束时返回 False"""
+        if self._eof:
+            return False
+        chunk = self._stream.read(self._config.chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self) -> Optional[str]:
+        """跳过空白，返回下一个字符，文件结束时返回 None"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return None
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise self._error(f'应为 {char!r}')
+        self._pos += 1
+
+    def _error(self, message: str) -> EventParseError:
+        return EventParseError(f'{message}（附近内容: {self._buffer[self._pos:self._pos + 20]!r}）')
+
+    # ---- 值 ----
+
+    def _value(self, path: Tuple) -> Any:
+        char = self._peek()
+        if char == '{':
+            return self._object(path)
+        if char == '[':
+            return self._array(path)
+        if char == '"':
+            return self._string()
+        if char is None:
+            raise self._error('事件数据不完整')
+        return self._scalar()
+
+    def _object(self, path: Tuple) -> Dict[str, Any]:
+        # client_payload.attachments 中的每个对象是一个附件
+        is_attachment = (self._directory is not None and len(path) == 3
+                         and path[:2] == ('client_payload', 'attachments') and isinstance(path[2], int))
+        writer: Optional[_AttachmentWriter] = None
+        result: Dict[str, Any] = {}
+        self._expect('{')
+        try:
+            if self._peek() == '}':
+                self._pos += 1
+                return result
+            while True:
+                if self._peek() != '"':
+                    raise self._error('对象的键应为字符串')
+                key = self._string()
+                self._expect(':')
+                if is_attachment and key == 'content' and writer is None and self._peek() == '"':
+                    encoding = result.get('encoding')
+                    writer = _AttachmentWriter(self._directory, None if encoding is None else encoding or 'base64',
+                                               self._config)
+                    self._string(writer.write)
+                    result[key] = ''
+                else:
+                    result[key] = self._value(path + (key,))
+                char = self._peek()
+                self._pos += 1
+                if char == '}':
+                    break
+                if char != ',':
+                    self._pos -= 1
+                    raise self._error("应为 ',' 或 '}'")
+        except Exception:
+            if writer is not None:
+                writer.abort()
+            raise
+        if writer is not None:
+            self._finish_attachment(path[2], result, writer)
+        return result
+
+    def _array(self, path: Tuple) -> List[Any]:
+        result: List[Any] = []
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return result
+        while True:
+            result.append(self._value(path + (len(result),)))
+            char = self._peek()
+            self._pos += 1
+            if char == ']':
+                return result
+            if char != ',':
+                self._pos -= 1
+                raise self._error("应为 ',' 或 ']'")
+
+    def _string(self, sink=None) -> Optional[str]:
+        """
+        解析字符串；提供 sink 时按段写入 sink 并返回 None，否则返回完整的字符串
+        """
+        self._expect('"')
+        parts: List[str] = []
+        emit = sink or parts.append
+        while True:
+            match = _STRING_SPECIAL.search(self._buffer, self._pos)
+            if match is None:
+                if self._pos < len(self._buffer):
+                    emit(self._buffer[self._pos:])
+                self._pos = len(self._buffer)
+                if not self._fill():
+                    raise self._error('字符串没有结束')
+                continue
+            if match.start() > self._pos:
+                emit(self._buffer[self._pos:match.start()])
+            self._pos = match.start() + 1
+            if match.group() == '"':
+                return None if sink else ''.join(parts)
+            emit(self._escape())
+
+    def _escape(self) -> str:
+        """解析反斜杠之后的转义序列"""
+        self._ensure(1)
+        char = self._buffer[self._pos]
+        if char in _ESCAPES:
+            self._pos += 1
+            return _ESCAPES[char]
+        if char != 'u':
+            raise self._error('无效的转义字符')
+        code = self._hex4()
+        # 代理对：高位代理后面应紧跟 \uXXXX 形式的低位代理
+        if 0xD800 <= code < 0xDC00:
+            self._ensure(6)
+            if self._buffer.startswith('\\u', self._pos):
+                self._pos += 1
+                low = self._hex4()
+                if 0xDC00 <= low < 0xE000:
+                    return chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00))
+                return chr(code) + chr(low)
+        return chr(code)
+
+    def _hex4(self) -> int:
+        """解析 uXXXX，当前位置在 u 上"""
+        self._ensure(5)
+        digits = self._buffer[self._pos + 1:self._pos + 5]
+        try:
+            code = int(digits, 16)
+        except ValueError:
+            raise self._error('无效的 \\u 转义') from None
+        self._pos += 5
+        return code
+
+    def _ensure(self, count: int) -> None:
+        """保证缓冲中从当前位置起至少有 count 个字符"""
+        while len(self._buffer) - self._pos < count:
+            if not self._fill():
+                raise self._error('事件数据不完整')
+
+    def _scalar(self) -> Any:
+        # 数字和字面量可能跨越两个块，匹配到缓冲末尾时先继续读取
+        while True:
+            for literal, value in _LITERALS.items():
+                if self._buffer.startswith(literal, self._pos):
+                    self._pos += len(literal)
+                    return value
+            match = _NUMBER.match(self._buffer, self._pos)
+            # 按数字字符扫描到分隔符：块恰好在 1. 或 2e 之后结束时，_NUMBER 只匹配到较短的前缀
+            token_end = _NUMBER_CHARS.match(self._buffer, self._pos).end()
+            if (match is None or token_end == len(self._buffer)) and not self._eof and self._fill():
+                continue
+            if match is None:
+                raise self._error('无效的值')
+            self._pos = match.end()
+            text = match.group()
+            return float(text) if any(char in text for char in '.eE') else int(text)
+
+    def _finish_attachment(self, index: int, data: Dict[str, Any], writer: _AttachmentWriter) -> None:
+        filename = _safe_filename(data.get('filename'), index)
+        result = writer.finish(data.get('encoding') or 'base64')
+        if result is None:
+            logger.warning(f"附件 {filename} 导入失败: {writer.error}")
+            return
+        temp_path, size, digest = result
+        filepath = os.path.join(self._directory, filename)
+        try:
+            os.replace(temp_path, filepath)
+        except OSError as e:
+            writer.abort()
+            logger.warning(f"附件 {filename} 导入失败: {e}")
+            return
+        content_type = data.get('content_type', 'application/octet-stream')
+        self.attachments.append(AttachmentInfo(
+            filename=filename,
+            filepath=filepath,
+            content_type=content_type,
+            size=size,
+            sha256=digest,
+        ))
+        logger.info(f"附件已准备: {filename} ({content_type}, {size} 字节, sha256 {digest[:12]})")
+
+
+def ingest_event(event_path: str, attachments_dir: Optional[str] = None,
+                 config: Optional[AttachmentIngestConfig] = None) -> IngestedEvent:
+    """
+    解析事件文件，并把附件写入附件目录
+
+    Args:
+        event_path: 事件文件路径（GITHUB_EVENT_PATH）
+        attachments_dir: 附件目录，不存在时自动创建；为 None 时不写入附件，只解析事件
+        config: 附件导入配置
+
+    Returns:
+        IngestedEvent: 事件数据和已写入的附件
+
+    Raises:
+        EventParseError: 事件文件不是有效的 JSON
+    """
+    config = config or AttachmentIngestConfig()
+    if attachments_dir is not None:
+        os.makedirs(attachments_dir, exist_ok=True)
+    with open(event_path, 'r', encoding='utf-8') as f:
+        parser = _EventParser(f, attachments_dir, config)
+        event = parser.parse()
+    if not isinstance(event, dict):
+        raise EventParseError('事件数据应为 JSON 对象')
+    return IngestedEvent(event, parser.attachments)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量事件处理模块
+从 JSONL 文件或标准输入流式读取多个事件，在一次运行中通过同一个通知处理器发送
+"""
+
+import json
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from notification_handler import NotificationHandler, NotificationSummary
+
+logger = logging.getLogger(__name__)
+
+
+# 单个事件的处理状态
+STATUS_SENT = "sent"          # 所有渠道发送成功
+STATUS_PARTIAL = "partial"    # 部分渠道发送失败
+STATUS_FAILED = "failed"      # 所有渠道发送失败或处理异常
+STATUS_SKIPPED = "skipped"    # 未发送（内容为空、被跳过等）
+STATUS_INVALID = "invalid"    # 事件数据无效
+
+
+@dataclass
+class BatchEventResult:
+    """批量模式中单个事件的处理结果"""
+    line_number: int
+    status: str
+    title: str = ""
+    summary: Optional[NotificationSummary] = None
+    errors: List[str] = field(default_factory=list)
+
+
+@dataclass
+class BatchReport:
+    """批量处理汇总结果"""
+    results: List[BatchEventResult]
+
+    def count(self, status: str) -> int:
+        """统计指定状态的事件数量"""
+        return sum(1 for result in self.results if result.status == status)
+
+    @property
+    def exit_code(self) -> int:
+        """汇总退出码：全部成功或跳过时为 0，否则为 1"""
+        ok_statuses = (STATUS_SENT, STATUS_SKIPPED)
+        return 0 if all(result.status in ok_statuses for result in self.results) else 1
+
+
+class BatchProcessor:
+    """批量事件处理器"""
+
+    def __init__(self, notification_handler: NotificationHandler,
+                 validate_event: Callable[[Dict[str, Any]], bool],
+                 concurrency: int = 4):
+        """
+        初始化批量事件处理器
+
+        Args:
+            notification_handler: 通知处理器实例，所有事件共用
+            validate_event: 事件数据校验函数
+            concurrency: 同时处理的事件数
+        """
+        self.notification_handler = notification_handler
+        self.validate_event = validate_event
+        self.concurrency = max(1, concurrency)
+        self.logger = logging.getLogger(__name__)
+
+    def process_stream(self, lines: Iterable[str]) -> BatchReport:
+        """
+        流式处理 JSONL 事件
+
+        同时在途的事件数量受 concurrency 限制，因此内存占用与输入大小无关；
+        结果按输入顺序返回。
+
+        Args:
+            lines: JSONL 文本行迭代器
+
+        Returns:
+            BatchReport: 批量处理汇总结果
+        """
+        results = []
+        pending = deque()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="BatchEvent") as executor:
+            for line_number, line in enumerate(lines, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+
+                try:
+                    event_data = json.loads(line)
+                except json.JSONDecodeError as e:
+                    self.logger.error(f"第 {line_number} 行事件 JSON 解析失败: {e}")
+                    pending.append(BatchEventResult(line_number, STATUS_INVALID, errors=[f"JSON 解析失败: {e}"]))
+                    continue
+
+                if not self.validate_event(event_data):
+                    self.logger.error(f"第 {line_number} 行事件数据验证失败")
+                    pending.append(BatchEventResult(line_number, STATUS_INVALID, errors=["事件数据验证失败"]))
+                    continue
+
+                pending.append(executor.submit(self._process_event, line_number, event_data))
+
+                # 限制在途事件数量
+                while len(pending) > self.concurrency * 2:
+                    results.append(self._collect(pending.popleft()))
+
+            while pending:
+                results.append(self._collect(pending.popleft()))
+
+        report = BatchReport(results)
+        self.logger.info(
+            f"批量处理完成: 共 {len(results)} 个事件，成功 {report.count(STATUS_SENT)} 个，"
+            f"部分失败 {report.count(STATUS_PARTIAL)} 个，失败 {report.count(STATUS_FAILED)} 个，"
+            f"跳过 {report.count(STATUS_SKIPPED)} 个，无效 {report.count(STATUS_INVALID)} 个"
+        )
+        return report
+
+    def _collect(self, item) -> BatchEventResult:
+        """获取单个事件的处理结果"""
+        if isinstance(item, Future):
+            item = item.result()
+        self.logger.info(f"[第 {item.line_number} 行] {item.title or 'N/A'}: {item.status}")
+        return item
+
+    def _process_event(self, line_number: int, event_data: Dict[str, Any]) -> BatchEventResult:
+        """处理单个事件"""
+        title = event_data.get('client_payload', {}).get('title', '')
+        try:
+            # 处理异常计为失败，而不是像未发送的事件一样计为跳过
+            summary = self.notification_handler.process_github_event(event_data, raise_errors=True)
+        except Exception as e:
+            self.logger.error(f"第 {line_number} 行事件处理异常: {e}")
+            return BatchEventResult(line_number, STATUS_FAILED, title, errors=[str(e)])
+
+        if summary is None or summary.total_channels == 0:
+            errors = summary.errors if summary else []
+            return BatchEventResult(line_number, STATUS_SKIPPED, title, summary, errors)
+        if not summary.failed_channels:
+            status = STATUS_SENT
+        elif summary.successful_channels:
+            status = STATUS_PARTIAL
+        else:
+            status = STATUS_FAILED
+        return BatchEventResult(line_number, status, title, summary, list(summary.errors))
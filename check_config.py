@@ -71,6 +71,13 @@ def main():
             if status['optional_env']:
                 print(f"    可选的环境变量: {', '.join(status['optional_env'])}")
     
+    # 显示配置错误（格式错误、无效的路由规则等）
+    config_errors = config_manager.validate_config()
+    if config_errors:
+        print(f"\n❌ 配置错误 ({len(config_errors)} 个):")
+        for key, message in config_errors.items():
+            print(f"  • {key}: {message}")
+
     # 显示配置建议
     if active_count == 0:
         print("\n💡 建议:")
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+熔断器模块
+按通知渠道统计滑动窗口内的失败率，服务商故障时快速失败，避免工作线程阻塞在重试等待上
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(Enum):
+    """熔断器状态枚举"""
+    CLOSED = "closed"          # 正常放行
+    OPEN = "open"              # 熔断中，直接拒绝
+    HALF_OPEN = "half_open"    # 试探中，仅放行少量请求
+
+
+class CircuitOpenError(Exception):
+    """渠道处于熔断状态时抛出，不可重试"""
+    pass
+
+
+@dataclass
+class CircuitBreakerConfig:
+    """熔断器配置"""
+    enabled: bool = True
+    window_seconds: float = 60.0          # 统计失败率的滑动窗口（秒）
+    min_calls: int = 5                    # 窗口内至少多少次调用才计算失败率
+    failure_rate_threshold: float = 0.5   # 触发熔断的失败率
+    open_seconds: float = 30.0            # 熔断持续时间（秒），之后进入半开状态
+    half_open_max_calls: int = 1          # 半开状态下允许同时试探的请求数
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'CircuitBreakerConfig':
+        """从 notification_config.json 的 circuit_breaker 配置创建"""
+        data = data or {}
+        default = cls()
+        return cls(
+            enabled=bool(data.get('enabled', default.enabled)),
+            window_seconds=float(data.get('window_seconds', default.window_seconds)),
+            min_calls=int(data.get('min_calls', default.min_calls)),
+            failure_rate_threshold=float(data.get('failure_rate_threshold', default.failure_rate_threshold)),
+            open_seconds=float(data.get('open_seconds', default.open_seconds)),
+            half_open_max_calls=int(data.get('half_open_max_calls', default.half_open_max_calls)),
+        )
+
+
+class CircuitBreaker:
+    """单个渠道的熔断器"""
+
+    def __init__(self, name: str, config: Optional[CircuitBreakerConfig] = None):
+        """
+        初始化熔断器
+
+        Args:
+            name: 渠道名
+            config: 熔断器配置
+        """
+        self.name = name
+        self.config = config or CircuitBreakerConfig()
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._outcomes = deque()      # (时间戳, 是否成功)
+        self._failures = 0
+        self._half_open_in_flight = 0
+        self._rejected = 0
+        self._transitions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        """当前状态（熔断时间到期后自动进入半开状态）"""
+        with self._lock:
+            self._refresh_state(time.monotonic())
+            return self._state
+
+    def allow_request(self) -> bool:
+        """
+        检查是否允许发送请求
+
+        Returns:
+            bool: 允许返回 True，熔断中返回 False
+        """
+        if not self.config.enabled:
+            return True
+
+        with self._lock:
+            self._refresh_state(time.monotonic())
+            if self._state == CircuitState.CLOSED:
+                return True
+            if self._state == CircuitState.HALF_OPEN and self._half_open_in_flight < self.config.half_open_max_calls:
+                self._half_open_in_flight += 1
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        """记录一次成功调用"""
+        self._record(True)
+
+    def record_failure(self) -> None:
+        """记录一次失败调用"""
+        self._record(False)
+
+    def release(self) -> None:
+        """调用结束但不计入统计（如不可重试的业务错误），释放半开状态的试探名额"""
+        with self._lock:
+            if self._state == CircuitState.HALF_OPEN and self._half_open_in_flight > 0:
+                self._half_open_in_flight -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取熔断器指标
+
+        Returns:
+            Dict[str, Any]: 状态、窗口内失败率、拒绝次数和状态切换次数
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refresh_state(now)
+            self._prune(now)
+            calls = len(self._outcomes)
+            return {
+                'state': self._state.value,
+                'window_calls': calls,
+                'failure_rate': round(self._failures / calls, 3) if calls else 0.0,
+                'rejected': self._rejected,
+                'transitions': dict(self._transitions),
+            }
+
+    def _record(self, success: bool) -> None:
+        if not self.config.enabled:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            self._refresh_state(now)
+
+            if self._state == CircuitState.HALF_OPEN:
+                if self._half_open_in_flight > 0:
+                    self._half_open_in_flight -= 1
+                if success:
+                    self._transition(CircuitState.CLOSED, now)
+                else:
+                    self._transition(CircuitState.OPEN, now)
+                return
+
+            if self._state == CircuitState.OPEN:
+                # 熔断前已发出的请求在熔断后才返回，不再影响状态
+                return
+
+            self._outcomes.append((now, success))
+            if not success:
+                self._failures += 1
+            self._prune(now)
+
+            calls = len(self._outcomes)
+            if calls >= self.config.min_calls and self._failures / calls >= self.config.failure_rate_threshold:
+                self._transition(CircuitState.OPEN, now)
+
+    def _refresh_state(self, now: float) -> None:
+        if self._state == CircuitState.OPEN and now - self._opened_at >= self.config.open_seconds:
+            self._transition(CircuitState.HALF_OPEN, now)
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.config.window_seconds
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            _, success = self._outcomes.popleft()
+            if not success:
+                self._failures -= 1
+
+    def _transition(self, new_state: CircuitState, now: float) -> None:
+        old_state = self._state
+        if old_state == new_state:
+            return
+
+        self._state = new_state
+        key = f"{old_state.value}->{new_state.value}"
+        self._transitions[key] = self._transitions.get(key, 0) + 1
+
+        if new_state == CircuitState.OPEN:
+            self._opened_at = now
+            self._half_open_in_flight = 0
+            logger.warning(f"渠道 {self.name} 熔断器打开，{self.config.open_seconds:g} 秒内的发送将直接失败")
+        elif new_state == CircuitState.HALF_OPEN:
+            self._half_open_in_flight = 0
+            logger.info(f"渠道 {self.name} 熔断器进入半开状态，开始试探发送")
+        else:
+            self._outcomes.clear()
+            self._failures = 0
+            logger.info(f"渠道 {self.name} 熔断器关闭，恢复正常发送")
+
+
+class CircuitBreakerRegistry:
+    """按渠道管理熔断器"""
+
+    def __init__(self, config: Optional[CircuitBreakerConfig] = None):
+        """
+        初始化熔断器注册表
+
+        Args:
+            config: 所有渠道共用的熔断器配置
+        """
+        self.config = config or CircuitBreakerConfig()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, channel: str) -> CircuitBreaker:
+        """获取渠道的熔断器，不存在时创建"""
+        with self._lock:
+            breaker = self._breakers.get(channel)
+            if breaker is None:
+                breaker = self._breakers[channel] = CircuitBreaker(channel, self.config)
+            return breaker
+
+    def update_config(self, config: CircuitBreakerConfig) -> None:
+        """更新所有渠道的熔断器配置，已有的统计数据和状态保持不变"""
+        with self._lock:
+            self.config = config
+            for breaker in self._breakers.values():
+                breaker.config = config
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取所有渠道的熔断器指标"""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.get_stats() for breaker in breakers}
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合并发送模块
+短时间内大量通知发往同一渠道时，按渠道缓冲一段时间或一定条数后合并为一条摘要发送，
+摘要不超过服务商的单条消息大小限制；紧急通知和带附件的通知不经过缓冲
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from retry_scheduler import DelayScheduler, TimerHandle
+
+logger = logging.getLogger(__name__)
+
+# 各渠道单条消息的大小上限（UTF-8 字节，包括标题），None 表示不限制；未列出的渠道使用 DEFAULT_MAX_BYTES
+DIGEST_SIZE_LIMITS: Dict[str, Optional[int]] = {
+    'dingtalk': 20000,      # 钉钉文本消息 20000 字节
+    'wecom_app': 2048,      # 企业微信应用文本消息 2048 字节
+    'wecom_bot': 2048,      # 企业微信群机器人文本消息 2048 字节
+    'telegram': 4096,       # Telegram 单条消息 4096 字符
+    'bark': 3000,           # APNs 推送负载 4KB，扣除其他字段
+    'serverchan': 32000,    # Server酱 desp 32KB
+    'pushplus': 20000,
+    'smtp': None,
+    'console': None,
+}
+DEFAULT_MAX_BYTES = 4000
+
+# 合并后的摘要中，每条通知之间的分隔符
+DIGEST_SEPARATOR = "\n\n"
+
+# 为摘要标题预留的字节数
+_TITLE_RESERVE = 64
+
+
+def _section(title: str, content: str) -> str:
+    """摘要中一条通知的文本"""
+    return f"【{title}】\n{content}"
+
+
+@dataclass
+class CoalescingConfig:
+    """合并发送配置"""
+    enabled: bool = False
+    window_seconds: float = 30.0                  # 第一条通知进入缓冲后最多等待的时间（秒）
+    max_messages: int = 20                        # 缓冲的通知数达到该值时立即发送
+    channels: Tuple[str, ...] = ()                # 只合并这些渠道，为空时合并所有渠道
+    bypass_severities: Tuple[str, ...] = ('critical',)   # 这些严重级别的通知立即发送
+    max_bytes: Dict[str, Optional[int]] = field(default_factory=dict)   # 覆盖内置的各渠道消息大小上限
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'CoalescingConfig':
+        """从 notification_config.json 的 coalescing 配置创建"""
+        data = data or {}
+        default = cls()
+        return cls(
+            enabled=bool(data.get('enabled', default.enabled)),
+            window_seconds=float(data.get('window_seconds', default.window_seconds)),
+            max_messages=max(1, int(data.get('max_messages', default.max_messages))),
+            channels=tuple(data.get('channels') or ()),
+            bypass_severities=tuple(str(item).lower() for item in data.get('bypass_severities', default.bypass_severities)),
+            max_bytes={channel: (int(limit) if limit else None) for channel, limit in (data.get('max_bytes') or {}).items()},
+        )
+
+    def size_limit(self, channel: str) -> Optional[int]:
+        """渠道单条消息的大小上限（字节），None 表示不限制"""
+        if channel in self.max_bytes:
+            return self.max_bytes[channel]
+        return DIGEST_SIZE_LIMITS.get(channel, DEFAULT_MAX_BYTES)
+
+
+@dataclass
+class CoalescedMessage:
+    """缓冲中的一条通知"""
+    title: str
+    content: str
+    notifier: Any                       # 发送摘要使用的通知器
+    deliveries: Any = None              # 发件箱中的投递，摘要发送后更新
+    dead_letter: Any = None             # 死信记录，摘要发送失败时每条通知各自写入死信
+    priority: Optional[str] = None      # 优先级通道，摘要按其中最高的优先级排队
+    size: int = 0                       # 在摘要中占用的字节数
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+def build_digest(messages: List[CoalescedMessage]) -> Tuple[str, str]:
+    """
+    把多条通知合并为一条摘要
+
+    Args:
+        messages: 按到达顺序排列的通知
+
+    Returns:
+        Tuple[str, str]: (标题, 内容)，只有一条通知时原样返回
+    """
+    if len(messages) == 1:
+        return messages[0].title, messages[0].content
+    title = f"{len(messages)} 条通知汇总"
+    return title, DIGEST_SEPARATOR.join(_section(message.title, message.content) for message in messages)
+
+
+class DigestDeliveries:
+    """把摘要的发送结果记录到其中每条通知的发件箱投递"""
+
+    def __init__(self, entries: List[Any]):
+        self.entries = entries
+
+    def mark(self, channel: str, success: bool, error: Optional[str] = None) -> None:
+        for entry in self.entries:
+            entry.mark(channel, success, error)
+
+
+class DigestDeadLetters:
+    """摘要发送失败时，其中每条通知各自写入死信，重放时单独发送"""
+
+    letters = None
+
+    def __init__(self, entries: List[Any]):
+        self.entries = entries
+
+    def record(self, channel: str, success: bool, *args) -> None:
+        for entry in self.entries:
+            entry.record(channel, success, *args)
+
+
+class _Buffer:
+    """一个渠道的缓冲"""
+
+    __slots__ = ('messages', 'size', 'timer')
+
+    def __init__(self):
+        self.messages: List[CoalescedMessage] = []
+        self.size = _TITLE_RESERVE
+        self.timer: Optional[TimerHandle] = None
+
+
+class Coalescer:
+    """
+    按渠道合并通知
+
+    缓冲按窗口时间、条数和大小上限三个条件中先满足的一个发送。窗口由延迟调度器计时，
+    到期后摘要在单独的线程池中发送，不阻塞调用方；关闭时立即发送所有缓冲中的通知。
+    """
+
+    # 发送摘要的线程数
+    FLUSH_WORKERS = 4
+
+    def __init__(self, config: CoalescingConfig, send_digest: Callable[[str, List[CoalescedMessage]], Any],
+                 scheduler: DelayScheduler):
+        """
+        初始化合并器
+
+        Args:
+            config: 合并发送配置
+            send_digest: 发送摘要的函数，参数为渠道名和缓冲中的通知
+            scheduler: 窗口计时使用的延迟调度器
+        """
+        self.config = config
+        self._send_digest = send_digest
+        self._scheduler = scheduler
+        self._buffers: Dict[str, _Buffer] = {}
+        self._lock = threading.Lock()
+        self._flusher: Optional[ThreadPoolExecutor] = None
+        self._coalesced = 0
+        self._digests = 0
+        self._bypassed = 0
+        self._total_delay = 0.0
+
+    def accepts(self, channel: str, title: str, content: str, severity: str, has_attachments: bool = False) -> bool:
+        """
+        检查通知是否应进入该渠道的缓冲
+
+        Args:
+            channel: 渠道名
+            title: 通知标题
+            content: 通知内容
+            severity: 严重级别
+            has_attachments: 是否带有附件
+
+        Returns:
+            bool: 应进入缓冲时返回 True
+        """
+        config = self.config
+        if not config.enabled or (config.channels and channel not in config.channels):
+            return False
+        limit = config.size_limit(channel)
+        if has_attachments or str(severity).lower() in config.bypass_severities or (
+                limit is not None and _TITLE_RESERVE + len(_section(title, content).encode('utf-8')) > limit):
+            with self._lock:
+                self._bypassed += 1
+            return False
+        return True
+
+    def add(self, channel: str, message: CoalescedMessage) -> None:
+        """
+        把通知放入渠道的缓冲，调用前应先用 accepts() 检查
+
+        Args:
+            channel: 渠道名
+            message: 通知
+        """
+        separator = len(DIGEST_SEPARATOR)
+        message.size = len(_section(message.title, message.content).encode('utf-8'))
+        limit = self.config.size_limit(channel)
+        ready = []
+        with self._lock:
+            buffer = self._buffers.get(channel)
+            # 加入这条通知后会超过大小上限时，先发送已缓冲的通知
+            if buffer is not None and limit is not None and buffer.size + separator + message.size > limit:
+                ready.append(self._pop(channel))
+                buffer = None
+            if buffer is None:
+                buffer = self._buffers[channel] = _Buffer()
+                buffer.timer = self._scheduler.call_later(self.config.window_seconds, self._on_window, channel, buffer)
+            buffer.messages.append(message)
+            buffer.size += message.size + separator
+            self._coalesced += 1
+            if len(buffer.messages) >= self.config.max_messages:
+                ready.append(self._pop(channel))
+        for item in ready:
+            self._submit(channel, item)
+
+    def flush(self) -> None:
+        """立即发送所有缓冲中的通知"""
+        with self._lock:
+            ready = [(channel, self._pop(channel)) for channel in list(self._buffers)]
+        for channel, messages in ready:
+            self._submit(channel, messages)
+
+    def close(self, wait: bool = True) -> None:
+        """
+        发送所有缓冲中的通知并关闭发送线程池
+
+        Args:
+            wait: 是否等待摘要发送完成
+        """
+        self.flush()
+        with self._lock:
+            flusher = self._flusher
+            self._flusher = None
+        if flusher is not None:
+            flusher.shutdown(wait=wait)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取合并发送指标
+
+        Returns:
+            Dict[str, Any]: 缓冲中的通知数、已合并的通知数、已发送的摘要数、跳过缓冲的通知数和平均等待时间
+        """
+        with self._lock:
+            sent = self._coalesced - sum(len(buffer.messages) for buffer in self._buffers.values())
+            return {
+                'buffered': {channel: len(buffer.messages) for channel, buffer in self._buffers.items()},
+                'coalesced': self._coalesced,
+                'digests': self._digests,
+                'bypassed': self._bypassed,
+                'avg_delay': round(self._total_delay / sent, 3) if sent else 0.0,
+            }
+
+    def _pop(self, channel: str) -> List[CoalescedMessage]:
+        """取出渠道的缓冲（调用方持有锁）"""
+        buffer = self._buffers.pop(channel)
+        if buffer.timer is not None:
+            buffer.timer.cancel()
+        now = time.monotonic()
+        self._digests += 1
+        self._total_delay += sum(now - message.queued_at for message in buffer.messages)
+        return buffer.messages
+
+    def _on_window(self, channel: str, buffer: _Buffer) -> None:
+        """窗口到期，在调度线程中执行，只负责把摘要交给发送线程池"""
+        with self._lock:
+            if self._buffers.get(channel) is not buffer:
+                return
+            messages = self._pop(channel)
+        self._submit(channel, messages)
+
+    def _submit(self, channel: str, messages: List[CoalescedMessage]) -> None:
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = ThreadPoolExecutor(max_workers=self.FLUSH_WORKERS, thread_name_prefix="NotificationDigest")
+            flusher = self._flusher
+        flusher.submit(self._run_digest, channel, messages)
+
+    def _run_digest(self, channel: str, messages: List[CoalescedMessage]) -> None:
+        try:
+            self._send_digest(channel, messages)
+        except Exception as e:
+            logger.error(f"发送 {channel} 的合并摘要失败: {e}")
@@ -8,7 +8,98 @@
 import os
 import re
 import json
-from typing import Any, Dict, Optional
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+
+from priority_executor import PRIORITY_LANES, normalize_priority
+from routing import RoutingTable
+from suppression import SuppressionFilter
+
+
+# 各渠道必需的配置项，元组表示其中任意一个配置项即可
+CHANNEL_REQUIRED_KEYS = {
+    'bark': ['BARK_PUSH'],
+    'console': [],  # 控制台输出不需要配置
+    'dingtalk': ['DD_BOT_SECRET', 'DD_BOT_TOKEN'],
+    'feishu': ['FSKEY'],
+    'wecom_app': ['QYWX_AM'],
+    'wecom_bot': ['QYWX_KEY'],
+    'telegram': ['TG_BOT_TOKEN', 'TG_USER_ID'],
+    'serverchan': [('PUSH_KEY', 'SCKEY')],  # 两种配置方式任选其一
+    'serverchan_legacy': ['SCKEY'],
+    'pushdeer': ['DEER_KEY'],
+    'pushplus': ['PUSH_PLUS_TOKEN'],
+    'qmsg': ['QMSG_KEY', 'QMSG_TYPE'],
+    'gotify': ['GOTIFY_URL', 'GOTIFY_TOKEN'],
+    'igot': ['IGOT_PUSH_KEY'],
+    'smtp': ['SMTP_SERVER', 'SMTP_SSL', 'SMTP_EMAIL', 'SMTP_PASSWORD', 'SMTP_NAME'],
+}
+
+
+def _freeze(value: Any) -> Any:
+    """递归地将字典转换为只读映射、列表转换为元组"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _parse_switch(value: Optional[str]) -> Optional[bool]:
+    """解析 ENABLE_<渠道名> 形式的开关，未设置或无法识别时返回 None"""
+    value = (value or '').lower()
+    if value in ['true', '1', 'yes', 'on']:
+        return True
+    if value in ['false', '0', 'no', 'off']:
+        return False
+    return None
+
+
+@dataclass(frozen=True)
+class ChannelState:
+    """通知渠道的预计算状态"""
+    name: str
+    enabled: bool
+    configured: bool
+    description: str = ''
+    required_env: Tuple[str, ...] = ()
+    optional_env: Tuple[str, ...] = ()
+    
+    @property
+    def active(self) -> bool:
+        """是否同时启用且已配置"""
+        return self.enabled and self.configured
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """
+    编译后的只读配置快照
+    
+    环境变量和 notification_config.json 在创建快照时一次性解析为带类型的值，
+    快照创建后不再改变，读取时无需加锁；重新加载时整体替换为新的快照。
+    """
+    values: Mapping[str, Any]                 # 配置键到带类型值的映射
+    notification_config: Mapping[str, Any]   # 只读的 notification_config.json
+    channels: Mapping[str, ChannelState]      # 渠道名到渠道状态的映射
+    circuit_breaker: Mapping[str, Any]        # 已合并环境变量的熔断器配置
+    routing: RoutingTable                     # 编译后的路由表
+    suppression: SuppressionFilter            # 编译后的屏蔽规则（含 SKIP_PUSH_TITLE）
+    version: int = 1
+    loaded_at: float = 0.0
+
+
+class ConfigValidationError(Exception):
+    """重新加载的配置未通过校验"""
+    
+    def __init__(self, errors: Dict[str, str]):
+        super().__init__("; ".join(f"{key}: {message}" for key, message in errors.items()))
+        self.errors = errors
 
 
 class ConfigManager:
@@ -16,25 +107,176 @@ class ConfigManager:
     
     def __init__(self):
         """初始化配置管理器"""
-        self._config_cache = {}
-        self._notification_config = {}
-        self._load_notification_config()
-        self._load_config()
+        self.config_path = os.path.join(os.path.dirname(__file__), 'notification_config.json')
+        self._pinned = contextvars.ContextVar(f"config_snapshot_{id(self)}", default=None)
+        self._reload_lock = threading.Lock()
+        self._file_signature = self._stat_config_file()
+        self._snapshot = self._build_snapshot(self._load_notification_config())
+    
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """当前上下文使用的配置快照，处于 pinned() 范围内时返回固定的快照"""
+        return self._pinned.get() or self._snapshot
+    
+    @contextmanager
+    def pinned(self, snapshot: Optional[ConfigSnapshot] = None) -> Iterator[ConfigSnapshot]:
+        """
+        在当前上下文（线程或 asyncio 任务）中固定配置快照，
+        期间重新加载配置不会影响正在进行的发送
+        
+        Args:
+            snapshot: 要固定的快照，默认为当前快照
+        """
+        token = self._pinned.set(snapshot or self.snapshot)
+        try:
+            yield self._pinned.get()
+        finally:
+            self._pinned.reset(token)
+    
+    def reload(self) -> ConfigSnapshot:
+        """
+        重新读取环境变量和配置文件，校验通过后原子地替换配置快照
+        
+        Returns:
+            ConfigSnapshot: 新的配置快照
+            
+        Raises:
+            ConfigValidationError: 配置文件无法解析，或新配置引入了校验错误
+        """
+        with self._reload_lock:
+            # 无论成功与否都记录本次读取的文件状态，避免文件监视反复加载同一个错误文件
+            self._file_signature = self._stat_config_file()
+            current = self._snapshot
+            try:
+                candidate = self._build_snapshot(self._load_notification_config(strict=True), current.version + 1)
+            except Exception as e:
+                raise ConfigValidationError({'notification_config.json': str(e)})
+            
+            # 只拒绝新引入的错误，已存在的问题不应阻止其他配置生效
+            current_errors = self.validate_config(current)
+            new_errors = {
+                key: message for key, message in self.validate_config(candidate).items()
+                if current_errors.get(key) != message
+            }
+            if new_errors:
+                raise ConfigValidationError(new_errors)
+            
+            self._snapshot = candidate
+            return candidate
+    
+    def config_file_changed(self) -> bool:
+        """检查配置文件自上次加载后是否被修改"""
+        return self._stat_config_file() != self._file_signature
+    
+    def _stat_config_file(self) -> Optional[Tuple[int, int]]:
+        """获取配置文件的修改时间和大小，文件不存在时返回 None"""
+        try:
+            stat = os.stat(self.config_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
     
-    def _load_notification_config(self) -> None:
-        """加载通知配置文件"""
+    def _load_notification_config(self, strict: bool = False) -> Dict[str, Any]:
+        """
+        加载通知配置文件
+        
+        Args:
+            strict: 为 True 时加载失败直接抛出异常
+            
+        Returns:
+            配置文件内容，非严格模式下加载失败时返回空字典
+        """
         try:
-            config_path = os.path.join(os.path.dirname(__file__), 'notification_config.json')
-            with open(config_path, 'r', encoding='utf-8') as f:
-                self._notification_config = json.load(f)
+            with open(self.config_path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            if not isinstance(config, dict):
+                raise ValueError("配置文件顶层必须是 JSON 对象")
+            return config
         except Exception as e:
+            if strict:
+                raise
             print(f"加载通知配置文件失败: {e}")
-            self._notification_config = {}
+            return {}
     
-    def _load_config(self) -> None:
-        """从环境变量加载配置"""
+    def _build_snapshot(self, notification_config: Dict[str, Any], version: int = 1) -> ConfigSnapshot:
+        """
+        将环境变量和配置文件编译为只读快照
+        
+        Args:
+            notification_config: notification_config.json 的内容
+            version: 快照版本号
+            
+        Returns:
+            ConfigSnapshot: 配置快照
+        """
+        values = self._compile_values(notification_config)
+        
+        # 熔断器配置，环境变量 CIRCUIT_BREAKER_ENABLED 可覆盖是否启用
+        circuit_breaker = dict(notification_config.get('circuit_breaker', {}))
+        enabled = os.environ.get('CIRCUIT_BREAKER_ENABLED')
+        if enabled:
+            circuit_breaker['enabled'] = enabled.lower() == 'true'
+        
+        return ConfigSnapshot(
+            values=MappingProxyType(values),
+            notification_config=_freeze(notification_config),
+            channels=MappingProxyType(self._compute_channel_states(values, notification_config)),
+            circuit_breaker=_freeze(circuit_breaker),
+            routing=RoutingTable.from_config(notification_config.get('routing')),
+            suppression=SuppressionFilter.from_config(notification_config.get('suppression'), values.get('SKIP_PUSH_TITLE')),
+            version=version,
+            loaded_at=time.time(),
+        )
+    
+    @staticmethod
+    def _compute_channel_states(values: Dict[str, Any], notification_config: Dict[str, Any]) -> Dict[str, ChannelState]:
+        """预先计算所有渠道的启用和配置状态"""
+        channels = notification_config.get('notification_channels', {})
+        
+        # 配置文件中的渠道、有必需配置项定义的渠道，以及通过 ENABLE_<渠道名> 显式开关的渠道
+        names = list(channels.keys())
+        names += [name for name in CHANNEL_REQUIRED_KEYS if name not in channels]
+        names += [
+            key[len('ENABLE_'):].lower() for key in os.environ
+            if key.startswith('ENABLE_') and key[len('ENABLE_'):].lower() not in names
+        ]
+        
+        states = {}
+        for name in names:
+            channel_config = channels.get(name, {})
+            
+            # 环境变量优先，未设置时使用配置文件中的默认值
+            enabled = _parse_switch(os.environ.get(f"ENABLE_{name.upper()}"))
+            if enabled is None:
+                enabled = bool(channel_config.get('enabled', False))
+            
+            configured = False
+            if name in CHANNEL_REQUIRED_KEYS:
+                configured = all(
+                    any(values.get(k) for k in key) if isinstance(key, tuple) else bool(values.get(key))
+                    for key in CHANNEL_REQUIRED_KEYS[name]
+                )
+            
+            states[name] = ChannelState(
+                name=name,
+                enabled=enabled,
+                configured=configured,
+                description=channel_config.get('description', ''),
+                required_env=tuple(channel_config.get('required_env', [])),
+                optional_env=tuple(channel_config.get('optional_env', [])),
+            )
+        return states
+    
+    def _compile_values(self, notification_config: Dict[str, Any]) -> Dict[str, Any]:
+        """从环境变量加载配置，未设置的并发、重试等参数使用配置文件中的默认值"""
+        concurrent_settings = notification_config.get('concurrent_settings', {})
+        retry_settings = notification_config.get('retry_settings', {})
+        http_settings = notification_config.get('http_settings', {})
+        smtp_settings = notification_config.get('smtp_settings', {})
+        cache_settings = notification_config.get('attachments', {}).get('cache', {})
+        
         # 通知服务相关配置
-        self._config_cache = {
+        return {
             # Bark 推送配置
             'BARK_PUSH': os.environ.get('BARK_PUSH') or None,
             'BARK_ARCHIVE': os.environ.get('BARK_ARCHIVE') or None,
@@ -52,6 +294,7 @@ class ConfigManager:
             # 企业微信配置
             'QYWX_AM': os.environ.get('QYWX_AM') or None,
             'QYWX_KEY': os.environ.get('QYWX_KEY') or None,
+            'QYWX_TOKEN_CACHE_FILE': os.environ.get('QYWX_TOKEN_CACHE_FILE') or None,
             
             # Telegram 配置
             'TG_BOT_TOKEN': os.environ.get('TG_BOT_TOKEN') or None,
@@ -91,11 +334,49 @@ class ConfigManager:
             'SMTP_EMAIL': os.environ.get('SMTP_EMAIL') or None,
             'SMTP_PASSWORD': os.environ.get('SMTP_PASSWORD') or None,
             'SMTP_NAME': os.environ.get('SMTP_NAME') or None,
+            'SMTP_TO': os.environ.get('SMTP_TO') or None,   # 收件人地址或分组名，逗号、分号或换行分隔；为空时发给 SMTP_EMAIL
+            
+            # 并发与重试配置（未设置环境变量时使用 notification_config.json 中的默认值）
+            'NOTIFICATION_TIMEOUT': int(os.environ.get('NOTIFICATION_TIMEOUT') or concurrent_settings.get('notification_timeout', 30)),
+            'MAX_CONCURRENT_NOTIFICATIONS': int(os.environ.get('MAX_CONCURRENT_NOTIFICATIONS') or concurrent_settings.get('max_workers', 10)),
+            'NOTIFICATION_RETRY_ATTEMPTS': int(os.environ.get('NOTIFICATION_RETRY_ATTEMPTS') or retry_settings.get('max_attempts', 2)),
+            'NOTIFICATION_RETRY_DELAY': float(os.environ.get('NOTIFICATION_RETRY_DELAY') or retry_settings.get('base_delay', 1.0)),
+            'NOTIFICATION_MAX_RETRY_DELAY': float(os.environ.get('NOTIFICATION_MAX_RETRY_DELAY') or retry_settings.get('max_delay', 10.0)),
+            
+            # HTTP 连接池配置
+            'HTTP_POOL_MAXSIZE': int(os.environ.get('HTTP_POOL_MAXSIZE') or http_settings.get('pool_maxsize', 10)),
+            'HTTP_POOL_RETRIES': int(os.environ.get('HTTP_POOL_RETRIES') or http_settings.get('max_retries', 1)),
+            'HTTP_POOL_BACKOFF': float(os.environ.get('HTTP_POOL_BACKOFF') or http_settings.get('backoff_factor', 0.3)),
+            'HTTP_TCP_KEEPALIVE': (os.environ.get('HTTP_TCP_KEEPALIVE') or str(http_settings.get('tcp_keepalive', True))).lower() == 'true',
+            
+            # SMTP 连接池配置
+            'SMTP_POOL_MAXSIZE': int(os.environ.get('SMTP_POOL_MAXSIZE') or smtp_settings.get('pool_maxsize', 2)),
+            'SMTP_POOL_IDLE_TIMEOUT': float(os.environ.get('SMTP_POOL_IDLE_TIMEOUT') or smtp_settings.get('idle_timeout', 60.0)),
+            'SMTP_POOL_HEALTH_CHECK': float(os.environ.get('SMTP_POOL_HEALTH_CHECK') or smtp_settings.get('health_check_interval', 5.0)),
+            'SMTP_MAX_RECIPIENTS': int(os.environ.get('SMTP_MAX_RECIPIENTS') or smtp_settings.get('max_recipients', 100)),
+            
+            # 附件缓存配置（已编码的附件按内容缓存在内存中，超出预算或单条目上限的转存到 ATTACHMENT_CACHE_DIR）
+            'ATTACHMENT_CACHE_MAX_BYTES': int(os.environ.get('ATTACHMENT_CACHE_MAX_BYTES') or cache_settings.get('max_bytes', 67108864)),
+            'ATTACHMENT_CACHE_DIR': os.environ.get('ATTACHMENT_CACHE_DIR') or cache_settings.get('spill_dir') or None,
+            'ATTACHMENT_CACHE_SPILL_BYTES': int(os.environ.get('ATTACHMENT_CACHE_SPILL_BYTES') or cache_settings.get('max_spill_bytes', 536870912)),
+            'ATTACHMENT_CACHE_MAX_ENTRY_BYTES': int(os.environ.get('ATTACHMENT_CACHE_MAX_ENTRY_BYTES') or cache_settings.get('max_entry_bytes', 1048576)),
             
             # 其他配置
             'HITOKOTO': os.environ.get('HITOKOTO', 'false').lower() == 'true',
             'CONSOLE': os.environ.get('CONSOLE', 'true').lower() == 'true',
             'SKIP_PUSH_TITLE': os.environ.get('SKIP_PUSH_TITLE') or None,
+            'CONFIG_WATCH_INTERVAL': float(os.environ.get('CONFIG_WATCH_INTERVAL') or 2.0),  # 常驻服务检查配置文件变化的间隔（秒），0 表示不检查
+            
+            # 去重配置（未设置环境变量时使用 notification_config.json 中的 dedup 配置）
+            'DEDUP_ENABLED': _parse_switch(os.environ.get('DEDUP_ENABLED')),
+            'DEDUP_STORE_PATH': os.environ.get('DEDUP_STORE_PATH') or None,
+            
+            # 发件箱数据库路径（覆盖 notification_config.json 中 outbox.path），为空时不启用
+            'OUTBOX_PATH': os.environ.get('OUTBOX_PATH') or None,
+            # 合并发送开关（未设置时使用 notification_config.json 中 coalescing.enabled）
+            'COALESCING_ENABLED': _parse_switch(os.environ.get('COALESCING_ENABLED')),
+            # 死信队列数据库路径（覆盖 notification_config.json 中 dead_letter.path），为空时不启用
+            'DLQ_PATH': os.environ.get('DLQ_PATH') or None,
         }
     
     def get_config(self, key: str, default: Any = None) -> Any:
@@ -109,11 +390,7 @@ class ConfigManager:
         Returns:
             配置值或默认值
         """
-        try:
-            return self._config_cache.get(key, default)
-        except Exception as e:
-            print(f"获取配置 {key} 时发生错误: {e}")
-            return default
+        return self.snapshot.values.get(key, default)
     
     def is_configured(self, service: str) -> bool:
         """
@@ -125,33 +402,8 @@ class ConfigManager:
         Returns:
             是否已配置
         """
-        service_configs = {
-            'bark': ['BARK_PUSH'],
-            'console': [],  # 控制台输出不需要配置
-            'dingtalk': ['DD_BOT_SECRET', 'DD_BOT_TOKEN'],
-            'feishu': ['FSKEY'],
-            'wecom_app': ['QYWX_AM'],
-            'wecom_bot': ['QYWX_KEY'],
-            'telegram': ['TG_BOT_TOKEN', 'TG_USER_ID'],
-            'serverchan': ['PUSH_KEY'],
-            'serverchan_legacy': ['SCKEY'],
-            'pushdeer': ['DEER_KEY'],
-            'pushplus': ['PUSH_PLUS_TOKEN'],
-            'qmsg': ['QMSG_KEY', 'QMSG_TYPE'],
-            'gotify': ['GOTIFY_URL', 'GOTIFY_TOKEN'],
-            'igot': ['IGOT_PUSH_KEY'],
-            'smtp': ['SMTP_SERVER', 'SMTP_SSL', 'SMTP_EMAIL', 'SMTP_PASSWORD', 'SMTP_NAME'],
-        }
-        
-        required_keys = service_configs.get(service, [])
-        if service not in service_configs:
-            return False
-        
-        # 如果没有必需的配置项，则认为已配置（如console）
-        if not required_keys:
-            return True
-            
-        return all(self.get_config(key) for key in required_keys)
+        state = self.snapshot.channels.get(service)
+        return state.configured if state is not None else False
     
     def get_notifier_configs(self) -> Dict[str, Dict[str, Any]]:
         """
@@ -283,18 +535,23 @@ class ConfigManager:
         # 保留前3位和后3位，中间用*替代
         return value[:3] + '*' * (len(value) - 6) + value[-3:]
     
-    def validate_config(self) -> Dict[str, str]:
+    def validate_config(self, snapshot: Optional[ConfigSnapshot] = None) -> Dict[str, str]:
         """
         验证配置并返回错误信息
         
+        Args:
+            snapshot: 要验证的配置快照，默认为当前快照
+            
         Returns:
             配置错误信息字典
         """
         errors = {}
+        snapshot = snapshot or self.snapshot
+        values = snapshot.values
         
         # 检查 Server酱 配置格式
-        push_key = self.get_config('PUSH_KEY')
-        sckey = self.get_config('SCKEY')
+        push_key = values.get('PUSH_KEY')
+        sckey = values.get('SCKEY')
         
         if push_key and not (push_key.startswith('SCT') or re.match(r'^[a-zA-Z0-9]+$', push_key)):
             errors['PUSH_KEY'] = 'PUSH_KEY 格式不正确'
@@ -303,17 +560,86 @@ class ConfigManager:
             errors['SCKEY'] = 'SCKEY 格式不正确'
         
         # 检查企业微信应用配置格式
-        qywx_am = self.get_config('QYWX_AM')
+        qywx_am = values.get('QYWX_AM')
         if qywx_am:
             parts = qywx_am.split(',')
             if len(parts) < 4 or len(parts) > 5:
                 errors['QYWX_AM'] = 'QYWX_AM 配置格式错误，应为：corpid,corpsecret,touser,agentid[,media_id]'
         
         # 检查 SMTP SSL 配置
-        smtp_ssl = self.get_config('SMTP_SSL')
+        smtp_ssl = values.get('SMTP_SSL')
         if smtp_ssl and smtp_ssl.lower() not in ['true', 'false']:
             errors['SMTP_SSL'] = 'SMTP_SSL 应设置为 true 或 false'
         
+        # 检查并发与重试配置
+        if values.get('NOTIFICATION_TIMEOUT', 30) <= 0:
+            errors['NOTIFICATION_TIMEOUT'] = 'NOTIFICATION_TIMEOUT 必须大于 0'
+        if values.get('MAX_CONCURRENT_NOTIFICATIONS', 10) < 1:
+            errors['MAX_CONCURRENT_NOTIFICATIONS'] = 'MAX_CONCURRENT_NOTIFICATIONS 至少为 1'
+        if values.get('NOTIFICATION_RETRY_ATTEMPTS', 2) < 1:
+            errors['NOTIFICATION_RETRY_ATTEMPTS'] = 'NOTIFICATION_RETRY_ATTEMPTS 至少为 1'
+        
+        # 检查去重配置
+        try:
+            if float(snapshot.notification_config.get('dedup', {}).get('ttl_seconds', 600)) <= 0:
+                raise ValueError
+        except (TypeError, ValueError):
+            errors['dedup.ttl_seconds'] = 'dedup.ttl_seconds 必须是大于 0 的秒数'
+        
+        # 检查合并发送配置
+        coalescing = snapshot.notification_config.get('coalescing', {})
+        try:
+            if float(coalescing.get('window_seconds', 30)) <= 0 or int(coalescing.get('max_messages', 20)) < 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            errors['coalescing'] = 'coalescing.window_seconds 必须大于 0，max_messages 必须至少为 1'
+        for channel in coalescing.get('channels') or ():
+            if channel not in snapshot.channels:
+                errors[f'coalescing.{channel}'] = f'合并发送的渠道 {channel} 不存在'
+        
+        # 检查优先级通道配置
+        priority = snapshot.notification_config.get('priority', {})
+        default_lane = priority.get('default_lane')
+        if default_lane is not None and normalize_priority(default_lane) is None:
+            errors['priority.default_lane'] = f'priority.default_lane 应为 {" / ".join(PRIORITY_LANES)}'
+        for lane, weight in (priority.get('weights') or {}).items():
+            try:
+                if lane not in PRIORITY_LANES[1:] or float(weight) <= 0:
+                    raise ValueError
+            except (TypeError, ValueError):
+                errors[f'priority.weights.{lane}'] = f'优先级通道 {lane} 的权重无效，{PRIORITY_LANES[0]} 通道严格优先，不设权重'
+        
+        # 检查限流配置
+        for channel, limits in snapshot.notification_config.get('rate_limits', {}).items():
+            for limit in (limits if isinstance(limits, tuple) else (limits,)):
+                try:
+                    if float(limit['max_requests']) <= 0 or float(limit.get('period', 1)) <= 0:
+                        raise ValueError
+                except (KeyError, TypeError, ValueError):
+                    errors[f'rate_limits.{channel}'] = f'渠道 {channel} 的限流配置无效'
+        
+        # 检查路由和屏蔽规则，无效的规则在编译时已被跳过
+        errors.update(snapshot.routing.errors)
+        errors.update(snapshot.suppression.errors)
+        for rule in snapshot.routing.rules:
+            unknown = [channel for channel in rule.channels if channel not in snapshot.channels]
+            if unknown:
+                errors[f'routing.{rule.name}'] = f'路由规则 {rule.name} 包含未知渠道: {", ".join(unknown)}'
+        
+        # 检查 SMTP 收件人中引用的分组（不含 @ 的条目为分组名）
+        recipients = self.get_smtp_recipient_settings(snapshot)
+        references = {'SMTP_TO': recipients['to']}
+        references.update((f'smtp_settings.groups.{name}', members) for name, members in recipients['groups'].items())
+        references.update((f'routing.{rule.name}.recipients', rule.recipients) for rule in snapshot.routing.rules)
+        for key, entries in references.items():
+            unknown = [entry for entry in entries if '@' not in entry and entry not in recipients['groups']]
+            if unknown:
+                errors[key] = f'收件人分组不存在: {", ".join(unknown)}'
+        if recipients['list_address'] and '@' not in recipients['list_address']:
+            errors['smtp_settings.list_address'] = 'smtp_settings.list_address 应为邮件地址'
+        if recipients['max_recipients'] < 1:
+            errors['SMTP_MAX_RECIPIENTS'] = 'SMTP_MAX_RECIPIENTS 至少为 1'
+        
         return errors
     
     def is_channel_enabled(self, channel: str) -> bool:
@@ -326,19 +652,9 @@ class ConfigManager:
         Returns:
             是否启用
         """
-        # 从环境变量获取启用状态，格式如：ENABLE_BARK=true
-        env_key = f"ENABLE_{channel.upper()}"
-        env_value = os.environ.get(env_key, '').lower()
-        
-        if env_value in ['true', '1', 'yes', 'on']:
-            return True
-        elif env_value in ['false', '0', 'no', 'off']:
-            return False
-        
-        # 如果环境变量未设置，使用配置文件中的默认值
-        channels = self._notification_config.get('notification_channels', {})
-        channel_config = channels.get(channel, {})
-        return channel_config.get('enabled', False)
+        # 环境变量 ENABLE_<渠道名> 优先于配置文件中的默认值，已在快照中预先计算
+        state = self.snapshot.channels.get(channel)
+        return state.enabled if state is not None else False
     
     def get_enabled_channels(self) -> list:
         """
@@ -347,14 +663,9 @@ class ConfigManager:
         Returns:
             启用的通知渠道列表
         """
-        enabled_channels = []
-        channels = self._notification_config.get('notification_channels', {})
-        
-        for channel_name in channels.keys():
-            if self.is_channel_enabled(channel_name) and self.is_configured(channel_name):
-                enabled_channels.append(channel_name)
-        
-        return enabled_channels
+        snapshot = self.snapshot
+        channels = snapshot.notification_config.get('notification_channels', {})
+        return [name for name in channels if snapshot.channels[name].active]
     
     def get_channel_info(self, channel: str) -> Dict[str, Any]:
         """
@@ -366,8 +677,121 @@ class ConfigManager:
         Returns:
             通知渠道信息
         """
-        channels = self._notification_config.get('notification_channels', {})
-        return channels.get(channel, {})
+        channels = self.snapshot.notification_config.get('notification_channels', {})
+        return dict(channels.get(channel, {}))
+    
+    def get_rate_limits(self) -> Dict[str, Any]:
+        """
+        获取各通知渠道的限流配置
+        
+        Returns:
+            渠道名到限流配置的映射
+        """
+        return self.snapshot.notification_config.get('rate_limits', {})
+    
+    def get_circuit_breaker_settings(self) -> Dict[str, Any]:
+        """
+        获取熔断器配置，环境变量 CIRCUIT_BREAKER_ENABLED 可覆盖是否启用
+        
+        Returns:
+            熔断器配置字典
+        """
+        return dict(self.snapshot.circuit_breaker)
+    
+    def get_dedup_settings(self) -> Dict[str, Any]:
+        """
+        获取去重配置，环境变量 DEDUP_ENABLED、DEDUP_STORE_PATH 可覆盖配置文件中的设置
+        
+        Returns:
+            去重配置字典
+        """
+        snapshot = self.snapshot
+        settings = dict(snapshot.notification_config.get('dedup', {}))
+        if snapshot.values.get('DEDUP_ENABLED') is not None:
+            settings['enabled'] = snapshot.values['DEDUP_ENABLED']
+        if snapshot.values.get('DEDUP_STORE_PATH'):
+            settings['store_path'] = snapshot.values['DEDUP_STORE_PATH']
+        return settings
+    
+    def get_outbox_settings(self) -> Dict[str, Any]:
+        """
+        获取发件箱配置，环境变量 OUTBOX_PATH 可覆盖配置文件中的数据库路径
+        
+        Returns:
+            发件箱配置字典
+        """
+        snapshot = self.snapshot
+        settings = dict(snapshot.notification_config.get('outbox', {}))
+        if snapshot.values.get('OUTBOX_PATH'):
+            settings['path'] = snapshot.values['OUTBOX_PATH']
+        return settings
+    
+    def get_coalescing_settings(self) -> Dict[str, Any]:
+        """
+        获取合并发送配置，环境变量 COALESCING_ENABLED 可覆盖配置文件中的开关
+        
+        Returns:
+            合并发送配置字典
+        """
+        snapshot = self.snapshot
+        settings = dict(snapshot.notification_config.get('coalescing', {}))
+        if snapshot.values.get('COALESCING_ENABLED') is not None:
+            settings['enabled'] = snapshot.values['COALESCING_ENABLED']
+        return settings
+    
+    def get_attachment_settings(self) -> Dict[str, Any]:
+        """
+        获取附件导入配置
+        
+        Returns:
+            附件导入配置字典
+        """
+        return dict(self.snapshot.notification_config.get('attachments', {}))
+    
+    def get_smtp_recipient_settings(self, snapshot: Optional[ConfigSnapshot] = None) -> Dict[str, Any]:
+        """
+        获取 SMTP 收件人配置，环境变量 SMTP_TO 可覆盖配置文件中的默认收件人
+        
+        Args:
+            snapshot: 要读取的配置快照，默认为当前快照
+        
+        Returns:
+            包含 to（默认收件人）、groups（分组）、max_recipients（每个事务的收件人上限）
+            和 list_address（邮件 To 头部显示的地址，为 None 时显示发件人）的字典
+        """
+        snapshot = snapshot or self.snapshot
+        smtp_settings = snapshot.notification_config.get('smtp_settings', {})
+        to = smtp_settings.get('to') or ()
+        if snapshot.values.get('SMTP_TO'):
+            to = tuple(item for item in re.split(r'[,;\s]+', snapshot.values['SMTP_TO']) if item)
+        return {
+            'to': tuple(to),
+            'groups': smtp_settings.get('groups') or {},
+            'max_recipients': snapshot.values.get('SMTP_MAX_RECIPIENTS', 100),
+            'list_address': smtp_settings.get('list_address') or None,
+        }
+    
+    def get_priority_settings(self) -> Dict[str, Any]:
+        """
+        获取优先级通道配置
+        
+        Returns:
+            优先级通道配置字典
+        """
+        return dict(self.snapshot.notification_config.get('priority', {}))
+    
+    def get_dead_letter_settings(self) -> Dict[str, Any]:
+        """
+        获取死信队列配置，环境变量 DLQ_PATH 可覆盖配置文件中的数据库路径
+        
+        Returns:
+            死信队列配置字典
+        """
+        snapshot = self.snapshot
+        settings = dict(snapshot.notification_config.get('dead_letter', {}))
+        if snapshot.values.get('DLQ_PATH'):
+            settings['path'] = snapshot.values['DLQ_PATH']
+        return settings
     
     def get_all_channels_status(self) -> Dict[str, Dict[str, Any]]:
         """
@@ -377,15 +801,17 @@ class ConfigManager:
             所有通知渠道的状态信息
         """
         status = {}
-        channels = self._notification_config.get('notification_channels', {})
+        snapshot = self.snapshot
+        channels = snapshot.notification_config.get('notification_channels', {})
         
-        for channel_name, channel_config in channels.items():
+        for channel_name in channels:
+            state = snapshot.channels[channel_name]
             status[channel_name] = {
-                'enabled': self.is_channel_enabled(channel_name),
-                'configured': self.is_configured(channel_name),
-                'description': channel_config.get('description', ''),
-                'required_env': channel_config.get('required_env', []),
-                'optional_env': channel_config.get('optional_env', [])
+                'enabled': state.enabled,
+                'configured': state.configured,
+                'description': state.description,
+                'required_env': list(state.required_env),
+                'optional_env': list(state.optional_env)
             }
         
         return status
\ No newline at end of file
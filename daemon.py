@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻服务模块
+以 asyncio HTTP 服务的形式接收 repository_dispatch 格式的事件，
+在多个事件之间复用配置、通知器和网络连接
+"""
+
+import asyncio
+import json
+import logging
+import signal
+from dataclasses import asdict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config_manager import ConfigManager, ConfigValidationError
+from notification_handler import NotificationHandler
+
+logger = logging.getLogger(__name__)
+
+# 单个请求体的最大字节数
+MAX_BODY_SIZE = 32 * 1024 * 1024
+
+# 读取请求头的超时时间（秒），防止空闲连接长期占用
+HEADER_READ_TIMEOUT = 30
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    """HTTP 请求处理错误"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class NotificationDaemon:
+    """通知常驻服务，复用同一个 ConfigManager 和 NotificationHandler 处理所有事件"""
+
+    def __init__(self, config_manager: ConfigManager, notification_handler: NotificationHandler,
+                 validate_event: Callable[[Dict[str, Any]], bool],
+                 auth_token: Optional[str] = None):
+        """
+        初始化常驻服务
+
+        Args:
+            config_manager: 配置管理器实例
+            notification_handler: 通知处理器实例
+            validate_event: 事件数据校验函数
+            auth_token: 可选的访问令牌，设置后请求需携带 Authorization: Bearer <token>
+        """
+        self.config_manager = config_manager
+        self.notification_handler = notification_handler
+        self.validate_event = validate_event
+        self.auth_token = auth_token
+        self.logger = logging.getLogger(__name__)
+        self._server = None
+        self._stop_event = None
+        self._processed_count = 0
+
+    async def serve(self, host: str, port: int) -> None:
+        """
+        启动 HTTP 服务并阻塞直到收到停止信号
+
+        Args:
+            host: 监听地址
+            port: 监听端口
+        """
+        self._stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self._stop_event.set)
+            except (NotImplementedError, RuntimeError):
+                # Windows 或非主线程不支持信号处理
+                pass
+        if hasattr(signal, "SIGHUP"):
+            try:
+                loop.add_signal_handler(signal.SIGHUP, self.reload_config, "SIGHUP")
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        # 在开始接收新事件之前取出上次退出时未完成的投递，新事件写入的发件箱记录不会被当作未完成而重复发送
+        pending_messages = await asyncio.to_thread(self.notification_handler.claim_outbox)
+
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        addresses = ", ".join(str(sock.getsockname()) for sock in self._server.sockets)
+        self.logger.info(f"通知常驻服务已启动，监听 {addresses}")
+
+        watch_interval = float(self.config_manager.get_config("CONFIG_WATCH_INTERVAL", 2.0))
+        watch_task = asyncio.create_task(self._watch_config(watch_interval)) if watch_interval > 0 else None
+
+        # 在后台发送取出的投递，不阻塞接收新事件
+        resume_task = asyncio.create_task(asyncio.to_thread(self.notification_handler.resume_outbox, pending_messages))
+
+        async with self._server:
+            await self._stop_event.wait()
+
+        if watch_task is not None:
+            watch_task.cancel()
+        if not resume_task.done():
+            await resume_task
+
+        from notifiers.transport import close_async_session_pool
+        await close_async_session_pool()
+
+        self.logger.info(f"通知常驻服务已停止，共处理 {self._processed_count} 个事件")
+
+    def stop(self) -> None:
+        """请求停止服务"""
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    def reload_config(self, reason: str = "manual") -> bool:
+        """
+        重新加载配置，未通过校验时继续使用旧配置
+
+        Args:
+            reason: 触发原因，用于日志
+
+        Returns:
+            bool: 是否已切换到新配置
+        """
+        try:
+            snapshot = self.notification_handler.reload_config()
+        except ConfigValidationError as e:
+            self.logger.error(f"配置重新加载失败（{reason}），继续使用旧配置: {e}")
+            return False
+        self.logger.info(f"配置已重新加载（{reason}），当前版本 {snapshot.version}")
+        return True
+
+    async def _watch_config(self, interval: float) -> None:
+        """按修改时间轮询配置文件，文件变化时重新加载"""
+        while True:
+            await asyncio.sleep(interval)
+            if self.config_manager.config_file_changed():
+                self.reload_config("配置文件变化")
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """处理单个客户端连接，支持 HTTP/1.1 keep-alive"""
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), timeout=HEADER_READ_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if request is None:
+                    break
+
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                try:
+                    status, payload = await self._dispatch(method, path, headers, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": e.message}
+                except Exception as e:
+                    self.logger.exception(f"处理请求时发生未预期的错误: {e}")
+                    status, payload = 500, {"error": "内部错误"}
+
+                await self._write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except HTTPError as e:
+            await self._write_response(writer, e.status, {"error": e.message}, False)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        """
+        读取一个 HTTP 请求
+
+        Returns:
+            (method, path, headers, body)，连接关闭时返回 None
+        """
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+
+        try:
+            method, path, _ = request_line.decode("latin-1").strip().split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "无效的请求行")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if not line or line in (b"\r\n", b"\n"):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            content_length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(400, "无效的 Content-Length")
+        if content_length > MAX_BODY_SIZE:
+            raise HTTPError(413, f"请求体过大，最大 {MAX_BODY_SIZE} 字节")
+
+        body = await reader.readexactly(content_length) if content_length else b""
+        return method.upper(), path, headers, body
+
+    async def _dispatch(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> Tuple[int, Dict[str, Any]]:
+        """根据请求路径分发处理"""
+        path = path.split("?", 1)[0]
+
+        if path == "/healthz":
+            return 200, {"status": "ok", "processed": self._processed_count}
+        if path == "/metrics":
+            return 200, {
+                "executor": self.notification_handler.get_executor_stats(),
+                "rate_limits": self.notification_handler.get_rate_limit_stats(),
+                "circuit_breakers": self.notification_handler.get_circuit_breaker_stats(),
+                "suppression": self.notification_handler.get_suppression_stats(),
+                "dedup": self.notification_handler.get_dedup_stats(),
+                "outbox": self.notification_handler.get_outbox_stats(),
+                "dead_letters": self.notification_handler.get_dead_letter_stats(),
+                "coalescing": self.notification_handler.get_coalescing_stats(),
+                "smtp_pool": self.notification_handler.get_smtp_pool_stats(),
+                "attachment_cache": self.notification_handler.get_attachment_cache_stats(),
+                "config": {
+                    "version": self.config_manager.snapshot.version,
+                    "loaded_at": self.config_manager.snapshot.loaded_at,
+                },
+            }
+
+        if path not in ("/", "/dispatch"):
+            raise HTTPError(404, f"未知路径: {path}")
+        if method != "POST":
+            raise HTTPError(405, "仅支持 POST 请求")
+
+        if self.auth_token and headers.get("authorization", "") != f"Bearer {self.auth_token}":
+            raise HTTPError(401, "访问令牌无效")
+
+        try:
+            event_data = json.loads(body.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise HTTPError(400, f"事件数据 JSON 解析失败: {e}")
+
+        if not self.validate_event(event_data):
+            raise HTTPError(400, "事件数据验证失败")
+
+        # HTTP 渠道在事件循环中原生异步发送，其余渠道回退到线程中执行
+        summary = await self.notification_handler.process_github_event_async(event_data)
+        self._processed_count += 1
+
+        if summary is None:
+            return 200, {"status": "skipped"}
+        return 200, {"status": "processed", "summary": asdict(summary)}
+
+    async def _write_response(self, writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any], keep_alive: bool) -> None:
+        """写入 JSON 响应"""
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n"
+        ).encode("latin-1")
+        writer.write(head + body)
+        await writer.drain()
+
+
+def run_daemon(host: str, port: int, validate_event: Callable[[Dict[str, Any]], bool],
+               auth_token: Optional[str] = None) -> None:
+    """
+    创建常驻服务所需组件并运行直到退出
+
+    Args:
+        host: 监听地址
+        port: 监听端口
+        validate_event: 事件数据校验函数
+        auth_token: 可选的访问令牌
+    """
+    config_manager = ConfigManager()
+    notification_handler = NotificationHandler(config_manager)
+
+    active_notifiers = notification_handler.get_active_notifiers()
+    logger.info(f"发现 {len(active_notifiers)} 个已配置的通知器:")
+    for notifier in active_notifiers:
+        logger.info(f"  - {notifier.get_name()}")
+
+    with notification_handler:
+        daemon = NotificationDaemon(config_manager, notification_handler, validate_event, auth_token)
+        asyncio.run(daemon.serve(host, port))
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+死信队列模块
+重试耗尽或遇到不可重试错误的投递连同错误分类、每次尝试的记录和通知内容保存到 SQLite，
+之后可以按渠道和时间筛选并通过正常的发送流程重放
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = (
+    # 通知内容按摘要只保存一份，同一条通知在多个渠道失败或上游重复触发时共用
+    "CREATE TABLE IF NOT EXISTS payloads (hash TEXT PRIMARY KEY, data BLOB NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS dead_letters ("
+    "id INTEGER PRIMARY KEY, payload TEXT NOT NULL REFERENCES payloads(hash), channel TEXT NOT NULL, "
+    "error_type TEXT NOT NULL, error TEXT, attempts BLOB NOT NULL, created_at REAL NOT NULL, "
+    "replay_count INTEGER NOT NULL DEFAULT 0, replayed_at REAL)",
+    "CREATE INDEX IF NOT EXISTS dead_letters_channel ON dead_letters (channel, created_at)",
+    "CREATE INDEX IF NOT EXISTS dead_letters_payload ON dead_letters (payload)",
+)
+
+
+def _encode(value: Any) -> bytes:
+    """序列化为紧凑的 JSON 并压缩"""
+    return zlib.compress(json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def _decode(data: bytes) -> Any:
+    return json.loads(zlib.decompress(data).decode('utf-8'))
+
+
+@dataclass
+class DeadLetterConfig:
+    """死信队列配置"""
+    path: Optional[str] = None          # SQLite 数据库路径，为空时不启用死信队列
+    retention_hours: float = 168.0      # 死信的保留时间（小时）
+    max_entries: int = 10000            # 最多保留的死信数，超出时删除最早的
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'DeadLetterConfig':
+        """从 notification_config.json 的 dead_letter 配置创建"""
+        data = data or {}
+        default = cls()
+        return cls(
+            path=data.get('path') or None,
+            retention_hours=float(data.get('retention_hours', default.retention_hours)),
+            max_entries=max(1, int(data.get('max_entries', default.max_entries))),
+        )
+
+
+@dataclass
+class DeadLetterMessage:
+    """死信中保存的通知内容"""
+    title: str
+    content: str
+    source: str
+    severity: str
+    attachments: List[Dict[str, str]] = field(default_factory=list)   # 附件信息（文件名、路径和类型）
+
+
+@dataclass
+class DeadLetter:
+    """一个渠道上失败的投递"""
+    id: int
+    channel: str
+    error_type: str
+    error: Optional[str]
+    created_at: float
+    replay_count: int
+    replayed_at: Optional[float]
+    payload: str                        # 通知内容的摘要，相同的通知共用
+    message: DeadLetterMessage
+    attempts: List[Dict[str, Any]]      # 每次尝试的记录，重放失败的尝试会追加在后面
+
+
+class DeadLetterEntry:
+    """
+    一条通知的死信记录
+
+    正常发送时，失败的渠道写入新的死信；重放时只更新被重放的死信。
+    """
+
+    def __init__(self, store: 'DeadLetterStore', message: DeadLetterMessage, letters: Optional[Dict[str, List[int]]] = None,
+                 channels: Sequence[str] = ()):
+        """
+        Args:
+            store: 死信队列
+            message: 通知内容
+            letters: 重放时渠道名到死信 ID 列表的映射
+            channels: 要发送的渠道，全部记录结果前死信队列不会被 close_when_idle() 关闭
+        """
+        self.store = store
+        self.message = message
+        self.letters = letters
+        self.unrecorded = set(channels)
+        self._payload: Optional[Tuple[str, bytes]] = None
+        store._track(self)
+
+    def record(self, channel: str, success: bool, error: Optional[str] = None, error_type: Optional[str] = None,
+               attempts: Sequence[Dict[str, Any]] = ()) -> None:
+        """
+        记录渠道的发送结果
+
+        Args:
+            channel: 渠道名
+            success: 是否发送成功
+            error: 失败原因
+            error_type: 错误分类
+            attempts: 每次尝试的记录
+        """
+        try:
+            if self.letters is not None:
+                for letter_id in self.letters.get(channel, ()):
+                    self.store.record_replay(letter_id, success, error, error_type, attempts)
+            elif not success:
+                if self._payload is None:
+                    self._payload = self.store.encode_message(self.message)
+                self.store.add(self._payload, channel, error, error_type, attempts)
+        finally:
+            self.store._untrack(self, channel)
+
+
+class DeadLetterStore:
+    """
+    基于 SQLite 的死信队列
+
+    通知内容和尝试记录以压缩后的 JSON 保存，相同的通知内容只保存一份。同一个数据库文件只应由一个进程写入。
+    """
+
+    # 每写入多少条死信清理一次过期和超出数量上限的死信
+    PURGE_INTERVAL = 100
+
+    def __init__(self, config: DeadLetterConfig):
+        """
+        打开死信队列
+
+        Args:
+            config: 死信队列配置，path 不能为空
+        """
+        from storage import connect_sqlite
+
+        self.config = config
+        self._connection = connect_sqlite(config.path)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._in_flight = 0          # 还有渠道未记录结果的死信记录数
+        self._close_pending = False
+        with self._lock:
+            for statement in _SCHEMA:
+                self._connection.execute(statement)
+        self.purge()
+
+    @staticmethod
+    def encode_message(message: DeadLetterMessage) -> Tuple[str, bytes]:
+        """
+        序列化通知内容
+
+        Returns:
+            Tuple[str, bytes]: (内容摘要, 压缩后的内容)
+        """
+        data = json.dumps(asdict(message), ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        return hashlib.sha256(data).hexdigest(), zlib.compress(data)
+
+    def add(self, payload: Tuple[str, bytes], channel: str, error: Optional[str], error_type: Optional[str],
+            attempts: Sequence[Dict[str, Any]] = ()) -> int:
+        """
+        写入一条死信
+
+        Args:
+            payload: encode_message() 返回的通知内容
+            channel: 渠道名
+            error: 失败原因
+            error_type: 错误分类
+            attempts: 每次尝试的记录
+
+        Returns:
+            int: 死信 ID
+        """
+        digest, data = payload
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.execute("INSERT OR IGNORE INTO payloads (hash, data) VALUES (?, ?)", (digest, data))
+                cursor.execute(
+                    "INSERT INTO dead_letters (payload, channel, error_type, error, attempts, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (digest, channel, error_type or 'unknown', error, _encode(list(attempts)), time.time()),
+                )
+                letter_id = cursor.lastrowid
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            self._writes += 1
+            purge = self._writes % self.PURGE_INTERVAL == 0
+        if purge:
+            self.purge()
+        return letter_id
+
+    def record_replay(self, letter_id: int, success: bool, error: Optional[str] = None, error_type: Optional[str] = None,
+                      attempts: Sequence[Dict[str, Any]] = ()) -> None:
+        """
+        记录一次重放的结果：成功时标记为已重放，失败时更新错误并追加尝试记录
+
+        Args:
+            letter_id: 死信 ID
+            success: 是否发送成功
+            error: 失败原因
+            error_type: 错误分类
+            attempts: 本次重放中每次尝试的记录
+        """
+        now = time.time()
+        with self._lock:
+            if success:
+                self._connection.execute(
+                    "UPDATE dead_letters SET replay_count = replay_count + 1, replayed_at = ? WHERE id = ?",
+                    (now, letter_id),
+                )
+                return
+            cursor = self._connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                row = cursor.execute(
+                    "SELECT attempts, replay_count FROM dead_letters WHERE id = ?", (letter_id,)
+                ).fetchone()
+                if row is not None:
+                    history = _decode(row[0])
+                    history.extend(dict(attempt, replay=row[1] + 1) for attempt in attempts)
+                    cursor.execute(
+                        "UPDATE dead_letters SET replay_count = replay_count + 1, error = ?, error_type = ?, attempts = ? "
+                        "WHERE id = ?",
+                        (error, error_type or 'unknown', _encode(history), letter_id),
+                    )
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+
+    def query(self, channel: Optional[str] = None, since: Optional[float] = None, error_type: Optional[str] = None,
+              include_replayed: bool = False, limit: Optional[int] = None) -> List[DeadLetter]:
+        """
+        按条件查询死信
+
+        Args:
+            channel: 只返回该渠道的死信
+            since: 只返回该时间（Unix 时间戳）之后写入的死信
+            error_type: 只返回该错误分类的死信
+            include_replayed: 是否包括已成功重放的死信
+            limit: 最多返回的条数
+
+        Returns:
+            List[DeadLetter]: 按写入顺序排列的死信
+        """
+        conditions, params = [], []
+        if channel:
+            conditions.append("d.channel = ?")
+            params.append(channel)
+        if since is not None:
+            conditions.append("d.created_at >= ?")
+            params.append(since)
+        if error_type:
+            conditions.append("d.error_type = ?")
+            params.append(error_type)
+        if not include_replayed:
+            conditions.append("d.replayed_at IS NULL")
+        sql = (
+            "SELECT d.id, d.channel, d.error_type, d.error, d.created_at, d.replay_count, d.replayed_at, "
+            "d.payload, p.data, d.attempts FROM dead_letters d JOIN payloads p ON p.hash = d.payload"
+        )
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY d.id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._lock:
+            rows = self._connection.execute(sql, params).fetchall()
+
+        messages: Dict[str, DeadLetterMessage] = {}
+        letters = []
+        for letter_id, channel_name, kind, error, created_at, replay_count, replayed_at, digest, data, attempts in rows:
+            message = messages.get(digest)
+            if message is None:
+                message = messages[digest] = DeadLetterMessage(**_decode(data))
+            letters.append(DeadLetter(
+                letter_id, channel_name, kind, error, created_at, replay_count, replayed_at, digest, message, _decode(attempts)
+            ))
+        return letters
+
+    def purge(self) -> int:
+        """
+        删除超过保留时间或超出数量上限的死信，以及不再被引用的通知内容
+
+        Returns:
+            int: 删除的死信数
+        """
+        cutoff = time.time() - self.config.retention_hours * 3600
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.execute("DELETE FROM dead_letters WHERE created_at < ?", (cutoff,))
+                deleted = cursor.rowcount
+                cursor.execute(
+                    "DELETE FROM dead_letters WHERE id <= "
+                    "(SELECT id FROM dead_letters ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (self.config.max_entries,),
+                )
+                deleted += cursor.rowcount
+                if deleted:
+                    cursor.execute("DELETE FROM payloads WHERE hash NOT IN (SELECT payload FROM dead_letters)")
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+        return deleted
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取死信数量
+
+        Returns:
+            Dict[str, Any]: 待重放和已重放的死信数，以及各渠道待重放的死信数
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT channel, replayed_at IS NULL, COUNT(*) FROM dead_letters GROUP BY channel, replayed_at IS NULL"
+            ).fetchall()
+        stats: Dict[str, Any] = {'pending': 0, 'replayed': 0, 'channels': {}}
+        for channel, pending, count in rows:
+            if pending:
+                stats['pending'] += count
+                stats['channels'][channel] = count
+            else:
+                stats['replayed'] += count
+        return stats
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._connection.close()
+
+    def close_when_idle(self) -> None:
+        """
+        进行中的发送全部记录结果后再关闭数据库连接
+
+        重新加载配置更换死信队列时使用：旧配置下正在发送的通知最终失败时仍写入旧死信队列，而不是丢失。
+        """
+        with self._lock:
+            if self._in_flight:
+                self._close_pending = True
+                return
+            self._connection.close()
+
+    def _track(self, entry: DeadLetterEntry) -> None:
+        if entry.unrecorded:
+            with self._lock:
+                self._in_flight += 1
+
+    def _untrack(self, entry: DeadLetterEntry, channel: str) -> None:
+        with self._lock:
+            if channel not in entry.unrecorded:
+                return
+            entry.unrecorded.discard(channel)
+            if entry.unrecorded:
+                return
+            self._in_flight -= 1
+            if self._close_pending and not self._in_flight:
+                self._connection.close()
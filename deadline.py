@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+截止时间模块
+一次通知发送共用一个绝对截止时间，连接/读取超时和重试等待都根据剩余时间计算
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+# 连接超时的上限（秒），读取超时使用剩余的全部时间
+DEFAULT_CONNECT_TIMEOUT = 5.0
+
+_current_deadline: contextvars.ContextVar = contextvars.ContextVar('notification_deadline', default=None)
+
+
+class DeadlineExceededError(Exception):
+    """截止时间已到时抛出，不可重试"""
+    pass
+
+
+class Deadline:
+    """基于单调时钟的绝对截止时间"""
+
+    def __init__(self, timeout: float):
+        """
+        初始化截止时间
+
+        Args:
+            timeout: 从现在起允许使用的秒数
+        """
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        """剩余秒数，已过期时返回 0"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """是否已过期"""
+        return time.monotonic() >= self.expires_at
+
+    def allows(self, delay: float) -> bool:
+        """等待 delay 秒后是否仍有时间再尝试一次"""
+        return self.expires_at - time.monotonic() > delay
+
+    def check(self) -> None:
+        """
+        检查截止时间
+
+        Raises:
+            DeadlineExceededError: 截止时间已到
+        """
+        if self.expired():
+            raise DeadlineExceededError(f"已超过 {self.timeout:g} 秒的发送时限")
+
+    def clamp(self, timeout: float) -> float:
+        """
+        将超时收紧到剩余时间以内
+
+        Raises:
+            DeadlineExceededError: 截止时间已到
+        """
+        self.check()
+        return min(timeout, self.remaining())
+
+    def http_timeout(self, timeout: float, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT) -> Tuple[float, float]:
+        """
+        根据剩余时间计算 HTTP 请求的 (连接超时, 读取超时)
+
+        Args:
+            timeout: 调用方原本使用的超时
+            connect_timeout: 连接超时上限
+
+        Returns:
+            Tuple[float, float]: 不超过剩余时间的连接超时和读取超时
+
+        Raises:
+            DeadlineExceededError: 截止时间已到
+        """
+        self.check()
+        remaining = self.remaining()
+        if isinstance(timeout, tuple):
+            connect_timeout, timeout = min(connect_timeout, timeout[0]), timeout[1]
+        return min(connect_timeout, timeout, remaining), min(timeout, remaining)
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.2f}s)"
+
+
+def current_deadline() -> Optional[Deadline]:
+    """获取当前上下文（线程或 asyncio 任务）中生效的截止时间"""
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """
+    在当前上下文中设置截止时间，通知器发起的请求据此计算超时
+
+    Args:
+        deadline: 截止时间，为 None 时不改变当前设置
+    """
+    if deadline is None:
+        yield current_deadline()
+        return
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def apply_deadline(timeout, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT):
+    """
+    按当前截止时间收紧超时设置，没有截止时间时原样返回
+
+    Args:
+        timeout: 原超时，数字或 (连接超时, 读取超时)
+        connect_timeout: 连接超时上限
+
+    Returns:
+        收紧后的超时设置
+    """
+    deadline = current_deadline()
+    if deadline is None:
+        return timeout
+    return deadline.http_timeout(timeout, connect_timeout)
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+去重模块
+上游任务重复触发同一事件时，直接返回上次的发送结果，不再重复发送到各渠道。
+内存中按 TTL + LRU 缓存发送结果，可选使用 SQLite 持久化以便进程重启后继续去重
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def make_dedup_key(source: str, title: str, content: str, idempotency_key: Optional[str] = None) -> str:
+    """
+    计算去重键
+
+    提供幂等键时按 (来源, 幂等键) 去重，即使内容变化（如带有时间戳）也视为同一条通知；
+    否则按来源、标题和内容去重。
+
+    Args:
+        source: 通知来源
+        title: 通知标题
+        content: 通知内容
+        idempotency_key: 调用方提供的幂等键
+
+    Returns:
+        str: 十六进制的 SHA-256 摘要
+    """
+    if idempotency_key:
+        parts = ('idempotency', source or '', str(idempotency_key))
+    else:
+        parts = ('content', source or '', title or '', content or '')
+    return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+
+@dataclass
+class DedupConfig:
+    """去重配置"""
+    enabled: bool = False
+    ttl_seconds: float = 600.0          # 发送结果的保留时间（秒）
+    max_entries: int = 1000             # 内存中最多保留的发送结果数
+    store_path: Optional[str] = None    # SQLite 数据库路径，为空时只在内存中去重
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'DedupConfig':
+        """从 notification_config.json 的 dedup 配置创建"""
+        data = data or {}
+        default = cls()
+        return cls(
+            enabled=bool(data.get('enabled', default.enabled)),
+            ttl_seconds=float(data.get('ttl_seconds', default.ttl_seconds)),
+            max_entries=max(1, int(data.get('max_entries', default.max_entries))),
+            store_path=data.get('store_path') or None,
+        )
+
+
+class SQLiteDedupStore:
+    """基于 SQLite 的发送结果存储，进程重启后仍可去重"""
+
+    # 每写入多少条记录清理一次过期记录
+    PURGE_INTERVAL = 100
+
+    def __init__(self, path: str):
+        """
+        打开存储
+
+        Args:
+            path: 数据库文件路径
+        """
+        from storage import connect_sqlite
+
+        self.path = path
+        self._connection = connect_sqlite(path)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS dedup ("
+            "key TEXT PRIMARY KEY, summary TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._writes = 0
+        self.purge()
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        读取未过期的发送结果
+
+        Returns:
+            Optional[Tuple[Dict[str, Any], float]]: (发送结果, 过期时间)，不存在或已过期时返回 None
+        """
+        row = self._connection.execute(
+            "SELECT summary, expires_at FROM dedup WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def put(self, key: str, summary: Dict[str, Any], expires_at: float) -> None:
+        """写入发送结果"""
+        self._connection.execute(
+            "INSERT OR REPLACE INTO dedup (key, summary, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(summary, ensure_ascii=False), expires_at),
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_INTERVAL == 0:
+            self.purge()
+
+    def purge(self) -> None:
+        """删除过期记录"""
+        self._connection.execute("DELETE FROM dedup WHERE expires_at <= ?", (time.time(),))
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        self._connection.close()
+
+
+class Deduplicator:
+    """
+    通知去重器
+
+    同一个去重键同时只有一个发送在进行，其他相同的请求等待它完成后直接使用其结果。
+    只缓存至少一个渠道发送成功的结果，全部失败时上游重新触发仍会重新发送。
+    """
+
+    def __init__(self, config: Optional[DedupConfig] = None):
+        """
+        初始化去重器
+
+        Args:
+            config: 去重配置
+        """
+        self.config = config or DedupConfig()
+        self._entries: 'OrderedDict[str, Tuple[Dict[str, Any], float]]' = OrderedDict()
+        self._in_flight: Set[str] = set()
+        self._condition = threading.Condition()
+        self._store: Optional[SQLiteDedupStore] = None
+        self._hits = 0
+        self._misses = 0
+        self._waits = 0
+
+        if self.config.store_path:
+            try:
+                self._store = SQLiteDedupStore(self.config.store_path)
+            except Exception as e:
+                logger.warning(f"打开去重数据库 {self.config.store_path} 失败，只在内存中去重: {e}")
+
+    def acquire(self, key: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        查找重复通知的发送结果；相同的通知正在发送时等待其完成
+
+        未找到时调用方负责发送，并且必须在完成后调用 release()。
+
+        Args:
+            key: 去重键
+            timeout: 等待正在进行的相同发送的最长时间（秒）
+
+        Returns:
+            Optional[Dict[str, Any]]: 上次的发送结果，没有可用结果时返回 None
+        """
+        deadline = time.monotonic() + timeout
+        waited = False
+        with self._condition:
+            while True:
+                cached = self._get(key)
+                if cached is not None:
+                    self._hits += 1
+                    return cached
+                remaining = deadline - time.monotonic()
+                if key not in self._in_flight or remaining <= 0:
+                    self._in_flight.add(key)
+                    self._misses += 1
+                    return None
+                if not waited:
+                    waited = True
+                    self._waits += 1
+                self._condition.wait(remaining)
+
+    def release(self, key: str, summary: Optional[Dict[str, Any]]) -> None:
+        """
+        结束发送并保存发送结果，唤醒等待相同通知的请求
+
+        Args:
+            key: 去重键
+            summary: 发送结果，为 None 时不缓存
+        """
+        with self._condition:
+            self._in_flight.discard(key)
+            if summary is not None:
+                expires_at = time.time() + self.config.ttl_seconds
+                self._put(key, summary, expires_at)
+                if self._store is not None:
+                    try:
+                        self._store.put(key, summary, expires_at)
+                    except Exception as e:
+                        logger.warning(f"写入去重数据库失败: {e}")
+            self._condition.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取去重指标
+
+        Returns:
+            Dict[str, Any]: 命中、未命中、等待次数和缓存条目数
+        """
+        with self._condition:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'waits': self._waits,
+                'entries': len(self._entries),
+                'in_flight': len(self._in_flight),
+                'persistent': self._store is not None,
+            }
+
+    def close(self) -> None:
+        """关闭持久化存储"""
+        with self._condition:
+            if self._store is not None:
+                self._store.close()
+                self._store = None
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        """先查内存再查数据库，数据库命中的结果放回内存"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] > time.time():
+                self._entries.move_to_end(key)
+                return entry[0]
+            del self._entries[key]
+
+        if self._store is not None:
+            try:
+                stored = self._store.get(key)
+            except Exception as e:
+                logger.warning(f"读取去重数据库失败: {e}")
+                return None
+            if stored is not None:
+                self._put(key, *stored)
+                return stored[0]
+        return None
+
+    def _put(self, key: str, summary: Dict[str, Any], expires_at: float) -> None:
+        self._entries[key] = (summary, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.config.max_entries:
+            self._entries.popitem(last=False)
@@ -5,13 +5,16 @@ Notification Service Main Entry Point
 处理来自 GitHub Actions 的通知请求
 """
 
-import json
+import argparse
 import logging
 import os
+import re
 import sys
+import time
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
+from attachment_ingest import AttachmentIngestConfig, EventParseError, ingest_event
 from config_manager import ConfigManager
 from notification_handler import NotificationHandler
 
@@ -27,57 +30,6 @@ def setup_logging():
     )
 
 
-def process_attachments(client_payload: Dict[str, Any]) -> List:
-    """
-    处理附件数据，返回附件信息列表
-    
-    Args:
-        client_payload: GitHub client_payload 数据
-        
-    Returns:
-        List: 附件信息列表
-    """
-    logger = logging.getLogger(__name__)
-    attachments = []
-    
-    # 获取附件目录
-    attachments_dir = os.environ.get('ATTACHMENTS_DIR', './temp_attachments')
-    
-    # 检查是否有附件数据
-    attachment_data = client_payload.get('attachments', [])
-    if not attachment_data:
-        return attachments
-    
-    logger.info(f"发现 {len(attachment_data)} 个附件")
-    
-    # 检查附件目录是否存在
-    if not os.path.exists(attachments_dir):
-        logger.warning(f"附件目录不存在: {attachments_dir}")
-        return attachments
-    
-    # 导入附件信息类
-    from notification_handler import AttachmentInfo
-    
-    # 处理每个附件
-    for attachment in attachment_data:
-        filename = attachment.get('filename', 'attachment')
-        filepath = os.path.join(attachments_dir, filename)
-        content_type = attachment.get('content_type', 'application/octet-stream')
-        
-        # 检查文件是否存在
-        if os.path.exists(filepath):
-            attachments.append(AttachmentInfo(
-                filename=filename,
-                filepath=filepath,
-                content_type=content_type
-            ))
-            logger.info(f"附件已准备: {filename} ({content_type})")
-        else:
-            logger.warning(f"附件文件不存在: {filepath}")
-    
-    return attachments
-
-
 def validate_event_data(event_data: Dict[str, Any]) -> bool:
     """
     验证事件数据的完整性和有效性
@@ -145,18 +97,175 @@ def log_event_details(event_data: Dict[str, Any]):
             logger.info(f"  - 通知标题: {client_payload.get('title', 'N/A')}")
             logger.info(f"  - 内容长度: {len(client_payload.get('content', ''))}")
             logger.info(f"  - 事件来源: {client_payload.get('source', 'unknown')}")
+            logger.info(f"  - 严重级别: {client_payload.get('severity', 'info')}")
+            logger.info(f"  - 优先级: {client_payload.get('priority') or '默认'}")
             logger.info(f"  - 时间戳: {client_payload.get('timestamp', 'N/A')}")
         
     except Exception as e:
         logger.error(f"记录事件详情时发生错误: {e}")
 
 
-def main():
+def parse_duration(value: str) -> float:
+    """
+    解析时长，支持 s/m/h/d 后缀，不带后缀时按秒计算
+    
+    Args:
+        value: 时长字符串，如 30m、1h、7d
+        
+    Returns:
+        float: 秒数
+    """
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*', value.lower())
+    if not match:
+        raise argparse.ArgumentTypeError(f"无效的时长: {value}（示例: 30m、1h、7d）")
+    return float(match.group(1)) * {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}[match.group(2)]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    解析命令行参数
+    
+    Args:
+        argv: 命令行参数列表，默认使用 sys.argv
+        
+    Returns:
+        argparse.Namespace: 解析后的参数
+    """
+    parser = argparse.ArgumentParser(description="通知服务")
+    parser.add_argument('--serve', action='store_true',
+                        help='以常驻服务模式运行，通过 HTTP 接收事件')
+    parser.add_argument('--host', default=os.environ.get('NOTIFICATION_SERVE_HOST', '127.0.0.1'),
+                        help='常驻服务监听地址（默认 NOTIFICATION_SERVE_HOST 或 127.0.0.1）')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('NOTIFICATION_SERVE_PORT', '8080')),
+                        help='常驻服务监听端口（默认 NOTIFICATION_SERVE_PORT 或 8080）')
+    parser.add_argument('--batch', metavar='PATH',
+                        help='批量模式：从 JSONL 文件逐行读取事件，PATH 为 - 时从标准输入读取')
+    parser.add_argument('--batch-concurrency', type=int, default=int(os.environ.get('BATCH_CONCURRENCY', '4')),
+                        help='批量模式下同时处理的事件数（默认 BATCH_CONCURRENCY 或 4）')
+    
+    subparsers = parser.add_subparsers(dest='command')
+    dlq_parser = subparsers.add_parser('dlq', help='查看或重放死信队列中失败的投递')
+    dlq_parser.add_argument('action', choices=['list', 'replay'], help='list 列出死信，replay 通过正常发送流程重放死信')
+    dlq_parser.add_argument('--channel', help='只处理该渠道的死信')
+    dlq_parser.add_argument('--since', type=parse_duration, help='只处理最近这段时间内的死信，如 30m、1h、7d')
+    dlq_parser.add_argument('--error-type', help='只处理该错误分类的死信，如 network、rate_limited、circuit_open')
+    dlq_parser.add_argument('--limit', type=int, help='最多处理的死信数')
+    dlq_parser.add_argument('--all', action='store_true', help='list 时包括已重放成功的死信')
+    return parser.parse_args(argv)
+
+
+def run_batch(args: argparse.Namespace):
+    """以批量模式运行，处理 JSONL 事件流并以汇总结果作为退出码"""
+    logger = logging.getLogger(__name__)
+    
+    try:
+        logger.info("=== 通知服务批量模式启动 ===")
+        from batch import BatchProcessor
+        
+        config_manager = ConfigManager()
+        if args.batch != '-' and not os.path.exists(args.batch):
+            logger.error(f"批量事件文件不存在: {args.batch}")
+            sys.exit(1)
+        
+        with NotificationHandler(config_manager) as notification_handler:
+            notification_handler.resume_outbox()
+            processor = BatchProcessor(notification_handler, validate_event_data, args.batch_concurrency)
+            if args.batch == '-':
+                report = processor.process_stream(sys.stdin)
+            else:
+                with open(args.batch, 'r', encoding='utf-8') as f:
+                    report = processor.process_stream(f)
+            logger.info(f"发送线程池指标: {notification_handler.get_executor_stats()}")
+        
+        logger.info("=== 通知服务批量模式完成 ===")
+        sys.exit(report.exit_code)
+    except KeyboardInterrupt:
+        logger.info("接收到中断信号，正在退出...")
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"批量处理时发生未预期的错误: {e}")
+        logger.exception("详细错误信息:")
+        sys.exit(1)
+
+
+def run_dlq(args: argparse.Namespace):
+    """列出或重放死信队列中的死信，重放时以是否全部成功作为退出码"""
+    logger = logging.getLogger(__name__)
+    config_manager = ConfigManager()
+    since = time.time() - args.since if args.since is not None else None
+    
+    if args.action == 'list':
+        from dead_letter import DeadLetterConfig, DeadLetterStore
+        config = DeadLetterConfig.from_dict(config_manager.get_dead_letter_settings())
+        if not config.path:
+            logger.error("未配置死信队列数据库路径（DLQ_PATH 或 dead_letter.path）")
+            sys.exit(1)
+        store = DeadLetterStore(config)
+        try:
+            letters = store.query(args.channel, since, args.error_type, include_replayed=args.all, limit=args.limit)
+        finally:
+            store.close()
+        
+        print(f"{'ID':<8} {'时间':<20} {'渠道':<12} {'错误分类':<14} {'尝试':<6} {'重放':<6} 标题 / 错误")
+        for letter in letters:
+            created_at = datetime.fromtimestamp(letter.created_at).strftime('%Y-%m-%d %H:%M:%S')
+            replayed = f"{letter.replay_count}{'✅' if letter.replayed_at else ''}"
+            print(f"{letter.id:<8} {created_at:<20} {letter.channel:<12} {letter.error_type:<14} "
+                  f"{len(letter.attempts):<6} {replayed:<6} {letter.message.title}")
+            print(f"{'':<8} {letter.error or ''}")
+        print(f"共 {len(letters)} 条死信")
+        return
+    
+    try:
+        with NotificationHandler(config_manager) as notification_handler:
+            if notification_handler.dead_letters is None:
+                logger.error("未配置死信队列数据库路径（DLQ_PATH 或 dead_letter.path）")
+                sys.exit(1)
+            summaries = notification_handler.replay_dead_letters(args.channel, since, args.error_type, args.limit)
+        failed = sum(1 for summary in summaries if summary.failed_channels)
+        logger.info(f"重放完成: {len(summaries)} 条通知，{len(summaries) - failed} 条全部成功，{failed} 条仍有失败的渠道")
+        sys.exit(1 if failed else 0)
+    except KeyboardInterrupt:
+        logger.info("接收到中断信号，正在退出...")
+        sys.exit(1)
+
+
+def serve(args: argparse.Namespace):
+    """以常驻服务模式运行"""
+    logger = logging.getLogger(__name__)
+    
+    try:
+        logger.info("=== 通知常驻服务启动 ===")
+        from daemon import run_daemon
+        run_daemon(args.host, args.port, validate_event_data,
+                   auth_token=os.environ.get('NOTIFICATION_SERVE_TOKEN') or None)
+        logger.info("=== 通知常驻服务退出 ===")
+    except KeyboardInterrupt:
+        logger.info("接收到中断信号，正在退出...")
+        sys.exit(0)
+    except Exception as e:
+        logger.error(f"常驻服务运行时发生未预期的错误: {e}")
+        logger.exception("详细错误信息:")
+        sys.exit(1)
+
+
+def main(argv: Optional[List[str]] = None):
     """主入口函数，处理 GitHub Actions 事件"""
     # 设置日志
     setup_logging()
     logger = logging.getLogger(__name__)
     
+    args = parse_args(argv)
+    if args.command == 'dlq':
+        run_dlq(args)
+        return
+    if args.serve:
+        serve(args)
+        return
+    if args.batch:
+        run_batch(args)
+        return
+    
     try:
         logger.info("=== 通知服务启动 ===")
         
@@ -182,12 +291,18 @@ def main():
             logger.error(f"事件数据文件不存在: {event_path}")
             sys.exit(1)
             
-        # 读取和解析事件数据
+        config_manager = ConfigManager()
+        
+        # 读取和解析事件数据，附件内容边解析边解码写入附件目录
         logger.info("读取事件数据...")
         try:
-            with open(event_path, 'r', encoding='utf-8') as f:
-                event_data = json.load(f)
-        except json.JSONDecodeError as e:
+            ingested = ingest_event(
+                event_path,
+                os.environ.get('ATTACHMENTS_DIR', './temp_attachments'),
+                AttachmentIngestConfig.from_dict(config_manager.get_attachment_settings()),
+            )
+            event_data = ingested.event
+        except EventParseError as e:
             logger.error(f"事件数据 JSON 解析失败: {e}")
             sys.exit(1)
         except Exception as e:
@@ -206,7 +321,6 @@ def main():
         
         # 初始化配置管理器和通知处理器
         logger.info("初始化通知服务组件...")
-        config_manager = ConfigManager()
         notification_handler = NotificationHandler(config_manager)
         
         # 检查可用的通知器
@@ -220,7 +334,10 @@ def main():
         
         # 处理通知请求
         logger.info("开始处理通知请求...")
-        notification_handler.process_github_event(event_data)
+        with notification_handler:
+            # 先恢复上次运行被中断时未完成的投递
+            notification_handler.resume_outbox()
+            notification_handler.process_github_event(event_data, ingested.attachments)
         
         logger.info("=== 通知服务完成 ===")
         
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多模式匹配模块
+将多个正则表达式合并为一个预编译的交替表达式，一次调用即可得到第一个命中的模式，
+避免在 Python 中逐条规则调用 re.search；多个子串用 Aho-Corasick 自动机一次扫描文本完成匹配，
+也可以先用自动机筛选出必然包含的字面量已出现的模式，只对这些模式运行正则
+"""
+
+import re
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+
+def _branch(pattern: str, index: int) -> str:
+    """将单个模式包装为交替表达式中的一个分支，只有跳过前缀的 .*? 可以跨行"""
+    return f"(?s:.*?)(?:{pattern})(?P<_p{index}>)"
+
+
+def _mergeable(regex: 're.Pattern', index: int, flags: int) -> bool:
+    """
+    检查模式能否放入合并后的交替表达式
+
+    含分组的模式不能合并：不同模式中的同名分组会冲突，编号分组和反向引用（如 \\1）在合并后会指向其他模式的分组；
+    写在开头的全局标志如 ``(?i)`` 放入分支后也无法编译
+    """
+    if regex.groups:
+        return False
+    try:
+        re.compile(_branch(regex.pattern, index), flags)
+    except re.error:
+        return False
+    return True
+
+
+def compile_pattern(pattern: str, flags: int = 0) -> Optional[str]:
+    """
+    检查单个正则表达式能否编译
+
+    Args:
+        pattern: 正则表达式
+        flags: 编译标志
+
+    Returns:
+        Optional[str]: 无法编译时返回错误信息，否则返回 None
+    """
+    try:
+        re.compile(pattern, flags)
+    except (re.error, TypeError) as e:
+        return str(e)
+    return None
+
+
+class PatternSet:
+    """
+    合并后的正则表达式集合
+
+    每个模式编译为 ``(?s:.*?)(?:模式)(?P<_pN>)`` 形式的分支，从文本开头用一个交替表达式匹配。
+    正则引擎按分支顺序尝试，因此命中的是列表中最靠前的模式，而不是文本中最先出现的模式；
+    分支末尾的空命名分组用于通过 ``lastgroup`` 反查模式序号。
+    含分组、反向引用或全局标志的模式无法合并，单独编译，只在序号比合并表达式的结果靠前时检查。
+    """
+
+    def __init__(self, patterns: Sequence[str], flags: int = 0):
+        """
+        编译模式集合
+
+        Args:
+            patterns: 正则表达式列表，调用方应先用 compile_pattern 排除无效的模式
+            flags: 编译标志
+        """
+        self.patterns: Tuple[str, ...] = tuple(patterns)
+        self._regex = None
+        self._standalone: List[Tuple[int, Callable]] = []
+        branches = []
+        for index, pattern in enumerate(self.patterns):
+            regex = re.compile(pattern, flags)
+            if _mergeable(regex, index, flags):
+                branches.append(_branch(pattern, index))
+            else:
+                self._standalone.append((index, regex.search))
+        if branches:
+            self._regex = re.compile("|".join(branches), flags)
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def first_match(self, text: str) -> Optional[int]:
+        """
+        查找第一个命中的模式
+
+        Args:
+            text: 待匹配文本
+
+        Returns:
+            Optional[int]: 命中模式在列表中的序号，均未命中时返回 None
+        """
+        if text is None:
+            return None
+        matched = None
+        if self._regex is not None:
+            match = self._regex.match(text)
+            if match is not None:
+                matched = int(match.lastgroup[2:])
+        for index, search in self._standalone:
+            if matched is not None and index > matched:
+                break
+            if search(text):
+                return index
+        return matched
+
+
+
+
+# 正则表达式中需要转义才表示字面量的字符（不构成量词的 { 和 } 按字面量处理）
+_REGEX_META = set('.^$*+?[]\\|()')
+
+# 量词，紧挨在前面的字符不一定出现
+_QUANTIFIERS = set('*+?')
+
+# {m}、{m,}、{,n}、{m,n} 形式的量词；其他写法（如 {x}、{}）在 Python 中是字面量
+_BRACE_QUANTIFIER = re.compile(r'\{(?:\d+|\d*,\d*)\}')
+
+
+def _class_end(pattern: str, position: int) -> int:
+    """返回从 position 处的 [ 开始的字符集之后的位置，字符集没有结束时返回模式长度"""
+    position += 1
+    if pattern[position:position + 1] == '^':
+        position += 1
+    # 紧跟在 [ 或 [^ 之后的 ] 是字符集中的普通字符
+    if pattern[position:position + 1] == ']':
+        position += 1
+    while position < len(pattern):
+        char = pattern[position]
+        if char == '\\':
+            position += 2
+        elif char == ']':
+            return position + 1
+        else:
+            position += 1
+    return len(pattern)
+
+
+def _is_quantified(pattern: str, position: int) -> bool:
+    """检查 position 处是否是量词"""
+    return pattern[position:position + 1] in _QUANTIFIERS or bool(_BRACE_QUANTIFIER.match(pattern, position))
+
+
+def required_literal(pattern: str, glob: bool = False) -> str:
+    """
+    提取匹配成功时文本中必然包含的最长字面量，用于在运行正则之前用子串匹配预筛选
+
+    只处理不含分组和分支的模式，无法可靠提取时返回空字符串。
+
+    Args:
+        pattern: 正则表达式或通配符
+        glob: 是否为通配符（fnmatch 语法）
+
+    Returns:
+        str: 必然出现的字面量，无法提取时返回空字符串
+    """
+    if not glob and ('|' in pattern or '(' in pattern):
+        return ''
+
+    runs, current = [], []
+    position = 0
+    while position < len(pattern):
+        char = pattern[position]
+        literal = None
+        if glob:
+            if char == '[':
+                end = pattern.find(']', position + 2)
+                position = (end if end != -1 else len(pattern) - 1) + 1
+            elif char not in '*?':
+                literal = char
+                position += 1
+            else:
+                position += 1
+        elif char == '\\':
+            escaped = pattern[position + 1:position + 2]
+            if escaped and not escaped.isalnum():
+                literal = escaped
+            position += 2
+        elif char == '[':
+            position = _class_end(pattern, position)
+        elif char == '{' and _BRACE_QUANTIFIER.match(pattern, position):
+            # 量词本身不是字面量，前面的字符已按量词处理
+            position = _BRACE_QUANTIFIER.match(pattern, position).end()
+        elif char not in _REGEX_META:
+            literal = char
+            position += 1
+        else:
+            position += 1
+
+        # 正则中后跟量词的字符不一定出现
+        if literal is not None and not glob and _is_quantified(pattern, position):
+            literal = None
+        if literal is None:
+            runs.append(''.join(current))
+            current = []
+        else:
+            current.append(literal)
+    runs.append(''.join(current))
+    return max(runs, key=len)
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick 多子串匹配自动机
+
+    构建时间与所有子串的总长度成正比，匹配时只扫描一遍文本，
+    扫描开销与子串数量无关。
+    """
+
+    def __init__(self, patterns: Sequence[str]):
+        """
+        构建自动机
+
+        Args:
+            patterns: 子串列表，空字符串会被忽略
+        """
+        self.patterns: Tuple[str, ...] = tuple(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]   # 以该状态结尾的所有子串序号，按序号排序
+
+        for index, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            self._output[state] += (index,)
+
+        # 按层次计算失败指针，并把失败指针上的输出合并到当前状态，匹配时只需检查一次
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail
+                if self._output[fail]:
+                    self._output[next_state] = tuple(sorted(self._output[next_state] + self._output[fail]))
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def _scan(self, text: str) -> Iterator[Tuple[int, ...]]:
+        """逐字符推进自动机，产生每个位置命中的子串序号"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                yield output[state]
+
+    def first_match(self, text: str) -> Optional[int]:
+        """
+        查找文本中最先出现的子串
+
+        Args:
+            text: 待匹配文本
+
+        Returns:
+            Optional[int]: 命中子串在列表中的序号，均未命中时返回 None
+        """
+        if not text or len(self._goto) == 1:
+            return None
+        for matched in self._scan(text):
+            return matched[0]
+        return None
+
+    def find_all(self, text: str) -> Set[int]:
+        """
+        查找文本中出现的所有子串
+
+        Args:
+            text: 待匹配文本
+
+        Returns:
+            Set[int]: 出现的子串序号
+        """
+        found: Set[int] = set()
+        if text and len(self._goto) > 1:
+            for matched in self._scan(text):
+                found.update(matched)
+        return found
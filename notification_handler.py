@@ -1,33 +1,64 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import asyncio
+import contextvars
+import functools
 import json
 import logging
 import os
 import sys
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
-from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
+from concurrent.futures import Future, as_completed, TimeoutError
+from dataclasses import asdict, dataclass, field
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 import threading
 
-from retry_handler import RetryHandler, RetryConfig, RetryStrategy, NetworkError, TemporaryError
+from retry_handler import (RetryHandler, RetryConfig, RetryStrategy, NetworkError, TemporaryError,
+                           ERROR_EXCEPTION, ERROR_REJECTED, ERROR_TIMEOUT)
 
 # 添加当前目录到 Python 路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from config_manager import ConfigManager
+from config_manager import ConfigManager, ConfigSnapshot
 from notifiers.base import NotificationResult
+from rate_limiter import RateLimiter
+from circuit_breaker import CircuitBreakerConfig, CircuitBreakerRegistry, CircuitOpenError
+from retry_scheduler import DelayScheduler
+from deadline import Deadline, DeadlineExceededError
+from routing import DEFAULT_SEVERITY, recipients_scope
+from suppression import SuppressionStats
+from dedup import DedupConfig, Deduplicator, make_dedup_key
+from outbox import Outbox, OutboxConfig, OutboxEntry, PendingMessage
+from dead_letter import DeadLetterConfig, DeadLetterEntry, DeadLetterMessage, DeadLetterStore
+from priority_executor import PRIORITY_LANES, LaneConfig, PriorityExecutor, normalize_priority
+from coalescing import CoalescedMessage, Coalescer, CoalescingConfig, DigestDeadLetters, DigestDeliveries, build_digest
+from notifiers.registry import NOTIFIER_CHANNELS, NOTIFIER_REGISTRY, NotifierSpec, load_notifier_class
 
 logger = logging.getLogger(__name__)
 
 
+def get_notifier_channel(notifier) -> Optional[str]:
+    """
+    获取通知器对应的渠道名
+    
+    Args:
+        notifier: 通知器实例
+        
+    Returns:
+        Optional[str]: 渠道名，未映射的通知器返回 None
+    """
+    return NOTIFIER_CHANNELS.get(notifier.__class__.__name__)
+
+
 @dataclass
 class AttachmentInfo:
     """附件信息数据模型"""
     filename: str
     filepath: str
     content_type: str = "application/octet-stream"
+    size: Optional[int] = None          # 文件大小（字节），导入时计算
+    sha256: Optional[str] = None        # 文件内容的 sha256，导入时计算
 
 @dataclass
 class GitHubEventPayload:
@@ -37,6 +68,9 @@ class GitHubEventPayload:
     source: str
     timestamp: str
     attachments: List[AttachmentInfo] = None
+    severity: str = DEFAULT_SEVERITY
+    idempotency_key: Optional[str] = None
+    priority: Optional[str] = None     # 优先级通道，为空时由路由规则或默认通道决定
 
 
 @dataclass
@@ -46,6 +80,8 @@ class NotificationSummary:
     successful_channels: List[str]
     failed_channels: List[str]
     errors: List[str]
+    duplicate: bool = False    # 是否为重复通知（直接返回了上次的发送结果）
+    coalesced_channels: List[str] = field(default_factory=list)   # 进入缓冲、稍后合并为摘要发送的渠道
 
 
 class NotificationHandler:
@@ -60,80 +96,497 @@ class NotificationHandler:
         """
         self.config_manager = config_manager
         self.logger = logging.getLogger(__name__)
-        self.notifiers = []
         self._lock = threading.Lock()
         
-        # 初始化所有通知器
-        self._initialize_notifiers()
-    
-    def _initialize_notifiers(self):
-        """初始化所有可用的通知器"""
-        from notifiers.bark import BarkNotifier
-        from notifiers.console import ConsoleNotifier
-        from notifiers.dingtalk import DingTalkNotifier
-        from notifiers.wecom import WeComAppNotifier, WeComBotNotifier
-        from notifiers.telegram import TelegramNotifier
-        from notifiers.smtp import SMTPNotifier
-        from notifiers.pushplus import PushPlusNotifier
-        from notifiers.qmsg import QmsgNotifier
-        from notifiers.gotify import GotifyNotifier
-        from notifiers.igot import IGotNotifier
-        from notifiers.pushdeer import PushDeerNotifier
-        from notifiers.serverchan import ServerChanNotifier
-        
-        # 初始化所有通知器
-        self.notifiers = [
-            BarkNotifier(self.config_manager),
-            ConsoleNotifier(self.config_manager),
-            DingTalkNotifier(self.config_manager),
-            WeComAppNotifier(self.config_manager),
-            WeComBotNotifier(self.config_manager),
-            TelegramNotifier(self.config_manager),
-            SMTPNotifier(self.config_manager),
-            PushPlusNotifier(self.config_manager),
-            QmsgNotifier(self.config_manager),
-            GotifyNotifier(self.config_manager),
-            IGotNotifier(self.config_manager),
-            PushDeerNotifier(self.config_manager),
-            ServerChanNotifier(self.config_manager),
-        ]
+        # 按渠道缓存已创建的通知器，通知器模块在首次用到时才导入
+        self._notifier_instances: Dict[str, Any] = {}
+        
+        # 长期复用的发送线程池，由 start()/close() 管理生命周期；关闭后只有显式调用 start() 才会重新创建
+        self._executor = None
+        self._closed = False
+        self._max_workers = 0
+        self._queued_tasks = 0
+        self._active_workers = 0
+        self._completed_tasks = 0
+        self._peak_queue_depth = 0
+        self._peak_active_workers = 0
+        
+        # 发送任务按优先级通道排队
+        self._lane_config = LaneConfig.from_dict(config_manager.get_priority_settings())
+        
+        # 重试等待由调度器计时，失败的渠道不会在退避期间占用工作线程
+        self._retry_scheduler = DelayScheduler()
+        
+        # 按渠道限流，使发送速率不超过服务商限制
+        self._rate_limit_config = config_manager.get_rate_limits()
+        self.rate_limiter = RateLimiter.from_config(self._rate_limit_config)
+        
+        # 按渠道熔断，服务商持续故障时快速失败
+        self.circuit_breakers = CircuitBreakerRegistry(
+            CircuitBreakerConfig.from_dict(config_manager.get_circuit_breaker_settings())
+        )
+        
+        # 屏蔽规则命中次数，重新加载配置后保留
+        self.suppression_stats = SuppressionStats()
+        
+        # 重复的通知直接返回上次的发送结果
+        self._dedup_config = DedupConfig.from_dict(config_manager.get_dedup_settings())
+        self.deduplicator = Deduplicator(self._dedup_config)
+        
+        # 发件箱，配置数据库路径后发送前持久化每个渠道的投递
+        self._outbox_config = OutboxConfig.from_dict(config_manager.get_outbox_settings())
+        self.outbox = self._open_outbox(self._outbox_config)
+        
+        # 死信队列，配置数据库路径后保存最终失败的投递以便重放
+        self._dead_letter_config = DeadLetterConfig.from_dict(config_manager.get_dead_letter_settings())
+        self.dead_letters = self._open_dead_letters(self._dead_letter_config)
+        
+        # 突发的通知按渠道缓冲后合并为摘要发送
+        self._coalescing_config = CoalescingConfig.from_dict(config_manager.get_coalescing_settings())
+        self.coalescer = Coalescer(self._coalescing_config, self._send_digest, self._retry_scheduler)
     
-    def process_github_event(self, event_data: dict) -> None:
+    def start(self) -> 'NotificationHandler':
         """
-        处理来自 GitHub Actions 的事件数据
+        启动共享的发送线程池，重复调用不会创建新的线程池
+        
+        Returns:
+            NotificationHandler: 当前实例，便于链式调用
+        """
+        with self._lock:
+            self._closed = False
+            self._start_locked()
+        return self
+    
+    def _start_locked(self) -> None:
+        """创建线程池并启动重试调度器（调用方持有锁）"""
+        if self._executor is None:
+            self._max_workers = max(1, int(self.config_manager.get_config("MAX_CONCURRENT_NOTIFICATIONS", 10)))
+            self._executor = PriorityExecutor(self._max_workers, self._lane_config, thread_name_prefix="NotificationSender")
+            self._retry_scheduler.start()
+            self.logger.debug(f"发送线程池已启动，最大工作线程数 {self._max_workers}")
+    
+    def close(self, wait: bool = True) -> None:
+        """
+        关闭共享的发送线程池
         
         Args:
-            event_data: GitHub repository_dispatch 事件数据
+            wait: 是否等待已提交的任务完成
+        """
+        # 先发送缓冲中的通知，摘要发送需要用到线程池和重试调度器
+        self.coalescer.close(wait=wait)
+        with self._lock:
+            self._closed = True
+            executor = self._executor
+            self._executor = None
+        # 先关闭线程池：正在执行的发送完成后才能确定是否需要重试；之后到期的重试不会重新创建线程池，
+        # 调度器关闭时未到期的重试直接以最后一次的错误结束
+        if executor is not None:
+            executor.shutdown(wait=wait)
+            self.logger.debug("发送线程池已关闭")
+        self._retry_scheduler.shutdown()
+        self.deduplicator.close()
+        if self.outbox is not None:
+            self.outbox.close()
+        if self.dead_letters is not None:
+            self.dead_letters.close()
+        
+        # 释放共享的 HTTP 连接和 SMTP 会话（仅在对应模块已被加载时）
+        transport = sys.modules.get('notifiers.transport')
+        if transport is not None:
+            transport.close_session_pool()
+        smtp_pool = sys.modules.get('notifiers.smtp_pool')
+        if smtp_pool is not None:
+            smtp_pool.close_smtp_pool()
+        attachment_cache = sys.modules.get('notifiers.attachment_cache')
+        if attachment_cache is not None:
+            attachment_cache.close_attachment_cache()
+    
+    def __enter__(self) -> 'NotificationHandler':
+        return self.start()
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+    
+    def reload_config(self) -> ConfigSnapshot:
+        """
+        重新加载配置，校验通过后按新配置重建通知器、限流器、熔断器和线程池
+        
+        正在进行的发送持有旧的配置快照和通知器实例，会在旧配置下完成。
+        
+        Returns:
+            ConfigSnapshot: 新的配置快照
+            
+        Raises:
+            ConfigValidationError: 新配置未通过校验，此时继续使用旧配置
+        """
+        snapshot = self.config_manager.reload()
+        self._apply_config()
+        return snapshot
+    
+    def _apply_config(self) -> None:
+        """按当前配置快照重建运行时组件"""
+        old_executor = None
+        with self._lock:
+            # 新的发送会按新配置重新创建通知器，旧实例由进行中的发送继续持有
+            self._notifier_instances = {}
+            
+            self._lane_config = LaneConfig.from_dict(self.config_manager.get_priority_settings())
+            max_workers = max(1, int(self.config_manager.get_config("MAX_CONCURRENT_NOTIFICATIONS", 10)))
+            if self._executor is not None and max_workers != self._max_workers:
+                # 线程池无法调整大小，新建线程池接收新任务，旧线程池执行完已提交的任务后退出
+                old_executor = self._executor
+                self._executor = PriorityExecutor(max_workers, self._lane_config, thread_name_prefix="NotificationSender")
+                self._max_workers = max_workers
+            elif self._executor is not None:
+                self._executor.update_config(self._lane_config)
+        if old_executor is not None:
+            old_executor.shutdown(wait=False)
+            self.logger.info(f"发送线程池已按新配置重建，最大工作线程数 {max_workers}")
+        
+        # 限流配置未变化时保留现有令牌桶状态
+        rate_limits = self.config_manager.get_rate_limits()
+        if rate_limits != self._rate_limit_config:
+            self._rate_limit_config = rate_limits
+            self.rate_limiter = RateLimiter.from_config(rate_limits)
+        
+        self.circuit_breakers.update_config(
+            CircuitBreakerConfig.from_dict(self.config_manager.get_circuit_breaker_settings())
+        )
+        
+        # 去重配置未变化时保留已缓存的发送结果
+        dedup_config = DedupConfig.from_dict(self.config_manager.get_dedup_settings())
+        if dedup_config != self._dedup_config:
+            old_deduplicator = self.deduplicator
+            self._dedup_config = dedup_config
+            self.deduplicator = Deduplicator(dedup_config)
+            old_deduplicator.close()
+        
+        outbox_config = OutboxConfig.from_dict(self.config_manager.get_outbox_settings())
+        if outbox_config != self._outbox_config:
+            old_outbox = self.outbox
+            self._outbox_config = outbox_config
+            self.outbox = self._open_outbox(outbox_config)
+            if old_outbox is not None:
+                # 进行中的发送仍把投递结果写回旧发件箱，全部写完后才关闭
+                old_outbox.close_when_idle()
+        
+        dead_letter_config = DeadLetterConfig.from_dict(self.config_manager.get_dead_letter_settings())
+        if dead_letter_config != self._dead_letter_config:
+            old_dead_letters = self.dead_letters
+            self._dead_letter_config = dead_letter_config
+            self.dead_letters = self._open_dead_letters(dead_letter_config)
+            if old_dead_letters is not None:
+                # 进行中的发送最终失败时仍写入旧死信队列，全部记录后才关闭
+                old_dead_letters.close_when_idle()
+        
+        # 合并配置变化时，旧合并器中缓冲的通知立即发送
+        coalescing_config = CoalescingConfig.from_dict(self.config_manager.get_coalescing_settings())
+        if coalescing_config != self._coalescing_config:
+            old_coalescer = self.coalescer
+            self._coalescing_config = coalescing_config
+            self.coalescer = Coalescer(coalescing_config, self._send_digest, self._retry_scheduler)
+            old_coalescer.close(wait=False)
+    
+    def get_executor_stats(self) -> Dict[str, int]:
+        """
+        获取发送线程池的运行指标，用于评估 MAX_CONCURRENT_NOTIFICATIONS 的设置
+        
+        Returns:
+            Dict[str, int]: 线程池指标
+        """
+        with self._lock:
+            return {
+                'running': int(self._executor is not None),
+                'max_workers': self._max_workers,
+                'queue_depth': self._queued_tasks,
+                'active_workers': self._active_workers,
+                'completed_tasks': self._completed_tasks,
+                'peak_queue_depth': self._peak_queue_depth,
+                'peak_active_workers': self._peak_active_workers,
+                'pending_retries': self._retry_scheduler.get_stats()['pending'],
+                'lanes': self._executor.get_lane_stats() if self._executor is not None else {},
+            }
+    
+    def get_rate_limit_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取各渠道的限流等待指标
+        
+        Returns:
+            Dict[str, Dict[str, float]]: 渠道名到指标的映射
+        """
+        return self.rate_limiter.get_stats()
+    
+    def get_circuit_breaker_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取各渠道的熔断器状态和失败率
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: 渠道名到指标的映射
+        """
+        return self.circuit_breakers.get_stats()
+    
+    def get_outbox_stats(self) -> Dict[str, int]:
+        """
+        获取发件箱中各状态的投递数
+        
+        Returns:
+            Dict[str, int]: 状态到投递数的映射，未启用发件箱时为空
+        """
+        if self.outbox is None:
+            return {}
+        try:
+            return self.outbox.get_stats()
+        except Exception as e:
+            self.logger.warning(f"读取发件箱指标失败: {str(e)}")
+            return {}
+    
+    def get_dead_letter_stats(self) -> Dict[str, Any]:
+        """
+        获取死信队列中的死信数
+        
+        Returns:
+            Dict[str, Any]: 死信指标，未启用死信队列时为空
         """
+        if self.dead_letters is None:
+            return {}
         try:
-            # 解析事件数据
-            client_payload = event_data.get('client_payload', {})
+            return self.dead_letters.get_stats()
+        except Exception as e:
+            self.logger.warning(f"读取死信队列指标失败: {str(e)}")
+            return {}
+    
+    def get_coalescing_stats(self) -> Dict[str, Any]:
+        """
+        获取合并发送指标
+        
+        Returns:
+            Dict[str, Any]: 合并发送指标
+        """
+        return self.coalescer.get_stats()
+    
+    def get_smtp_pool_stats(self) -> Dict[str, int]:
+        """
+        获取 SMTP 连接池指标，SMTP 通知器尚未使用时返回空字典
+        
+        Returns:
+            Dict[str, int]: 会话的新建、复用、NOOP 检查和重连次数
+        """
+        smtp_pool = sys.modules.get('notifiers.smtp_pool')
+        if smtp_pool is None:
+            return {}
+        return smtp_pool.get_smtp_pool(self.config_manager).get_stats()
+    
+    def get_attachment_cache_stats(self) -> Dict[str, int]:
+        """
+        获取附件缓存指标，尚未发送过附件时返回空字典
+        
+        Returns:
+            Dict[str, int]: 命中、未命中次数和缓存占用
+        """
+        attachment_cache = sys.modules.get('notifiers.attachment_cache')
+        if attachment_cache is None:
+            return {}
+        return attachment_cache.get_attachment_cache(self.config_manager).get_stats()
+    
+    def get_dedup_stats(self) -> Dict[str, Any]:
+        """
+        获取去重命中情况
+        
+        Returns:
+            Dict[str, Any]: 去重指标
+        """
+        return self.deduplicator.get_stats()
+    
+    def get_suppression_stats(self) -> Dict[str, int]:
+        """
+        获取各屏蔽规则的命中次数
+        
+        Returns:
+            Dict[str, int]: 规则名到命中次数的映射
+        """
+        return self.suppression_stats.get_stats(self.config_manager.snapshot.suppression)
+    
+    def _submit(self, func, *args, lane: Optional[str] = None) -> Future:
+        """
+        向共享线程池提交任务，并统计排队和执行中的任务数
+        
+        Args:
+            func: 要执行的函数
+            *args: 函数参数
+            lane: 优先级通道，为 None 时使用默认通道
             
-            # 处理附件
-            attachments = self._process_attachments(client_payload)
+        Returns:
+            Future: 任务的 Future 对象
             
-            payload = GitHubEventPayload(
-                title=client_payload.get('title', '通知'),
-                content=client_payload.get('content', ''),
-                source=client_payload.get('source', 'unknown'),
-                timestamp=client_payload.get('timestamp', ''),
-                attachments=attachments
-            )
+        Raises:
+            RuntimeError: 通知处理器已关闭
+        """
+        def run():
+            with self._lock:
+                self._queued_tasks -= 1
+                self._active_workers += 1
+                self._peak_active_workers = max(self._peak_active_workers, self._active_workers)
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._active_workers -= 1
+                    self._completed_tasks += 1
+        
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("通知处理器已关闭")
+            self._start_locked()
+            executor = self._executor
+            self._queued_tasks += 1
+            self._peak_queue_depth = max(self._peak_queue_depth, self._queued_tasks)
+        
+        try:
+            # 在提交时的上下文中执行，使固定的配置快照等上下文变量在工作线程中同样生效
+            future = executor.submit(contextvars.copy_context().run, run, lane=lane or self._lane_config.default_lane)
+        except Exception:
+            with self._lock:
+                self._queued_tasks -= 1
+            raise
+        
+        # 排队中被取消的任务不会执行 run()，需要在这里修正排队计数
+        def on_done(f):
+            if f.cancelled():
+                with self._lock:
+                    self._queued_tasks -= 1
+        future.add_done_callback(on_done)
+        return future
+    
+    @property
+    def notifiers(self) -> List:
+        """已创建的通知器列表（按注册顺序）"""
+        with self._lock:
+            instances = dict(self._notifier_instances)
+        return [instances[spec.channel] for spec in NOTIFIER_REGISTRY if spec.channel in instances]
+    
+    def _get_notifier(self, spec: NotifierSpec):
+        """
+        获取渠道的通知器实例，首次调用时导入模块并创建
+        
+        Args:
+            spec: 渠道注册信息
             
-            self.logger.info(f"接收到来自 {payload.source} 的通知请求: {payload.title}")
-            if attachments:
-                self.logger.info(f"包含 {len(attachments)} 个附件")
+        Returns:
+            通知器实例，导入或创建失败时返回 None
+        """
+        notifier = self._notifier_instances.get(spec.channel)
+        if notifier is not None:
+            return notifier
+        
+        try:
+            notifier_class = load_notifier_class(spec)
+            notifier = notifier_class(self.config_manager)
+        except Exception as e:
+            self.logger.error(f"加载通知渠道 {spec.channel} 失败: {str(e)}")
+            return None
+        
+        with self._lock:
+            return self._notifier_instances.setdefault(spec.channel, notifier)
+    
+    def process_github_event(self, event_data: dict,
+                             attachments: Optional[List[AttachmentInfo]] = None,
+                             raise_errors: bool = False) -> Optional[NotificationSummary]:
+        """
+        处理来自 GitHub Actions 的事件数据
+        
+        Args:
+            event_data: GitHub repository_dispatch 事件数据
+            attachments: 已由 attachment_ingest 导入的附件，为 None 时从附件目录查找
+            raise_errors: 处理异常时是否抛出，为 False 时记录日志并返回 None
             
-            # 验证请求数据
-            if not payload.content:
-                self.logger.warning("通知内容为空，跳过发送")
-                return
+        Returns:
+            Optional[NotificationSummary]: 发送结果汇总，未发送时返回 None
+        """
+        try:
+            payload = self._parse_event_payload(event_data, attachments)
+            if payload is None:
+                return None
             
             # 发送通知
-            self.send_notification(payload.title, payload.content, payload.source, attachments)
+            return self.send_notification(payload.title, payload.content, payload.source, payload.attachments,
+                                          severity=payload.severity, idempotency_key=payload.idempotency_key,
+                                          priority=payload.priority)
+            
+        except Exception as e:
+            self.logger.error(f"处理 GitHub 事件时发生错误: {str(e)}")
+            if raise_errors:
+                raise
+            return None
+    
+    async def process_github_event_async(self, event_data: dict,
+                                         attachments: Optional[List[AttachmentInfo]] = None,
+                                         raise_errors: bool = False) -> Optional[NotificationSummary]:
+        """
+        异步处理来自 GitHub Actions 的事件数据
+        
+        Args:
+            event_data: GitHub repository_dispatch 事件数据
+            attachments: 已由 attachment_ingest 导入的附件，为 None 时从附件目录查找
+            raise_errors: 处理异常时是否抛出，为 False 时记录日志并返回 None
+            
+        Returns:
+            Optional[NotificationSummary]: 发送结果汇总，未发送时返回 None
+        """
+        try:
+            payload = self._parse_event_payload(event_data, attachments)
+            if payload is None:
+                return None
+            
+            return await self.send_notification_async(payload.title, payload.content, payload.source, payload.attachments,
+                                                      severity=payload.severity, idempotency_key=payload.idempotency_key,
+                                                      priority=payload.priority)
             
         except Exception as e:
             self.logger.error(f"处理 GitHub 事件时发生错误: {str(e)}")
+            if raise_errors:
+                raise
+            return None
+    
+    def _parse_event_payload(self, event_data: dict,
+                             attachments: Optional[List[AttachmentInfo]] = None) -> Optional[GitHubEventPayload]:
+        """
+        解析事件数据并准备附件
+        
+        Args:
+            event_data: GitHub repository_dispatch 事件数据
+            attachments: 已导入的附件
+            
+        Returns:
+            Optional[GitHubEventPayload]: 事件负载，内容为空时返回 None
+        """
+        # 解析事件数据
+        client_payload = event_data.get('client_payload', {})
+        
+        # 处理附件，已导入的附件直接使用
+        if attachments is None:
+            attachments = self._process_attachments(client_payload)
+        
+        payload = GitHubEventPayload(
+            title=client_payload.get('title', '通知'),
+            content=client_payload.get('content', ''),
+            source=client_payload.get('source', 'unknown'),
+            timestamp=client_payload.get('timestamp', ''),
+            attachments=attachments,
+            severity=client_payload.get('severity') or DEFAULT_SEVERITY,
+            idempotency_key=client_payload.get('idempotency_key') or None,
+            priority=client_payload.get('priority') or None
+        )
+        
+        self.logger.info(f"接收到来自 {payload.source} 的通知请求: {payload.title}")
+        if attachments:
+            self.logger.info(f"包含 {len(attachments)} 个附件")
+        
+        # 验证请求数据
+        if not payload.content:
+            self.logger.warning("通知内容为空，跳过发送")
+            return None
+        
+        return payload
     
     def _process_attachments(self, client_payload: dict) -> List[AttachmentInfo]:
         """
@@ -181,103 +634,320 @@ class NotificationHandler:
         
         return attachments
     
-    def send_notification(self, title: str, content: str, source: str = "unknown", attachments: List[AttachmentInfo] = None) -> NotificationSummary:
+    def send_notification(self, title: str, content: str, source: str = "unknown", attachments: List[AttachmentInfo] = None,
+                          severity: str = DEFAULT_SEVERITY, idempotency_key: Optional[str] = None,
+                          priority: Optional[str] = None) -> NotificationSummary:
         """
-        发送通知到所有配置的渠道
+        发送通知到路由规则选中的渠道，没有规则命中时发送到所有配置的渠道
         
         Args:
             title: 通知标题
             content: 通知内容
             source: 通知来源
+            attachments: 附件列表
+            severity: 严重级别
+            idempotency_key: 幂等键，相同来源和幂等键的通知只发送一次
+            priority: 优先级通道（urgent / high / normal / low），为空时由路由规则或默认通道决定
             
         Returns:
-            NotificationSummary: 发送结果汇总
+            NotificationSummary: 发送结果汇总，重复的通知返回上次的发送结果
+        """
+        # 整个发送过程使用同一个配置快照，期间重新加载配置不影响本次发送
+        with self.config_manager.pinned():
+            deduplicator = self.deduplicator
+            dedup_key = self._get_dedup_key(deduplicator, title, content, source, idempotency_key)
+            if dedup_key is None:
+                return self._send_notification(title, content, source, attachments, severity, priority)
+            
+            cached = deduplicator.acquire(dedup_key, self._dedup_wait_timeout())
+            if cached is not None:
+                return self._duplicate_summary(title, cached)
+            
+            summary = None
+            try:
+                summary = self._send_notification(title, content, source, attachments, severity, priority)
+                return summary
+            finally:
+                deduplicator.release(dedup_key, self._cacheable_summary(summary))
+    
+    def _send_notification(self, title: str, content: str, source: str, attachments: Optional[List[AttachmentInfo]],
+                           severity: str, priority: Optional[str] = None) -> NotificationSummary:
+        """发送通知（不经过去重）"""
+        early_summary, active_notifiers, lane, recipients = self._prepare_send(title, content, source, severity, priority)
+        if early_summary is not None:
+            return early_summary
+        direct_notifiers, coalesced_notifiers = self._split_coalesced(active_notifiers, title, content, severity, attachments,
+                                                                     recipients)
+        
+        # 添加一言（如果启用），合并发送的摘要不添加
+        final_content = self._add_hitokoto_if_enabled(content) if direct_notifiers else content
+        
+        # 发送前写入发件箱
+        deliveries = self._enqueue_outbox(title, final_content, source, severity, attachments, active_notifiers)
+        dead_letter = self._new_dead_letter(title, final_content, source, severity, attachments, active_notifiers)
+        self._buffer_coalesced(coalesced_notifiers, title, content, deliveries, dead_letter, lane)
+        
+        # 并发发送通知
+        summary = None
+        if direct_notifiers:
+            with recipients_scope(recipients):
+                summary = self._send_concurrent_notifications(title, final_content, direct_notifiers, attachments, deliveries,
+                                                              dead_letter, priority=lane)
+        return self._with_coalesced(summary, coalesced_notifiers)
+    
+    async def send_notification_async(self, title: str, content: str, source: str = "unknown", attachments: List[AttachmentInfo] = None,
+                                      severity: str = DEFAULT_SEVERITY, idempotency_key: Optional[str] = None,
+                                      priority: Optional[str] = None) -> NotificationSummary:
+        """
+        在事件循环中发送通知到路由规则选中的渠道，没有规则命中时发送到所有配置的渠道
+        
+        Args:
+            title: 通知标题
+            content: 通知内容
+            source: 通知来源
+            attachments: 附件列表
+            severity: 严重级别
+            idempotency_key: 幂等键，相同来源和幂等键的通知只发送一次
+            priority: 优先级通道（urgent / high / normal / low），为空时由路由规则或默认通道决定
+            
+        Returns:
+            NotificationSummary: 发送结果汇总，重复的通知返回上次的发送结果
+        """
+        with self.config_manager.pinned():
+            deduplicator = self.deduplicator
+            dedup_key = self._get_dedup_key(deduplicator, title, content, source, idempotency_key)
+            if dedup_key is None:
+                return await self._send_notification_async(title, content, source, attachments, severity, priority)
+            
+            # 相同的通知正在发送时需要阻塞等待，放到线程中避免阻塞事件循环
+            cached = await asyncio.to_thread(deduplicator.acquire, dedup_key, self._dedup_wait_timeout())
+            if cached is not None:
+                return self._duplicate_summary(title, cached)
+            
+            summary = None
+            try:
+                summary = await self._send_notification_async(title, content, source, attachments, severity, priority)
+                return summary
+            finally:
+                deduplicator.release(dedup_key, self._cacheable_summary(summary))
+    
+    async def _send_notification_async(self, title: str, content: str, source: str, attachments: Optional[List[AttachmentInfo]],
+                                       severity: str, priority: Optional[str] = None) -> NotificationSummary:
+        """在事件循环中发送通知（不经过去重），优先级只影响合并后摘要的排队"""
+        early_summary, active_notifiers, lane, recipients = self._prepare_send(title, content, source, severity, priority)
+        if early_summary is not None:
+            return early_summary
+        direct_notifiers, coalesced_notifiers = self._split_coalesced(active_notifiers, title, content, severity, attachments,
+                                                                     recipients)
+        
+        final_content = await asyncio.to_thread(self._add_hitokoto_if_enabled, content) if direct_notifiers else content
+        deliveries = self._enqueue_outbox(title, final_content, source, severity, attachments, active_notifiers)
+        dead_letter = self._new_dead_letter(title, final_content, source, severity, attachments, active_notifiers)
+        self._buffer_coalesced(coalesced_notifiers, title, content, deliveries, dead_letter, lane)
+        
+        summary = None
+        if direct_notifiers:
+            with recipients_scope(recipients):
+                summary = await self._send_concurrent_notifications_async(title, final_content, direct_notifiers, attachments,
+                                                                          deliveries, dead_letter)
+        return self._with_coalesced(summary, coalesced_notifiers)
+    
+    def _prepare_send(self, title: str, content: str, source: str = "unknown", severity: str = DEFAULT_SEVERITY,
+                      priority: Optional[str] = None):
+        """
+        发送前的公共检查、渠道路由、优先级和邮件收件人选择
+        
+        Args:
+            title: 通知标题
+            content: 通知内容
+            source: 通知来源
+            severity: 严重级别
+            priority: 调用方指定的优先级通道
+            
+        Returns:
+            (提前返回的汇总结果, 活跃的通知器列表, 优先级通道, 路由规则指定的邮件收件人)，可以发送时汇总结果为 None
         """
         if not content:
             self.logger.warning(f"{title} 推送内容为空！")
-            return NotificationSummary(0, [], [], ["推送内容为空"])
+            return NotificationSummary(0, [], [], ["推送内容为空"]), [], None, ()
         
-        # 检查是否需要跳过推送
-        if self._should_skip_push(title):
-            self.logger.info(f"{title} 在跳过推送列表中，跳过推送！")
-            return NotificationSummary(0, [], [], ["标题在跳过列表中"])
+        # 检查是否命中屏蔽规则
+        suppressed_by = self.config_manager.snapshot.suppression.match(title, content, source)
+        if suppressed_by is not None:
+            self.suppression_stats.record(suppressed_by)
+            self.logger.info(f"{title} 命中屏蔽规则 {suppressed_by.name}，跳过推送！")
+            return NotificationSummary(0, [], [], [f"命中屏蔽规则 {suppressed_by.name}"]), [], None, ()
         
-        # 获取活跃的通知器
+        # 按路由规则选择渠道，只加载被选中渠道的通知器
+        rule = self.config_manager.snapshot.routing.route(source, severity, title)
+        lane = self._resolve_priority(priority, rule)
+        recipients = rule.recipients if rule is not None else ()
+        if recipients:
+            self.logger.info(f"命中路由规则 {rule.name}，邮件收件人: {', '.join(recipients)}")
+        if rule is not None and rule.channels:
+            self.logger.info(f"命中路由规则 {rule.name}，发送渠道: {', '.join(rule.channels)}")
+            active_notifiers = self.get_active_notifiers(rule.channels)
+            if not active_notifiers:
+                self.logger.warning(f"路由规则 {rule.name} 指定的渠道均未启用或未配置")
+                return NotificationSummary(0, [], [], [f"路由规则 {rule.name} 指定的渠道均未启用"]), [], lane, recipients
+            return None, active_notifiers, lane, recipients
+        
+        # 获取活跃的通知器（未命中路由规则，或命中的规则只指定了优先级或收件人）
         active_notifiers = self.get_active_notifiers()
         if not active_notifiers:
             self.logger.warning("没有配置任何通知器")
-            return NotificationSummary(0, [], [], ["没有配置任何通知器"])
+            return NotificationSummary(0, [], [], ["没有配置任何通知器"]), [], lane, recipients
         
-        # 添加一言（如果启用）
-        final_content = self._add_hitokoto_if_enabled(content)
+        return None, active_notifiers, lane, recipients
+    
+    def _resolve_priority(self, priority: Optional[str], rule) -> str:
+        """按 调用方指定 > 路由规则 > 默认通道 的顺序选择优先级通道"""
+        lane = normalize_priority(priority)
+        if lane is None and priority:
+            self.logger.warning(f"未知的优先级 {priority}，可选值: {' / '.join(PRIORITY_LANES)}")
+        if lane is None and rule is not None:
+            lane = rule.priority
+        return lane or self._lane_config.default_lane
+    
+    def _get_dedup_key(self, deduplicator: Deduplicator, title: str, content: str, source: str,
+                       idempotency_key: Optional[str]) -> Optional[str]:
+        """计算去重键，未启用去重或内容为空时返回 None"""
+        if not deduplicator.config.enabled or not content:
+            return None
+        return make_dedup_key(source, title, content, idempotency_key)
+    
+    def _dedup_wait_timeout(self) -> float:
+        """等待相同通知发送完成的最长时间，与单次发送的总时限一致"""
+        return float(self.config_manager.get_config("NOTIFICATION_TIMEOUT", 30))
+    
+    def _duplicate_summary(self, title: str, cached: Dict[str, Any]) -> NotificationSummary:
+        """用缓存的发送结果构造重复通知的汇总结果"""
+        self.logger.info(f"{title} 是重复的通知，直接返回上次的发送结果")
+        summary = NotificationSummary(**{**cached, 'duplicate': True})
+        summary.successful_channels = list(summary.successful_channels)
+        summary.failed_channels = list(summary.failed_channels)
+        summary.errors = list(summary.errors)
+        return summary
+    
+    @staticmethod
+    def _cacheable_summary(summary: Optional[NotificationSummary]) -> Optional[Dict[str, Any]]:
+        """至少一个渠道发送成功或进入合并缓冲时返回可缓存的发送结果，全部失败的通知允许上游重新触发"""
+        if summary is None or not (summary.successful_channels or summary.coalesced_channels):
+            return None
+        return asdict(summary)
+    
+    def _split_coalesced(self, notifiers: List, title: str, content: str, severity: str,
+                         attachments: Optional[List[AttachmentInfo]], recipients: Tuple[str, ...] = ()):
+        """
+        把通知器分为立即发送的和进入合并缓冲的
         
-        # 并发发送通知
-        return self._send_concurrent_notifications(title, final_content, active_notifiers, attachments)
+        路由规则指定了邮件收件人时，邮件不进入缓冲：摘要在单独的线程中按默认收件人发送。
+        
+        Returns:
+            (立即发送的通知器列表, 进入合并缓冲的通知器列表)
+        """
+        coalescer = self.coalescer
+        if not coalescer.config.enabled:
+            return notifiers, []
+        direct, coalesced = [], []
+        for notifier in notifiers:
+            channel = get_notifier_channel(notifier)
+            if recipients and channel == 'smtp':
+                direct.append(notifier)
+            elif channel and coalescer.accepts(channel, title, content, severity, bool(attachments)):
+                coalesced.append(notifier)
+            else:
+                direct.append(notifier)
+        return direct, coalesced
+    
+    def _buffer_coalesced(self, notifiers: List, title: str, content: str, deliveries: Optional[OutboxEntry],
+                          dead_letter: Optional[DeadLetterEntry], priority: Optional[str] = None) -> None:
+        """把通知放入各渠道的合并缓冲"""
+        for notifier in notifiers:
+            self.coalescer.add(get_notifier_channel(notifier),
+                               CoalescedMessage(title, content, notifier, deliveries, dead_letter, priority))
+        if notifiers:
+            self.logger.info(f"{title} 已进入合并缓冲，渠道: {', '.join(notifier.get_name() for notifier in notifiers)}")
+    
+    def _with_coalesced(self, summary: Optional[NotificationSummary], coalesced_notifiers: List) -> NotificationSummary:
+        """在发送结果汇总中加入进入合并缓冲的渠道"""
+        if summary is None:
+            summary = NotificationSummary(0, [], [], [])
+        if coalesced_notifiers:
+            summary.total_channels += len(coalesced_notifiers)
+            summary.coalesced_channels = [notifier.get_name() for notifier in coalesced_notifiers]
+        return summary
+    
+    def _send_digest(self, channel: str, messages: List[CoalescedMessage]) -> NotificationSummary:
+        """
+        把渠道缓冲中的通知合并为一条摘要发送，在合并器的发送线程中执行
+        
+        Args:
+            channel: 渠道名
+            messages: 缓冲中的通知
+            
+        Returns:
+            NotificationSummary: 摘要的发送结果
+        """
+        title, content = build_digest(messages)
+        # 摘要按其中优先级最高的通知排队
+        lanes = [message.priority for message in messages if message.priority in PRIORITY_LANES]
+        priority = min(lanes, key=PRIORITY_LANES.index) if lanes else None
+        deliveries = [message.deliveries for message in messages if message.deliveries is not None]
+        dead_letters = [message.dead_letter for message in messages if message.dead_letter is not None]
+        self.logger.info(f"发送 {channel} 的合并摘要，包含 {len(messages)} 条通知")
+        with self.config_manager.pinned():
+            return self._send_concurrent_notifications(
+                title, content, [messages[-1].notifier], None,
+                DigestDeliveries(deliveries) if deliveries else None,
+                DigestDeadLetters(dead_letters) if dead_letters else None,
+                priority=priority,
+            )
     
-    def get_active_notifiers(self) -> List:
+    def get_active_notifiers(self, channels: Optional[Sequence[str]] = None) -> List:
         """
         获取已配置且启用的通知器列表
         
+        Args:
+            channels: 只返回这些渠道的通知器，默认返回所有渠道
+            
         Returns:
             List: 已配置且启用的通知器列表
         """
         active_notifiers = []
+        channel_states = self.config_manager.snapshot.channels
         
-        # 通知器名称映射
-        notifier_mapping = {
-            'BarkNotifier': 'bark',
-            'ConsoleNotifier': 'console', 
-            'DingTalkNotifier': 'dingtalk',
-            'WeComAppNotifier': 'wecom_app',
-            'WeComBotNotifier': 'wecom_bot',
-            'TelegramNotifier': 'telegram',
-            'SMTPNotifier': 'smtp',
-            'PushPlusNotifier': 'pushplus',
-            'QmsgNotifier': 'qmsg',
-            'GotifyNotifier': 'gotify',
-            'IGotNotifier': 'igot',
-            'PushDeerNotifier': 'pushdeer',
-            'ServerChanNotifier': 'serverchan'
-        }
-        
-        for notifier in self.notifiers:
-            notifier_class_name = notifier.__class__.__name__
-            channel_name = notifier_mapping.get(notifier_class_name)
-            
-            if channel_name:
-                # 检查是否启用且已配置
-                if (self.config_manager.is_channel_enabled(channel_name) and 
-                    notifier.is_configured()):
-                    active_notifiers.append(notifier)
-            else:
-                # 对于未映射的通知器，使用原有逻辑
-                if notifier.is_configured():
-                    active_notifiers.append(notifier)
+        for spec in NOTIFIER_REGISTRY:
+            if channels is not None and spec.channel not in channels:
+                continue
+            # 先用预计算的渠道状态判断，只有启用且已配置的渠道才会导入通知器模块
+            state = channel_states.get(spec.channel)
+            if state is None or not state.active:
+                continue
+            
+            notifier = self._get_notifier(spec)
+            if notifier is not None and notifier.is_configured():
+                active_notifiers.append(notifier)
         
         return active_notifiers
     
-    def _should_skip_push(self, title: str) -> bool:
-        """检查是否应该跳过推送"""
-        skip_titles = self.config_manager.get_config("SKIP_PUSH_TITLE", "")
-        if skip_titles:
-            skip_list = skip_titles.split("\n")
-            return title in skip_list
-        return False
-    
     def _add_hitokoto_if_enabled(self, content: str) -> str:
         """如果启用一言，则添加到内容末尾"""
         if self.config_manager.get_config("HITOKOTO", False):
             try:
-                import requests
+                from notifiers.transport import get_session_pool
                 url = "https://v1.hitokoto.cn/"
-                res = requests.get(url, timeout=5).json()
+                res = get_session_pool(self.config_manager).request("GET", url, timeout=5).json()
                 hitokoto = res["hitokoto"] + "    ----" + res["from"]
                 return content + "\n\n" + hitokoto
             except Exception as e:
                 self.logger.warning(f"获取一言失败: {str(e)}")
         return content
     
-    def _send_concurrent_notifications(self, title: str, content: str, notifiers: List, attachments: List[AttachmentInfo] = None) -> NotificationSummary:
+    def _send_concurrent_notifications(self, title: str, content: str, notifiers: List, attachments: List[AttachmentInfo] = None,
+                                       deliveries: Optional[OutboxEntry] = None,
+                                       dead_letter: Optional[DeadLetterEntry] = None,
+                                       priority: Optional[str] = None) -> NotificationSummary:
         """
         并发发送通知到多个渠道，支持超时控制和资源管理
         
@@ -285,6 +955,10 @@ class NotificationHandler:
             title: 通知标题
             content: 通知内容
             notifiers: 通知器列表
+            attachments: 附件列表
+            deliveries: 发件箱中的投递，得到发送结果后更新投递状态
+            dead_letter: 死信记录，最终失败的渠道写入死信队列
+            priority: 优先级通道，包括重试在内的每次尝试都在该通道排队
             
         Returns:
             NotificationSummary: 发送结果汇总
@@ -297,67 +971,351 @@ class NotificationHandler:
             self.logger.warning("没有可用的通知器")
             return NotificationSummary(0, [], [], ["没有可用的通知器"])
         
-        # 获取配置的超时时间和最大工作线程数
-        timeout = int(self.config_manager.get_config("NOTIFICATION_TIMEOUT", 30))
-        max_workers = min(len(notifiers), int(self.config_manager.get_config("MAX_CONCURRENT_NOTIFICATIONS", 10)))
+        submit = functools.partial(self._submit, lane=priority)
         
-        self.logger.info(f"开始并发发送通知到 {len(notifiers)} 个渠道，使用 {max_workers} 个工作线程，超时时间 {timeout} 秒")
+        # 所有渠道共用一个截止时间，请求超时和重试都不会超过它
+        deadline = self._new_deadline()
+        self.start()
         
-        # 使用线程池并发发送，确保资源管理
-        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="NotificationSender") as executor:
-            # 提交所有发送任务
-            future_to_notifier = {}
-            for notifier in notifiers:
-                try:
-                    future = executor.submit(self._send_single_notification, notifier, title, content, attachments)
-                    future_to_notifier[future] = notifier
-                except Exception as e:
-                    # 提交任务失败
-                    channel_name = notifier.get_name()
-                    failed_channels.append(channel_name)
-                    error_msg = f"提交发送任务失败: {str(e)}"
-                    errors.append(f"{channel_name}: {error_msg}")
-                    self.logger.error(f"{channel_name} 提交任务失败: {error_msg}")
-            
-            # 收集结果，使用超时控制
-            completed_count = 0
-            for future in as_completed(future_to_notifier, timeout=timeout + 10):  # 额外10秒缓冲
+        self.logger.info(f"开始并发发送通知到 {len(notifiers)} 个渠道，使用共享线程池（最大 {self._max_workers} 个工作线程），超时时间 {deadline.timeout:g} 秒")
+        
+        # 提交所有发送任务到共享线程池
+        future_to_notifier = {}
+        retry_handlers = {}
+        for notifier in notifiers:
+            retry_handler = self._build_retry_handler(notifier, deadline)
+            try:
+                future = retry_handler.submit_with_retry(
+                    submit, self._execute_notification_send, notifier, title, content, attachments
+                )
+                future_to_notifier[future] = notifier
+                retry_handlers[future] = retry_handler
+            except Exception as e:
+                # 提交任务失败
+                channel_name = notifier.get_name()
+                failed_channels.append(channel_name)
+                error_msg = f"提交发送任务失败: {str(e)}"
+                errors.append(f"{channel_name}: {error_msg}")
+                self._record_delivery(deliveries, notifier, False, error_msg)
+                self._record_dead_letter(dead_letter, notifier, False, error_msg, retry_handler, ERROR_EXCEPTION)
+                self.logger.error(f"{channel_name} 提交任务失败: {error_msg}")
+        
+        # 收集结果，使用超时控制
+        completed_count = 0
+        try:
+            for future in as_completed(future_to_notifier, timeout=deadline.remaining()):
                 notifier = future_to_notifier[future]
                 channel_name = notifier.get_name()
                 completed_count += 1
                 
                 try:
-                    result = future.result(timeout=1)  # 快速获取已完成的结果
-                    if result.success:
-                        successful_channels.append(result.channel)
-                        self.logger.info(f"[{completed_count}/{len(future_to_notifier)}] {result.channel} 推送成功: {result.message}")
-                    else:
-                        failed_channels.append(result.channel)
-                        error_msg = result.error or "未知错误"
-                        errors.append(f"{result.channel}: {error_msg}")
-                        self.logger.error(f"[{completed_count}/{len(future_to_notifier)}] {result.channel} 推送失败: {error_msg}")
-                        
+                    result = self._validate_result(channel_name, future.result(timeout=1))  # 快速获取已完成的结果
                 except Exception as e:
-                    # 处理超时或其他异常
+                    # 重试耗尽或遇到不可重试的异常
+                    result = self._create_retry_failure_result(channel_name, e)
+                
+                self._record_delivery(deliveries, notifier, result.success, result.error)
+                self._record_dead_letter(dead_letter, notifier, result.success, result.error, retry_handlers[future])
+                if result.success:
+                    successful_channels.append(result.channel)
+                    self.logger.info(f"[{completed_count}/{len(future_to_notifier)}] {result.channel} 推送成功: {result.message}")
+                else:
+                    failed_channels.append(result.channel)
+                    error_msg = result.error or "未知错误"
+                    errors.append(f"{result.channel}: {error_msg}")
+                    self.logger.error(f"[{completed_count}/{len(future_to_notifier)}] {result.channel} 推送失败: {error_msg}")
+        except TimeoutError:
+            pass
+        
+        # 检查是否有未完成的任务
+        remaining_futures = [f for f in future_to_notifier.keys() if not f.done()]
+        if remaining_futures:
+            self.logger.warning(f"有 {len(remaining_futures)} 个通知任务未在超时时间内完成")
+            for future in remaining_futures:
+                notifier = future_to_notifier[future]
+                channel_name = notifier.get_name()
+                if channel_name not in failed_channels:
                     failed_channels.append(channel_name)
-                    error_msg = f"获取发送结果异常: {str(e)}"
-                    errors.append(f"{channel_name}: {error_msg}")
-                    self.logger.error(f"[{completed_count}/{len(future_to_notifier)}] {channel_name} 获取结果异常: {error_msg}")
-            
-            # 检查是否有未完成的任务
-            remaining_futures = [f for f in future_to_notifier.keys() if not f.done()]
-            if remaining_futures:
-                self.logger.warning(f"有 {len(remaining_futures)} 个通知任务未在超时时间内完成")
-                for future in remaining_futures:
-                    notifier = future_to_notifier[future]
-                    channel_name = notifier.get_name()
-                    if channel_name not in failed_channels:
-                        failed_channels.append(channel_name)
-                        errors.append(f"{channel_name}: 发送超时")
-                    future.cancel()  # 尝试取消未完成的任务
-        
-        # 记录汇总结果
-        total = len(notifiers)
+                    errors.append(f"{channel_name}: 发送超时")
+                    self._record_delivery(deliveries, notifier, False, "发送超时")
+                    self._record_dead_letter(dead_letter, notifier, False, "发送超时", retry_handlers[future], ERROR_TIMEOUT)
+                # 放弃仍在排队或等待重试的任务；正在执行的请求受截止时间约束，会很快自行结束
+                future.cancel()
+        
+        return self._build_summary(len(notifiers), successful_channels, failed_channels, errors)
+    
+    async def _send_concurrent_notifications_async(self, title: str, content: str, notifiers: List, attachments: List[AttachmentInfo] = None,
+                                                   deliveries: Optional[OutboxEntry] = None,
+                                                   dead_letter: Optional[DeadLetterEntry] = None) -> NotificationSummary:
+        """
+        在事件循环中并发发送通知，超时后真正取消未完成的发送任务
+        
+        Args:
+            title: 通知标题
+            content: 通知内容
+            notifiers: 通知器列表
+            attachments: 附件列表
+            deliveries: 发件箱中的投递，得到发送结果后更新投递状态
+            dead_letter: 死信记录，最终失败的渠道写入死信队列
+            
+        Returns:
+            NotificationSummary: 发送结果汇总
+        """
+        successful_channels = []
+        failed_channels = []
+        errors = []
+        
+        if not notifiers:
+            self.logger.warning("没有可用的通知器")
+            return NotificationSummary(0, [], [], ["没有可用的通知器"])
+        
+        deadline = self._new_deadline()
+        self.logger.info(f"开始异步发送通知到 {len(notifiers)} 个渠道，超时时间 {deadline.timeout:g} 秒")
+        
+        retry_handlers = [self._build_retry_handler(notifier, deadline) for notifier in notifiers]
+        tasks = [
+            asyncio.ensure_future(self._send_single_notification_async(notifier, title, content, attachments, deadline, retry_handler))
+            for notifier, retry_handler in zip(notifiers, retry_handlers)
+        ]
+        done, pending = await asyncio.wait(tasks, timeout=deadline.remaining())
+        
+        # 取消超时的任务，并等待取消完成
+        for task in pending:
+            task.cancel()
+        if pending:
+            self.logger.warning(f"有 {len(pending)} 个通知任务未在超时时间内完成，已取消")
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        for notifier, task, retry_handler in zip(notifiers, tasks, retry_handlers):
+            channel_name = notifier.get_name()
+            if task in pending:
+                failed_channels.append(channel_name)
+                errors.append(f"{channel_name}: 发送超时")
+                self._record_delivery(deliveries, notifier, False, "发送超时")
+                self._record_dead_letter(dead_letter, notifier, False, "发送超时", retry_handler, ERROR_TIMEOUT)
+                continue
+            
+            result = task.result()
+            self._record_delivery(deliveries, notifier, result.success, result.error)
+            self._record_dead_letter(dead_letter, notifier, result.success, result.error, retry_handler)
+            if result.success:
+                successful_channels.append(result.channel)
+                self.logger.info(f"{result.channel} 推送成功: {result.message}")
+            else:
+                failed_channels.append(result.channel)
+                error_msg = result.error or "未知错误"
+                errors.append(f"{result.channel}: {error_msg}")
+                self.logger.error(f"{result.channel} 推送失败: {error_msg}")
+        
+        return self._build_summary(len(notifiers), successful_channels, failed_channels, errors)
+    
+    def claim_outbox(self) -> List[PendingMessage]:
+        """
+        取出发件箱中上次运行未完成的投递，之后写入的通知不在其中
+        
+        Returns:
+            List[PendingMessage]: 待恢复的通知，未启用发件箱或读取失败时为空
+        """
+        outbox = self.outbox
+        if outbox is None:
+            return []
+        try:
+            return outbox.claim_pending()
+        except Exception as e:
+            self.logger.error(f"读取发件箱失败: {str(e)}")
+            return []
+    
+    def resume_outbox(self, pending_messages: Optional[List[PendingMessage]] = None) -> List[NotificationSummary]:
+        """
+        重新发送发件箱中上次运行未完成的投递（进程崩溃或运行被取消时留下），只发送到未完成的渠道
+        
+        Args:
+            pending_messages: 已由 claim_outbox() 取出的待恢复通知，为 None 时在这里取出
+            
+        Returns:
+            List[NotificationSummary]: 每条恢复的通知的发送结果
+        """
+        outbox = self.outbox
+        if outbox is None:
+            return []
+        if pending_messages is None:
+            pending_messages = self.claim_outbox()
+        if pending_messages:
+            self.logger.info(f"发件箱中有 {len(pending_messages)} 条未完成的通知，开始恢复发送")
+        
+        summaries = []
+        for message in pending_messages:
+            with self.config_manager.pinned():
+                notifiers = self.get_active_notifiers(list(message.deliveries))
+                
+                # 已不再生效的渠道无法恢复，直接标记为失败
+                entry = OutboxEntry(outbox, message.deliveries)
+                active_channels = {get_notifier_channel(notifier) for notifier in notifiers}
+                for channel in message.deliveries:
+                    if channel not in active_channels:
+                        self._mark_delivery(entry, channel, False, "渠道已不再生效")
+                if not notifiers:
+                    continue
+                
+                attachments = [AttachmentInfo(**item) for item in message.attachments if os.path.exists(item.get('filepath', ''))]
+                if len(attachments) < len(message.attachments):
+                    self.logger.warning(f"恢复的通知 {message.title} 有 {len(message.attachments) - len(attachments)} 个附件文件已不存在")
+                
+                self.logger.info(f"恢复发送通知 {message.title}，渠道: {', '.join(sorted(active_channels))}")
+                dead_letter = self._new_dead_letter(message.title, message.content, message.source, message.severity, attachments,
+                                                    notifiers)
+                summaries.append(self._send_concurrent_notifications(
+                    message.title, message.content, notifiers, attachments, entry, dead_letter
+                ))
+        return summaries
+    
+    def _open_outbox(self, config: OutboxConfig) -> Optional[Outbox]:
+        """打开发件箱，未配置数据库路径或打开失败时返回 None"""
+        if not config.path:
+            return None
+        try:
+            return Outbox(config)
+        except Exception as e:
+            self.logger.error(f"打开发件箱 {config.path} 失败，发送不会持久化: {str(e)}")
+            return None
+    
+    def _enqueue_outbox(self, title: str, content: str, source: str, severity: str,
+                        attachments: Optional[List[AttachmentInfo]], notifiers: List) -> Optional[OutboxEntry]:
+        """
+        发送前将通知和各渠道的投递写入发件箱
+        
+        Returns:
+            Optional[OutboxEntry]: 各渠道的投递，未启用发件箱或写入失败时返回 None
+        """
+        outbox = self.outbox
+        if outbox is None:
+            return None
+        try:
+            return outbox.enqueue(
+                title, content, source, severity,
+                [asdict(attachment) for attachment in attachments or []],
+                [get_notifier_channel(notifier) for notifier in notifiers],
+            )
+        except Exception as e:
+            # 发件箱不可用时仍然发送，只是不再保证崩溃后恢复
+            self.logger.error(f"写入发件箱失败，本次发送不会持久化: {str(e)}")
+            return None
+    
+    def _record_delivery(self, deliveries: Optional[OutboxEntry], notifier, success: bool, error: Optional[str] = None) -> None:
+        """在发件箱中记录渠道的发送结果"""
+        if deliveries is not None:
+            self._mark_delivery(deliveries, get_notifier_channel(notifier), success, error)
+    
+    def _mark_delivery(self, deliveries: OutboxEntry, channel: str, success: bool, error: Optional[str] = None) -> None:
+        try:
+            deliveries.mark(channel, success, error)
+        except Exception as e:
+            self.logger.error(f"更新发件箱投递状态失败: {str(e)}")
+    
+    def replay_dead_letters(self, channel: Optional[str] = None, since: Optional[float] = None,
+                            error_type: Optional[str] = None, limit: Optional[int] = None) -> List[NotificationSummary]:
+        """
+        通过正常的发送流程（限流、熔断、重试和发件箱）重放死信，只发送到当初失败的渠道
+        
+        重放成功的死信标记为已重放；再次失败时更新错误和尝试记录，不会产生新的死信。
+        同一条通知在同一渠道上的多条死信只发送一次。
+        
+        Args:
+            channel: 只重放该渠道的死信
+            since: 只重放该时间（Unix 时间戳）之后写入的死信
+            error_type: 只重放该错误分类的死信
+            limit: 最多重放的死信数
+            
+        Returns:
+            List[NotificationSummary]: 每条重放的通知的发送结果
+        """
+        store = self.dead_letters
+        if store is None:
+            self.logger.warning("未配置死信队列数据库路径，没有可以重放的死信")
+            return []
+        letters = store.query(channel, since, error_type, limit=limit)
+        if letters:
+            self.logger.info(f"开始重放 {len(letters)} 条死信")
+        
+        # 按通知内容分组，同一条通知的多个渠道一起发送
+        groups: Dict[str, DeadLetterEntry] = {}
+        for letter in letters:
+            entry = groups.get(letter.payload)
+            if entry is None:
+                entry = groups[letter.payload] = DeadLetterEntry(store, letter.message, {})
+            entry.letters.setdefault(letter.channel, []).append(letter.id)
+        
+        summaries = []
+        for entry in groups.values():
+            message = entry.message
+            with self.config_manager.pinned():
+                notifiers = self.get_active_notifiers(list(entry.letters))
+                inactive = set(entry.letters) - {get_notifier_channel(notifier) for notifier in notifiers}
+                if inactive:
+                    self.logger.warning(f"死信 {message.title} 的渠道 {', '.join(sorted(inactive))} 已不再生效，跳过重放")
+                if not notifiers:
+                    continue
+                
+                attachments = [AttachmentInfo(**item) for item in message.attachments if os.path.exists(item.get('filepath', ''))]
+                if len(attachments) < len(message.attachments):
+                    self.logger.warning(f"重放的通知 {message.title} 有 {len(message.attachments) - len(attachments)} 个附件文件已不存在")
+                
+                deliveries = self._enqueue_outbox(message.title, message.content, message.source, message.severity,
+                                                  attachments, notifiers)
+                entry = DeadLetterEntry(store, message, entry.letters, [get_notifier_channel(notifier) for notifier in notifiers])
+                # 批量重放在最低优先级通道排队，不影响正常通知
+                summaries.append(self._send_concurrent_notifications(
+                    message.title, message.content, notifiers, attachments, deliveries, entry, priority=PRIORITY_LANES[-1]
+                ))
+        return summaries
+    
+    def _open_dead_letters(self, config: DeadLetterConfig) -> Optional[DeadLetterStore]:
+        """打开死信队列，未配置数据库路径或打开失败时返回 None"""
+        if not config.path:
+            return None
+        try:
+            return DeadLetterStore(config)
+        except Exception as e:
+            self.logger.error(f"打开死信队列 {config.path} 失败，失败的投递不会保存: {str(e)}")
+            return None
+    
+    def _new_dead_letter(self, title: str, content: str, source: str, severity: str,
+                         attachments: Optional[List[AttachmentInfo]], notifiers: List) -> Optional[DeadLetterEntry]:
+        """创建本次发送的死信记录，未启用死信队列时返回 None"""
+        store = self.dead_letters
+        if store is None:
+            return None
+        message = DeadLetterMessage(title, content, source, severity, [asdict(attachment) for attachment in attachments or []])
+        return DeadLetterEntry(store, message, channels=[get_notifier_channel(notifier) for notifier in notifiers])
+    
+    def _record_dead_letter(self, dead_letter: Optional[DeadLetterEntry], notifier, success: bool, error: Optional[str] = None,
+                            retry_handler: Optional[RetryHandler] = None, error_type: Optional[str] = None) -> None:
+        """
+        在死信队列中记录渠道的发送结果
+        
+        Args:
+            dead_letter: 死信记录
+            notifier: 通知器实例
+            success: 是否发送成功
+            error: 失败原因
+            retry_handler: 本次发送的重试处理器，从中读取每次尝试的记录
+            error_type: 错误分类，为 None 时取最后一次尝试的分类
+        """
+        if dead_letter is None:
+            return
+        attempts = []
+        if not success:
+            attempts = [asdict(attempt) for attempt in (retry_handler.attempts if retry_handler is not None else ())]
+            if error_type is None:
+                # 最后一次尝试没有抛出异常，说明通知器返回了不可重试的失败结果
+                error_type = (attempts[-1]['error_type'] if attempts else None) or ERROR_REJECTED
+        try:
+            dead_letter.record(get_notifier_channel(notifier), success, error, error_type, attempts)
+        except Exception as e:
+            self.logger.error(f"写入死信队列失败: {str(e)}")
+    
+    def _build_summary(self, total: int, successful_channels: List[str], failed_channels: List[str], errors: List[str]) -> NotificationSummary:
+        """记录并构建发送结果汇总"""
         success_count = len(successful_channels)
         failure_count = len(failed_channels)
         
@@ -376,22 +1334,50 @@ class NotificationHandler:
             errors=errors
         )
     
-    def _send_single_notification(self, notifier, title: str, content: str, attachments: List[AttachmentInfo] = None) -> NotificationResult:
+    async def _send_single_notification_async(self, notifier, title: str, content: str, attachments: List[AttachmentInfo] = None,
+                                              deadline: Optional[Deadline] = None,
+                                              retry_handler: Optional[RetryHandler] = None) -> NotificationResult:
         """
-        发送单个通知，包含错误处理、重试机制和日志记录
+        在事件循环中发送单个通知，重试等待不占用线程
         
         Args:
             notifier: 通知器实例
             title: 通知标题
             content: 通知内容
+            deadline: 截止时间，为 None 时按 NOTIFICATION_TIMEOUT 计算
+            retry_handler: 重试处理器，调用方需要读取尝试记录时传入
             
         Returns:
             NotificationResult: 发送结果
         """
         channel_name = notifier.get_name()
+        retry_handler = retry_handler or self._build_retry_handler(notifier, deadline or self._new_deadline())
         
-        # 配置重试机制
-        retry_config = RetryConfig(
+        try:
+            self.logger.debug(f"开始异步发送通知到 {channel_name}")
+            result = await retry_handler.execute_with_retry_async(self._execute_notification_send_async, notifier, title, content, attachments)
+            return self._validate_result(channel_name, result)
+            
+        except Exception as e:
+            return self._create_retry_failure_result(channel_name, e)
+    
+    def _new_deadline(self) -> Deadline:
+        """按 NOTIFICATION_TIMEOUT 创建本次发送的截止时间"""
+        return Deadline(float(self.config_manager.get_config("NOTIFICATION_TIMEOUT", 30)))
+    
+    def _build_retry_handler(self, notifier, deadline: Optional[Deadline] = None) -> RetryHandler:
+        """为通知器创建带渠道熔断器和截止时间的重试处理器"""
+        channel = get_notifier_channel(notifier) or notifier.get_name()
+        return RetryHandler(
+            self._build_retry_config(),
+            circuit_breaker=self.circuit_breakers.get(channel),
+            scheduler=self._retry_scheduler,
+            deadline=deadline,
+        )
+    
+    def _build_retry_config(self) -> RetryConfig:
+        """根据配置构建重试机制"""
+        return RetryConfig(
             max_attempts=int(self.config_manager.get_config("NOTIFICATION_RETRY_ATTEMPTS", 2)),
             base_delay=float(self.config_manager.get_config("NOTIFICATION_RETRY_DELAY", 1.0)),
             max_delay=float(self.config_manager.get_config("NOTIFICATION_MAX_RETRY_DELAY", 10.0)),
@@ -400,39 +1386,30 @@ class NotificationHandler:
             jitter=True,
             retryable_exceptions=[NetworkError, TemporaryError, ConnectionError, TimeoutError]
         )
-        
-        retry_handler = RetryHandler(retry_config)
-        
-        try:
-            # 记录发送开始
-            self.logger.debug(f"开始发送通知到 {channel_name}")
-            
-            # 使用重试机制执行发送
-            result = retry_handler.execute_with_retry(self._execute_notification_send, notifier, title, content, attachments)
-            
-            # 验证结果
-            if not isinstance(result, NotificationResult):
-                self.logger.error(f"{channel_name} 返回了无效的结果类型: {type(result)}")
-                return NotificationResult(
-                    success=False,
-                    channel=channel_name,
-                    message="发送失败",
-                    error="通知器返回了无效的结果类型"
-                )
-            
-            return result
-            
-        except Exception as e:
-            # 捕获所有异常，确保单个通知器失败不影响其他通知器
-            error_msg = self._format_error_message(e)
-            self.logger.error(f"{channel_name} 发送失败（已重试）: {error_msg}")
-            
+    
+    def _validate_result(self, channel_name: str, result: Any) -> NotificationResult:
+        """验证通知器返回的结果类型"""
+        if not isinstance(result, NotificationResult):
+            self.logger.error(f"{channel_name} 返回了无效的结果类型: {type(result)}")
             return NotificationResult(
                 success=False,
                 channel=channel_name,
                 message="发送失败",
-                error=error_msg
+                error="通知器返回了无效的结果类型"
             )
+        return result
+    
+    def _create_retry_failure_result(self, channel_name: str, exception: Exception) -> NotificationResult:
+        """重试耗尽或遇到不可重试的异常时构建失败结果，确保单个通知器失败不影响其他通知器"""
+        error_msg = self._format_error_message(exception)
+        self.logger.error(f"{channel_name} 发送失败（已重试）: {error_msg}")
+        
+        return NotificationResult(
+            success=False,
+            channel=channel_name,
+            message="发送失败",
+            error=error_msg
+        )
     
     def _execute_notification_send(self, notifier, title: str, content: str, attachments: List[AttachmentInfo] = None) -> NotificationResult:
         """
@@ -449,34 +1426,90 @@ class NotificationHandler:
         Raises:
             NetworkError: 网络相关错误
             TemporaryError: 临时性错误
+            RateLimitExceededError: 限流等待会超过发送时限，不可重试
         """
+        # 每次尝试（包括重试）都计入服务商的频率限制，等待不超过发送时限
+        channel = get_notifier_channel(notifier)
+        if channel:
+            self.rate_limiter.acquire(channel)
+        
         try:
             # 检查通知器是否支持附件
             if attachments and hasattr(notifier, 'send_with_attachments'):
                 result = notifier.send_with_attachments(title, content, attachments)
             else:
                 result = notifier.send(title, content)
+        except Exception as e:
+            raise self._translate_send_exception(e)
+        
+        return self._check_send_result(result)
+    
+    async def _execute_notification_send_async(self, notifier, title: str, content: str, attachments: List[AttachmentInfo] = None) -> NotificationResult:
+        """
+        异步执行通知发送的核心逻辑，可能会抛出可重试的异常
+        
+        Args:
+            notifier: 通知器实例
+            title: 通知标题
+            content: 通知内容
             
-            # 如果通知器返回失败结果，检查是否为可重试的错误
-            if not result.success and self._is_retryable_error(result.error):
-                if "网络" in str(result.error) or "连接" in str(result.error) or "timeout" in str(result.error).lower():
-                    raise NetworkError(f"网络错误: {result.error}")
-                elif "临时" in str(result.error) or "temporary" in str(result.error).lower():
-                    raise TemporaryError(f"临时错误: {result.error}")
-            
-            return result
+        Returns:
+            NotificationResult: 发送结果
+        """
+        channel = get_notifier_channel(notifier)
+        if channel:
+            await self.rate_limiter.acquire_async(channel)
+        
+        try:
+            if attachments and hasattr(notifier, 'send_with_attachments'):
+                result = await asyncio.to_thread(notifier.send_with_attachments, title, content, attachments)
+            else:
+                result = await notifier.send_async(title, content)
+        except Exception as e:
+            raise self._translate_send_exception(e)
+        
+        return self._check_send_result(result)
+    
+    def _check_send_result(self, result: NotificationResult) -> NotificationResult:
+        """
+        如果通知器返回失败结果，检查是否为可重试的错误
+        
+        Raises:
+            NetworkError: 网络相关错误
+            TemporaryError: 临时性错误
+        """
+        if isinstance(result, NotificationResult) and not result.success and self._is_retryable_error(result.error):
+            if "网络" in str(result.error) or "连接" in str(result.error) or "timeout" in str(result.error).lower():
+                raise NetworkError(f"网络错误: {result.error}")
+            elif "临时" in str(result.error) or "temporary" in str(result.error).lower():
+                raise TemporaryError(f"临时错误: {result.error}")
+        return result
+    
+    def _translate_send_exception(self, exception: Exception) -> Exception:
+        """
+        将发送过程中的异常转换为重试机制可识别的异常
+        
+        Args:
+            exception: 原始异常
             
-        except (ConnectionError, TimeoutError) as e:
+        Returns:
+            Exception: 需要抛出的异常
+        """
+        if isinstance(exception, DeadlineExceededError):
+            # 发送时限已到，不可重试
+            return exception
+        
+        if isinstance(exception, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
             # 将网络相关异常转换为可重试的异常
-            raise NetworkError(f"网络连接异常: {str(e)}")
-        except Exception as e:
-            # 检查异常消息是否表明这是一个可重试的错误
-            error_msg = str(e).lower()
-            if any(keyword in error_msg for keyword in ["timeout", "connection", "network", "temporary", "503", "502", "504"]):
-                raise NetworkError(f"网络相关异常: {str(e)}")
-            else:
-                # 不可重试的异常，直接抛出
-                raise e
+            return NetworkError(f"网络连接异常: {str(exception)}")
+        
+        # 检查异常消息是否表明这是一个可重试的错误
+        error_msg = str(exception).lower()
+        if any(keyword in error_msg for keyword in ["timeout", "connection", "network", "temporary", "503", "502", "504"]):
+            return NetworkError(f"网络相关异常: {str(exception)}")
+        
+        # 不可重试的异常，直接抛出
+        return exception
     
     def _is_retryable_error(self, error_msg: Optional[str]) -> bool:
         """
@@ -514,7 +1547,11 @@ class NotificationHandler:
         error_msg = str(exception)
         
         # 根据异常类型提供更友好的描述
-        if isinstance(exception, NetworkError):
+        if isinstance(exception, CircuitOpenError):
+            return f"熔断: {error_msg}"
+        elif isinstance(exception, DeadlineExceededError):
+            return f"发送超时: {error_msg}"
+        elif isinstance(exception, NetworkError):
             return f"网络错误: {error_msg}"
         elif isinstance(exception, TemporaryError):
             return f"临时错误: {error_msg}"
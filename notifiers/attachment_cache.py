@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+附件缓存
+按文件内容的 sha256 保存已编码的 MIME 部分内容和各渠道上传后得到的媒体 ID：
+同一个报告文件附加到多条通知时，整个进程只读取和 base64 编码一次。
+编码结果保存在按字节数限制的 LRU 中，超出内存预算的条目可以转存到磁盘目录。
+单个条目的内存上限默认 1 MiB：大附件只转存或不缓存，进程的内存占用不随附件大小增长
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 计算文件摘要时每次读取的大小
+_HASH_CHUNK = 1024 * 1024
+# 转存文件读取时每块的大小
+_SPILL_CHUNK = 64 * 1024
+# 记住摘要的文件数和媒体 ID 数上限
+_MAX_DIGESTS = 4096
+_MAX_MEDIA_IDS = 4096
+_SPILL_SUFFIX = '.part'
+
+
+class _Entry:
+    """内存中的一个已编码部分"""
+
+    __slots__ = ('chunks', 'size')
+
+    def __init__(self, chunks: List[bytes], size: int):
+        self.chunks = chunks
+        self.size = size
+
+
+class AttachmentCache:
+    """
+    按内容寻址的附件缓存
+
+    内存中的条目按最近使用排序，总大小超过 max_bytes 时淘汰最久未使用的条目，大于 max_entry_bytes 的条目不放入内存；
+    设置了 spill_dir 时，被淘汰的条目和不放入内存的条目写入该目录，目录总大小不超过 max_spill_bytes。
+    转存文件以摘要命名，先写临时文件再重命名，目录保留时下次运行可以直接复用。
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, spill_dir: Optional[str] = None,
+                 max_spill_bytes: int = 512 * 1024 * 1024, max_entry_bytes: int = 1024 * 1024):
+        """
+        初始化缓存
+
+        Args:
+            max_bytes: 内存中已编码内容的总字节数上限，0 表示不在内存中缓存
+            spill_dir: 转存目录，为 None 时不转存
+            max_spill_bytes: 转存目录中文件的总字节数上限
+            max_entry_bytes: 单个条目在内存中缓存的字节数上限，更大的条目只转存
+        """
+        self.max_bytes = max(0, max_bytes)
+        self.max_entry_bytes = max(0, max_entry_bytes)
+        self.spill_dir = spill_dir
+        self.max_spill_bytes = max(0, max_spill_bytes) if spill_dir else 0
+        self._entries: 'OrderedDict[str, _Entry]' = OrderedDict()
+        self._spilled: 'OrderedDict[str, int]' = OrderedDict()
+        self._digests: 'OrderedDict[Tuple[int, int, int, int], str]' = OrderedDict()
+        self._media: 'OrderedDict[Tuple[str, str], Tuple[str, Optional[float]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._spill_bytes = 0
+        self._hits = 0
+        self._spill_hits = 0
+        self._misses = 0
+        if self.spill_dir:
+            self._load_spill_dir()
+
+    def file_digest(self, path: str) -> str:
+        """
+        计算文件内容的 sha256，文件未变化（设备、inode、大小、修改时间相同）时直接返回上次的结果
+
+        Args:
+            path: 文件路径
+
+        Returns:
+            str: 十六进制摘要
+        """
+        stat = os.stat(path)
+        key = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._digests.get(key)
+            if digest is not None:
+                self._digests.move_to_end(key)
+                return digest
+        sha256 = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+                sha256.update(chunk)
+        digest = sha256.hexdigest()
+        with self._lock:
+            self._digests[key] = digest
+            if len(self._digests) > _MAX_DIGESTS:
+                self._digests.popitem(last=False)
+        return digest
+
+    def get_encoded(self, digest: str) -> Optional[Iterator[bytes]]:
+        """
+        获取已编码的内容
+
+        Args:
+            digest: 原始内容的 sha256
+
+        Returns:
+            Optional[Iterator[bytes]]: 按块读取编码结果的迭代器，未缓存时返回 None
+        """
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+                self._hits += 1
+                return iter(entry.chunks)
+            if digest in self._spilled:
+                try:
+                    # 打开后再释放锁：文件随后被淘汰删除也不影响本次读取
+                    f = open(self._spill_path(digest), 'rb')
+                except OSError:
+                    self._spill_bytes -= self._spilled.pop(digest)
+                else:
+                    self._spilled.move_to_end(digest)
+                    self._spill_hits += 1
+                    return _read_file(f)
+            self._misses += 1
+            return None
+
+    def put_encoded(self, digest: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        原样产出编码结果，同时保存到缓存；调用方消费完迭代器后条目才会加入缓存
+
+        内容不超过内存预算和单条目上限时保存在内存中，超过时写入转存目录，两者都放不下时不缓存。
+
+        Args:
+            digest: 原始内容的 sha256
+            chunks: 编码结果
+
+        Yields:
+            bytes: 与 chunks 相同的内容
+        """
+        memory_limit = min(self.max_bytes, self.max_entry_bytes)
+        kept: List[bytes] = []
+        spill = None
+        caching = True
+        size = 0
+        try:
+            for chunk in chunks:
+                yield chunk
+                if not caching:
+                    continue
+                size += len(chunk)
+                if spill is None:
+                    kept.append(chunk)
+                    if size > memory_limit:
+                        spill = self._open_spill(kept, size)
+                        kept = []
+                        caching = spill is not None
+                else:
+                    if not _write_spill(spill, chunk) or size > self.max_spill_bytes:
+                        _discard_spill(spill)
+                        spill = None
+                        caching = False
+            if caching:
+                if spill is not None:
+                    self._commit_spill(digest, spill, size)
+                    spill = None
+                else:
+                    self._commit_memory(digest, kept, size)
+        finally:
+            if spill is not None:
+                _discard_spill(spill)
+
+    def get_media_id(self, channel: str, digest: str) -> Optional[str]:
+        """
+        获取渠道为该内容上传后得到的媒体 ID，过期或没有时返回 None
+
+        Args:
+            channel: 渠道名
+            digest: 原始内容的 sha256
+        """
+        key = (channel, digest)
+        with self._lock:
+            item = self._media.get(key)
+            if item is None:
+                return None
+            media_id, expires_at = item
+            if expires_at is not None and time.time() >= expires_at:
+                del self._media[key]
+                return None
+            self._media.move_to_end(key)
+            return media_id
+
+    def put_media_id(self, channel: str, digest: str, media_id: str, ttl: Optional[float] = None) -> None:
+        """
+        记录渠道为该内容上传后得到的媒体 ID
+
+        Args:
+            channel: 渠道名
+            digest: 原始内容的 sha256
+            media_id: 媒体 ID
+            ttl: 有效期（秒），如企业微信临时素材为 3 天；None 表示不过期
+        """
+        with self._lock:
+            self._media[(channel, digest)] = (media_id, time.time() + ttl if ttl is not None else None)
+            self._media.move_to_end((channel, digest))
+            if len(self._media) > _MAX_MEDIA_IDS:
+                self._media.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取缓存指标
+
+        Returns:
+            Dict[str, int]: 命中、未命中次数，内存和转存目录中的条目数与字节数，媒体 ID 数
+        """
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'spill_hits': self._spill_hits,
+                'misses': self._misses,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'spilled_entries': len(self._spilled),
+                'spill_bytes': self._spill_bytes,
+                'media_ids': len(self._media),
+            }
+
+    def clear(self) -> None:
+        """清空内存中的条目和媒体 ID，转存目录中的文件保留"""
+        with self._lock:
+            self._entries.clear()
+            self._media.clear()
+            self._digests.clear()
+            self._bytes = 0
+
+    def _commit_memory(self, digest: str, chunks: List[bytes], size: int) -> None:
+        spill: List[Tuple[str, _Entry]] = []
+        with self._lock:
+            if digest in self._entries:
+                return
+            self._entries[digest] = _Entry(chunks, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                evicted_digest, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                if self.spill_dir and evicted_digest not in self._spilled:
+                    spill.append((evicted_digest, evicted))
+        for evicted_digest, evicted in spill:
+            if evicted.size > self.max_spill_bytes:
+                continue
+            f = self._open_spill(evicted.chunks, evicted.size)
+            if f is not None:
+                self._commit_spill(evicted_digest, f, evicted.size)
+
+    def _open_spill(self, chunks: List[bytes], size: int):
+        """在转存目录中创建临时文件并写入已有的内容；不转存或写入失败时返回 None"""
+        if not self.spill_dir or size > self.max_spill_bytes:
+            return None
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            f = tempfile.NamedTemporaryFile(dir=self.spill_dir, suffix='.tmp', delete=False)
+        except OSError as e:
+            logger.warning(f"附件缓存转存失败: {str(e)}")
+            return None
+        for chunk in chunks:
+            if not _write_spill(f, chunk):
+                return None
+        return f
+
+    def _commit_spill(self, digest: str, f, size: int) -> None:
+        """把写完的临时文件重命名为以摘要命名的转存文件，并淘汰超出上限的旧文件"""
+        try:
+            f.close()
+            os.replace(f.name, self._spill_path(digest))
+        except OSError as e:
+            logger.warning(f"附件缓存转存失败: {str(e)}")
+            _discard_spill(f)
+            return
+        removed: List[str] = []
+        with self._lock:
+            self._spill_bytes -= self._spilled.pop(digest, 0)
+            self._spilled[digest] = size
+            self._spill_bytes += size
+            while self._spill_bytes > self.max_spill_bytes and len(self._spilled) > 1:
+                removed_digest, removed_size = self._spilled.popitem(last=False)
+                self._spill_bytes -= removed_size
+                removed.append(removed_digest)
+        for removed_digest in removed:
+            try:
+                os.remove(self._spill_path(removed_digest))
+            except OSError:
+                pass
+
+    def _load_spill_dir(self) -> None:
+        """登记转存目录中已有的文件，按修改时间从旧到新排列"""
+        try:
+            names = [name for name in os.listdir(self.spill_dir) if name.endswith(_SPILL_SUFFIX)]
+        except OSError:
+            return
+        files = []
+        for name in names:
+            try:
+                stat = os.stat(os.path.join(self.spill_dir, name))
+            except OSError:
+                continue
+            files.append((stat.st_mtime, name[:-len(_SPILL_SUFFIX)], stat.st_size))
+        for _, digest, size in sorted(files):
+            self._spilled[digest] = size
+            self._spill_bytes += size
+        if self._spilled:
+            logger.debug(f"附件缓存转存目录中已有 {len(self._spilled)} 个条目")
+
+    def _spill_path(self, digest: str) -> str:
+        return os.path.join(self.spill_dir, f"{digest}{_SPILL_SUFFIX}")
+
+
+def _read_file(f) -> Iterator[bytes]:
+    with f:
+        for chunk in iter(lambda: f.read(_SPILL_CHUNK), b''):
+            yield chunk
+
+
+def _write_spill(f, chunk: bytes) -> bool:
+    """写入转存文件，失败时删除文件；转存失败不影响邮件发送"""
+    try:
+        f.write(chunk)
+        return True
+    except OSError as e:
+        logger.warning(f"附件缓存转存失败: {str(e)}")
+        _discard_spill(f)
+        return False
+
+
+def _discard_spill(f) -> None:
+    """关闭并删除未完成的临时文件"""
+    try:
+        f.close()
+    except OSError:
+        pass
+    try:
+        os.remove(f.name)
+    except OSError:
+        pass
+
+
+_default_cache: Optional[AttachmentCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_attachment_cache(config_manager=None) -> AttachmentCache:
+    """
+    获取进程内共享的附件缓存，首次调用时根据配置创建
+
+    Args:
+        config_manager: 配置管理器实例，用于读取缓存配置
+
+    Returns:
+        AttachmentCache: 共享的附件缓存
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                if config_manager is not None:
+                    _default_cache = AttachmentCache(
+                        max_bytes=int(config_manager.get_config("ATTACHMENT_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+                        spill_dir=config_manager.get_config("ATTACHMENT_CACHE_DIR"),
+                        max_spill_bytes=int(config_manager.get_config("ATTACHMENT_CACHE_SPILL_BYTES", 512 * 1024 * 1024)),
+                        max_entry_bytes=int(config_manager.get_config("ATTACHMENT_CACHE_MAX_ENTRY_BYTES", 1024 * 1024)),
+                    )
+                else:
+                    _default_cache = AttachmentCache()
+    return _default_cache
+
+
+def close_attachment_cache() -> None:
+    """丢弃共享的附件缓存，转存目录中的文件保留"""
+    global _default_cache
+    with _default_cache_lock:
+        cache = _default_cache
+        _default_cache = None
+    if cache is not None:
+        cache.clear()
@@ -2,15 +2,16 @@
 # -*- coding: utf-8 -*-
 
 import urllib.parse
-import requests
 from typing import Dict, Any
 
-from .base import BaseNotifier, NotificationResult
+from .base import HTTPNotifier, HTTPRequest, NotificationResult
 
 
-class BarkNotifier(BaseNotifier):
+class BarkNotifier(HTTPNotifier):
     """Bark 通知器"""
     
+    missing_config_error = "BARK_PUSH 未设置"
+    
     def get_name(self) -> str:
         return "Bark"
     
@@ -18,46 +19,27 @@ class BarkNotifier(BaseNotifier):
         """检查 Bark 是否已配置"""
         return bool(self.config_manager.get_config("BARK_PUSH"))
     
-    def send(self, title: str, content: str) -> NotificationResult:
-        """发送 Bark 通知"""
-        if not self.is_configured():
-            self._log_not_configured()
-            return self._create_error_result("BARK_PUSH 未设置", "配置错误")
+    def _build_request(self, title: str, content: str) -> HTTPRequest:
+        """构建 Bark 推送请求"""
+        # 构建 URL
+        bark_push = self.config_manager.get_config("BARK_PUSH")
+        if bark_push.startswith("http"):
+            url = f'{bark_push}/{urllib.parse.quote_plus(title)}/{urllib.parse.quote_plus(content)}'
+        else:
+            url = f'https://api.day.app/{bark_push}/{urllib.parse.quote_plus(title)}/{urllib.parse.quote_plus(content)}'
         
-        self._log_send_attempt(title)
+        # 添加可选参数
+        params = self._build_params()
+        if params:
+            url = url + "?" + params.rstrip("&")
         
-        try:
-            # 构建 URL
-            bark_push = self.config_manager.get_config("BARK_PUSH")
-            if bark_push.startswith("http"):
-                url = f'{bark_push}/{urllib.parse.quote_plus(title)}/{urllib.parse.quote_plus(content)}'
-            else:
-                url = f'https://api.day.app/{bark_push}/{urllib.parse.quote_plus(title)}/{urllib.parse.quote_plus(content)}'
-            
-            # 添加可选参数
-            params = self._build_params()
-            if params:
-                url = url + "?" + params.rstrip("&")
-            
-            # 发送请求
-            response = requests.get(url, timeout=15).json()
-            
-            if response.get("code") == 200:
-                self._log_send_success()
-                return self._create_success_result("Bark 推送成功")
-            else:
-                error_msg = response.get("message", "未知错误")
-                self._log_send_failure(error_msg)
-                return self._create_error_result(error_msg, "Bark 推送失败")
-                
-        except requests.exceptions.RequestException as e:
-            error_msg = f"网络请求失败: {str(e)}"
-            self._log_send_failure(error_msg)
-            return self._create_error_result(error_msg, "Bark 推送失败")
-        except Exception as e:
-            error_msg = f"发送异常: {str(e)}"
-            self._log_send_failure(error_msg)
-            return self._create_error_result(error_msg, "Bark 推送失败")
+        return HTTPRequest("GET", url)
+    
+    def _handle_response(self, response: Dict[str, Any]) -> NotificationResult:
+        """解析 Bark 响应"""
+        if response.get("code") == 200:
+            return self._succeed("Bark 推送成功")
+        return self._fail(response.get("message", "未知错误"))
     
     def _build_params(self) -> str:
         """构建可选参数"""
@@ -74,4 +56,4 @@ class BarkNotifier(BaseNotifier):
             if value:
                 params += f"{param_key}={value}&"
         
-        return params
\ No newline at end of file
+        return params
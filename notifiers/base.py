@@ -4,8 +4,11 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Optional, Any, Dict
+import asyncio
 import logging
 
+from deadline import DeadlineExceededError, apply_deadline
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,6 +21,17 @@ class NotificationResult:
     error: Optional[str] = None
 
 
+@dataclass
+class HTTPRequest:
+    """HTTP 请求描述，供同步和异步发送路径共用"""
+    method: str
+    url: str
+    params: Optional[Dict[str, Any]] = None
+    data: Any = None
+    headers: Optional[Dict[str, str]] = None
+    timeout: float = 15
+
+
 class BaseNotifier(ABC):
     """通知器基础抽象类，定义所有通知器的通用接口"""
     
@@ -65,6 +79,55 @@ class BaseNotifier(ABC):
         """
         pass
     
+    async def send_async(self, title: str, content: str) -> NotificationResult:
+        """
+        异步发送通知消息，默认在线程中执行同步的 send()
+        
+        Args:
+            title: 通知标题
+            content: 通知内容
+            
+        Returns:
+            NotificationResult: 发送结果
+        """
+        return await asyncio.to_thread(self.send, title, content)
+    
+    def _get_proxies(self) -> Optional[Dict[str, str]]:
+        """
+        获取请求使用的代理配置，需要代理的通知器可以覆盖此方法
+        
+        Returns:
+            Optional[Dict[str, str]]: requests 格式的代理配置
+        """
+        return None
+    
+    def _http_request(self, method: str, url: str, **kwargs) -> Any:
+        """
+        通过共享的连接池发送 HTTP 请求，同一服务商主机的请求复用连接，
+        超时会按当前发送的截止时间收紧
+        
+        Args:
+            method: HTTP 方法
+            url: 请求 URL
+            **kwargs: 传递给 requests 的其他参数
+            
+        Returns:
+            requests.Response: 响应对象
+        """
+        from .transport import get_session_pool
+        
+        kwargs["timeout"] = apply_deadline(kwargs.get("timeout", 15))
+        pool = get_session_pool(self.config_manager)
+        return pool.request(method, url, proxies=self._get_proxies(), **kwargs)
+    
+    def _http_get(self, url: str, **kwargs) -> Any:
+        """发送 GET 请求"""
+        return self._http_request("GET", url, **kwargs)
+    
+    def _http_post(self, url: str, **kwargs) -> Any:
+        """发送 POST 请求"""
+        return self._http_request("POST", url, **kwargs)
+    
     def _create_success_result(self, message: str = "发送成功") -> NotificationResult:
         """创建成功结果"""
         return NotificationResult(
@@ -96,4 +159,123 @@ class BaseNotifier(ABC):
     
     def _log_not_configured(self) -> None:
         """记录未配置日志"""
-        self.logger.warning(f"{self.get_name()} 服务未配置，跳过推送")
\ No newline at end of file
+        self.logger.warning(f"{self.get_name()} 服务未配置，跳过推送")
+
+
+class HTTPNotifier(BaseNotifier):
+    """
+    基于单次 HTTP 请求的通知器基类
+    
+    子类只需描述请求（_build_request）和解析响应（_handle_response），
+    同步 send() 和原生异步 send_async() 共用这两部分逻辑。
+    """
+    
+    # 配置缺失时返回的错误信息
+    missing_config_error = "配置不完整"
+    
+    @abstractmethod
+    def _build_request(self, title: str, content: str) -> HTTPRequest:
+        """
+        构建发送请求
+        
+        Args:
+            title: 通知标题
+            content: 通知内容
+            
+        Returns:
+            HTTPRequest: 请求描述
+        """
+        pass
+    
+    @abstractmethod
+    def _handle_response(self, response: Dict[str, Any]) -> NotificationResult:
+        """
+        解析服务商返回的 JSON 响应
+        
+        Args:
+            response: 响应 JSON
+            
+        Returns:
+            NotificationResult: 发送结果
+        """
+        pass
+    
+    def _get_failure_message(self) -> str:
+        """获取推送失败时的结果描述"""
+        return f"{self.get_name()} 推送失败"
+    
+    def send(self, title: str, content: str) -> NotificationResult:
+        """发送通知"""
+        if not self.is_configured():
+            self._log_not_configured()
+            return self._create_error_result(self.missing_config_error, "配置错误")
+        
+        self._log_send_attempt(title)
+        
+        try:
+            request = self._build_request(title, content)
+            response = self._http_request(
+                request.method,
+                request.url,
+                params=request.params,
+                data=request.data,
+                headers=request.headers,
+                timeout=request.timeout,
+            ).json()
+            return self._handle_response(response)
+        except DeadlineExceededError:
+            raise
+        except Exception as e:
+            return self._handle_send_exception(e)
+    
+    async def send_async(self, title: str, content: str) -> NotificationResult:
+        """异步发送通知，未安装 aiohttp 时回退到线程中执行"""
+        from .transport import get_async_session_pool
+        
+        pool = get_async_session_pool(self.config_manager)
+        if pool is None:
+            return await super().send_async(title, content)
+        
+        if not self.is_configured():
+            self._log_not_configured()
+            return self._create_error_result(self.missing_config_error, "配置错误")
+        
+        self._log_send_attempt(title)
+        
+        try:
+            request = self._build_request(title, content)
+            response = await pool.request_json(
+                request.method,
+                request.url,
+                proxies=self._get_proxies(),
+                params=request.params,
+                data=request.data,
+                headers=request.headers,
+                timeout=apply_deadline(request.timeout),
+            )
+            return self._handle_response(response)
+        except DeadlineExceededError:
+            raise
+        except Exception as e:
+            return self._handle_send_exception(e)
+    
+    def _handle_send_exception(self, exception: Exception) -> NotificationResult:
+        """将发送过程中的异常转换为失败结果，发送时限已到（DeadlineExceededError）由调用方直接抛出"""
+        from .transport import is_network_exception
+        
+        if is_network_exception(exception):
+            error_msg = f"网络请求失败: {str(exception)}"
+        else:
+            error_msg = f"发送异常: {str(exception)}"
+        self._log_send_failure(error_msg)
+        return self._create_error_result(error_msg, self._get_failure_message())
+    
+    def _succeed(self, message: str) -> NotificationResult:
+        """记录并返回成功结果"""
+        self._log_send_success()
+        return self._create_success_result(message)
+    
+    def _fail(self, error: str, message: Optional[str] = None) -> NotificationResult:
+        """记录并返回失败结果"""
+        self._log_send_failure(error)
+        return self._create_error_result(error, message or self._get_failure_message())
\ No newline at end of file
@@ -27,4 +27,8 @@ class ConsoleNotifier(BaseNotifier):
             
         except Exception as e:
             error_msg = f"控制台输出异常: {str(e)}"
-            return self._create_error_result(error_msg, "控制台输出失败")
\ No newline at end of file
+            return self._create_error_result(error_msg, "控制台输出失败")
+    
+    async def send_async(self, title: str, content: str) -> NotificationResult:
+        """控制台输出没有 I/O 等待，直接在事件循环中执行"""
+        return self.send(title, content)
@@ -7,14 +7,16 @@ import hmac
 import json
 import time
 import urllib.parse
-import requests
+from typing import Dict, Any
 
-from .base import BaseNotifier, NotificationResult
+from .base import HTTPNotifier, HTTPRequest, NotificationResult
 
 
-class DingTalkNotifier(BaseNotifier):
+class DingTalkNotifier(HTTPNotifier):
     """钉钉机器人通知器"""
     
+    missing_config_error = "DD_BOT_SECRET 或 DD_BOT_TOKEN 未设置"
+    
     def get_name(self) -> str:
         return "钉钉机器人"
     
@@ -25,53 +27,32 @@ class DingTalkNotifier(BaseNotifier):
             self.config_manager.get_config("DD_BOT_TOKEN")
         )
     
-    def send(self, title: str, content: str) -> NotificationResult:
-        """发送钉钉机器人通知"""
-        if not self.is_configured():
-            self._log_not_configured()
-            return self._create_error_result("DD_BOT_SECRET 或 DD_BOT_TOKEN 未设置", "配置错误")
+    def _get_failure_message(self) -> str:
+        return "钉钉机器人推送失败"
+    
+    def _build_request(self, title: str, content: str) -> HTTPRequest:
+        """构建钉钉机器人推送请求"""
+        # 生成签名
+        timestamp, sign = self._generate_sign()
         
-        self._log_send_attempt(title)
+        # 构建请求 URL
+        token = self.config_manager.get_config("DD_BOT_TOKEN")
+        url = f'https://oapi.dingtalk.com/robot/send?access_token={token}&timestamp={timestamp}&sign={sign}'
         
-        try:
-            # 生成签名
-            timestamp, sign = self._generate_sign()
-            
-            # 构建请求 URL
-            token = self.config_manager.get_config("DD_BOT_TOKEN")
-            url = f'https://oapi.dingtalk.com/robot/send?access_token={token}&timestamp={timestamp}&sign={sign}'
-            
-            # 构建请求数据
-            headers = {"Content-Type": "application/json;charset=utf-8"}
-            data = {
-                "msgtype": "text", 
-                "text": {"content": f"{title}\n\n{content}"}
-            }
-            
-            # 发送请求
-            response = requests.post(
-                url=url, 
-                data=json.dumps(data), 
-                headers=headers, 
-                timeout=15
-            ).json()
-            
-            if not response.get("errcode"):
-                self._log_send_success()
-                return self._create_success_result("钉钉机器人推送成功")
-            else:
-                error_msg = response.get("errmsg", "未知错误")
-                self._log_send_failure(error_msg)
-                return self._create_error_result(error_msg, "钉钉机器人推送失败")
-                
-        except requests.exceptions.RequestException as e:
-            error_msg = f"网络请求失败: {str(e)}"
-            self._log_send_failure(error_msg)
-            return self._create_error_result(error_msg, "钉钉机器人推送失败")
-        except Exception as e:
-            error_msg = f"发送异常: {str(e)}"
-            self._log_send_failure(error_msg)
-            return self._create_error_result(error_msg, "钉钉机器人推送失败")
+        # 构建请求数据
+        headers = {"Content-Type": "application/json;charset=utf-8"}
+        data = {
+            "msgtype": "text", 
+            "text": {"content": f"{title}\n\n{content}"}
+        }
+        
+        return HTTPRequest("POST", url, data=json.dumps(data), headers=headers)
+    
+    def _handle_response(self, response: Dict[str, Any]) -> NotificationResult:
+        """解析钉钉机器人响应"""
+        if not response.get("errcode"):
+            return self._succeed("钉钉机器人推送成功")
+        return self._fail(response.get("errmsg", "未知错误"))
     
     def _generate_sign(self) -> tuple:
         """生成钉钉机器人签名"""
@@ -88,4 +69,4 @@ class DingTalkNotifier(BaseNotifier):
         
         sign = urllib.parse.quote_plus(base64.b64encode(hmac_code))
         
-        return timestamp, sign
\ No newline at end of file
+        return timestamp, sign
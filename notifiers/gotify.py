@@ -1,14 +1,16 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import requests
+from typing import Dict, Any
 
-from .base import BaseNotifier, NotificationResult
+from .base import HTTPNotifier, HTTPRequest, NotificationResult
 
 
-class GotifyNotifier(BaseNotifier):
+class GotifyNotifier(HTTPNotifier):
     """Gotify 通知器"""
     
+    missing_config_error = "GOTIFY_URL 或 GOTIFY_TOKEN 未设置"
+    
     def get_name(self) -> str:
         return "Gotify"
     
@@ -19,44 +21,25 @@ class GotifyNotifier(BaseNotifier):
             self.config_manager.get_config("GOTIFY_TOKEN")
         )
     
-    def send(self, title: str, content: str) -> NotificationResult:
-        """发送 Gotify 通知"""
-        if not self.is_configured():
-            self._log_not_configured()
-            return self._create_error_result("GOTIFY_URL 或 GOTIFY_TOKEN 未设置", "配置错误")
+    def _build_request(self, title: str, content: str) -> HTTPRequest:
+        """构建 Gotify 推送请求"""
+        # 构建请求 URL
+        gotify_url = self.config_manager.get_config("GOTIFY_URL")
+        gotify_token = self.config_manager.get_config("GOTIFY_TOKEN")
+        url = f'{gotify_url}/message?token={gotify_token}'
         
-        self._log_send_attempt(title)
+        # 构建请求数据
+        priority = self.config_manager.get_config("GOTIFY_PRIORITY", 0)
+        data = {
+            "title": title, 
+            "message": content,
+            "priority": priority
+        }
         
-        try:
-            # 构建请求 URL
-            gotify_url = self.config_manager.get_config("GOTIFY_URL")
-            gotify_token = self.config_manager.get_config("GOTIFY_TOKEN")
-            url = f'{gotify_url}/message?token={gotify_token}'
-            
-            # 构建请求数据
-            priority = self.config_manager.get_config("GOTIFY_PRIORITY", 0)
-            data = {
-                "title": title, 
-                "message": content,
-                "priority": priority
-            }
-            
-            # 发送请求
-            response = requests.post(url, data=data, timeout=15).json()
-            
-            if response.get("id"):
-                self._log_send_success()
-                return self._create_success_result("Gotify 推送成功")
-            else:
-                error_msg = "未收到有效响应"
-                self._log_send_failure(error_msg)
-                return self._create_error_result(error_msg, "Gotify 推送失败")
-                
-        except requests.exceptions.RequestException as e:
-            error_msg = f"网络请求失败: {str(e)}"
-            self._log_send_failure(error_msg)
-            return self._create_error_result(error_msg, "Gotify 推送失败")
-        except Exception as e:
-            error_msg = f"发送异常: {str(e)}"
-            self._log_send_failure(error_msg)
-            return self._create_error_result(error_msg, "Gotify 推送失败")
\ No newline at end of file
+        return HTTPRequest("POST", url, data=data)
+    
+    def _handle_response(self, response: Dict[str, Any]) -> NotificationResult:
+        """解析 Gotify 响应"""
+        if response.get("id"):
+            return self._succeed("Gotify 推送成功")
+        return self._fail("未收到有效响应")
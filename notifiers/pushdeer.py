@@ -1,14 +1,16 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import requests
+from typing import Dict, Any
 
-from .base import BaseNotifier, NotificationResult
+from .base import HTTPNotifier, HTTPRequest, NotificationResult
 
 
-class PushDeerNotifier(BaseNotifier):
+class PushDeerNotifier(HTTPNotifier):
     """PushDeer 通知器"""
     
+    missing_config_error = "DEER_KEY 未设置"
+    
     def get_name(self) -> str:
         return "PushDeer"
     
@@ -16,43 +18,24 @@ class PushDeerNotifier(BaseNotifier):
         """检查 PushDeer 是否已配置"""
         return bool(self.config_manager.get_config("DEER_KEY"))
     
-    def send(self, title: str, content: str) -> NotificationResult:
-        """发送 PushDeer 通知"""
-        if not self.is_configured():
-            self._log_not_configured()
-            return self._create_error_result("DEER_KEY 未设置", "配置错误")
+    def _build_request(self, title: str, content: str) -> HTTPRequest:
+        """构建 PushDeer 推送请求"""
+        # 构建请求数据
+        deer_key = self.config_manager.get_config("DEER_KEY")
+        data = {
+            "text": title, 
+            "desp": content, 
+            "type": "markdown",
+            "pushkey": deer_key
+        }
         
-        self._log_send_attempt(title)
+        # 构建请求 URL
+        url = self.config_manager.get_config("DEER_URL") or "https://api2.pushdeer.com/message/push"
         
-        try:
-            # 构建请求数据
-            deer_key = self.config_manager.get_config("DEER_KEY")
-            data = {
-                "text": title, 
-                "desp": content, 
-                "type": "markdown",
-                "pushkey": deer_key
-            }
-            
-            # 构建请求 URL
-            url = self.config_manager.get_config("DEER_URL") or "https://api2.pushdeer.com/message/push"
-            
-            # 发送请求
-            response = requests.post(url, data=data, timeout=15).json()
-            
-            if len(response.get("content", {}).get("result", [])) > 0:
-                self._log_send_success()
-                return self._create_success_result("PushDeer 推送成功")
-            else:
-                error_msg = str(response)
-                self._log_send_failure(error_msg)
-                return self._create_error_result(error_msg, "PushDeer 推送失败")
-                
-        except requests.exceptions.RequestException as e:
-            error_msg = f"网络请求失败: {str(e)}"
-            self._log_send_failure(error_msg)
-            return self._create_error_result(error_msg, "PushDeer 推送失败")
-        except Exception as e:
-            error_msg = f"发送异常: {str(e)}"
-            self._log_send_failure(error_msg)
-            return self._create_error_result(error_msg, "PushDeer 推送失败")
\ No newline at end of file
+        return HTTPRequest("POST", url, data=data)
+    
+    def _handle_response(self, response: Dict[str, Any]) -> NotificationResult:
+        """解析 PushDeer 响应"""
+        if len(response.get("content", {}).get("result", [])) > 0:
+            return self._succeed("PushDeer 推送成功")
+        return self._fail(str(response))
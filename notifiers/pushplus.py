@@ -4,6 +4,7 @@
 import json
 import requests
 
+from deadline import DeadlineExceededError
 from .base import BaseNotifier, NotificationResult
 
 
@@ -42,7 +43,7 @@ class PushPlusNotifier(BaseNotifier):
             
             # 尝试新版 API
             url = "http://www.pushplus.plus/send"
-            response = requests.post(url=url, data=body, headers=headers, timeout=15).json()
+            response = self._http_post(url=url, data=body, headers=headers, timeout=15).json()
             
             if response.get("code") == 200:
                 self._log_send_success()
@@ -55,6 +56,8 @@ class PushPlusNotifier(BaseNotifier):
             error_msg = f"网络请求失败: {str(e)}"
             self._log_send_failure(error_msg)
             return self._create_error_result(error_msg, "Push+ 推送失败")
+        except DeadlineExceededError:
+            raise
         except Exception as e:
             error_msg = f"发送异常: {str(e)}"
             self._log_send_failure(error_msg)
@@ -65,7 +68,7 @@ class PushPlusNotifier(BaseNotifier):
         try:
             url_old = "http://pushplus.hxtrip.com/send"
             headers["Accept"] = "application/json"
-            response = requests.post(url=url_old, data=body, headers=headers, timeout=15).json()
+            response = self._http_post(url=url_old, data=body, headers=headers, timeout=15).json()
             
             if response.get("code") == 200:
                 self._log_send_success()
@@ -75,6 +78,8 @@ class PushPlusNotifier(BaseNotifier):
                 self._log_send_failure(error_msg)
                 return self._create_error_result(error_msg, "Push+ 推送失败")
                 
+        except DeadlineExceededError:
+            raise
         except Exception as e:
             error_msg = f"旧版 API 也失败: {str(e)}"
             self._log_send_failure(error_msg)
@@ -1,14 +1,16 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import requests
+from typing import Dict, Any
 
-from .base import BaseNotifier, NotificationResult
+from .base import HTTPNotifier, HTTPRequest, NotificationResult
 
 
-class QmsgNotifier(BaseNotifier):
+class QmsgNotifier(HTTPNotifier):
     """Qmsg 酱通知器"""
     
+    missing_config_error = "QMSG_KEY 或 QMSG_TYPE 未设置"
+    
     def get_name(self) -> str:
         return "Qmsg酱"
     
@@ -19,40 +21,24 @@ class QmsgNotifier(BaseNotifier):
             self.config_manager.get_config("QMSG_TYPE")
         )
     
-    def send(self, title: str, content: str) -> NotificationResult:
-        """发送 Qmsg 通知"""
-        if not self.is_configured():
-            self._log_not_configured()
-            return self._create_error_result("QMSG_KEY 或 QMSG_TYPE 未设置", "配置错误")
+    def _get_failure_message(self) -> str:
+        return "Qmsg酱推送失败"
+    
+    def _build_request(self, title: str, content: str) -> HTTPRequest:
+        """构建 Qmsg 推送请求"""
+        # 构建请求 URL
+        qmsg_key = self.config_manager.get_config("QMSG_KEY")
+        qmsg_type = self.config_manager.get_config("QMSG_TYPE")
+        url = f'https://qmsg.zendee.cn/{qmsg_type}/{qmsg_key}'
         
-        self._log_send_attempt(title)
+        # 构建请求数据（查询参数按 UTF-8 编码）
+        message = f'{title}\n\n{content.replace("----", "-")}'
+        payload = {"msg": message}
         
-        try:
-            # 构建请求 URL
-            qmsg_key = self.config_manager.get_config("QMSG_KEY")
-            qmsg_type = self.config_manager.get_config("QMSG_TYPE")
-            url = f'https://qmsg.zendee.cn/{qmsg_type}/{qmsg_key}'
-            
-            # 构建请求数据
-            message = f'{title}\n\n{content.replace("----", "-")}'
-            payload = {"msg": message.encode("utf-8")}
-            
-            # 发送请求
-            response = requests.post(url=url, params=payload, timeout=15).json()
-            
-            if response.get("code") == 0:
-                self._log_send_success()
-                return self._create_success_result("Qmsg酱推送成功")
-            else:
-                error_msg = response.get("reason", "未知错误")
-                self._log_send_failure(error_msg)
-                return self._create_error_result(error_msg, "Qmsg酱推送失败")
-                
-        except requests.exceptions.RequestException as e:
-            error_msg = f"网络请求失败: {str(e)}"
-            self._log_send_failure(error_msg)
-            return self._create_error_result(error_msg, "Qmsg酱推送失败")
-        except Exception as e:
-            error_msg = f"发送异常: {str(e)}"
-            self._log_send_failure(error_msg)
-            return self._create_error_result(error_msg, "Qmsg酱推送失败")
\ No newline at end of file
+        return HTTPRequest("POST", url, params=payload)
+    
+    def _handle_response(self, response: Dict[str, Any]) -> NotificationResult:
+        """解析 Qmsg 响应"""
+        if response.get("code") == 0:
+            return self._succeed("Qmsg酱推送成功")
+        return self._fail(response.get("reason", "未知错误"))
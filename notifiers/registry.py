@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+通知渠道注册表
+声明渠道名与通知器类的对应关系，通知器模块只在渠道启用且已配置时才导入，
+避免只用一个渠道时也加载 requests、smtplib、email 等依赖
+"""
+
+import importlib
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple, Type
+
+
+@dataclass(frozen=True)
+class NotifierSpec:
+    """通知渠道描述"""
+    channel: str       # 渠道名，与 notification_config.json 中的 notification_channels 一致
+    module: str        # 通知器所在模块
+    class_name: str    # 通知器类名
+
+
+# 注册顺序即发送顺序
+NOTIFIER_REGISTRY: Tuple[NotifierSpec, ...] = (
+    NotifierSpec('bark', 'notifiers.bark', 'BarkNotifier'),
+    NotifierSpec('console', 'notifiers.console', 'ConsoleNotifier'),
+    NotifierSpec('dingtalk', 'notifiers.dingtalk', 'DingTalkNotifier'),
+    NotifierSpec('wecom_app', 'notifiers.wecom', 'WeComAppNotifier'),
+    NotifierSpec('wecom_bot', 'notifiers.wecom', 'WeComBotNotifier'),
+    NotifierSpec('telegram', 'notifiers.telegram', 'TelegramNotifier'),
+    NotifierSpec('smtp', 'notifiers.smtp', 'SMTPNotifier'),
+    NotifierSpec('pushplus', 'notifiers.pushplus', 'PushPlusNotifier'),
+    NotifierSpec('qmsg', 'notifiers.qmsg', 'QmsgNotifier'),
+    NotifierSpec('gotify', 'notifiers.gotify', 'GotifyNotifier'),
+    NotifierSpec('igot', 'notifiers.igot', 'IGotNotifier'),
+    NotifierSpec('pushdeer', 'notifiers.pushdeer', 'PushDeerNotifier'),
+    NotifierSpec('serverchan', 'notifiers.serverchan', 'ServerChanNotifier'),
+)
+
+# 通知器类名到渠道名的映射
+NOTIFIER_CHANNELS: Dict[str, str] = {spec.class_name: spec.channel for spec in NOTIFIER_REGISTRY}
+
+_SPECS_BY_CHANNEL: Dict[str, NotifierSpec] = {spec.channel: spec for spec in NOTIFIER_REGISTRY}
+
+
+def get_notifier_spec(channel: str) -> Optional[NotifierSpec]:
+    """
+    获取渠道的注册信息
+
+    Args:
+        channel: 渠道名
+
+    Returns:
+        Optional[NotifierSpec]: 注册信息，未注册的渠道返回 None
+    """
+    return _SPECS_BY_CHANNEL.get(channel)
+
+
+def load_notifier_class(spec: NotifierSpec) -> Type:
+    """
+    导入并返回渠道的通知器类
+
+    Args:
+        spec: 渠道注册信息
+
+    Returns:
+        Type: 通知器类
+    """
+    module = importlib.import_module(spec.module)
+    return getattr(module, spec.class_name)
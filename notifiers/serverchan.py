@@ -1,14 +1,16 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import requests
+from typing import Dict, Any
 
-from .base import BaseNotifier, NotificationResult
+from .base import HTTPNotifier, HTTPRequest, NotificationResult
 
 
-class ServerChanNotifier(BaseNotifier):
+class ServerChanNotifier(HTTPNotifier):
     """Server酱通知器，兼容新版和旧版 API"""
     
+    missing_config_error = "PUSH_KEY 或 SCKEY 未设置"
+    
     def get_name(self) -> str:
         return "Server酱"
     
@@ -20,54 +22,43 @@ class ServerChanNotifier(BaseNotifier):
             self.config_manager.get_config("SCKEY")
         )
     
-    def send(self, title: str, content: str) -> NotificationResult:
-        """发送 Server酱 通知"""
-        if not self.is_configured():
-            self._log_not_configured()
-            return self._create_error_result("PUSH_KEY 或 SCKEY 未设置", "配置错误")
+    def _get_failure_message(self) -> str:
+        return "Server酱推送失败"
+    
+    def _get_push_key(self) -> str:
+        """获取密钥，优先使用 PUSH_KEY，然后是 SCKEY"""
+        return self.config_manager.get_config("PUSH_KEY") or self.config_manager.get_config("SCKEY")
+    
+    def _get_api_version(self) -> str:
+        """根据密钥类型确定 API 版本"""
+        return "新版" if self._get_push_key().startswith("SCT") else "旧版"
+    
+    def _build_request(self, title: str, content: str) -> HTTPRequest:
+        """构建 Server酱 推送请求"""
+        push_key = self._get_push_key()
         
-        self._log_send_attempt(title)
+        # 根据密钥类型确定 API URL
+        if push_key.startswith("SCT"):
+            # 新版 Server酱 Turbo
+            url = f'https://sctapi.ftqq.com/{push_key}.send'
+        else:
+            # 旧版 Server酱
+            url = f'https://sc.ftqq.com/{push_key}.send'
+        
+        # 构建请求数据
+        data = {
+            "text": title, 
+            "desp": content.replace("\n", "\n\n")  # 兼容 Markdown 格式
+        }
         
-        try:
-            # 获取密钥，优先使用 PUSH_KEY，然后是 SCKEY
-            push_key = self.config_manager.get_config("PUSH_KEY") or self.config_manager.get_config("SCKEY")
-            
-            # 根据密钥类型确定 API 版本和 URL
-            if push_key.startswith("SCT"):
-                # 新版 Server酱 Turbo
-                url = f'https://sctapi.ftqq.com/{push_key}.send'
-                api_version = "新版"
-            else:
-                # 旧版 Server酱
-                url = f'https://sc.ftqq.com/{push_key}.send'
-                api_version = "旧版"
-            
-            # 构建请求数据
-            data = {
-                "text": title, 
-                "desp": content.replace("\n", "\n\n")  # 兼容 Markdown 格式
-            }
-            
-            # 发送请求
-            response = requests.post(url, data=data, timeout=15).json()
-            
-            # 检查响应结果
-            if self._is_success_response(response):
-                self._log_send_success()
-                return self._create_success_result(f"Server酱({api_version}) 推送成功")
-            else:
-                error_msg = self._extract_error_message(response)
-                self._log_send_failure(error_msg)
-                return self._create_error_result(error_msg, f"Server酱({api_version}) 推送失败")
-                
-        except requests.exceptions.RequestException as e:
-            error_msg = f"网络请求失败: {str(e)}"
-            self._log_send_failure(error_msg)
-            return self._create_error_result(error_msg, "Server酱推送失败")
-        except Exception as e:
-            error_msg = f"发送异常: {str(e)}"
-            self._log_send_failure(error_msg)
-            return self._create_error_result(error_msg, "Server酱推送失败")
+        return HTTPRequest("POST", url, data=data)
+    
+    def _handle_response(self, response: Dict[str, Any]) -> NotificationResult:
+        """解析 Server酱 响应"""
+        api_version = self._get_api_version()
+        if self._is_success_response(response):
+            return self._succeed(f"Server酱({api_version}) 推送成功")
+        return self._fail(self._extract_error_message(response), f"Server酱({api_version}) 推送失败")
     
     def _is_success_response(self, response: dict) -> bool:
         """判断响应是否成功"""
@@ -1,18 +1,23 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import functools
 import smtplib
 import os
 import mimetypes
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email.header import Header
-from email.utils import formataddr
-from email import encoders
-from typing import List
+from typing import Callable, Dict, List, Sequence, Tuple
 
+from deadline import DeadlineExceededError, current_deadline
+from routing import current_recipients
 from .base import BaseNotifier, NotificationResult
+from .attachment_cache import get_attachment_cache
+from .smtp_message import (MappedFile, MessageWriter, attachment_headers, encode_base64, encode_header, format_address,
+                           send_spooled)
+from .smtp_pool import get_smtp_pool
+from .smtp_recipients import expand_recipients, group_recipients
+
+# SMTP 连接和每次交互的超时（秒）
+SMTP_TIMEOUT = 30
 
 
 class SMTPNotifier(BaseNotifier):
@@ -50,44 +55,49 @@ class SMTPNotifier(BaseNotifier):
             smtp_email = self.config_manager.get_config("SMTP_EMAIL")
             smtp_password = self.config_manager.get_config("SMTP_PASSWORD")
             smtp_name = self.config_manager.get_config("SMTP_NAME")
-            
-            # 构建邮件
-            if attachments:
-                # 有附件时使用多部分邮件
-                message = MIMEMultipart()
-                
-                # 添加文本内容
-                text_part = MIMEText(content, 'plain', 'utf-8')
-                message.attach(text_part)
-                
-                # 添加附件
-                for attachment in attachments:
-                    if self._add_attachment(message, attachment):
+            recipient_settings = self.config_manager.get_smtp_recipient_settings()
+            recipients = self._resolve_recipients(recipient_settings, smtp_email)
+            if not recipients:
+                return self._create_error_result("没有可用的收件人", "配置错误")
+            
+            # 构建邮件：按线路格式写入临时文件，大附件不会整体放入内存；所有收件人共用同一封邮件。
+            # 收件人只出现在 RCPT TO 中，To 头部使用配置的列表地址或发件人，不向每个收件人暴露完整名单
+            headers = {
+                'From': format_address(smtp_name, smtp_email),
+                'To': recipient_settings['list_address'] or format_address(smtp_name, smtp_email),
+                'Subject': encode_header(title),
+            }
+            writer = MessageWriter(headers, content, multipart=bool(attachments))
+            with writer.message as message:
+                for attachment in attachments or []:
+                    if self._add_attachment(writer, attachment):
                         self.logger.info(f"附件 {attachment.filename} 添加成功")
                     else:
                         self.logger.warning(f"附件 {attachment.filename} 添加失败")
-            else:
-                # 无附件时使用简单文本邮件
-                message = MIMEText(content, 'plain', 'utf-8')
-            
-            # 设置邮件头
-            message['From'] = formataddr((Header(smtp_name, 'utf-8').encode(), smtp_email))
-            message['To'] = formataddr((Header(smtp_name, 'utf-8').encode(), smtp_email))
-            message['Subject'] = Header(title, 'utf-8')
-            
-            # 发送邮件
-            if smtp_ssl.lower() == 'true':
-                smtp_client = smtplib.SMTP_SSL(smtp_server)
-            else:
-                smtp_client = smtplib.SMTP(smtp_server)
-            
-            smtp_client.login(smtp_email, smtp_password)
-            smtp_client.sendmail(smtp_email, smtp_email, message.as_string())
-            smtp_client.close()
+                writer.finish()
+                
+                # 通过连接池中已登录的会话发送，超时不超过本次发送的剩余时间
+                deadline = current_deadline()
+                timeout = deadline.clamp(SMTP_TIMEOUT) if deadline else SMTP_TIMEOUT
+                pool = get_smtp_pool(self.config_manager)
+                session = functools.partial(pool.session, smtp_server, smtp_ssl.lower() == 'true', smtp_email,
+                                            smtp_password, timeout)
+                refused = self._send_transactions(session, smtp_email, recipients, message,
+                                                  recipient_settings['max_recipients'])
+            
+            if len(refused) == len(recipients):
+                error_msg = f"所有收件人均被拒绝: {self._format_refused(refused)}"
+                self._log_send_failure(error_msg)
+                return self._create_error_result(error_msg, "SMTP 邮件推送失败")
             
             success_msg = "SMTP 邮件推送成功"
+            if len(recipients) > 1:
+                success_msg += f"（{len(recipients) - len(refused)} 个收件人）"
             if attachments:
                 success_msg += f"（包含 {len(attachments)} 个附件）"
+            if refused:
+                self.logger.warning(f"部分收件人被拒绝: {self._format_refused(refused)}")
+                success_msg += f"，{len(refused)} 个收件人被拒绝"
             
             self._log_send_success()
             return self._create_success_result(success_msg)
@@ -96,17 +106,101 @@ class SMTPNotifier(BaseNotifier):
             error_msg = f"SMTP 错误: {str(e)}"
             self._log_send_failure(error_msg)
             return self._create_error_result(error_msg, "SMTP 邮件推送失败")
+        except DeadlineExceededError:
+            raise
         except Exception as e:
             error_msg = f"发送异常: {str(e)}"
             self._log_send_failure(error_msg)
             return self._create_error_result(error_msg, "SMTP 邮件推送失败")
     
-    def _add_attachment(self, message: MIMEMultipart, attachment) -> bool:
+    def _resolve_recipients(self, settings: Dict, smtp_email: str) -> List[str]:
         """
-        添加附件到邮件
+        确定收件人：路由规则指定的收件人优先，其次是配置的默认收件人，都没有时发送给发件人自己
         
         Args:
-            message: 邮件对象
+            settings: SMTP 收件人配置
+            smtp_email: 发件人地址
+            
+        Returns:
+            List[str]: 展开分组并去重后的收件人地址
+        """
+        entries = current_recipients() or settings['to']
+        if not entries:
+            return [smtp_email]
+        return expand_recipients(entries, settings['groups'])
+    
+    def _send_transactions(self, session: Callable, sender: str, recipients: Sequence[str], message,
+                           max_recipients: int) -> Dict[str, Tuple[int, bytes]]:
+        """
+        按域名分组发送：每组是一个 SMTP 事务，包含多个 RCPT TO，重复发送同一封已构建好的邮件
+        
+        服务器以 452 拒绝超出其上限的收件人时，这些收件人在后续事务中重新发送。
+        某个事务失败只影响该组收件人：已投递的组不会因为后面的失败被整体重试而重复收到邮件。
+        
+        Args:
+            session: 从连接池取出已登录会话的上下文管理器工厂，每个事务单独取出和归还
+            sender: 发件人地址
+            recipients: 收件人地址
+            message: 已构建好的邮件
+            max_recipients: 每个事务的收件人上限
+            
+        Returns:
+            Dict[str, Tuple[int, bytes]]: 最终被拒绝的收件人到 (代码, 响应) 的映射，连接错误的代码为 -1
+            
+        Raises:
+            smtplib.SMTPException, OSError: 还没有任何收件人投递成功时连接失败，整封邮件可以安全重试
+        """
+        refused: Dict[str, Tuple[int, bytes]] = {}
+        delivered = 0
+        pending = list(recipients)
+        while pending:
+            deferred: List[str] = []
+            groups = group_recipients(pending, max_recipients)
+            for index, group in enumerate(groups):
+                try:
+                    with session() as smtp_client:
+                        group_refused = send_spooled(smtp_client, sender, group, message)
+                except smtplib.SMTPRecipientsRefused as e:
+                    group_refused = e.recipients
+                except (smtplib.SMTPException, OSError) as e:
+                    if isinstance(e, smtplib.SMTPResponseException) and e.smtp_code != 421:
+                        # 发件人或邮件内容被拒绝（会话仍可用），本组收件人计为被拒绝，继续发送其他组
+                        group_refused = {recipient: (e.smtp_code, e.smtp_error) for recipient in group}
+                    elif not delivered:
+                        raise
+                    else:
+                        # 连接中断（或服务器以 421 关闭连接）且已有收件人收到邮件：不再整体重试，剩余的收件人计为失败
+                        self.logger.error(f"SMTP 连接中断，已有 {delivered} 个收件人收到邮件，剩余收件人不再发送: {str(e)}")
+                        remaining = [recipient for rest in groups[index:] for recipient in rest] + deferred
+                        refused.update((recipient, (-1, str(e).encode('utf-8'))) for recipient in remaining)
+                        return refused
+                delivered += len(group) - len(group_refused)
+                for recipient, (code, response) in group_refused.items():
+                    if code == 452:
+                        deferred.append(recipient)
+                    else:
+                        refused[recipient] = (code, response)
+            # 452 表示本事务的收件人过多，只要还有进展就在新的事务中继续发送
+            if len(deferred) >= len(pending):
+                refused.update((recipient, (452, b'Too many recipients')) for recipient in deferred)
+                break
+            if deferred:
+                self.logger.debug(f"{len(deferred)} 个收件人超出服务器单次事务上限，在新的事务中重新发送")
+            pending = deferred
+        return refused
+    
+    @staticmethod
+    def _format_refused(refused: Dict[str, Tuple[int, bytes]]) -> str:
+        return ", ".join(f"{recipient} ({code})" for recipient, (code, _) in refused.items())
+    
+    def _add_attachment(self, writer: MessageWriter, attachment) -> bool:
+        """
+        添加附件到邮件，文件通过 mmap 按块编码，不整体读入内存
+        
+        编码结果按文件内容的 sha256 保存在附件缓存中，同一文件再次发送时直接复用，不再读取和编码
+        
+        Args:
+            writer: 邮件构建器
             attachment: 附件信息对象
             
         Returns:
@@ -126,10 +220,6 @@ class SMTPNotifier(BaseNotifier):
                 self.logger.error(f"附件 {attachment.filename} 过大: {file_size} bytes (最大 {max_size} bytes)")
                 return False
             
-            # 读取文件内容
-            with open(attachment.filepath, 'rb') as f:
-                file_data = f.read()
-            
             # 猜测MIME类型
             content_type = attachment.content_type
             if content_type == 'application/octet-stream':
@@ -137,26 +227,17 @@ class SMTPNotifier(BaseNotifier):
                 if content_type is None:
                     content_type = 'application/octet-stream'
             
-            # 创建附件对象
-            main_type, sub_type = content_type.split('/', 1)
-            
-            if main_type == 'text':
-                # 文本文件
-                attachment_part = MIMEText(file_data.decode('utf-8'), sub_type, 'utf-8')
+            # 文本和二进制文件都按 base64 编码，文本文件声明 utf-8 字符集
+            headers = attachment_headers(attachment.filename, content_type)
+            cache = get_attachment_cache(self.config_manager)
+            digest = attachment.sha256 or cache.file_digest(attachment.filepath)
+            encoded = cache.get_encoded(digest)
+            if encoded is not None:
+                self.logger.debug(f"附件 {attachment.filename} 使用缓存的编码结果")
+                writer.add_encoded_part(headers, encoded)
             else:
-                # 二进制文件
-                attachment_part = MIMEBase(main_type, sub_type)
-                attachment_part.set_payload(file_data)
-                encoders.encode_base64(attachment_part)
-            
-            # 设置附件头
-            attachment_part.add_header(
-                'Content-Disposition',
-                f'attachment; filename="{attachment.filename}"'
-            )
-            
-            # 添加到邮件
-            message.attach(attachment_part)
+                with MappedFile(attachment.filepath) as mapped:
+                    writer.add_encoded_part(headers, cache.put_encoded(digest, encode_base64(mapped.data)))
             
             self.logger.debug(f"附件 {attachment.filename} 添加成功 ({content_type}, {file_size} bytes)")
             return True
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式邮件构建
+邮件按 SMTP DATA 阶段的线路格式（CRLF 换行、已做点号填充）写入 SpooledTemporaryFile，
+附件通过 mmap 按块 base64 编码，发送时分块写入 SMTP 连接。
+构建和发送占用的内存与附件大小基本无关，不再需要 message.as_string() 生成的整封邮件字符串
+"""
+
+import base64
+import mmap
+import os
+import smtplib
+import tempfile
+import uuid
+from email.header import Header
+from email.utils import encode_rfc2231, formatdate, make_msgid
+from typing import Dict, Iterable, Iterator, Sequence
+
+# 邮件小于该大小时只保存在内存中，超过后转存到临时文件
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+# base64 每行 76 个字符对应 57 个字节，按整行的倍数读取，保证各块的编码结果可以直接拼接
+_ENCODE_BLOCK = 57 * 1024
+_STREAM_CHUNK = 64 * 1024
+
+
+def encode_header(value: str) -> str:
+    """按 RFC 2047 编码头部的值，折行使用 CRLF"""
+    return Header(value, 'utf-8').encode().replace('\n', '\r\n')
+
+
+def format_address(name: str, address: str) -> str:
+    """格式化地址，显示名按 RFC 2047 编码"""
+    return f"{encode_header(name)} <{address}>" if name else address
+
+
+class SpooledMessage:
+    """
+    按线路格式保存的邮件
+
+    内容写入 SpooledTemporaryFile，小邮件只占用内存，大邮件转存到磁盘。
+    同一封邮件可以多次发送，每次从头读取。
+    """
+
+    def __init__(self, max_memory: int = SPOOL_MAX_MEMORY):
+        self._file = tempfile.SpooledTemporaryFile(max_size=max_memory)
+        self.size = 0
+
+    def write_line(self, line: str = '') -> None:
+        """写入一行文本，以点号开头的行按 RFC 5321 重复点号"""
+        if line.startswith('.'):
+            line = '.' + line
+        self._write(line.encode('utf-8') + b'\r\n')
+
+    def write_base64(self, data) -> None:
+        """
+        按块写入 base64 编码后的数据，每行 76 个字符
+
+        Args:
+            data: bytes 或 mmap，按 _ENCODE_BLOCK 切片编码，不整体复制
+        """
+        for block in encode_base64(data):
+            self._write(block)
+
+    def write_raw(self, data: bytes) -> None:
+        """写入已是线路格式的内容（如缓存的 base64 编码结果），不再做点号填充"""
+        self._write(data)
+
+    def chunks(self, chunk_size: int = _STREAM_CHUNK) -> Iterator[bytes]:
+        """从头按块读取邮件内容"""
+        self._file.seek(0)
+        while True:
+            chunk = self._file.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> 'SpooledMessage':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+        self.size += len(data)
+
+
+def encode_base64(data) -> Iterator[bytes]:
+    """
+    按块产出 base64 编码后的线路格式内容，每行 76 个字符，以 CRLF 换行
+
+    Args:
+        data: bytes 或 mmap，按 _ENCODE_BLOCK 切片编码，不整体复制
+    """
+    # 映射的文件页编码后即释放，避免整个附件留在进程的常驻内存中
+    release = data.madvise if isinstance(data, mmap.mmap) and hasattr(mmap, 'MADV_DONTNEED') else None
+    released = 0
+    for offset in range(0, len(data), _ENCODE_BLOCK):
+        end = min(offset + _ENCODE_BLOCK, len(data))
+        # base64 行不会以点号开头，不需要点号填充
+        yield base64.encodebytes(data[offset:end]).replace(b'\n', b'\r\n')
+        if release is not None:
+            aligned = end - end % mmap.PAGESIZE
+            if aligned > released:
+                release(mmap.MADV_DONTNEED, released, aligned - released)
+                released = aligned
+
+
+class MessageWriter:
+    """
+    按顺序写出邮件头、正文和附件
+
+    没有附件时生成单部分的 text/plain 邮件，有附件时生成 multipart/mixed 邮件，
+    与原先 MIMEText / MIMEMultipart 生成的结构相同。
+    """
+
+    def __init__(self, headers: Dict[str, str], content: str, multipart: bool,
+                 max_memory: int = SPOOL_MAX_MEMORY):
+        """
+        写出邮件头和正文
+
+        Args:
+            headers: 已编码的头部（From、To、Subject 等）
+            content: 正文
+            multipart: 是否会添加附件
+            max_memory: 邮件保存在内存中的大小上限
+        """
+        self.message = SpooledMessage(max_memory)
+        self.boundary = f"===============_{uuid.uuid4().hex}==" if multipart else None
+        self._closed = False
+
+        headers = dict(headers)
+        headers.setdefault('Date', formatdate(localtime=True))
+        headers.setdefault('Message-ID', make_msgid())
+        headers['MIME-Version'] = '1.0'
+        if self.boundary:
+            headers['Content-Type'] = f'multipart/mixed; boundary="{self.boundary}"'
+        else:
+            headers.update(_text_headers('plain'))
+        for name, value in headers.items():
+            self.message.write_line(f"{name}: {value}")
+        self.message.write_line()
+
+        if self.boundary:
+            self._begin_part(_text_headers('plain'))
+        self.message.write_base64(content.encode('utf-8'))
+
+    def add_part(self, headers: Dict[str, str], data) -> None:
+        """
+        添加一个 base64 编码的部分
+
+        Args:
+            headers: 部分的头部，Content-Transfer-Encoding 会自动添加
+            data: 部分的内容，bytes 或 mmap
+        """
+        self._begin_part(dict(headers, **{'Content-Transfer-Encoding': 'base64'}))
+        self.message.write_base64(data)
+
+    def add_encoded_part(self, headers: Dict[str, str], chunks: Iterable[bytes]) -> None:
+        """
+        添加一个内容已按 base64 编码的部分
+
+        Args:
+            headers: 部分的头部，Content-Transfer-Encoding 会自动添加
+            chunks: encode_base64 产出的编码结果
+        """
+        self._begin_part(dict(headers, **{'Content-Transfer-Encoding': 'base64'}))
+        for chunk in chunks:
+            self.message.write_raw(chunk)
+
+    def finish(self) -> SpooledMessage:
+        """写出结束分隔符，返回完整的邮件"""
+        if self.boundary and not self._closed:
+            self.message.write_line(f"--{self.boundary}--")
+        self._closed = True
+        return self.message
+
+    def _begin_part(self, headers: Dict[str, str]) -> None:
+        self.message.write_line(f"--{self.boundary}")
+        for name, value in headers.items():
+            self.message.write_line(f"{name}: {value}")
+        self.message.write_line()
+
+
+def _text_headers(subtype: str) -> Dict[str, str]:
+    return {
+        'Content-Type': f'text/{subtype}; charset="utf-8"',
+        'Content-Transfer-Encoding': 'base64',
+    }
+
+
+def attachment_headers(filename: str, content_type: str) -> Dict[str, str]:
+    """
+    附件部分的头部
+
+    Args:
+        filename: 附件文件名，非 ASCII 文件名按 RFC 2231 编码
+        content_type: MIME 类型
+    """
+    try:
+        filename.encode('ascii')
+        disposition = f'attachment; filename="{filename}"'
+    except UnicodeEncodeError:
+        disposition = f"attachment; filename*={encode_rfc2231(filename, 'utf-8')}"
+    main_type = content_type.split('/', 1)[0]
+    headers = {'Content-Type': f'{content_type}; charset="utf-8"' if main_type == 'text' else content_type}
+    headers['Content-Disposition'] = disposition
+    return headers
+
+
+class MappedFile:
+    """以 mmap 只读方式打开文件，空文件返回 b''"""
+
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
+
+    def __enter__(self) -> 'MappedFile':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def send_spooled(client: smtplib.SMTP, sender: str, recipients: Sequence[str], message: SpooledMessage) -> Dict[str, tuple]:
+    """
+    通过已登录的 SMTP 连接发送邮件，DATA 阶段分块写入连接
+
+    与 smtplib.SMTP.sendmail 的行为相同：部分收件人被拒绝时返回被拒绝的收件人，
+    全部被拒绝或服务器拒绝邮件时抛出相应的 SMTPException，抛出前已发送 RSET，连接可以继续使用；
+    服务器回复 421（关闭会话）或 RSET 失败时连接已被关闭（client.sock 为 None），不能再使用。
+    服务器支持 PIPELINING 时，MAIL、所有 RCPT 和 DATA 命令一次写出，只等待一轮响应。
+
+    Args:
+        client: 已登录的 SMTP 连接
+        sender: 发件人地址
+        recipients: 收件人地址
+        message: 邮件内容
+
+    Returns:
+        Dict[str, tuple]: 被拒绝的收件人到 (代码, 响应) 的映射
+    """
+    client.ehlo_or_helo_if_needed()
+    options = ''
+    if client.does_esmtp and client.has_extn('size'):
+        options = f" SIZE={message.size}"
+
+    commands = [f"MAIL FROM:{smtplib.quoteaddr(sender)}{options}"]
+    commands.extend(f"RCPT TO:{smtplib.quoteaddr(recipient)}" for recipient in recipients)
+    commands.append("DATA")
+    if client.does_esmtp and client.has_extn('pipelining'):
+        client.send(''.join(f"{command}\r\n" for command in commands))
+        replies = [client.getreply() for _ in commands]
+    else:
+        # 不支持 PIPELINING 时逐条等待响应，MAIL 或全部 RCPT 失败时不再发送后续命令
+        replies = []
+        for index, command in enumerate(commands):
+            client.putcmd(command)
+            replies.append(client.getreply())
+            code = replies[-1][0]
+            if (index == 0 and code != 250) or (command == "DATA" and code != 354):
+                break
+            if index == len(recipients) and all(reply[0] not in (250, 251) for reply in replies[1:]):
+                break
+
+    code, response = replies[0]
+    if code != 250:
+        _abort(client, replies)
+        raise smtplib.SMTPSenderRefused(code, response, sender)
+
+    refused: Dict[str, tuple] = {}
+    for recipient, (code, response) in zip(recipients, replies[1:]):
+        if code not in (250, 251):
+            refused[recipient] = (code, response)
+    if len(refused) == len(recipients):
+        _abort(client, replies)
+        raise smtplib.SMTPRecipientsRefused(refused)
+
+    code, response = replies[-1]
+    if len(replies) == len(commands) and code == 354:
+        for chunk in message.chunks():
+            client.send(chunk)
+        client.send(b".\r\n")
+        code, response = client.getreply()
+        if code == 250:
+            return refused
+        replies.append((code, response))
+    _reset(client, replies)
+    raise smtplib.SMTPDataError(code, response)
+
+
+def _abort(client: smtplib.SMTP, replies: list) -> None:
+    """放弃当前邮件；流水线中的 DATA 已被服务器接受时，先以空内容结束再 RSET"""
+    if len(replies) > 1 and replies[-1][0] == 354 and not _closing(replies):
+        client.send(b".\r\n")
+        client.getreply()
+    _reset(client, replies)
+
+
+def _reset(client: smtplib.SMTP, replies: list) -> None:
+    """发送 RSET 以便继续使用连接；服务器已关闭会话或 RSET 失败时关闭连接"""
+    if _closing(replies):
+        client.close()
+        return
+    try:
+        code, _ = client.rset()
+    except (smtplib.SMTPServerDisconnected, OSError):
+        code = None
+    if code != 250:
+        client.close()
+
+
+def _closing(replies: list) -> bool:
+    """服务器是否回复了 421，即将关闭连接"""
+    return any(code == 421 for code, _ in replies)
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SMTP 连接池
+按服务器和账号保留已登录的 SMTP 会话，多封邮件复用同一个会话，不必每封邮件都重新建立 TLS 连接并登录。
+空闲较久的会话使用前先发送 NOOP 检查，超过空闲时间的会话直接关闭，出错的会话不再放回池中
+"""
+
+import logging
+import smtplib
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 只影响当前这封邮件、会话本身通常仍然可用的错误，会话在 RSET 成功后放回池中
+_TRANSACTION_ERRORS = (smtplib.SMTPSenderRefused, smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError)
+
+
+class _Session:
+    """一个已登录的 SMTP 会话"""
+
+    __slots__ = ('client', 'last_used', 'messages')
+
+    def __init__(self, client: smtplib.SMTP):
+        self.client = client
+        self.last_used = time.monotonic()
+        self.messages = 0
+
+
+class SMTPPool:
+    """
+    SMTP 会话池
+
+    每个 (服务器, 是否 SSL, 账号) 最多保留 max_idle 个空闲会话；并发发送时池中没有空闲会话则新建，
+    用完后超出 max_idle 的会话直接关闭。
+    """
+
+    def __init__(self, max_idle: int = 2, idle_timeout: float = 60.0, health_check_interval: float = 5.0):
+        """
+        初始化连接池
+
+        Args:
+            max_idle: 每个服务器和账号保留的最大空闲会话数，0 表示不复用
+            idle_timeout: 空闲超过该时间（秒）的会话直接关闭，应小于服务器的空闲断开时间
+            health_check_interval: 空闲超过该时间（秒）的会话在使用前先发送 NOOP 检查
+        """
+        self.max_idle = max(0, max_idle)
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self._idle: Dict[Tuple, Deque[_Session]] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._created = 0
+        self._reused = 0
+        self._health_checks = 0
+        self._reconnects = 0
+
+    @contextmanager
+    def session(self, server: str, use_ssl: bool, username: str, password: str, timeout: float) -> Iterator[smtplib.SMTP]:
+        """
+        取出一个已登录的会话，离开上下文时放回池中
+
+        Args:
+            server: SMTP 服务器（host 或 host:port）
+            use_ssl: 是否使用 SMTP_SSL
+            username: 登录账号
+            password: 登录密码
+            timeout: 本次使用的套接字超时（秒）
+
+        Yields:
+            smtplib.SMTP: 已登录的 SMTP 连接
+        """
+        key = (server, use_ssl, username, password)
+        session = self._checkout(key, timeout)
+        if session is None:
+            session = _Session(self._connect(server, use_ssl, username, password, timeout))
+        try:
+            yield session.client
+        except _TRANSACTION_ERRORS:
+            # send_spooled 在抛出这些错误前已发送 RSET，会话仍可用；服务器回复 421 或 RSET 失败时连接已关闭
+            if session.client.sock is None:
+                self._discard(session)
+            else:
+                self._checkin(key, session)
+            raise
+        except BaseException:
+            self._discard(session)
+            raise
+        else:
+            session.messages += 1
+            self._checkin(key, session)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取连接池指标
+
+        Returns:
+            Dict[str, int]: 新建、复用、NOOP 检查、检查失败后重连的次数和当前空闲会话数
+        """
+        with self._lock:
+            return {
+                'created': self._created,
+                'reused': self._reused,
+                'health_checks': self._health_checks,
+                'reconnects': self._reconnects,
+                'idle': sum(len(sessions) for sessions in self._idle.values()),
+            }
+
+    def close(self) -> None:
+        """关闭所有空闲会话，之后归还的会话直接关闭"""
+        with self._lock:
+            self._closed = True
+            sessions = [session for idle in self._idle.values() for session in idle]
+            self._idle.clear()
+        for session in sessions:
+            self._quit(session)
+
+    def _checkout(self, key: Tuple, timeout: float) -> Optional[_Session]:
+        """取出可用的空闲会话，过期或检查失败的会话被关闭"""
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                if not idle:
+                    return None
+                # 后进先出：最近用过的会话最可能仍然有效
+                session = idle.pop()
+            idle_for = time.monotonic() - session.last_used
+            if idle_for > self.idle_timeout:
+                self._quit(session)
+                continue
+            session.client.timeout = timeout
+            if session.client.sock is not None:
+                session.client.sock.settimeout(timeout)
+            if idle_for > self.health_check_interval and not self._check(session):
+                with self._lock:
+                    self._reconnects += 1
+                continue
+            with self._lock:
+                self._reused += 1
+            return session
+
+    def _check(self, session: _Session) -> bool:
+        """发送 NOOP 检查会话是否仍然有效"""
+        with self._lock:
+            self._health_checks += 1
+        try:
+            code, _ = session.client.noop()
+        except (smtplib.SMTPException, OSError):
+            code = None
+        if code == 250:
+            return True
+        logger.debug("SMTP 会话已失效，重新连接")
+        self._discard(session)
+        return False
+
+    def _connect(self, server: str, use_ssl: bool, username: str, password: str, timeout: float) -> smtplib.SMTP:
+        client = smtplib.SMTP_SSL(server, timeout=timeout) if use_ssl else smtplib.SMTP(server, timeout=timeout)
+        try:
+            client.login(username, password)
+        except BaseException:
+            client.close()
+            raise
+        with self._lock:
+            self._created += 1
+        return client
+
+    def _checkin(self, key: Tuple, session: _Session) -> None:
+        session.last_used = time.monotonic()
+        with self._lock:
+            if not self._closed:
+                idle = self._idle.setdefault(key, deque())
+                if len(idle) < self.max_idle:
+                    idle.append(session)
+                    return
+        self._quit(session)
+
+    @staticmethod
+    def _quit(session: _Session) -> None:
+        """正常结束会话"""
+        try:
+            session.client.quit()
+        except (smtplib.SMTPException, OSError):
+            session.client.close()
+
+    @staticmethod
+    def _discard(session: _Session) -> None:
+        """直接关闭出错的会话"""
+        try:
+            session.client.close()
+        except OSError:
+            pass
+
+
+_default_pool: Optional[SMTPPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_smtp_pool(config_manager=None) -> SMTPPool:
+    """
+    获取进程内共享的 SMTP 连接池，首次调用时根据配置创建
+
+    Args:
+        config_manager: 配置管理器实例，用于读取连接池配置
+
+    Returns:
+        SMTPPool: 共享的 SMTP 连接池
+    """
+    global _default_pool
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                if config_manager is not None:
+                    _default_pool = SMTPPool(
+                        max_idle=int(config_manager.get_config("SMTP_POOL_MAXSIZE", 2)),
+                        idle_timeout=float(config_manager.get_config("SMTP_POOL_IDLE_TIMEOUT", 60.0)),
+                        health_check_interval=float(config_manager.get_config("SMTP_POOL_HEALTH_CHECK", 5.0)),
+                    )
+                else:
+                    _default_pool = SMTPPool()
+    return _default_pool
+
+
+def close_smtp_pool() -> None:
+    """关闭并丢弃共享的 SMTP 连接池"""
+    global _default_pool
+    with _default_pool_lock:
+        pool = _default_pool
+        _default_pool = None
+    if pool is not None:
+        pool.close()
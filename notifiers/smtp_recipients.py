@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SMTP 收件人
+展开收件人列表中的分组，并按域名把收件人分成若干个 SMTP 事务：
+同一域名的收件人尽量放在同一个事务中，每个事务的 RCPT TO 数量不超过服务器的收件人上限
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set
+
+logger = logging.getLogger(__name__)
+
+# RFC 5321 要求服务器至少接受 100 个收件人
+DEFAULT_MAX_RECIPIENTS = 100
+
+
+def is_group(entry: str) -> bool:
+    """不含 @ 的条目是分组名"""
+    return '@' not in entry
+
+
+def expand_recipients(entries: Iterable[str], groups: Mapping[str, Sequence[str]],
+                      _seen: Optional[Set[str]] = None) -> List[str]:
+    """
+    展开分组并去掉重复的地址（地址比较不区分大小写），保持首次出现的顺序
+
+    Args:
+        entries: 地址或分组名，分组中也可以引用其他分组
+        groups: 分组名到地址或分组名列表的映射
+
+    Returns:
+        List[str]: 收件人地址
+    """
+    seen = set() if _seen is None else _seen
+    recipients: List[str] = []
+    for entry in entries:
+        entry = entry.strip()
+        if not entry:
+            continue
+        if is_group(entry):
+            if entry in seen:
+                continue
+            seen.add(entry)
+            if entry not in groups:
+                logger.warning(f"收件人分组 {entry} 不存在")
+                continue
+            recipients.extend(expand_recipients(groups[entry], groups, seen))
+            continue
+        key = entry.lower()
+        if key not in seen:
+            seen.add(key)
+            recipients.append(entry)
+    return recipients
+
+
+def group_recipients(recipients: Sequence[str], max_per_transaction: int = DEFAULT_MAX_RECIPIENTS) -> List[List[str]]:
+    """
+    按域名把收件人分成 SMTP 事务
+
+    同一域名的收件人相邻排列，整个域名能放进当前事务时不拆分；
+    单个域名超过上限时按上限拆分。
+
+    Args:
+        recipients: 收件人地址
+        max_per_transaction: 每个事务最多的收件人数
+
+    Returns:
+        List[List[str]]: 每个事务的收件人
+    """
+    limit = max(1, max_per_transaction)
+    domains: Dict[str, List[str]] = OrderedDict()
+    for address in recipients:
+        domains.setdefault(address.rsplit('@', 1)[-1].lower(), []).append(address)
+
+    transactions: List[List[str]] = []
+    current: List[str] = []
+    for addresses in domains.values():
+        for offset in range(0, len(addresses), limit):
+            chunk = addresses[offset:offset + limit]
+            if current and len(current) + len(chunk) > limit:
+                transactions.append(current)
+                current = []
+            current.extend(chunk)
+    if current:
+        transactions.append(current)
+    return transactions
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP 传输层
+为每个服务商主机维护一个带连接池的 requests.Session，在多次发送之间复用 TCP/TLS 连接；
+安装 aiohttp 时另外提供绑定事件循环的异步连接池
+"""
+
+import asyncio
+import logging
+import socket
+import threading
+import weakref
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp 为可选依赖，未安装时异步发送回退到线程中执行
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """开启 TCP keep-alive 的 HTTPAdapter，防止空闲连接被中间设备静默断开"""
+
+    def __init__(self, tcp_keepalive: bool = True, **kwargs):
+        self._socket_options = list(HTTPConnection.default_socket_options)
+        if tcp_keepalive:
+            self._socket_options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = self._socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        proxy_kwargs.setdefault('socket_options', self._socket_options)
+        return super().proxy_manager_for(proxy, **proxy_kwargs)
+
+
+class SessionPool:
+    """按服务商主机（及代理设置）划分的 Session 池"""
+
+    def __init__(self, pool_maxsize: int = 10, max_retries: int = 1,
+                 backoff_factor: float = 0.3, tcp_keepalive: bool = True):
+        """
+        初始化 Session 池
+
+        Args:
+            pool_maxsize: 每个主机保留的最大连接数
+            max_retries: 适配器层面的连接重试次数，仅在请求尚未发出时重试，不会重复投递
+            backoff_factor: 连接重试的退避系数
+            tcp_keepalive: 是否开启 TCP keep-alive
+        """
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.tcp_keepalive = tcp_keepalive
+        self._sessions: Dict[Tuple, requests.Session] = {}
+        self._request_counts: Dict[Tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def get_session(self, url: str, proxies: Optional[dict] = None) -> requests.Session:
+        """
+        获取指定 URL 所属主机的 Session，不存在时创建
+
+        Args:
+            url: 请求 URL
+            proxies: 代理配置，不同代理设置使用不同的 Session
+
+        Returns:
+            requests.Session: 复用的 Session
+        """
+        key = self._session_key(url, proxies)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._create_session(proxies)
+                self._sessions[key] = session
+                self._request_counts[key] = 0
+                logger.debug(f"为 {key[0]}://{key[1]} 创建新的 HTTP Session")
+            self._request_counts[key] += 1
+        return session
+
+    def request(self, method: str, url: str, proxies: Optional[dict] = None, **kwargs) -> requests.Response:
+        """
+        通过复用的 Session 发送请求
+
+        Args:
+            method: HTTP 方法
+            url: 请求 URL
+            proxies: 代理配置
+            **kwargs: 传递给 requests.Session.request 的其他参数
+
+        Returns:
+            requests.Response: 响应对象
+        """
+        return self.get_session(url, proxies).request(method, url, **kwargs)
+
+    def close(self) -> None:
+        """关闭所有 Session 及其连接"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._request_counts.clear()
+        for session in sessions:
+            session.close()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取各主机的请求计数
+
+        Returns:
+            Dict[str, int]: 主机到请求次数的映射
+        """
+        with self._lock:
+            return {f"{key[0]}://{key[1]}": count for key, count in self._request_counts.items()}
+
+    def _create_session(self, proxies: Optional[dict]) -> requests.Session:
+        """创建带连接池和连接重试的 Session"""
+        retry = Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=0,
+            status=0,
+            backoff_factor=self.backoff_factor,
+            raise_on_status=False,
+        )
+        adapter = KeepAliveAdapter(
+            tcp_keepalive=self.tcp_keepalive,
+            pool_connections=1,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["Connection"] = "keep-alive"
+        if proxies:
+            session.proxies.update(proxies)
+        return session
+
+    @staticmethod
+    def _session_key(url: str, proxies: Optional[dict]) -> Tuple:
+        parts = urlsplit(url)
+        proxy_key = tuple(sorted(proxies.items())) if proxies else ()
+        return parts.scheme, parts.netloc, proxy_key
+
+
+_default_pool: Optional[SessionPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_session_pool(config_manager=None) -> SessionPool:
+    """
+    获取进程内共享的 Session 池，首次调用时根据配置创建
+
+    Args:
+        config_manager: 配置管理器实例，用于读取连接池配置
+
+    Returns:
+        SessionPool: 共享的 Session 池
+    """
+    global _default_pool
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                if config_manager is not None:
+                    _default_pool = SessionPool(
+                        pool_maxsize=int(config_manager.get_config("HTTP_POOL_MAXSIZE", 10)),
+                        max_retries=int(config_manager.get_config("HTTP_POOL_RETRIES", 1)),
+                        backoff_factor=float(config_manager.get_config("HTTP_POOL_BACKOFF", 0.3)),
+                        tcp_keepalive=bool(config_manager.get_config("HTTP_TCP_KEEPALIVE", True)),
+                    )
+                else:
+                    _default_pool = SessionPool()
+    return _default_pool
+
+
+def close_session_pool() -> None:
+    """关闭并丢弃共享的 Session 池"""
+    global _default_pool
+    with _default_pool_lock:
+        pool = _default_pool
+        _default_pool = None
+    if pool is not None:
+        pool.close()
+
+
+def is_network_exception(exception: Exception) -> bool:
+    """
+    判断异常是否为网络层异常（同步或异步传输）
+
+    Args:
+        exception: 异常对象
+
+    Returns:
+        bool: 是否为网络层异常
+    """
+    if isinstance(exception, (requests.exceptions.RequestException, asyncio.TimeoutError)):
+        return True
+    return aiohttp is not None and isinstance(exception, aiohttp.ClientError)
+
+
+class AsyncSessionPool:
+    """基于 aiohttp 的异步连接池，绑定到创建它的事件循环"""
+
+    def __init__(self, pool_maxsize: int = 10, keepalive_timeout: float = 30.0):
+        """
+        初始化异步连接池
+
+        Args:
+            pool_maxsize: 每个主机的最大连接数
+            keepalive_timeout: 空闲连接保留时间（秒）
+        """
+        self.pool_maxsize = pool_maxsize
+        self.keepalive_timeout = keepalive_timeout
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=0,
+                limit_per_host=self.pool_maxsize,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def request_json(self, method: str, url: str, proxies: Optional[dict] = None,
+                           params: Optional[Dict[str, Any]] = None, data: Any = None,
+                           headers: Optional[Dict[str, str]] = None,
+                           timeout: Union[float, Tuple[float, float]] = 15) -> Any:
+        """
+        发送请求并解析 JSON 响应，参数与 requests 的写法保持一致
+
+        Args:
+            method: HTTP 方法
+            url: 请求 URL
+            proxies: requests 格式的代理配置
+            params: 查询参数
+            data: 表单字典或原始请求体
+            headers: 请求头
+            timeout: 总超时，或 (连接超时, 读取超时)
+
+        Returns:
+            响应 JSON
+        """
+        if isinstance(timeout, tuple):
+            client_timeout = aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+        else:
+            client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+        if params:
+            params = {key: str(value) for key, value in params.items()}
+        if isinstance(data, dict):
+            data = {key: str(value) for key, value in data.items()}
+
+        proxy = None
+        if proxies:
+            proxy = proxies.get(urlsplit(url).scheme) or proxies.get("https") or proxies.get("http")
+
+        async with self._get_session().request(
+            method, url, params=params, data=data, headers=headers,
+            proxy=proxy, timeout=client_timeout,
+        ) as response:
+            return await response.json(content_type=None)
+
+    async def close(self) -> None:
+        """关闭连接池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+_async_pools = weakref.WeakKeyDictionary()
+
+
+def get_async_session_pool(config_manager=None) -> Optional[AsyncSessionPool]:
+    """
+    获取当前事件循环的异步连接池
+
+    Args:
+        config_manager: 配置管理器实例，用于读取连接池配置
+
+    Returns:
+        Optional[AsyncSessionPool]: 异步连接池，未安装 aiohttp 时返回 None
+    """
+    if aiohttp is None:
+        return None
+
+    loop = asyncio.get_running_loop()
+    pool = _async_pools.get(loop)
+    if pool is None:
+        pool_maxsize = 10
+        if config_manager is not None:
+            pool_maxsize = int(config_manager.get_config("HTTP_POOL_MAXSIZE", 10))
+        pool = AsyncSessionPool(pool_maxsize=pool_maxsize)
+        _async_pools[loop] = pool
+    return pool
+
+
+async def close_async_session_pool() -> None:
+    """关闭当前事件循环的异步连接池"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    pool = _async_pools.pop(loop, None)
+    if pool is not None:
+        await pool.close()
@@ -1,11 +1,19 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import hashlib
 import json
+import logging
+import os
 import re
+import threading
+import time
+from typing import Callable, Dict, Any, Optional, Tuple
+
 import requests
 
-from .base import BaseNotifier, NotificationResult
+from deadline import DeadlineExceededError, apply_deadline
+from .base import BaseNotifier, HTTPNotifier, HTTPRequest, NotificationResult
 
 
 class WeComAppNotifier(BaseNotifier):
@@ -42,8 +50,13 @@ class WeComAppNotifier(BaseNotifier):
             agentid = qywx_am_parts[3]
             media_id = qywx_am_parts[4] if len(qywx_am_parts) == 5 else ""
             
-            # 创建企业微信客户端
-            wecom_client = WeComClient(corpid, corpsecret, agentid)
+            # 创建企业微信客户端，复用共享的连接池和 access_token 缓存
+            from .transport import get_session_pool
+            wecom_client = WeComClient(
+                corpid, corpsecret, agentid,
+                get_session_pool(self.config_manager),
+                get_token_cache(self.config_manager),
+            )
             
             # 发送消息
             if not media_id:
@@ -59,15 +72,19 @@ class WeComAppNotifier(BaseNotifier):
                 self._log_send_failure(response)
                 return self._create_error_result(response, "企业微信应用推送失败")
                 
+        except DeadlineExceededError:
+            raise
         except Exception as e:
             error_msg = f"发送异常: {str(e)}"
             self._log_send_failure(error_msg)
             return self._create_error_result(error_msg, "企业微信应用推送失败")
 
 
-class WeComBotNotifier(BaseNotifier):
+class WeComBotNotifier(HTTPNotifier):
     """企业微信机器人通知器"""
     
+    missing_config_error = "QYWX_KEY 未设置"
+    
     def get_name(self) -> str:
         return "企业微信机器人"
     
@@ -75,77 +92,230 @@ class WeComBotNotifier(BaseNotifier):
         """检查企业微信机器人是否已配置"""
         return bool(self.config_manager.get_config("QYWX_KEY"))
     
-    def send(self, title: str, content: str) -> NotificationResult:
-        """发送企业微信机器人通知"""
-        if not self.is_configured():
-            self._log_not_configured()
-            return self._create_error_result("QYWX_KEY 未设置", "配置错误")
+    def _get_failure_message(self) -> str:
+        return "企业微信机器人推送失败"
+    
+    def _build_request(self, title: str, content: str) -> HTTPRequest:
+        """构建企业微信机器人推送请求"""
+        # 构建请求 URL
+        qywx_key = self.config_manager.get_config("QYWX_KEY")
+        url = f"https://qyapi.weixin.qq.com/cgi-bin/webhook/send?key={qywx_key}"
         
-        self._log_send_attempt(title)
+        # 构建请求数据
+        headers = {"Content-Type": "application/json;charset=utf-8"}
+        data = {
+            "msgtype": "text", 
+            "text": {"content": f"{title}\n\n{content}"}
+        }
         
-        try:
-            # 构建请求 URL
-            qywx_key = self.config_manager.get_config("QYWX_KEY")
-            url = f"https://qyapi.weixin.qq.com/cgi-bin/webhook/send?key={qywx_key}"
+        return HTTPRequest("POST", url, data=json.dumps(data), headers=headers)
+    
+    def _handle_response(self, response: Dict[str, Any]) -> NotificationResult:
+        """解析企业微信机器人响应"""
+        if response.get("errcode") == 0:
+            return self._succeed("企业微信机器人推送成功")
+        return self._fail(response.get("errmsg", "未知错误"))
+
+
+class WeComTokenCache:
+    """
+    企业微信 access_token 缓存
+    
+    按 corpid/corpsecret 缓存令牌并遵循 expires_in，在到期前提前刷新；
+    同一应用同一时刻只允许一个线程刷新令牌，可选持久化到文件供后续运行复用。
+    """
+    
+    def __init__(self, refresh_margin: float = 300, persist_path: Optional[str] = None):
+        """
+        初始化令牌缓存
+        
+        Args:
+            refresh_margin: 提前刷新的时间（秒）
+            persist_path: 持久化文件路径，为空时仅缓存在内存中
+        """
+        self.refresh_margin = refresh_margin
+        self.persist_path = persist_path
+        self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
+        self._tokens: Dict[str, Tuple[str, float]] = {}
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._fetch_count = 0
+        self._load()
+    
+    @staticmethod
+    def make_key(corpid: str, corpsecret: str) -> str:
+        """生成缓存键，不在键中保存明文 corpsecret"""
+        secret_digest = hashlib.sha256(corpsecret.encode("utf-8")).hexdigest()[:16]
+        return f"{corpid}:{secret_digest}"
+    
+    def get_token(self, corpid: str, corpsecret: str, fetch: Callable[[], Tuple[str, int]]) -> str:
+        """
+        获取有效的 access_token，缓存失效时调用 fetch 刷新
+        
+        Args:
+            corpid: 企业 ID
+            corpsecret: 应用密钥
+            fetch: 刷新函数，返回 (access_token, expires_in)
             
-            # 构建请求数据
-            headers = {"Content-Type": "application/json;charset=utf-8"}
+        Returns:
+            str: access_token
+        """
+        key = self.make_key(corpid, corpsecret)
+        token = self._get_valid(key)
+        if token:
+            return token
+        
+        with self._get_key_lock(key):
+            # 等待锁期间其他线程可能已经刷新
+            token = self._get_valid(key)
+            if token:
+                return token
+            
+            access_token, expires_in = fetch()
+            expires_at = time.time() + int(expires_in)
+            with self._lock:
+                self._tokens[key] = (access_token, expires_at)
+                self._fetch_count += 1
+            self.logger.debug(f"企业微信 access_token 已刷新，{expires_in} 秒后过期")
+            self._save()
+            return access_token
+    
+    def invalidate(self, corpid: str, corpsecret: str, token: Optional[str] = None) -> None:
+        """
+        使缓存的令牌失效
+        
+        Args:
+            corpid: 企业 ID
+            corpsecret: 应用密钥
+            token: 只有缓存中的令牌与之相同时才失效，避免覆盖其他线程刚刷新的令牌
+        """
+        key = self.make_key(corpid, corpsecret)
+        with self._lock:
+            cached = self._tokens.get(key)
+            if cached and (token is None or cached[0] == token):
+                del self._tokens[key]
+        self._save()
+    
+    def get_stats(self) -> Dict[str, int]:
+        """获取缓存指标"""
+        with self._lock:
+            return {'cached_tokens': len(self._tokens), 'fetch_count': self._fetch_count}
+    
+    def _get_valid(self, key: str) -> Optional[str]:
+        with self._lock:
+            cached = self._tokens.get(key)
+        if cached and cached[1] - self.refresh_margin > time.time():
+            return cached[0]
+        return None
+    
+    def _get_key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+    
+    def _load(self) -> None:
+        """从持久化文件加载未过期的令牌"""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            now = time.time()
+            for key, entry in data.items():
+                if entry.get('expires_at', 0) > now:
+                    self._tokens[key] = (entry['access_token'], float(entry['expires_at']))
+        except Exception as e:
+            self.logger.warning(f"加载企业微信令牌缓存失败: {e}")
+    
+    def _save(self) -> None:
+        """将令牌写入持久化文件（原子替换，权限 0600）"""
+        if not self.persist_path:
+            return
+        with self._lock:
             data = {
-                "msgtype": "text", 
-                "text": {"content": f"{title}\n\n{content}"}
+                key: {'access_token': token, 'expires_at': expires_at}
+                for key, (token, expires_at) in self._tokens.items()
             }
-            
-            # 发送请求
-            response = requests.post(
-                url=url, 
-                data=json.dumps(data), 
-                headers=headers, 
-                timeout=15
-            ).json()
-            
-            if response.get("errcode") == 0:
-                self._log_send_success()
-                return self._create_success_result("企业微信机器人推送成功")
-            else:
-                error_msg = response.get("errmsg", "未知错误")
-                self._log_send_failure(error_msg)
-                return self._create_error_result(error_msg, "企业微信机器人推送失败")
-                
-        except requests.exceptions.RequestException as e:
-            error_msg = f"网络请求失败: {str(e)}"
-            self._log_send_failure(error_msg)
-            return self._create_error_result(error_msg, "企业微信机器人推送失败")
+        try:
+            directory = os.path.dirname(os.path.abspath(self.persist_path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.persist_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.persist_path)
         except Exception as e:
-            error_msg = f"发送异常: {str(e)}"
-            self._log_send_failure(error_msg)
-            return self._create_error_result(error_msg, "企业微信机器人推送失败")
+            self.logger.warning(f"保存企业微信令牌缓存失败: {e}")
+
+
+_token_cache: Optional[WeComTokenCache] = None
+_token_cache_lock = threading.Lock()
+
+
+def get_token_cache(config_manager=None) -> WeComTokenCache:
+    """
+    获取进程内共享的企业微信令牌缓存
+    
+    Args:
+        config_manager: 配置管理器实例，用于读取 QYWX_TOKEN_CACHE_FILE
+        
+    Returns:
+        WeComTokenCache: 共享的令牌缓存
+    """
+    global _token_cache
+    if _token_cache is None:
+        with _token_cache_lock:
+            if _token_cache is None:
+                persist_path = config_manager.get_config("QYWX_TOKEN_CACHE_FILE") if config_manager else None
+                _token_cache = WeComTokenCache(persist_path=persist_path)
+    return _token_cache
 
 
 class WeComClient:
     """企业微信客户端"""
     
-    def __init__(self, corpid: str, corpsecret: str, agentid: str):
+    # access_token 无效或过期的错误码
+    INVALID_TOKEN_ERRCODES = (40014, 42001)
+    
+    def __init__(self, corpid: str, corpsecret: str, agentid: str, session_pool=None,
+                 token_cache: Optional[WeComTokenCache] = None):
         self.corpid = corpid
         self.corpsecret = corpsecret
         self.agentid = agentid
+        self.session_pool = session_pool
+        self.token_cache = token_cache
     
-    def get_access_token(self) -> str:
-        """获取访问令牌"""
+    def _post(self, url: str, **kwargs) -> requests.Response:
+        """通过共享连接池发送 POST 请求，超时按当前发送的截止时间收紧"""
+        if self.session_pool is None:
+            from .transport import get_session_pool
+            self.session_pool = get_session_pool()
+        kwargs["timeout"] = apply_deadline(kwargs.get("timeout", 15))
+        return self.session_pool.request("POST", url, **kwargs)
+    
+    def _fetch_access_token(self) -> Tuple[str, int]:
+        """从企业微信接口获取新的访问令牌"""
         url = "https://qyapi.weixin.qq.com/cgi-bin/gettoken"
         params = {
             "corpid": self.corpid,
             "corpsecret": self.corpsecret,
         }
-        response = requests.post(url, params=params, timeout=15)
+        response = self._post(url, params=params, timeout=15)
         data = response.json()
-        return data["access_token"]
+        if "access_token" not in data:
+            raise ValueError(f"获取 access_token 失败: {data.get('errmsg', '未知错误')}")
+        return data["access_token"], int(data.get("expires_in", 7200))
+    
+    def get_access_token(self) -> str:
+        """获取访问令牌，配置了令牌缓存时优先使用缓存"""
+        if self.token_cache is None:
+            return self._fetch_access_token()[0]
+        return self.token_cache.get_token(self.corpid, self.corpsecret, self._fetch_access_token)
     
     def send_text(self, message: str, touser: str = "@all") -> str:
         """发送文本消息"""
-        send_url = (
-            "https://qyapi.weixin.qq.com/cgi-bin/message/send?access_token="
-            + self.get_access_token()
-        )
         send_data = {
             "touser": touser,
             "msgtype": "text",
@@ -153,17 +323,10 @@ class WeComClient:
             "text": {"content": message},
             "safe": "0",
         }
-        send_bytes = json.dumps(send_data).encode("utf-8")
-        response = requests.post(send_url, data=send_bytes, timeout=15)
-        response_data = response.json()
-        return response_data["errmsg"]
+        return self._send_message(send_data)
     
     def send_mpnews(self, title: str, message: str, media_id: str, touser: str = "@all") -> str:
         """发送图文消息"""
-        send_url = (
-            "https://qyapi.weixin.qq.com/cgi-bin/message/send?access_token="
-            + self.get_access_token()
-        )
         send_data = {
             "touser": touser,
             "msgtype": "mpnews",
@@ -181,7 +344,27 @@ class WeComClient:
                 ]
             },
         }
+        return self._send_message(send_data)
+    
+    def _send_message(self, send_data: Dict[str, Any]) -> str:
+        """
+        发送应用消息，缓存的令牌被服务端判定失效时刷新后重试一次
+        
+        Returns:
+            str: 企业微信返回的 errmsg
+        """
         send_bytes = json.dumps(send_data).encode("utf-8")
-        response = requests.post(send_url, data=send_bytes, timeout=15)
-        response_data = response.json()
-        return response_data["errmsg"]
\ No newline at end of file
+        
+        for attempt in range(2):
+            access_token = self.get_access_token()
+            send_url = "https://qyapi.weixin.qq.com/cgi-bin/message/send?access_token=" + access_token
+            response = self._post(send_url, data=send_bytes, timeout=15)
+            response_data = response.json()
+            
+            if (self.token_cache is not None and attempt == 0
+                    and response_data.get("errcode") in self.INVALID_TOKEN_ERRCODES):
+                self.token_cache.invalidate(self.corpid, self.corpsecret, access_token)
+                continue
+            return response_data["errmsg"]
+        
+        return response_data["errmsg"]
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发件箱模块
+发送前把每条通知在每个渠道上的投递写入 SQLite，收到发送结果后更新状态。
+进程崩溃或 GitHub Actions 运行被取消时，未完成的投递会在下次启动时重新发送（至少一次投递）
+"""
+
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# 投递状态
+STATE_PENDING = 'pending'    # 已写入发件箱，尚未得到发送结果
+STATE_SENT = 'sent'
+STATE_FAILED = 'failed'
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS messages ("
+    "id INTEGER PRIMARY KEY, title TEXT NOT NULL, content TEXT NOT NULL, source TEXT NOT NULL, "
+    "severity TEXT NOT NULL, attachments TEXT NOT NULL, created_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS deliveries ("
+    "id INTEGER PRIMARY KEY, message_id INTEGER NOT NULL REFERENCES messages(id), channel TEXT NOT NULL, "
+    "state TEXT NOT NULL, resumes INTEGER NOT NULL DEFAULT 0, error TEXT, updated_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS deliveries_state ON deliveries (state, message_id)",
+)
+
+
+@dataclass
+class OutboxConfig:
+    """发件箱配置"""
+    path: Optional[str] = None          # SQLite 数据库路径，为空时不启用发件箱
+    retention_hours: float = 168.0      # 已完成的通知保留时间（小时）
+    max_resumes: int = 3                # 同一投递最多在重启后恢复的次数，防止反复导致崩溃的消息无限重发
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'OutboxConfig':
+        """从 notification_config.json 的 outbox 配置创建"""
+        data = data or {}
+        default = cls()
+        return cls(
+            path=data.get('path') or None,
+            retention_hours=float(data.get('retention_hours', default.retention_hours)),
+            max_resumes=int(data.get('max_resumes', default.max_resumes)),
+        )
+
+
+@dataclass
+class PendingMessage:
+    """需要恢复发送的通知"""
+    message_id: int
+    title: str
+    content: str
+    source: str
+    severity: str
+    attachments: List[Dict[str, str]]
+    deliveries: Dict[str, int] = field(default_factory=dict)   # 渠道名到投递 ID 的映射
+
+
+class OutboxEntry:
+    """一条通知在发件箱中的投递，发送结果写回创建它的发件箱（重新加载配置后发件箱可能已更换）"""
+
+    def __init__(self, outbox: 'Outbox', deliveries: Dict[str, int]):
+        self.outbox = outbox
+        self.deliveries = deliveries   # 渠道名到投递 ID 的映射
+        self.unmarked = set(deliveries)   # 尚未记录结果的渠道，全部记录前发件箱不会被 close_when_idle() 关闭
+        outbox._track(self)
+
+    def mark(self, channel: str, success: bool, error: Optional[str] = None) -> None:
+        """记录渠道的投递结果，不在本条通知中的渠道会被忽略"""
+        delivery_id = self.deliveries.get(channel)
+        if delivery_id is not None:
+            try:
+                self.outbox.mark(delivery_id, success, error)
+            finally:
+                self.outbox._untrack(self, channel)
+
+
+class Outbox:
+    """
+    基于 SQLite 的发件箱
+
+    一条通知及其所有渠道的投递在同一个事务中写入，WAL 模式下提交不需要同步磁盘，
+    每条通知增加的开销在几百微秒以内。同一个数据库文件只应由一个进程使用。
+    """
+
+    def __init__(self, config: OutboxConfig):
+        """
+        打开发件箱
+
+        Args:
+            config: 发件箱配置，path 不能为空
+        """
+        from storage import connect_sqlite
+
+        self.config = config
+        self._connection = connect_sqlite(config.path)
+        self._lock = threading.Lock()
+        self._in_flight = 0          # 还有渠道未记录结果的投递条目数
+        self._close_pending = False
+        with self._lock:
+            for statement in _SCHEMA:
+                self._connection.execute(statement)
+        self.purge()
+
+    def enqueue(self, title: str, content: str, source: str, severity: str,
+                attachments: Sequence[Dict[str, str]], channels: Sequence[str]) -> OutboxEntry:
+        """
+        在一个事务中写入通知和各渠道的投递
+
+        Args:
+            title: 通知标题
+            content: 最终发送的通知内容
+            source: 通知来源
+            severity: 严重级别
+            attachments: 附件信息（文件名、路径和类型）
+            channels: 要投递的渠道
+
+        Returns:
+            OutboxEntry: 各渠道的投递
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.execute(
+                    "INSERT INTO messages (title, content, source, severity, attachments, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (title, content, source, severity, json.dumps(list(attachments), ensure_ascii=False), now),
+                )
+                message_id = cursor.lastrowid
+                deliveries = {}
+                for channel in channels:
+                    cursor.execute(
+                        "INSERT INTO deliveries (message_id, channel, state, updated_at) VALUES (?, ?, ?, ?)",
+                        (message_id, channel, STATE_PENDING, now),
+                    )
+                    deliveries[channel] = cursor.lastrowid
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+        return OutboxEntry(self, deliveries)
+
+    def mark(self, delivery_id: int, success: bool, error: Optional[str] = None) -> None:
+        """
+        记录投递结果
+
+        Args:
+            delivery_id: 投递 ID
+            success: 是否发送成功
+            error: 失败原因
+        """
+        with self._lock:
+            self._connection.execute(
+                "UPDATE deliveries SET state = ?, error = ?, updated_at = ? WHERE id = ?",
+                (STATE_SENT if success else STATE_FAILED, error, time.time(), delivery_id),
+            )
+
+    def claim_pending(self) -> List[PendingMessage]:
+        """
+        取出上次运行未完成的投递，并增加其恢复次数；超过恢复次数上限的投递标记为失败
+
+        Returns:
+            List[PendingMessage]: 按写入顺序排列的待恢复通知
+        """
+        now = time.time()
+        messages: Dict[int, PendingMessage] = {}
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.execute(
+                    "UPDATE deliveries SET state = ?, error = ?, updated_at = ? WHERE state = ? AND resumes >= ?",
+                    (STATE_FAILED, "恢复次数超过上限", now, STATE_PENDING, self.config.max_resumes),
+                )
+                abandoned = cursor.rowcount
+                cursor.execute(
+                    "UPDATE deliveries SET resumes = resumes + 1, updated_at = ? WHERE state = ?",
+                    (now, STATE_PENDING),
+                )
+                rows = cursor.execute(
+                    "SELECT d.id, d.channel, m.id, m.title, m.content, m.source, m.severity, m.attachments "
+                    "FROM deliveries d JOIN messages m ON m.id = d.message_id "
+                    "WHERE d.state = ? ORDER BY m.id, d.id",
+                    (STATE_PENDING,),
+                ).fetchall()
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+
+        if abandoned:
+            logger.warning(f"发件箱中有 {abandoned} 个投递超过恢复次数上限，已标记为失败")
+        for delivery_id, channel, message_id, title, content, source, severity, attachments in rows:
+            message = messages.get(message_id)
+            if message is None:
+                message = messages[message_id] = PendingMessage(
+                    message_id, title, content, source, severity, json.loads(attachments)
+                )
+            message.deliveries[channel] = delivery_id
+        return list(messages.values())
+
+    def purge(self) -> int:
+        """
+        删除超过保留时间且所有投递都已完成的通知
+
+        Returns:
+            int: 删除的通知数
+        """
+        cutoff = time.time() - self.config.retention_hours * 3600
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                expired = (
+                    "SELECT id FROM messages WHERE created_at < ? AND NOT EXISTS "
+                    "(SELECT 1 FROM deliveries WHERE message_id = messages.id AND state = ?)"
+                )
+                cursor.execute(f"DELETE FROM deliveries WHERE message_id IN ({expired})", (cutoff, STATE_PENDING))
+                cursor.execute(f"DELETE FROM messages WHERE id IN ({expired})", (cutoff, STATE_PENDING))
+                deleted = cursor.rowcount
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+        return deleted
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取各状态的投递数
+
+        Returns:
+            Dict[str, int]: 状态到投递数的映射
+        """
+        with self._lock:
+            rows = self._connection.execute("SELECT state, COUNT(*) FROM deliveries GROUP BY state").fetchall()
+        stats = {STATE_PENDING: 0, STATE_SENT: 0, STATE_FAILED: 0}
+        stats.update(dict(rows))
+        return stats
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._connection.close()
+
+    def close_when_idle(self) -> None:
+        """
+        进行中的投递全部记录结果后再关闭数据库连接
+
+        重新加载配置更换发件箱时使用：旧配置下正在发送的通知仍把结果写回旧发件箱，
+        否则这些投递会一直处于待发送状态，下次启动时被重复发送。
+        """
+        with self._lock:
+            if self._in_flight:
+                self._close_pending = True
+                return
+            self._connection.close()
+
+    def _track(self, entry: OutboxEntry) -> None:
+        if entry.unmarked:
+            with self._lock:
+                self._in_flight += 1
+
+    def _untrack(self, entry: OutboxEntry, channel: str) -> None:
+        with self._lock:
+            if channel not in entry.unmarked:
+                return
+            entry.unmarked.discard(channel)
+            if entry.unmarked:
+                return
+            self._in_flight -= 1
+            if self._close_pending and not self._in_flight:
+                self._connection.close()
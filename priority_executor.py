@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+优先级线程池模块
+发送任务按优先级分道排队：最高优先级的通道严格优先，其余通道按权重公平排队（WFQ），
+大量低优先级通知不会让高优先级的告警排在它们后面等待
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 优先级通道，从高到低；第一个通道严格优先，不参与按权重排队
+PRIORITY_LANES: Tuple[str, ...] = ('urgent', 'high', 'normal', 'low')
+DEFAULT_LANE = 'normal'
+DEFAULT_LANE_WEIGHTS: Dict[str, float] = {'high': 4.0, 'normal': 2.0, 'low': 1.0}
+
+
+def normalize_priority(priority: Optional[str]) -> Optional[str]:
+    """统一优先级的写法，未指定或不是已知的通道时返回 None"""
+    if priority is None:
+        return None
+    lane = str(priority).strip().lower()
+    return lane if lane in PRIORITY_LANES else None
+
+
+@dataclass
+class LaneConfig:
+    """优先级通道配置"""
+    default_lane: str = DEFAULT_LANE
+    weights: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_LANE_WEIGHTS))
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'LaneConfig':
+        """从 notification_config.json 的 priority 配置创建"""
+        data = data or {}
+        weights = dict(DEFAULT_LANE_WEIGHTS)
+        for lane, weight in (data.get('weights') or {}).items():
+            if lane in weights:
+                weights[lane] = max(float(weight), 0.001)
+        return cls(
+            default_lane=normalize_priority(data.get('default_lane')) or DEFAULT_LANE,
+            weights=weights,
+        )
+
+
+class _Lane:
+    """一个通道的队列和等待时间统计"""
+
+    __slots__ = ('tasks', 'last_finish', 'submitted', 'served', 'total_wait', 'max_wait')
+
+    def __init__(self):
+        self.tasks: Deque[Tuple[float, float, Callable]] = deque()   # (虚拟完成时间, 入队时间, 任务)
+        self.last_finish = 0.0
+        self.submitted = 0
+        self.served = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+
+class LaneQueue:
+    """
+    多通道任务队列（非线程安全，由调用方加锁）
+
+    最高优先级通道有任务时总是先出队；其余通道按加权公平排队：每个任务入队时按
+    max(虚拟时间, 本通道上一个任务的完成标签) + 1 / 权重 计算完成标签，出队时取标签最小的任务。
+    权重 4:2:1 的三个通道都积压时，出队的任务数约为 4:2:1，低优先级通道也不会被饿死。
+    """
+
+    def __init__(self, config: Optional[LaneConfig] = None):
+        self.config = config or LaneConfig()
+        self._lanes: Dict[str, _Lane] = {lane: _Lane() for lane in PRIORITY_LANES}
+        self._virtual_time = 0.0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, lane: str, task: Callable) -> None:
+        """任务入队，未知的通道按默认通道处理"""
+        if lane not in self._lanes:
+            lane = self.config.default_lane
+        queue = self._lanes[lane]
+        finish = 0.0
+        if lane != PRIORITY_LANES[0]:
+            weight = self.config.weights[lane]
+            finish = max(self._virtual_time, queue.last_finish) + 1.0 / weight
+            queue.last_finish = finish
+        queue.tasks.append((finish, time.monotonic(), task))
+        queue.submitted += 1
+        self._size += 1
+
+    def pop(self) -> Optional[Callable]:
+        """取出下一个要执行的任务，队列为空时返回 None"""
+        if not self._size:
+            return None
+        queue = self._lanes[PRIORITY_LANES[0]]
+        if not queue.tasks:
+            queue = min(
+                (self._lanes[lane] for lane in PRIORITY_LANES[1:] if self._lanes[lane].tasks),
+                key=lambda item: item.tasks[0][0],
+            )
+            self._virtual_time = queue.tasks[0][0]
+        _, queued_at, task = queue.tasks.popleft()
+        wait = time.monotonic() - queued_at
+        queue.served += 1
+        queue.total_wait += wait
+        queue.max_wait = max(queue.max_wait, wait)
+        self._size -= 1
+        return task
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取各通道的排队指标
+
+        Returns:
+            Dict[str, Dict[str, float]]: 通道名到排队中、已提交、已执行的任务数和等待时间的映射
+        """
+        return {
+            lane: {
+                'queued': len(queue.tasks),
+                'submitted': queue.submitted,
+                'served': queue.served,
+                'avg_wait': round(queue.total_wait / queue.served, 4) if queue.served else 0.0,
+                'max_wait': round(queue.max_wait, 4),
+            }
+            for lane, queue in self._lanes.items()
+        }
+
+
+class PriorityExecutor:
+    """
+    按优先级通道调度任务的线程池
+
+    与 ThreadPoolExecutor 一样按需创建工作线程，但排队的任务由 LaneQueue 决定执行顺序。
+    正在执行的任务不会被打断，高优先级任务在下一个工作线程空闲时立即执行。
+    """
+
+    def __init__(self, max_workers: int, config: Optional[LaneConfig] = None, thread_name_prefix: str = "PriorityExecutor"):
+        """
+        初始化线程池
+
+        Args:
+            max_workers: 最大工作线程数
+            config: 优先级通道配置
+            thread_name_prefix: 工作线程名前缀
+        """
+        self.max_workers = max(1, max_workers)
+        self.thread_name_prefix = thread_name_prefix
+        self._queue = LaneQueue(config)
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._idle = 0
+        self._shutdown = False
+
+    def update_config(self, config: LaneConfig) -> None:
+        """更新通道权重，已排队的任务保留原来的顺序"""
+        with self._condition:
+            self._queue.config = config
+
+    def submit(self, fn: Callable, *args, lane: str = DEFAULT_LANE, **kwargs) -> Future:
+        """
+        提交任务
+
+        Args:
+            fn: 要执行的函数
+            *args: 函数的位置参数
+            lane: 优先级通道
+            **kwargs: 函数的关键字参数
+
+        Returns:
+            Future: 任务的 Future 对象
+        """
+        future = Future()
+
+        def task():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            self._queue.push(lane, task)
+            self._condition.notify()
+            # 空闲线程不足以处理排队的任务时创建新线程
+            if len(self._queue) > self._idle and len(self._threads) < self.max_workers:
+                thread = threading.Thread(target=self._worker, daemon=True,
+                                          name=f"{self.thread_name_prefix}_{len(self._threads)}")
+                self._threads.append(thread)
+                thread.start()
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        关闭线程池，已排队的任务仍会执行
+
+        Args:
+            wait: 是否等待所有任务完成
+        """
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify_all()
+            threads = list(self._threads)
+        if wait:
+            for thread in threads:
+                if thread is not threading.current_thread():
+                    thread.join()
+
+    def get_lane_stats(self) -> Dict[str, Dict[str, float]]:
+        """获取各优先级通道的排队指标"""
+        with self._condition:
+            return self._queue.get_stats()
+
+    def _worker(self) -> None:
+        while True:
+            with self._condition:
+                task = self._queue.pop()
+                while task is None:
+                    if self._shutdown:
+                        return
+                    self._idle += 1
+                    self._condition.wait()
+                    self._idle -= 1
+                    task = self._queue.pop()
+            task()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+限流模块
+按通知渠道实现令牌桶限流，使发送速率保持在服务商限制之内
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional
+
+from deadline import current_deadline
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceededError(Exception):
+    """限流需要等待的时间超过了本次发送的剩余时间，未占用令牌，不可重试"""
+    pass
+
+
+class TokenBucket:
+    """
+    令牌桶
+
+    采用预约方式：调用方在锁内预约令牌并得到需要等待的时间，然后在锁外等待，
+    因此同一个令牌桶可以同时用于线程和 asyncio 两种等待方式，且按调用顺序排队。
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量（允许的突发请求数）
+        """
+        if rate <= 0:
+            raise ValueError("令牌补充速率必须大于 0")
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        预约令牌
+
+        Args:
+            tokens: 需要的令牌数
+            max_wait: 最多愿意等待的秒数，为 None 时不限制
+
+        Returns:
+            Optional[float]: 需要等待的秒数，0 表示立即可用；需要等待超过 max_wait 时不预约，返回 None
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            wait = max(0.0, (tokens - self._tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                return None
+            self._tokens -= tokens
+            return wait
+
+    def refund(self, tokens: float = 1.0) -> None:
+        """归还预约的令牌（同一渠道的其他令牌桶拒绝预约时使用）"""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + tokens)
+
+
+@dataclass
+class RateLimitStats:
+    """单个渠道的限流指标"""
+    acquired: int = 0          # 获取令牌的次数
+    throttled: int = 0         # 需要等待的次数
+    total_wait: float = 0.0    # 累计等待时间（秒）
+    max_wait: float = 0.0      # 单次最大等待时间（秒）
+    rejected: int = 0          # 等待时间超过发送时限而直接失败的次数
+
+
+class RateLimiter:
+    """按渠道划分的限流器，每个渠道可以同时受多个令牌桶约束"""
+
+    def __init__(self, buckets: Optional[Dict[str, List[TokenBucket]]] = None):
+        """
+        初始化限流器
+
+        Args:
+            buckets: 渠道名到令牌桶列表的映射
+        """
+        self._buckets = buckets or {}
+        self._stats: Dict[str, RateLimitStats] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, rate_limits: Mapping[str, Any]) -> 'RateLimiter':
+        """
+        根据 notification_config.json 中的 rate_limits 配置创建限流器
+
+        配置格式：{"telegram": [{"max_requests": 1, "period": 1, "burst": 1}, ...], ...}
+
+        Args:
+            rate_limits: 限流配置
+
+        Returns:
+            RateLimiter: 限流器实例
+        """
+        buckets = {}
+        for channel, limits in (rate_limits or {}).items():
+            if isinstance(limits, Mapping):
+                limits = [limits]
+            channel_buckets = []
+            for limit in limits:
+                try:
+                    max_requests = float(limit['max_requests'])
+                    period = float(limit.get('period', 1))
+                    burst = float(limit.get('burst', 1))
+                    channel_buckets.append(TokenBucket(max_requests / period, burst))
+                except (KeyError, TypeError, ValueError, ZeroDivisionError) as e:
+                    logger.warning(f"渠道 {channel} 的限流配置无效，已忽略: {limit} ({e})")
+            if channel_buckets:
+                buckets[channel] = channel_buckets
+        return cls(buckets)
+
+    def has_limit(self, channel: str) -> bool:
+        """检查渠道是否配置了限流"""
+        return channel in self._buckets
+
+    def reserve(self, channel: str, max_wait: Optional[float] = None) -> float:
+        """
+        为渠道预约一次发送
+
+        Args:
+            channel: 渠道名
+            max_wait: 最多愿意等待的秒数，为 None 时不限制
+
+        Returns:
+            float: 需要等待的秒数
+
+        Raises:
+            RateLimitExceededError: 需要等待超过 max_wait，此时不占用任何令牌
+        """
+        buckets = self._buckets.get(channel)
+        if not buckets:
+            return 0.0
+
+        waits = []
+        for bucket in buckets:
+            wait = bucket.reserve(max_wait=max_wait)
+            if wait is None:
+                for reserved in buckets[:len(waits)]:
+                    reserved.refund()
+                with self._lock:
+                    self._stats.setdefault(channel, RateLimitStats()).rejected += 1
+                raise RateLimitExceededError(f"渠道 {channel} 限流等待超过剩余的发送时间 {max_wait:.2f} 秒")
+            waits.append(wait)
+        wait = max(waits)
+        with self._lock:
+            stats = self._stats.setdefault(channel, RateLimitStats())
+            stats.acquired += 1
+            if wait > 0:
+                stats.throttled += 1
+                stats.total_wait += wait
+                stats.max_wait = max(stats.max_wait, wait)
+        if wait > 0:
+            logger.debug(f"渠道 {channel} 触发限流，等待 {wait:.2f} 秒")
+        return wait
+
+    def acquire(self, channel: str) -> float:
+        """
+        阻塞等待直到渠道允许发送，等待不会超过当前发送的截止时间
+
+        Args:
+            channel: 渠道名
+
+        Returns:
+            float: 实际等待的秒数
+
+        Raises:
+            RateLimitExceededError: 需要等待的时间超过截止时间的剩余时间
+        """
+        wait = self.reserve(channel, self._max_wait())
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, channel: str) -> float:
+        """
+        在事件循环中等待直到渠道允许发送，等待不会超过当前发送的截止时间
+
+        Args:
+            channel: 渠道名
+
+        Returns:
+            float: 实际等待的秒数
+
+        Raises:
+            RateLimitExceededError: 需要等待的时间超过截止时间的剩余时间
+        """
+        wait = self.reserve(channel, self._max_wait())
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    @staticmethod
+    def _max_wait() -> Optional[float]:
+        """当前发送的剩余时间，没有截止时间时不限制"""
+        deadline = current_deadline()
+        return deadline.remaining() if deadline is not None else None
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取各渠道的限流指标
+
+        Returns:
+            Dict[str, Dict[str, float]]: 渠道名到指标的映射
+        """
+        with self._lock:
+            return {
+                channel: {
+                    'acquired': stats.acquired,
+                    'throttled': stats.throttled,
+                    'total_wait': round(stats.total_wait, 3),
+                    'avg_wait': round(stats.total_wait / stats.acquired, 3) if stats.acquired else 0.0,
+                    'max_wait': round(stats.max_wait, 3),
+                    'rejected': stats.rejected,
+                }
+                for channel, stats in self._stats.items()
+            }
@@ -5,13 +5,22 @@
 实现网络错误的重试机制，支持指数退避策略
 """
 
+import asyncio
+import contextvars
+import functools
 import time
 import logging
 import random
+from concurrent.futures import Future, InvalidStateError
 from typing import Callable, Any, Optional, List, Type
 from dataclasses import dataclass
 from enum import Enum
 
+from circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+from retry_scheduler import DelayScheduler
+from deadline import Deadline, DeadlineExceededError, deadline_scope
+from rate_limiter import RateLimitExceededError
+
 logger = logging.getLogger(__name__)
 
 
@@ -30,6 +39,53 @@ class TemporaryError(RetryableError):
     pass
 
 
+# 错误分类，写入死信队列并用于筛选重放
+ERROR_NETWORK = "network"            # 网络连接错误
+ERROR_TEMPORARY = "temporary"        # 服务商临时性错误（5xx 等）
+ERROR_RATE_LIMITED = "rate_limited"  # 服务商限频（429）
+ERROR_TIMEOUT = "timeout"            # 超过发送截止时间
+ERROR_CIRCUIT_OPEN = "circuit_open"  # 渠道处于熔断状态，未发送
+ERROR_REJECTED = "rejected"          # 通知器返回了不可重试的失败结果（配置、鉴权、内容问题等）
+ERROR_EXCEPTION = "exception"        # 其他不可重试的异常
+
+
+def classify_error(exception: BaseException) -> str:
+    """
+    对发送异常进行分类
+    
+    Args:
+        exception: 发送时抛出的异常
+        
+    Returns:
+        str: 错误分类
+    """
+    if isinstance(exception, CircuitOpenError):
+        return ERROR_CIRCUIT_OPEN
+    if isinstance(exception, (DeadlineExceededError, TimeoutError, asyncio.TimeoutError)):
+        return ERROR_TIMEOUT
+    if isinstance(exception, RateLimitExceededError):
+        return ERROR_RATE_LIMITED
+    error_msg = str(exception).lower()
+    if "429" in error_msg or "too many requests" in error_msg:
+        return ERROR_RATE_LIMITED
+    if isinstance(exception, (NetworkError, ConnectionError)):
+        return ERROR_NETWORK
+    if isinstance(exception, RetryableError):
+        return ERROR_TEMPORARY
+    return ERROR_EXCEPTION
+
+
+@dataclass
+class AttemptRecord:
+    """一次尝试的记录"""
+    number: int                          # 第几次尝试（从1开始）
+    started_at: float                    # 开始时间（Unix 时间戳）
+    elapsed: float                       # 耗时（秒）
+    error: Optional[str] = None          # 失败原因，成功或函数正常返回时为 None
+    error_type: Optional[str] = None     # 错误分类
+    delay: Optional[float] = None        # 失败后等待重试的时间（秒），不再重试时为 None
+
+
 class RetryStrategy(Enum):
     """重试策略枚举"""
     FIXED = "fixed"           # 固定间隔
@@ -62,14 +118,23 @@ class RetryConfig:
 class RetryHandler:
     """重试处理器"""
     
-    def __init__(self, config: Optional[RetryConfig] = None):
+    def __init__(self, config: Optional[RetryConfig] = None, circuit_breaker: Optional[CircuitBreaker] = None,
+                 scheduler: Optional[DelayScheduler] = None, deadline: Optional[Deadline] = None):
         """
         初始化重试处理器
         
         Args:
             config: 重试配置，如果为 None 则使用默认配置
+            circuit_breaker: 熔断器，设置后每次尝试前检查熔断状态并记录结果
+            scheduler: 延迟调度器，设置后重试等待由调度器计时，不占用线程
+            deadline: 截止时间，设置后被调用函数中的请求超时和是否重试都据此决定
         """
         self.config = config or RetryConfig()
+        self.circuit_breaker = circuit_breaker
+        self.scheduler = scheduler
+        self.deadline = deadline
+        # 每次尝试的记录，熔断或截止时间导致的跳过也会记录
+        self.attempts: List[AttemptRecord] = []
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
     
     def execute_with_retry(self, func: Callable, *args, **kwargs) -> Any:
@@ -85,15 +150,22 @@ class RetryHandler:
             函数的执行结果
             
         Raises:
+            CircuitOpenError: 熔断器处于打开状态
+            DeadlineExceededError: 截止时间已到
             Exception: 如果所有重试都失败，抛出最后一次的异常
         """
         last_exception = None
         
         for attempt in range(1, self.config.max_attempts + 1):
+            self._check_before_attempt(attempt)
+            started = time.monotonic()
             try:
                 func_name = getattr(func, '__name__', str(func))
                 self.logger.debug(f"执行函数 {func_name}，第 {attempt} 次尝试")
-                result = func(*args, **kwargs)
+                with deadline_scope(self.deadline):
+                    result = self._call_releasing_probe(func, *args, **kwargs)
+                self._record_outcome(None, result)
+                self._record_attempt(attempt, started)
                 
                 if attempt > 1:
                     func_name = getattr(func, '__name__', str(func))
@@ -103,6 +175,8 @@ class RetryHandler:
                 
             except Exception as e:
                 last_exception = e
+                self._record_outcome(e)
+                self._record_attempt(attempt, started, e)
                 
                 func_name = getattr(func, '__name__', str(func))
                 
@@ -116,14 +190,282 @@ class RetryHandler:
                     self.logger.error(f"函数 {func_name} 在 {attempt} 次尝试后仍然失败: {str(e)}")
                     break
                 
+                # 渠道已熔断时不再等待重试
+                if self._circuit_is_open():
+                    self.logger.warning(f"函数 {func_name} 所属渠道已熔断，停止重试: {str(e)}")
+                    break
+                
                 # 计算延迟时间并等待
                 delay = self._calculate_delay(attempt)
+                if not self._deadline_allows(delay):
+                    self.logger.error(f"函数 {func_name} 第 {attempt} 次尝试失败: {str(e)}，剩余时间不足，不再重试")
+                    break
+                self.attempts[-1].delay = delay
                 self.logger.warning(f"函数 {func_name} 第 {attempt} 次尝试失败: {str(e)}，{delay:.2f} 秒后重试")
                 time.sleep(delay)
         
         # 所有重试都失败，抛出最后一次的异常
         raise last_exception
     
+    async def execute_with_retry_async(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        执行协程函数并在失败时重试，等待期间不占用线程
+        
+        Args:
+            func: 要执行的协程函数
+            *args: 函数的位置参数
+            **kwargs: 函数的关键字参数
+            
+        Returns:
+            协程函数的执行结果
+            
+        Raises:
+            CircuitOpenError: 熔断器处于打开状态
+            DeadlineExceededError: 截止时间已到
+            Exception: 如果所有重试都失败，抛出最后一次的异常
+        """
+        last_exception = None
+        func_name = getattr(func, '__name__', str(func))
+        
+        for attempt in range(1, self.config.max_attempts + 1):
+            self._check_before_attempt(attempt)
+            started = time.monotonic()
+            try:
+                self.logger.debug(f"执行函数 {func_name}，第 {attempt} 次尝试")
+                with deadline_scope(self.deadline):
+                    try:
+                        result = await func(*args, **kwargs)
+                    except Exception:
+                        raise
+                    except BaseException:
+                        # 被取消（如常驻服务的发送时限到期）时既不计成功也不计失败，但必须归还半开状态的试探名额
+                        self._release_probe()
+                        raise
+                self._record_outcome(None, result)
+                self._record_attempt(attempt, started)
+                
+                if attempt > 1:
+                    self.logger.info(f"函数 {func_name} 在第 {attempt} 次尝试后成功执行")
+                
+                return result
+                
+            except Exception as e:
+                last_exception = e
+                self._record_outcome(e)
+                self._record_attempt(attempt, started, e)
+                
+                if not self._is_retryable_exception(e):
+                    self.logger.error(f"函数 {func_name} 发生不可重试的异常: {str(e)}")
+                    raise e
+                
+                if attempt == self.config.max_attempts:
+                    self.logger.error(f"函数 {func_name} 在 {attempt} 次尝试后仍然失败: {str(e)}")
+                    break
+                
+                if self._circuit_is_open():
+                    self.logger.warning(f"函数 {func_name} 所属渠道已熔断，停止重试: {str(e)}")
+                    break
+                
+                delay = self._calculate_delay(attempt)
+                if not self._deadline_allows(delay):
+                    self.logger.error(f"函数 {func_name} 第 {attempt} 次尝试失败: {str(e)}，剩余时间不足，不再重试")
+                    break
+                
+                self.attempts[-1].delay = delay
+                self.logger.warning(f"函数 {func_name} 第 {attempt} 次尝试失败: {str(e)}，{delay:.2f} 秒后重试")
+                if self.scheduler is not None:
+                    await self.scheduler.sleep_async(delay)
+                else:
+                    await asyncio.sleep(delay)
+        
+        raise last_exception
+    
+    def submit_with_retry(self, submit: Callable[..., Future], func: Callable, *args, **kwargs) -> Future:
+        """
+        通过 submit 把每次尝试提交到线程池执行，失败后由调度器在退避时间到期时重新提交
+        
+        与 execute_with_retry 不同，退避等待期间不占用任何工作线程。
+        
+        Args:
+            submit: 提交函数，签名同 Executor.submit
+            func: 要执行的函数
+            *args: 函数的位置参数
+            **kwargs: 函数的关键字参数
+            
+        Returns:
+            Future: 最终结果，成功时为函数返回值，失败时为最后一次的异常；
+                    取消该 Future 会放弃尚未开始的重试
+        """
+        if self.scheduler is None:
+            raise ValueError("submit_with_retry 需要设置延迟调度器")
+        
+        outcome = Future()
+        func_name = getattr(func, '__name__', str(func))
+        
+        def settle(result=None, exception=None):
+            try:
+                if exception is not None:
+                    outcome.set_exception(exception)
+                else:
+                    outcome.set_result(result)
+            except InvalidStateError:
+                pass  # 已被调用方取消
+        
+        def attempt(number: int):
+            if outcome.done():
+                return
+            try:
+                self._check_before_attempt(number)
+            except (CircuitOpenError, DeadlineExceededError) as e:
+                settle(exception=e)
+                return
+            
+            started = time.monotonic()
+            try:
+                self.logger.debug(f"执行函数 {func_name}，第 {number} 次尝试")
+                with deadline_scope(self.deadline):
+                    result = self._call_releasing_probe(func, *args, **kwargs)
+                self._record_outcome(None, result)
+                self._record_attempt(number, started)
+            except Exception as e:
+                self._record_outcome(e)
+                self._record_attempt(number, started, e)
+                if not self._is_retryable_exception(e):
+                    self.logger.error(f"函数 {func_name} 发生不可重试的异常: {str(e)}")
+                    settle(exception=e)
+                    return
+                if number >= self.config.max_attempts:
+                    self.logger.error(f"函数 {func_name} 在 {number} 次尝试后仍然失败: {str(e)}")
+                    settle(exception=e)
+                    return
+                if self._circuit_is_open():
+                    self.logger.warning(f"函数 {func_name} 所属渠道已熔断，停止重试: {str(e)}")
+                    settle(exception=e)
+                    return
+                
+                delay = self._calculate_delay(number)
+                if not self._deadline_allows(delay):
+                    self.logger.error(f"函数 {func_name} 第 {number} 次尝试失败: {str(e)}，剩余时间不足，不再重试")
+                    settle(exception=e)
+                    return
+                
+                self.attempts[-1].delay = delay
+                self.logger.warning(f"函数 {func_name} 第 {number} 次尝试失败: {str(e)}，{delay:.2f} 秒后重试")
+                # 在调用方的上下文中重新提交，路由指定的收件人等上下文变量在重试时仍然有效；
+                # 调度器关闭时丢弃的重试以本次的错误结束，调用方不会一直等到截止时间
+                try:
+                    self.scheduler.call_later(delay, context.copy().run, resubmit, number + 1,
+                                              on_drop=functools.partial(abandon, e))
+                except RuntimeError as scheduling_error:
+                    self.logger.error(f"函数 {func_name} 无法安排重试: {str(scheduling_error)}")
+                    settle(exception=e)
+                return
+            
+            if number > 1:
+                self.logger.info(f"函数 {func_name} 在第 {number} 次尝试后成功执行")
+            settle(result=result)
+        
+        def abandon(exception: Exception):
+            self.logger.error(f"重试调度器已关闭，函数 {func_name} 放弃重试: {str(exception)}")
+            settle(exception=exception)
+        
+        def resubmit(number: int):
+            if outcome.done():
+                return
+            try:
+                submit(attempt, number)
+            except Exception as e:
+                # 线程池已关闭等情况
+                settle(exception=e)
+        
+        context = contextvars.copy_context()
+        resubmit(1)
+        return outcome
+    
+    def _check_before_attempt(self, number: int) -> None:
+        """
+        检查截止时间和熔断器是否允许本次尝试，不允许时记录一次跳过的尝试
+        
+        Args:
+            number: 本次尝试的序号
+        
+        Raises:
+            DeadlineExceededError: 截止时间已到
+            CircuitOpenError: 熔断器处于打开状态
+        """
+        try:
+            if self.deadline is not None:
+                self.deadline.check()
+            if self.circuit_breaker is not None and not self.circuit_breaker.allow_request():
+                raise CircuitOpenError(f"渠道 {self.circuit_breaker.name} 处于熔断状态，跳过发送")
+        except (CircuitOpenError, DeadlineExceededError) as e:
+            self._record_attempt(number, time.monotonic(), e)
+            raise
+    
+    def _record_attempt(self, number: int, started: float, exception: Optional[Exception] = None) -> None:
+        """
+        记录一次尝试
+        
+        Args:
+            number: 尝试序号
+            started: 开始时的 time.monotonic()
+            exception: 尝试抛出的异常，成功时为 None
+        """
+        elapsed = time.monotonic() - started
+        self.attempts.append(AttemptRecord(
+            number=number,
+            started_at=time.time() - elapsed,
+            elapsed=round(elapsed, 3),
+            error=str(exception) if exception is not None else None,
+            error_type=classify_error(exception) if exception is not None else None,
+        ))
+    
+    def _deadline_allows(self, delay: float) -> bool:
+        """检查等待 delay 秒后是否仍在截止时间内"""
+        return self.deadline is None or self.deadline.allows(delay)
+    
+    def _circuit_is_open(self) -> bool:
+        """检查熔断器是否处于打开状态"""
+        return self.circuit_breaker is not None and self.circuit_breaker.state == CircuitState.OPEN
+    
+    def _call_releasing_probe(self, func: Callable, *args, **kwargs) -> Any:
+        """调用 func，遇到 KeyboardInterrupt 等非 Exception 的中断时归还半开状态的试探名额"""
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            raise
+        except BaseException:
+            self._release_probe()
+            raise
+    
+    def _release_probe(self) -> None:
+        """归还熔断器半开状态的试探名额，不计入统计"""
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.release()
+    
+    def _record_outcome(self, exception: Optional[Exception], result: Any = None) -> None:
+        """
+        向熔断器记录一次尝试的结果
+        
+        只有可重试的异常（网络错误、临时错误）才计为失败，
+        不可重试的异常通常是配置或内容问题，不代表服务商故障；
+        返回了失败结果（success=False）的尝试同样是不可重试的错误，只归还试探名额而不计为成功
+        
+        Args:
+            exception: 尝试抛出的异常，没有抛出异常时为 None
+            result: 尝试的返回值
+        """
+        if self.circuit_breaker is None:
+            return
+        if exception is None and getattr(result, 'success', True) is False:
+            self.circuit_breaker.release()
+        elif exception is None:
+            self.circuit_breaker.record_success()
+        elif self._is_retryable_exception(exception):
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.release()
+    
     def _is_retryable_exception(self, exception: Exception) -> bool:
         """
         检查异常是否可重试
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+重试调度模块
+用一个最小堆和单个后台线程管理所有重试等待，等待期间不占用发送线程
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TimerHandle:
+    """延迟任务句柄，可在到期前取消"""
+
+    __slots__ = ('when', 'callback', 'args', 'on_drop', 'cancelled')
+
+    def __init__(self, when: float, callback: Callable, args: tuple, on_drop: Optional[Callable[[], Any]] = None):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.on_drop = on_drop
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """取消延迟任务，已经执行的任务不受影响"""
+        self.cancelled = True
+
+
+class DelayScheduler:
+    """
+    延迟任务调度器
+
+    所有延迟任务按到期时间放入最小堆，由一个后台线程在到期时执行回调。
+    回调应当只做轻量工作（如把任务重新提交到线程池），不能执行阻塞 I/O。
+    """
+
+    def __init__(self, name: str = "RetryScheduler"):
+        """
+        初始化调度器
+
+        Args:
+            name: 后台线程名
+        """
+        self.name = name
+        self._heap: List[tuple] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._closed = False
+        self._scheduled = 0
+        self._fired = 0
+
+    def start(self) -> 'DelayScheduler':
+        """启动后台线程，重复调用不会创建新线程；关闭后可以再次启动"""
+        with self._condition:
+            self._closed = False
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        return self
+
+    def shutdown(self) -> None:
+        """
+        停止后台线程并丢弃尚未到期的任务，被丢弃任务的 on_drop 回调在这里执行；
+        之后的 call_later 会被拒绝，直到再次调用 start()
+        """
+        with self._condition:
+            self._closed = True
+            if not self._running:
+                return
+            self._running = False
+            dropped = [handle for _, _, handle in self._heap if not handle.cancelled]
+            self._heap.clear()
+            self._condition.notify()
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        if dropped:
+            logger.warning(f"重试调度器关闭，丢弃 {len(dropped)} 个未到期的重试")
+        for handle in dropped:
+            if handle.on_drop is not None:
+                try:
+                    handle.on_drop()
+                except Exception as e:
+                    logger.error(f"重试调度器丢弃任务的回调执行异常: {str(e)}")
+
+    def call_later(self, delay: float, callback: Callable, *args,
+                   on_drop: Optional[Callable[[], Any]] = None) -> TimerHandle:
+        """
+        在 delay 秒后于调度线程中执行回调，尚未启动的调度器会自动启动
+
+        Args:
+            delay: 延迟秒数
+            callback: 回调函数
+            *args: 回调参数
+            on_drop: 调度器关闭时任务尚未到期、被丢弃后执行的回调
+
+        Returns:
+            TimerHandle: 可用于取消的句柄
+
+        Raises:
+            RuntimeError: 调度器已关闭
+        """
+        handle = TimerHandle(time.monotonic() + max(0.0, delay), callback, args, on_drop)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("重试调度器已关闭")
+            if not self._running:
+                self.start()
+            heapq.heappush(self._heap, (handle.when, next(self._counter), handle))
+            self._scheduled += 1
+            # 新任务比原来最早的任务更早到期时唤醒调度线程
+            if self._heap[0][2] is handle:
+                self._condition.notify()
+        return handle
+
+    async def sleep_async(self, delay: float) -> None:
+        """
+        在事件循环中等待 delay 秒，由调度线程负责计时
+
+        Args:
+            delay: 等待秒数
+        """
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+
+        def wake():
+            if not waiter.done():
+                waiter.set_result(None)
+
+        handle = self.call_later(delay, loop.call_soon_threadsafe, wake)
+        try:
+            await waiter
+        finally:
+            handle.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取调度器指标
+
+        Returns:
+            Dict[str, Any]: 等待中、已调度和已执行的任务数
+        """
+        with self._condition:
+            return {
+                'pending': sum(1 for _, _, handle in self._heap if not handle.cancelled),
+                'scheduled': self._scheduled,
+                'fired': self._fired,
+            }
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._running:
+                    # 跳过已取消的任务
+                    while self._heap and self._heap[0][2].cancelled:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    timeout = self._heap[0][0] - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    self._condition.wait(timeout)
+                if not self._running:
+                    return
+                _, _, handle = heapq.heappop(self._heap)
+                self._fired += 1
+
+            try:
+                handle.callback(*handle.args)
+            except Exception as e:
+                logger.error(f"重试调度回调执行异常: {str(e)}")
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+路由模块
+按事件来源、严重级别和标题选择通知渠道。路由规则在加载配置时编译为索引：
+来源和严重级别通过字典精确查找，标题模式合并为一个正则表达式，路由开销与规则数量基本无关
+"""
+
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import product
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from matching import PatternSet, compile_pattern
+from priority_executor import PRIORITY_LANES, normalize_priority
+
+# 未指定严重级别的事件使用的默认级别
+DEFAULT_SEVERITY = 'info'
+
+_current_recipients: contextvars.ContextVar = contextvars.ContextVar('route_recipients', default=())
+
+
+def normalize_severity(severity: Optional[str]) -> str:
+    """统一严重级别的写法，未指定时返回默认级别"""
+    return str(severity or DEFAULT_SEVERITY).strip().lower()
+
+
+def _as_tuple(value: Any) -> Tuple[str, ...]:
+    """将字符串或字符串列表转换为元组，"*" 和空值表示任意"""
+    if value is None or value == '*':
+        return ()
+    if isinstance(value, str):
+        return (value,)
+    return tuple(str(item) for item in value if item != '*')
+
+
+@dataclass(frozen=True)
+class RoutingRule:
+    """路由规则，所有条件都满足时命中"""
+    name: str
+    channels: Tuple[str, ...]             # 命中后发送的渠道
+    sources: Tuple[str, ...] = ()         # 事件来源，空表示任意来源
+    severities: Tuple[str, ...] = ()      # 严重级别，空表示任意级别
+    title_pattern: Optional[str] = None   # 标题正则表达式，为空表示任意标题
+    priority: Optional[str] = None        # 优先级通道，为空时使用默认通道
+    recipients: Tuple[str, ...] = ()      # 邮件收件人（地址或分组名），为空时使用默认收件人
+
+
+class _Bucket:
+    """同一 (来源, 严重级别) 下的规则"""
+
+    __slots__ = ('first_plain', 'pattern_rules', 'patterns')
+
+    def __init__(self):
+        self.first_plain: Optional[int] = None    # 没有标题模式的规则中序号最小的一条
+        self.pattern_rules: List[int] = []        # 带标题模式的规则序号
+        self.patterns: Optional[PatternSet] = None
+
+
+class RoutingTable:
+    """
+    编译后的路由表
+
+    规则按 (来源, 严重级别) 放入字典，未限定的条件使用通配键 None，
+    每个事件最多查找 4 个桶；桶内的标题模式合并为一个 PatternSet。
+    多条规则同时命中时以配置中靠前的规则为准。
+    """
+
+    def __init__(self, rules: Sequence[RoutingRule], errors: Optional[Dict[str, str]] = None):
+        """
+        编译路由表
+
+        Args:
+            rules: 按优先级排列的路由规则
+            errors: 解析配置时跳过的无效规则及原因
+        """
+        self.rules: Tuple[RoutingRule, ...] = tuple(rules)
+        self.errors: Dict[str, str] = dict(errors or {})
+        self._buckets: Dict[Tuple[Optional[str], Optional[str]], _Bucket] = {}
+
+        for index, rule in enumerate(self.rules):
+            severities = tuple(normalize_severity(item) for item in rule.severities)
+            for key in product(rule.sources or (None,), severities or (None,)):
+                bucket = self._buckets.setdefault(key, _Bucket())
+                if rule.title_pattern is None:
+                    if bucket.first_plain is None:
+                        bucket.first_plain = index
+                else:
+                    bucket.pattern_rules.append(index)
+
+        for bucket in self._buckets.values():
+            # 排在无条件规则之后的标题模式永远不会生效，不必参与匹配
+            if bucket.first_plain is not None:
+                bucket.pattern_rules = [index for index in bucket.pattern_rules if index < bucket.first_plain]
+            if bucket.pattern_rules:
+                bucket.patterns = PatternSet([self.rules[index].title_pattern for index in bucket.pattern_rules])
+
+    @classmethod
+    def from_config(cls, config: Optional[Mapping[str, Any]]) -> 'RoutingTable':
+        """
+        从 notification_config.json 的 routing 配置创建，无效的规则会被跳过并记录在 errors 中
+
+        Args:
+            config: routing 配置
+
+        Returns:
+            RoutingTable: 路由表
+        """
+        rules, errors = [], {}
+        for position, item in enumerate((config or {}).get('rules', ())):
+            key = f'routing.rules[{position}]'
+            if not isinstance(item, Mapping):
+                errors[key] = '路由规则必须是 JSON 对象'
+                continue
+            name = str(item.get('name') or key)
+            channels = _as_tuple(item.get('channels'))
+            priority = normalize_priority(item.get('priority'))
+            if item.get('priority') and priority is None:
+                errors[key] = f'路由规则 {name} 的 priority 应为 {" / ".join(PRIORITY_LANES)}'
+                continue
+            recipients = _as_tuple(item.get('recipients'))
+            # 只指定优先级或收件人的规则发送到所有渠道
+            if not channels and priority is None and not recipients:
+                errors[key] = f'路由规则 {name} 没有指定渠道、优先级或收件人'
+                continue
+            title_pattern = item.get('title_pattern') or None
+            if title_pattern is not None:
+                error = compile_pattern(title_pattern)
+                if error is not None:
+                    errors[key] = f'路由规则 {name} 的 title_pattern 无效: {error}'
+                    continue
+            rules.append(RoutingRule(
+                name=name,
+                channels=channels,
+                sources=_as_tuple(item.get('source')),
+                severities=_as_tuple(item.get('severity')),
+                title_pattern=title_pattern,
+                priority=priority,
+                recipients=recipients,
+            ))
+        return cls(rules, errors)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def route(self, source: str, severity: Optional[str], title: str) -> Optional[RoutingRule]:
+        """
+        查找事件命中的路由规则
+
+        Args:
+            source: 事件来源
+            severity: 严重级别
+            title: 通知标题
+
+        Returns:
+            Optional[RoutingRule]: 优先级最高的命中规则，没有规则命中时返回 None
+        """
+        if not self._buckets:
+            return None
+
+        severity = normalize_severity(severity)
+        best = len(self.rules)
+        for key in ((source, severity), (source, None), (None, severity), (None, None)):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            if bucket.first_plain is not None and bucket.first_plain < best:
+                best = bucket.first_plain
+            if bucket.patterns is not None and bucket.pattern_rules[0] < best:
+                matched = bucket.patterns.first_match(title)
+                if matched is not None:
+                    best = min(best, bucket.pattern_rules[matched])
+
+        return self.rules[best] if best < len(self.rules) else None
+
+
+def current_recipients() -> Tuple[str, ...]:
+    """获取当前上下文中命中的路由规则指定的邮件收件人，没有时返回空元组"""
+    return _current_recipients.get()
+
+
+@contextmanager
+def recipients_scope(recipients: Sequence[str]) -> Iterator[Tuple[str, ...]]:
+    """
+    在当前上下文中设置路由规则指定的邮件收件人，SMTP 通知器据此选择收件人
+
+    Args:
+        recipients: 地址或分组名，为空时不改变当前设置
+    """
+    if not recipients:
+        yield current_recipients()
+        return
+    token = _current_recipients.set(tuple(recipients))
+    try:
+        yield tuple(recipients)
+    finally:
+        _current_recipients.reset(token)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地存储模块
+为去重缓存等需要跨进程重启保留的数据打开 SQLite 数据库，只在配置了存储路径时才导入
+"""
+
+import os
+import sqlite3
+
+# 其他连接持有写锁时的最长等待时间（秒）
+BUSY_TIMEOUT = 5.0
+
+
+def connect_sqlite(path: str) -> sqlite3.Connection:
+    """
+    打开 SQLite 数据库，使用 WAL 日志以便读写互不阻塞
+
+    数据库中可能保存通知内容，新建的文件权限为 0600。返回的连接处于自动提交模式，
+    需要批量写入时由调用方显式执行 BEGIN/COMMIT；连接可以跨线程使用，但调用方必须自行加锁。
+
+    Args:
+        path: 数据库文件路径
+
+    Returns:
+        sqlite3.Connection: 数据库连接
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    if not os.path.exists(path):
+        os.close(os.open(path, os.O_WRONLY | os.O_CREAT, 0o600))
+
+    connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    # WAL 模式下 NORMAL 只在检查点时同步磁盘，断电最多丢失最后几个事务，不会损坏数据库
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
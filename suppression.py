@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+屏蔽模块
+按标题、内容或来源屏蔽通知，支持精确、通配符、正则和子串四种匹配方式。
+屏蔽规则在加载配置时编译：精确匹配放入字典，子串构建为 Aho-Corasick 自动机，
+通配符和正则先按必然出现的字面量预筛选，其余的合并为一个正则表达式（含分组的正则单独编译），规则数量增加时每条消息的检查开销基本不变
+"""
+
+import fnmatch
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from matching import AhoCorasick, PatternSet, compile_pattern, required_literal
+
+# 可以匹配的字段
+SUPPRESSION_FIELDS = ('title', 'content', 'source')
+
+# 支持的匹配方式
+MATCH_TYPES = ('exact', 'glob', 'regex', 'substring')
+
+
+@dataclass(frozen=True)
+class SuppressionRule:
+    """屏蔽规则"""
+    name: str
+    field: str = 'title'      # 匹配的字段：title / content / source
+    match: str = 'exact'      # 匹配方式：exact / glob / regex / substring
+    pattern: str = ''
+
+
+class _FieldMatcher:
+    """
+    单个字段上编译后的所有规则
+
+    通配符和正则规则中能提取出必然出现的字面量的，先用一个 Aho-Corasick 自动机找出字面量已出现的规则，
+    只对这些规则运行各自的正则；无法提取字面量的规则合并为一个交替表达式。
+    """
+
+    __slots__ = ('exact', 'substrings', 'substring_rules', 'literals', 'gated_rules', 'patterns', 'pattern_rules')
+
+    def __init__(self, rules: Sequence[Tuple[int, SuppressionRule]]):
+        self.exact: Dict[str, int] = {}
+        self.substring_rules: List[int] = []
+        self.gated_rules: List[Tuple[int, Callable]] = []
+        self.pattern_rules: List[int] = []
+        substrings, literals, patterns = [], [], []
+
+        for index, rule in rules:
+            if rule.match == 'exact':
+                self.exact.setdefault(rule.pattern, index)
+                continue
+            if rule.match == 'substring':
+                substrings.append(rule.pattern)
+                self.substring_rules.append(index)
+                continue
+
+            glob = rule.match == 'glob'
+            # 通配符匹配整个字段，转换后的正则以 \Z 结尾，这里再限定从开头匹配
+            pattern = '^' + fnmatch.translate(rule.pattern) if glob else rule.pattern
+            literal = required_literal(rule.pattern, glob=glob)
+            if literal:
+                literals.append(literal)
+                self.gated_rules.append((index, re.compile(pattern).search))
+            else:
+                patterns.append(pattern)
+                self.pattern_rules.append(index)
+
+        self.substrings = AhoCorasick(substrings) if substrings else None
+        self.literals = AhoCorasick(literals) if literals else None
+        self.patterns = PatternSet(patterns) if patterns else None
+
+    def match(self, text: str) -> Optional[int]:
+        """返回命中的规则序号"""
+        index = self.exact.get(text)
+        if index is not None:
+            return index
+        if self.substrings is not None:
+            matched = self.substrings.first_match(text)
+            if matched is not None:
+                return self.substring_rules[matched]
+        if self.literals is not None:
+            for candidate in sorted(self.literals.find_all(text)):
+                index, search = self.gated_rules[candidate]
+                if search(text):
+                    return index
+        if self.patterns is not None:
+            matched = self.patterns.first_match(text)
+            if matched is not None:
+                return self.pattern_rules[matched]
+        return None
+
+
+class SuppressionFilter:
+    """
+    编译后的屏蔽过滤器
+
+    过滤器本身只读，可以放在配置快照中；命中次数由 SuppressionStats 单独统计。
+    """
+
+    def __init__(self, rules: Sequence[SuppressionRule], errors: Optional[Dict[str, str]] = None):
+        """
+        编译屏蔽规则
+
+        Args:
+            rules: 屏蔽规则
+            errors: 解析配置时跳过的无效规则及原因
+        """
+        self.rules: Tuple[SuppressionRule, ...] = tuple(rules)
+        self.errors: Dict[str, str] = dict(errors or {})
+        self._fields: Dict[str, _FieldMatcher] = {}
+        for field in SUPPRESSION_FIELDS:
+            field_rules = [(index, rule) for index, rule in enumerate(self.rules) if rule.field == field]
+            if field_rules:
+                self._fields[field] = _FieldMatcher(field_rules)
+
+    @classmethod
+    def from_config(cls, config: Optional[Mapping[str, Any]], skip_titles: Optional[str] = None) -> 'SuppressionFilter':
+        """
+        从 notification_config.json 的 suppression 配置和 SKIP_PUSH_TITLE 创建，无效的规则会被跳过并记录在 errors 中
+
+        Args:
+            config: suppression 配置
+            skip_titles: SKIP_PUSH_TITLE 的值，每行一个需要跳过的标题
+
+        Returns:
+            SuppressionFilter: 屏蔽过滤器
+        """
+        rules, errors = [], {}
+
+        # SKIP_PUSH_TITLE 中的每一行都是一条精确匹配标题的规则
+        for title in (skip_titles or '').split('\n'):
+            if title:
+                rules.append(SuppressionRule(name=f'SKIP_PUSH_TITLE:{title}', field='title', match='exact', pattern=title))
+
+        for position, item in enumerate((config or {}).get('rules', ())):
+            key = f'suppression.rules[{position}]'
+            if not isinstance(item, Mapping):
+                errors[key] = '屏蔽规则必须是 JSON 对象'
+                continue
+            rule = SuppressionRule(
+                name=str(item.get('name') or key),
+                field=str(item.get('field', 'title')),
+                match=str(item.get('match', 'exact')),
+                pattern=item.get('pattern'),
+            )
+            if rule.field not in SUPPRESSION_FIELDS:
+                errors[key] = f'屏蔽规则 {rule.name} 的 field 应为 {" / ".join(SUPPRESSION_FIELDS)}'
+            elif rule.match not in MATCH_TYPES:
+                errors[key] = f'屏蔽规则 {rule.name} 的 match 应为 {" / ".join(MATCH_TYPES)}'
+            elif not isinstance(rule.pattern, str) or not rule.pattern:
+                errors[key] = f'屏蔽规则 {rule.name} 没有指定 pattern'
+            else:
+                error = compile_pattern(rule.pattern) if rule.match == 'regex' else None
+                if error is not None:
+                    errors[key] = f'屏蔽规则 {rule.name} 的 pattern 无效: {error}'
+                else:
+                    rules.append(rule)
+
+        return cls(rules, errors)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def match(self, title: str, content: str, source: str) -> Optional[SuppressionRule]:
+        """
+        检查通知是否应被屏蔽
+
+        Args:
+            title: 通知标题
+            content: 通知内容
+            source: 通知来源
+
+        Returns:
+            Optional[SuppressionRule]: 命中的屏蔽规则，未命中时返回 None
+        """
+        for field, text in (('title', title), ('source', source), ('content', content)):
+            matcher = self._fields.get(field)
+            if matcher is not None:
+                index = matcher.match(text or '')
+                if index is not None:
+                    return self.rules[index]
+        return None
+
+
+class SuppressionStats:
+    """按规则名统计屏蔽命中次数，重新加载配置后保留"""
+
+    def __init__(self):
+        self._hits: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, rule: SuppressionRule) -> None:
+        """记录一次命中"""
+        with self._lock:
+            self._hits[rule.name] = self._hits.get(rule.name, 0) + 1
+
+    def get_stats(self, suppression: Optional[SuppressionFilter] = None) -> Dict[str, int]:
+        """
+        获取各规则的命中次数
+
+        Args:
+            suppression: 当前的屏蔽过滤器，其中尚未命中的规则计为 0
+
+        Returns:
+            Dict[str, int]: 规则名到命中次数的映射
+        """
+        with self._lock:
+            stats = {rule.name: 0 for rule in suppression.rules} if suppression is not None else {}
+            stats.update(self._hits)
+            return stats
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+附件缓存测试
+编码结果按内容摘要缓存：内存按字节数做 LRU 淘汰，被淘汰和过大的条目转存到磁盘并能在重启后复用
+"""
+
+import hashlib
+import os
+
+from notifiers.attachment_cache import AttachmentCache
+
+
+def put(cache, digest, data, chunk_size=10):
+    """经过 put_encoded 消费全部内容，并确认产出的内容不变"""
+    chunks = [data[index:index + chunk_size] for index in range(0, len(data), chunk_size)]
+    assert b''.join(cache.put_encoded(digest, chunks)) == data
+
+
+def get(cache, digest):
+    chunks = cache.get_encoded(digest)
+    return None if chunks is None else b''.join(chunks)
+
+
+def test_memory_lru_by_bytes():
+    cache = AttachmentCache(max_bytes=100)
+    put(cache, 'a', b'a' * 40)
+    put(cache, 'b', b'b' * 40)
+    assert get(cache, 'a') == b'a' * 40
+    put(cache, 'c', b'c' * 40)
+
+    assert get(cache, 'b') is None
+    assert get(cache, 'a') == b'a' * 40
+    assert get(cache, 'c') == b'c' * 40
+    assert cache.get_stats()['bytes'] == 80
+
+
+def test_spill_evicted_and_oversized_entries(tmp_path):
+    """被淘汰和超过内存预算的条目写入转存目录，重启后仍可命中；目录超出上限时删除最旧的文件"""
+    spill_dir = str(tmp_path / 'spill')
+    cache = AttachmentCache(max_bytes=50, spill_dir=spill_dir, max_spill_bytes=250)
+    put(cache, 'small', b's' * 40)
+    put(cache, 'large', b'L' * 120)
+    put(cache, 'other', b'o' * 40)
+
+    assert cache.get_stats()['entries'] == 1
+    assert get(cache, 'large') == b'L' * 120
+    assert get(cache, 'small') == b's' * 40
+    assert cache.get_stats()['spill_hits'] == 2
+
+    restarted = AttachmentCache(max_bytes=50, spill_dir=spill_dir, max_spill_bytes=250)
+    assert get(restarted, 'large') == b'L' * 120
+    put(restarted, 'huge', b'h' * 120)
+    assert restarted.get_stats()['spill_bytes'] <= 250
+    assert not [name for name in os.listdir(spill_dir) if name.endswith('.tmp')]
+
+
+def test_large_entries_kept_out_of_memory(tmp_path):
+    """超过单条目上限的条目即使放得进内存预算也不缓存在内存中，只写入转存目录或不缓存"""
+    cache = AttachmentCache(max_bytes=1000, max_entry_bytes=50)
+    put(cache, 'small', b's' * 40)
+    put(cache, 'large', b'L' * 120)
+    assert get(cache, 'large') is None
+    assert cache.get_stats()['bytes'] == 40
+
+    spilling = AttachmentCache(max_bytes=1000, max_entry_bytes=50, spill_dir=str(tmp_path / 'spill'))
+    put(spilling, 'large', b'L' * 120)
+    assert get(spilling, 'large') == b'L' * 120
+    assert (spilling.get_stats()['bytes'], spilling.get_stats()['spill_bytes']) == (0, 120)
+
+
+def test_partially_consumed_stream_not_cached():
+    """调用方没有消费完编码结果（如发送中断）时不缓存不完整的内容"""
+    cache = AttachmentCache(max_bytes=100)
+    stream = cache.put_encoded('a', [b'1', b'2', b'3'])
+    next(stream)
+    stream.close()
+    assert get(cache, 'a') is None
+
+
+def test_file_digest_and_media_ids(tmp_path):
+    path = tmp_path / 'report.pdf'
+    path.write_bytes(b'report')
+    cache = AttachmentCache()
+
+    digest = cache.file_digest(str(path))
+    assert digest == hashlib.sha256(b'report').hexdigest()
+    path.write_bytes(b'changed report')
+    assert cache.file_digest(str(path)) == hashlib.sha256(b'changed report').hexdigest()
+
+    cache.put_media_id('wecom', digest, 'media-1', ttl=60)
+    cache.put_media_id('telegram', digest, 'media-2', ttl=-1)
+    assert cache.get_media_id('wecom', digest) == 'media-1'
+    assert cache.get_media_id('telegram', digest) is None
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+附件导入测试
+增量解析的结果应与 json.loads 完全一致，无论块在什么位置切开；附件内容直接写入附件目录
+"""
+
+import base64
+import hashlib
+import io
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from attachment_ingest import AttachmentIngestConfig, EventParseError, _EventParser, ingest_event
+
+
+def parse(text, chunk_size):
+    parser = _EventParser(io.StringIO(text), None, AttachmentIngestConfig(chunk_size=chunk_size))
+    return parser.parse()
+
+
+def random_value(rng, depth=0):
+    kind = rng.randrange(8 if depth < 3 else 5)
+    if kind == 0:
+        return rng.choice([True, False, None])
+    if kind == 1:
+        return rng.randint(-10 ** 12, 10 ** 12)
+    if kind == 2:
+        return rng.choice([rng.uniform(-1e6, 1e6), rng.uniform(-1, 1) * 10 ** rng.randint(-30, 30), 1.5, 2e5, 3.25e-4])
+    if kind in (3, 4):
+        alphabet = 'ab "\\/\n\té中 \U0001f600'
+        return ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+    if kind in (5, 6):
+        return {f"k{i}{random_value(rng, 4)}": random_value(rng, depth + 1) for i in range(rng.randint(0, 4))}
+    return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+
+
+def test_parser_matches_json_loads():
+    """随机 JSON 在任意块大小下的解析结果与 json.loads 相同"""
+    rng = random.Random(7)
+    for _ in range(300):
+        value = {'client_payload': random_value(rng), 'x': random_value(rng)}
+        text = json.dumps(value, ensure_ascii=rng.random() < 0.5,
+                          indent=rng.choice([None, 1]), separators=rng.choice([None, (',', ':')]))
+        for chunk_size in (1, 2, 3, 5, 64):
+            assert parse(text, chunk_size) == json.loads(text), (text, chunk_size)
+
+
+@pytest.mark.parametrize('number', ['1.5', '2e5', '3.25e-4', '-7E+2', '10', 'true', 'null'])
+def test_value_split_at_chunk_boundary(tmp_path, number):
+    """块恰好在数字的 . / e / E 或字面量中间结束时仍能正确解析"""
+    for split in range(1, len(number)):
+        prefix = '{"pad": "' + 'x' * (1024 - len('{"pad": "", "v": ') - split) + '", "v": '
+        text = prefix + number + '}'
+        assert len(prefix) + split == 1024
+        path = tmp_path / 'event.json'
+        path.write_text(text, encoding='utf-8')
+        ingested = ingest_event(str(path), config=AttachmentIngestConfig(chunk_size=1024))
+        assert ingested.event == json.loads(text)
+
+
+@pytest.mark.parametrize('text', ['{"a": 1', '{"a": 1.}', '[1, 2]x', '{"a": tru}', '"abc'])
+def test_malformed_event(tmp_path, text):
+    path = tmp_path / 'event.json'
+    path.write_text(text, encoding='utf-8')
+    with pytest.raises(EventParseError):
+        ingest_event(str(path))
+
+
+def test_attachments_written_to_directory(tmp_path):
+    """base64 和文本附件写入附件目录，并记录大小和 sha256；编码写在内容之后也能处理"""
+    binary = bytes(range(256)) * 50
+    event = {
+        'action': 'send-notification',
+        'client_payload': {
+            'title': 't',
+            'attachments': [
+                {'filename': 'data.bin', 'content': base64.b64encode(binary).decode(), 'encoding': 'base64'},
+                {'content': '中文内容\n', 'filename': 'note.txt', 'encoding': 'text', 'content_type': 'text/plain'},
+                {'content': base64.b64encode(b'late').decode(), 'filename': '../late.bin', 'encoding': 'base64'},
+            ],
+        },
+    }
+    path = tmp_path / 'event.json'
+    path.write_text(json.dumps(event), encoding='utf-8')
+
+    ingested = ingest_event(str(path), str(tmp_path / 'attachments'), AttachmentIngestConfig(chunk_size=1024))
+
+    contents = {info.filename: open(info.filepath, 'rb').read() for info in ingested.attachments}
+    assert contents['data.bin'] == binary
+    assert contents['note.txt'] == '中文内容\n'.encode('utf-8')
+    assert b'late' in contents.values()
+    for info in ingested.attachments:
+        assert info.size == len(contents[info.filename])
+        assert info.sha256 == hashlib.sha256(contents[info.filename]).hexdigest()
+        assert (tmp_path / 'attachments') in Path(info.filepath).parents
+    assert ingested.event['client_payload']['title'] == 't'
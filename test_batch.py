@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量处理测试
+处理异常计为失败，未发送的事件计为跳过；只有全部成功或跳过时退出码为 0
+"""
+
+import json
+
+import pytest
+
+from batch import STATUS_FAILED, STATUS_INVALID, STATUS_SKIPPED, BatchProcessor
+from config_manager import ConfigManager
+from notification_handler import NotificationHandler
+
+
+def event_line(content):
+    return json.dumps({'action': 'send-notification',
+                       'client_payload': {'title': '批量测试', 'content': content, 'source': 'test'}},
+                      ensure_ascii=False)
+
+
+@pytest.fixture
+def handler():
+    handler = NotificationHandler(ConfigManager())
+    yield handler
+    handler.close()
+
+
+def test_processing_errors_fail_the_batch(handler, monkeypatch):
+    """每个事件都处理异常时，结果为失败且退出码非 0"""
+    def broken(*args, **kwargs):
+        raise RuntimeError('发送崩溃')
+
+    monkeypatch.setattr(handler, 'send_notification', broken)
+    report = BatchProcessor(handler, lambda event: True).process_stream([event_line('内容')] * 3)
+
+    assert [result.status for result in report.results] == [STATUS_FAILED] * 3
+    assert report.results[0].errors == ['发送崩溃']
+    assert report.exit_code == 1
+
+
+def test_skipped_and_invalid_events(handler):
+    """内容为空的事件计为跳过，不影响退出码；无效事件使退出码非 0"""
+    processor = BatchProcessor(handler, lambda event: True)
+
+    report = processor.process_stream([event_line('')])
+    assert [result.status for result in report.results] == [STATUS_SKIPPED]
+    assert report.exit_code == 0
+
+    report = processor.process_stream([event_line(''), '{不是 JSON'])
+    assert [result.status for result in report.results] == [STATUS_SKIPPED, STATUS_INVALID]
+    assert report.exit_code == 1
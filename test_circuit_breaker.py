@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+熔断器测试
+覆盖状态切换，以及半开状态的试探发送被取消或中断后试探名额能否归还
+"""
+
+import asyncio
+import time
+
+from circuit_breaker import CircuitBreaker, CircuitBreakerConfig, CircuitState
+from notifiers.base import NotificationResult
+from retry_handler import NetworkError, RetryConfig, RetryHandler
+
+CONFIG = CircuitBreakerConfig(window_seconds=60, min_calls=2, failure_rate_threshold=0.5, open_seconds=0.05)
+
+
+def open_breaker() -> CircuitBreaker:
+    """创建一个已熔断、熔断时间已到期（进入半开状态）的熔断器"""
+    breaker = CircuitBreaker("test", CONFIG)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    time.sleep(CONFIG.open_seconds * 1.5)
+    assert breaker.state == CircuitState.HALF_OPEN
+    return breaker
+
+
+def retry_handler(breaker: CircuitBreaker) -> RetryHandler:
+    return RetryHandler(RetryConfig(max_attempts=1, jitter=False, retryable_exceptions=[NetworkError]),
+                        circuit_breaker=breaker)
+
+
+def test_failure_rate_opens_and_probe_success_closes():
+    """失败率达到阈值后熔断，半开状态只放行一个试探，试探成功后关闭"""
+    breaker = open_breaker()
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow_request()
+
+
+def test_probe_failure_reopens():
+    """试探失败后重新熔断"""
+    breaker = open_breaker()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_cancelled_async_probe_releases_slot():
+    """异步试探被发送时限取消后，熔断器不会一直停留在半开状态拒绝所有请求"""
+    breaker = open_breaker()
+    handler = retry_handler(breaker)
+
+    async def slow_send():
+        await asyncio.sleep(10)
+
+    async def run():
+        await asyncio.wait_for(handler.execute_with_retry_async(slow_send), 0.01)
+
+    try:
+        asyncio.run(run())
+    except asyncio.TimeoutError:
+        pass
+    else:
+        raise AssertionError("应当超时")
+
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_interrupted_sync_probe_releases_slot():
+    """同步试探被 KeyboardInterrupt 等中断时同样归还试探名额"""
+    breaker = open_breaker()
+    handler = retry_handler(breaker)
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    try:
+        handler.execute_with_retry(interrupted)
+    except KeyboardInterrupt:
+        pass
+    assert breaker.allow_request()
+
+
+def test_failed_result_not_counted_as_success():
+    """返回失败结果的试探不会关闭熔断器，但会归还试探名额"""
+    breaker = open_breaker()
+    handler = retry_handler(breaker)
+
+    result = handler.execute_with_retry(lambda: NotificationResult(success=False, channel='test', message='发送失败',
+                                                                   error='参数错误'))
+
+    assert not result.success
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合并发送测试
+缓冲按窗口时间、条数和大小上限中先满足的条件发送；紧急、带附件或过大的通知不进入缓冲
+"""
+
+import threading
+
+import pytest
+
+from coalescing import CoalescedMessage, Coalescer, CoalescingConfig, build_digest
+from retry_scheduler import DelayScheduler
+
+
+class DigestRecorder:
+    """记录发送的摘要，收到 expected 个摘要后置位 done"""
+
+    def __init__(self, expected=1):
+        self.digests = []
+        self.expected = expected
+        self.done = threading.Event()
+
+    def __call__(self, channel, messages):
+        self.digests.append((channel, build_digest(messages)))
+        if len(self.digests) >= self.expected:
+            self.done.set()
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = DelayScheduler("TestCoalescing")
+    yield scheduler
+    scheduler.shutdown()
+
+
+def make_coalescer(scheduler, recorder, **options):
+    return Coalescer(CoalescingConfig(enabled=True, **options), recorder, scheduler)
+
+
+def add(coalescer, channel, title, content='内容'):
+    coalescer.add(channel, CoalescedMessage(title, content, notifier=None))
+
+
+def test_window_flushes_digest_per_channel(scheduler):
+    recorder = DigestRecorder(expected=2)
+    coalescer = make_coalescer(scheduler, recorder, window_seconds=0.05)
+    add(coalescer, 'bark', '构建 1')
+    add(coalescer, 'bark', '构建 2')
+    add(coalescer, 'telegram', '部署')
+
+    assert recorder.done.wait(2)
+    digests = dict(recorder.digests)
+    assert digests['bark'] == ('2 条通知汇总', '【构建 1】\n内容\n\n【构建 2】\n内容')
+    assert digests['telegram'] == ('部署', '内容')
+    coalescer.close()
+    assert coalescer.get_stats()['digests'] == 2
+
+
+def test_max_messages_and_size_limit_flush_immediately(scheduler):
+    """条数达到上限或加入后会超过渠道大小上限时立即发送，不等待窗口"""
+    recorder = DigestRecorder(expected=2)
+    coalescer = make_coalescer(scheduler, recorder, window_seconds=60, max_messages=2, max_bytes={'bark': 200})
+    add(coalescer, 'smtp', 'a')
+    add(coalescer, 'smtp', 'b')
+    add(coalescer, 'bark', 'x', '长' * 40)
+    add(coalescer, 'bark', 'y', '长' * 40)
+
+    assert recorder.done.wait(2)
+    assert [channel for channel, _ in recorder.digests] == ['smtp', 'bark']
+    assert recorder.digests[1][1] == ('x', '长' * 40)
+    assert coalescer.get_stats()['buffered'] == {'bark': 1}
+    coalescer.close()
+    assert len(recorder.digests) == 3
+
+
+def test_accepts(scheduler):
+    coalescer = make_coalescer(scheduler, DigestRecorder(), channels=('bark',), max_bytes={'bark': 100})
+    assert coalescer.accepts('bark', '标题', '内容', 'info')
+    assert not coalescer.accepts('smtp', '标题', '内容', 'info')
+    assert not coalescer.accepts('bark', '标题', '内容', 'CRITICAL')
+    assert not coalescer.accepts('bark', '标题', '内容', 'info', has_attachments=True)
+    assert not coalescer.accepts('bark', '标题', '长' * 20, 'info')
+    assert coalescer.get_stats()['bypassed'] == 3
+    assert not Coalescer(CoalescingConfig(), DigestRecorder(), scheduler).accepts('bark', '标题', '内容', 'info')
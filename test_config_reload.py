@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配置热重载测试
+重新加载时应校验候选配置本身，而不是当前生效的配置
+"""
+
+import json
+import os
+
+import pytest
+
+from config_manager import ConfigManager, ConfigValidationError
+from dead_letter import DeadLetterConfig, DeadLetterStore
+from notification_handler import NotificationHandler
+from outbox import STATE_PENDING, STATE_SENT, Outbox, OutboxConfig
+
+
+def load_default_config():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'notification_config.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def reload_with(config_manager, tmp_path, config):
+    """把 config 写入临时文件后重新加载"""
+    path = tmp_path / 'notification_config.json'
+    path.write_text(json.dumps(config, ensure_ascii=False), encoding='utf-8')
+    config_manager.config_path = str(path)
+    return config_manager.reload()
+
+
+@pytest.fixture
+def config_manager(monkeypatch):
+    monkeypatch.delenv('SMTP_TO', raising=False)
+    return ConfigManager()
+
+
+def test_reload_accepts_new_group_with_route_using_it(config_manager, tmp_path):
+    """同时新增收件人分组和引用该分组的路由规则时，重新加载成功"""
+    config = load_default_config()
+    config['smtp_settings']['groups'] = {'ops': ['ops@example.com']}
+    config['routing'] = {'rules': [{'name': 'ops-route', 'source': 'ops', 'recipients': ['ops']}]}
+
+    snapshot = reload_with(config_manager, tmp_path, config)
+
+    assert config_manager.snapshot is snapshot
+    assert list(config_manager.get_smtp_recipient_settings()['groups']['ops']) == ['ops@example.com']
+
+
+def test_reload_rejects_removing_group_still_in_use(config_manager, tmp_path):
+    """删除仍被路由规则引用的分组时，重新加载被拒绝，原配置继续生效"""
+    config = load_default_config()
+    config['smtp_settings']['groups'] = {'ops': ['ops@example.com']}
+    config['routing'] = {'rules': [{'name': 'ops-route', 'source': 'ops', 'recipients': ['ops']}]}
+    reload_with(config_manager, tmp_path, config)
+
+    config['smtp_settings']['groups'] = {}
+    with pytest.raises(ConfigValidationError) as excinfo:
+        reload_with(config_manager, tmp_path, config)
+
+    assert 'routing.ops-route.recipients' in excinfo.value.errors
+    assert 'ops' in config_manager.get_smtp_recipient_settings()['groups']
+
+
+def test_reload_keeps_old_outbox_until_in_flight_deliveries_finish(config_manager, tmp_path):
+    """更换发件箱后，旧配置下进行中的投递结果仍写回旧发件箱，不会在下次启动时被重复发送"""
+    config = load_default_config()
+    old_path = str(tmp_path / 'old.db')
+    config['outbox']['path'] = old_path
+    reload_with(config_manager, tmp_path, config)
+    handler = NotificationHandler(config_manager)
+    entry = handler.outbox.enqueue('进行中', '内容', 'test', 'info', [], ['webhook'])
+
+    config['outbox']['path'] = str(tmp_path / 'new.db')
+    reload_with(config_manager, tmp_path, config)
+    handler._apply_config()
+    handler._mark_delivery(entry, 'webhook', True)
+    handler.close()
+
+    old_outbox = Outbox(OutboxConfig(path=old_path))
+    assert old_outbox.get_stats()[STATE_PENDING] == 0
+    assert old_outbox.get_stats()[STATE_SENT] == 1
+    old_outbox.close()
+
+
+def test_reload_keeps_old_dead_letter_store_until_in_flight_sends_finish(config_manager, tmp_path):
+    """更换死信队列后，旧配置下进行中的发送最终失败时仍写入旧死信队列"""
+    config = load_default_config()
+    old_path = str(tmp_path / 'old-dlq.db')
+    config['dead_letter']['path'] = old_path
+    reload_with(config_manager, tmp_path, config)
+    handler = NotificationHandler(config_manager)
+    notifier = handler.get_active_notifiers()[0]
+    dead_letter = handler._new_dead_letter('进行中', '内容', 'test', 'info', [], [notifier])
+
+    config['dead_letter']['path'] = str(tmp_path / 'new-dlq.db')
+    reload_with(config_manager, tmp_path, config)
+    handler._apply_config()
+    handler._record_dead_letter(dead_letter, notifier, False, '连接失败', error_type='network')
+    handler.close()
+
+    old_store = DeadLetterStore(DeadLetterConfig(path=old_path))
+    assert [letter.error for letter in old_store.query()] == ['连接失败']
+    old_store.close()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+死信队列测试
+失败的渠道写入死信，相同的通知内容只保存一份；重放成功后不再列出，重放失败时追加尝试记录
+"""
+
+import sqlite3
+
+import pytest
+
+from dead_letter import DeadLetterConfig, DeadLetterEntry, DeadLetterMessage, DeadLetterStore
+
+MESSAGE = DeadLetterMessage('构建失败', '内容', 'ci', 'critical', [{'filename': 'log.txt', 'filepath': '/tmp/log.txt'}])
+ATTEMPT = {'number': 1, 'error': '连接失败', 'error_type': 'network'}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = DeadLetterStore(DeadLetterConfig(path=str(tmp_path / 'dlq.db')))
+    yield store
+    store.close()
+
+
+def test_failed_channels_recorded_with_shared_payload(store):
+    entry = DeadLetterEntry(store, MESSAGE)
+    entry.record('smtp', False, '连接失败', 'network', [ATTEMPT])
+    entry.record('webhook', True)
+    entry.record('wecom', False, '参数错误', 'invalid')
+
+    letters = store.query()
+
+    assert [(letter.channel, letter.error_type) for letter in letters] == [('smtp', 'network'), ('wecom', 'invalid')]
+    assert letters[0].message == MESSAGE
+    assert letters[0].message is letters[1].message
+    assert letters[0].attempts == [ATTEMPT]
+    assert [letter.channel for letter in store.query(channel='wecom')] == ['wecom']
+    assert [letter.channel for letter in store.query(error_type='network')] == ['smtp']
+
+
+def test_replay_updates_existing_letters(store):
+    """重放只更新被重放的死信：失败时追加尝试记录，成功后默认不再列出"""
+    DeadLetterEntry(store, MESSAGE).record('smtp', False, '连接失败', 'network', [ATTEMPT])
+    letter = store.query()[0]
+    replay = DeadLetterEntry(store, letter.message, {'smtp': [letter.id]})
+
+    replay.record('smtp', False, '超时', 'timeout', [dict(ATTEMPT, error_type='timeout')])
+    letter = store.query()[0]
+    assert (letter.error_type, letter.replay_count) == ('timeout', 1)
+    assert [attempt.get('replay') for attempt in letter.attempts] == [None, 1]
+
+    replay.record('smtp', True)
+    assert store.query() == []
+    assert store.query(include_replayed=True)[0].replay_count == 2
+    assert store.get_stats() == {'pending': 0, 'replayed': 1, 'channels': {}}
+
+
+def test_purge_keeps_newest_entries(tmp_path):
+    store = DeadLetterStore(DeadLetterConfig(path=str(tmp_path / 'dlq.db'), max_entries=2))
+    for index in range(4):
+        DeadLetterEntry(store, DeadLetterMessage(f'通知 {index}', '内容', 'ci', 'info')).record('smtp', False, '失败')
+
+    assert store.purge() == 2
+    assert [letter.message.title for letter in store.query()] == ['通知 2', '通知 3']
+    assert store.get_stats()['channels'] == {'smtp': 2}
+    store.close()
+
+
+def test_close_when_idle_waits_for_in_flight_entries(tmp_path):
+    """重新加载配置后旧死信队列等进行中的发送都记录结果后才关闭"""
+    path = str(tmp_path / 'dlq.db')
+    store = DeadLetterStore(DeadLetterConfig(path=path))
+    entry = DeadLetterEntry(store, MESSAGE, channels=['smtp', 'webhook'])
+
+    store.close_when_idle()
+    entry.record('webhook', True)
+    entry.record('smtp', False, '连接失败', 'network', [ATTEMPT])
+    with pytest.raises(sqlite3.ProgrammingError):
+        store.query()
+
+    store = DeadLetterStore(DeadLetterConfig(path=path))
+    assert [letter.channel for letter in store.query()] == ['smtp']
+    store.close()
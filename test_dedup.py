@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+通知去重测试
+去重默认关闭，需要在配置文件或环境变量中显式启用
+"""
+
+import pytest
+
+from config_manager import ConfigManager
+from dedup import DedupConfig, Deduplicator, make_dedup_key
+
+
+@pytest.mark.parametrize('env, enabled', [(None, False), ('true', True), ('off', False)])
+def test_dedup_disabled_by_default(monkeypatch, env, enabled):
+    if env is None:
+        monkeypatch.delenv('DEDUP_ENABLED', raising=False)
+    else:
+        monkeypatch.setenv('DEDUP_ENABLED', env)
+    assert DedupConfig.from_dict(ConfigManager().get_dedup_settings()).enabled is enabled
+    assert DedupConfig.from_dict({}).enabled is False
+
+
+def test_duplicate_returns_cached_summary(tmp_path):
+    """成功的发送结果在保留时间内被复用，并写入数据库供重启后使用"""
+    config = DedupConfig(enabled=True, store_path=str(tmp_path / 'dedup.db'))
+    key = make_dedup_key('ci', '构建完成', '内容')
+    deduplicator = Deduplicator(config)
+    assert deduplicator.acquire(key, 1) is None
+    deduplicator.release(key, {'successful_channels': ['smtp']})
+    assert deduplicator.acquire(key, 1) == {'successful_channels': ['smtp']}
+    deduplicator.close()
+
+    restarted = Deduplicator(config)
+    assert restarted.acquire(key, 1) == {'successful_channels': ['smtp']}
+    assert make_dedup_key('ci', '构建完成', '其他内容') != key
+    assert make_dedup_key('ci', 'a', 'b', 'k1') == make_dedup_key('ci', 'c', 'd', 'k1')
+    restarted.close()
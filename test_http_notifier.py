@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP 通知器测试
+发送时限已到时抛出 DeadlineExceededError，由重试机制按超时处理，而不是变成普通的发送失败
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from config_manager import ConfigManager
+from deadline import Deadline, DeadlineExceededError, deadline_scope
+from notifiers.base import HTTPNotifier, HTTPRequest
+from retry_handler import ERROR_TIMEOUT, RetryConfig, RetryHandler, classify_error
+
+
+class EchoNotifier(HTTPNotifier):
+    def get_name(self):
+        return "Echo"
+
+    def is_configured(self):
+        return True
+
+    def _build_request(self, title, content):
+        return HTTPRequest("POST", "http://127.0.0.1:9/echo", data=content)
+
+    def _handle_response(self, response):
+        return self._succeed("推送成功")
+
+
+def test_send_raises_when_deadline_exceeded():
+    notifier = EchoNotifier(ConfigManager())
+    with deadline_scope(Deadline(0)):
+        with pytest.raises(DeadlineExceededError):
+            notifier.send("标题", "内容")
+
+
+def test_send_async_raises_when_deadline_exceeded():
+    notifier = EchoNotifier(ConfigManager())
+
+    async def run():
+        with deadline_scope(Deadline(0)):
+            await notifier.send_async("标题", "内容")
+
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(run())
+
+
+def test_deadline_classified_as_timeout():
+    """重试机制不重试已超时的发送，尝试记录中的错误类型为 timeout"""
+    notifier = EchoNotifier(ConfigManager())
+    handler = RetryHandler(RetryConfig(max_attempts=3, jitter=False), deadline=Deadline(0.05))
+
+    def send():
+        time.sleep(0.06)
+        return notifier.send("标题", "内容")
+
+    with pytest.raises(DeadlineExceededError) as excinfo:
+        handler.execute_with_retry(send)
+    assert classify_error(excinfo.value) == ERROR_TIMEOUT
+    assert [attempt.error_type for attempt in handler.attempts] == [ERROR_TIMEOUT]
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+冷启动导入测试
+在子进程中用 python -X importtime 启动通知处理器，确认未启用的渠道不会加载其依赖，
+并限制启动阶段的总导入耗时，防止 GitHub Actions 中的冷启动变慢
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 启动阶段导入耗时上限（毫秒），CI 机器较慢时可通过环境变量放宽
+IMPORT_TIME_BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", 1000))
+
+# 只启用控制台时不应加载的模块
+HEAVY_MODULES = ("requests", "smtplib", "email.mime.multipart", "hmac")
+
+STARTUP_SCRIPT = """
+import json
+import sys
+from config_manager import ConfigManager
+from notification_handler import NotificationHandler
+
+handler = NotificationHandler(ConfigManager())
+active = [notifier.get_name() for notifier in handler.get_active_notifiers()]
+print(json.dumps({"active": active, "modules": sorted(sys.modules)}))
+"""
+
+
+def run_startup(extra_env=None):
+    """在干净的环境变量下启动通知处理器，返回活跃渠道、已加载模块和导入耗时（毫秒）"""
+    env = {"PATH": os.environ.get("PATH", ""), "CONSOLE": "true"}
+    env.update(extra_env or {})
+
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT],
+        cwd=REPO_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+
+    # importtime 输出格式: "import time: self [us] | cumulative | imported package"
+    # 只累加顶层导入（包名前没有缩进），并排除解释器自身的 site 初始化
+    total_us = 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2][1:].rstrip()
+        if not name.startswith(" ") and name != "site":
+            total_us += int(parts[1])
+
+    report = json.loads(completed.stdout.strip().splitlines()[-1])
+    return report["active"], set(report["modules"]), total_us / 1000
+
+
+def test_console_only_startup_skips_heavy_imports():
+    """只启用控制台时，不导入 HTTP/SMTP 通知器及其依赖"""
+    active, modules, total_ms = run_startup()
+
+    print(f"活跃渠道: {active}，启动导入耗时 {total_ms:.1f} ms")
+    assert active == ["控制台"]
+    loaded = [name for name in HEAVY_MODULES if name in modules]
+    assert not loaded, f"不应加载的模块: {loaded}"
+    assert total_ms < IMPORT_TIME_BUDGET_MS, f"启动导入耗时 {total_ms:.1f} ms 超过上限 {IMPORT_TIME_BUDGET_MS} ms"
+
+
+def test_enabled_channel_is_loaded_on_demand():
+    """启用并配置 SMTP 后才导入 smtplib"""
+    active, modules, _ = run_startup({
+        "ENABLE_SMTP": "true",
+        "SMTP_SERVER": "smtp.example.com:465",
+        "SMTP_SSL": "true",
+        "SMTP_EMAIL": "bot@example.com",
+        "SMTP_PASSWORD": "password",
+        "SMTP_NAME": "通知服务",
+    })
+
+    assert "SMTP邮件" in active
+    assert "smtplib" in modules
+    assert "requests" not in modules
+
+
+if __name__ == "__main__":
+    test_console_only_startup_skips_heavy_imports()
+    test_enabled_channel_is_loaded_on_demand()
+    print("=== 冷启动导入测试完成 ===")
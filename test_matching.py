@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多模式匹配测试
+必然字面量的提取必须保守：正则能匹配的文本一定包含提取出的字面量，否则屏蔽规则会被预筛选漏掉
+"""
+
+import random
+import re
+import warnings
+
+import pytest
+
+from matching import AhoCorasick, PatternSet, required_literal
+from suppression import SuppressionFilter, SuppressionRule
+
+
+@pytest.mark.parametrize('pattern, literal', [
+    (r'abc', 'abc'),
+    (r'error: \d{10,20}', 'error: '),
+    (r'a{2}', ''),
+    (r'ab{2}c', 'a'),
+    (r'x{,3}yz', 'yz'),
+    (r'id{2,}', 'i'),
+    (r'a{x}', 'a{x}'),
+    (r'{}', '{}'),
+    (r'[]x]abc', 'abc'),
+    (r'[^]]abc', 'abc'),
+    (r'[\]]abc', 'abc'),
+    (r'foo\.bar', 'foo.bar'),
+    (r'colou?r', 'colo'),
+    (r'a|b', ''),
+    (r'(?i)abc', ''),
+])
+def test_required_literal(pattern, literal):
+    assert required_literal(pattern) == literal
+
+
+def test_required_literal_glob():
+    assert required_literal('*签到*[0-9]', glob=True) == '签到'
+    assert required_literal('report-?.txt', glob=True) == 'report-'
+
+
+def test_required_literal_is_conservative():
+    """随机模式与 re.search 对照：能匹配的文本必然包含提取出的字面量"""
+    rng = random.Random(20240601)
+    pattern_chars = ['a', 'b', '1', '2', '{', '}', ',', '[', ']', '^', '\\', '.', '*', '+', '?', '{2}', '{1,2}', '{,2}', 'x']
+    text_chars = 'ab12{},[]^\\.x'
+    checked = 0
+    for _ in range(3000):
+        pattern = ''.join(rng.choice(pattern_chars) for _ in range(rng.randint(1, 8)))
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', FutureWarning)
+                regex = re.compile(pattern, re.DOTALL)
+        except re.error:
+            continue
+        literal = required_literal(pattern)
+        for _ in range(30):
+            text = ''.join(rng.choice(text_chars) for _ in range(rng.randint(0, 12)))
+            if regex.search(text):
+                assert literal in text, (pattern, literal, text)
+                checked += 1
+    assert checked > 1000
+
+
+def test_suppression_regex_with_quantifier():
+    """带 {m,n} 量词的正则屏蔽规则只在正则匹配时生效，不依赖量词中的数字"""
+    suppression = SuppressionFilter([SuppressionRule('order', field='title', match='regex', pattern=r'订单 \d{10,20}')])
+    assert suppression.match('订单 1234567890 已完成', '', '') is not None
+    assert suppression.match('订单 12 已完成', '', '') is None
+
+
+def test_pattern_set_returns_first_listed_pattern():
+    patterns = PatternSet([r'b+', r'a'])
+    assert patterns.first_match('xab') == 0
+    assert patterns.first_match('xyz') is None
+
+
+def test_aho_corasick():
+    automaton = AhoCorasick(['he', 'she', 'his', 'hers'])
+    assert automaton.first_match('ushers') == 0   # he 和 she 在同一位置结束，取序号小的
+    assert automaton.find_all('ushers') == {0, 1, 3}
+    assert automaton.find_all('xyz') == set()
+
+
+def test_pattern_set_with_groups():
+    """含分组的模式单独编译：同名分组不冲突，反向引用指向本模式的分组"""
+    patterns = PatternSet([r'(?P<v>x)z', r'(?P<v>y)', r'plain'])
+    assert patterns.first_match('y') == 1
+    assert patterns.first_match('plain xz') == 0
+    assert patterns.first_match('plain') == 2
+
+    backreference = PatternSet(['(a)', r'(b)\1'])
+    assert backreference.first_match('bb') == 1
+    assert backreference.first_match('ab') == 0
+
+
+def test_pattern_set_keeps_regex_semantics():
+    """. 不匹配换行，与单独使用该正则时一致；模式前面的换行不影响匹配"""
+    patterns = PatternSet([r'a.b', r'(?i)hello', r'c'])
+    assert patterns.first_match('a\nb') is None
+    assert patterns.first_match('x\na-b') == 0
+    assert patterns.first_match('say\nHELLO') == 1
+    assert patterns.first_match('\n\nc') == 2
+
+
+def test_suppression_rules_with_groups():
+    """同名分组的屏蔽规则不会导致加载失败，后面规则中的反向引用仍然生效"""
+    suppression = SuppressionFilter.from_config({'rules': [
+        {'name': 'a', 'match': 'regex', 'pattern': r'(?P<n>\d+)-(?P=n)'},
+        {'name': 'b', 'match': 'regex', 'pattern': r'(?P<n>[a-z]+)!'},
+        {'name': 'c', 'match': 'regex', 'pattern': r'(.)\1{3}'},
+    ]})
+    assert suppression.errors == {}
+    assert suppression.match('12-12', '', '').name == 'a'
+    assert suppression.match('hey!', '', '').name == 'b'
+    assert suppression.match('zzzz', '', '').name == 'c'
+    assert suppression.match('a\nb', '', '') is None
+    assert SuppressionFilter([SuppressionRule('dot', match='regex', pattern='x.y')]).match('x\ny', '', '') is None
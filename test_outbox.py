@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发件箱测试
+未完成的投递在重启后恢复且只恢复一次；恢复开始后写入的通知不会被当作未完成而重复发送
+"""
+
+import sqlite3
+
+import pytest
+
+from outbox import STATE_FAILED, STATE_PENDING, STATE_SENT, Outbox, OutboxConfig
+
+
+@pytest.fixture
+def outbox_path(tmp_path):
+    return str(tmp_path / 'outbox.db')
+
+
+def enqueue(outbox, title, channels=('smtp', 'webhook')):
+    return outbox.enqueue(title, '内容', 'test', 'info', [{'filename': 'a.txt', 'filepath': '/tmp/a.txt'}], channels)
+
+
+def test_resume_only_unfinished_deliveries(outbox_path):
+    """重启后只恢复未完成的渠道，附件信息原样保留"""
+    outbox = Outbox(OutboxConfig(path=outbox_path))
+    entry = enqueue(outbox, '第一条')
+    entry.mark('smtp', True)
+    enqueue(outbox, '第二条').mark('webhook', False, '参数错误')
+    outbox.close()
+
+    outbox = Outbox(OutboxConfig(path=outbox_path))
+    pending = outbox.claim_pending()
+
+    assert [(message.title, sorted(message.deliveries)) for message in pending] == [
+        ('第一条', ['webhook']), ('第二条', ['smtp'])]
+    assert pending[0].attachments == [{'filename': 'a.txt', 'filepath': '/tmp/a.txt'}]
+    assert outbox.get_stats() == {STATE_PENDING: 2, STATE_SENT: 1, STATE_FAILED: 1}
+    outbox.close()
+
+
+def test_claim_excludes_messages_written_afterwards(outbox_path):
+    """取出待恢复的投递后再写入的通知不在恢复列表中，由接收它的发送流程负责"""
+    outbox = Outbox(OutboxConfig(path=outbox_path))
+    enqueue(outbox, '崩溃前')
+
+    pending = outbox.claim_pending()
+    enqueue(outbox, '启动后')
+
+    assert [message.title for message in pending] == ['崩溃前']
+    outbox.close()
+
+
+def test_deliveries_abandoned_after_max_resumes(outbox_path):
+    """反复恢复仍未完成的投递超过上限后标记为失败，不再重发"""
+    outbox = Outbox(OutboxConfig(path=outbox_path, max_resumes=2))
+    enqueue(outbox, '毒消息', channels=('smtp',))
+
+    assert len(outbox.claim_pending()) == 1
+    assert len(outbox.claim_pending()) == 1
+    assert outbox.claim_pending() == []
+    assert outbox.get_stats()[STATE_FAILED] == 1
+    outbox.close()
+
+
+def test_purge_keeps_pending_messages(outbox_path):
+    outbox = Outbox(OutboxConfig(path=outbox_path, retention_hours=0))
+    enqueue(outbox, '已完成', channels=('smtp',)).mark('smtp', True)
+    enqueue(outbox, '未完成', channels=('smtp',))
+
+    assert outbox.purge() == 1
+    assert [message.title for message in outbox.claim_pending()] == ['未完成']
+    outbox.close()
+
+
+def test_close_when_idle_waits_for_in_flight_entries(outbox_path):
+    """重新加载配置后旧发件箱等进行中的投递都记录结果后才关闭"""
+    outbox = Outbox(OutboxConfig(path=outbox_path))
+    entry = enqueue(outbox, '进行中')
+    enqueue(outbox, '已完成', channels=('smtp',)).mark('smtp', True)
+
+    outbox.close_when_idle()
+    entry.mark('smtp', True)
+    entry.mark('webhook', False, '超时')
+    with pytest.raises(sqlite3.ProgrammingError):
+        outbox.get_stats()
+
+    outbox = Outbox(OutboxConfig(path=outbox_path))
+    assert outbox.get_stats() == {STATE_PENDING: 0, STATE_SENT: 2, STATE_FAILED: 1}
+    outbox.close()
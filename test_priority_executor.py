@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+优先级通道测试
+最高优先级通道严格优先，其余通道按权重公平出队，低优先级通道不会被饿死
+"""
+
+import threading
+from collections import Counter
+
+from priority_executor import LaneConfig, LaneQueue, PriorityExecutor, normalize_priority
+
+
+def drain(queue):
+    order = []
+    while True:
+        task = queue.pop()
+        if task is None:
+            return order
+        order.append(task())
+
+
+def test_weighted_fair_share():
+    """三个通道都积压时，出队比例约为权重 4:2:1；urgent 总是先出队"""
+    queue = LaneQueue()
+    for _ in range(70):
+        for lane in ('low', 'normal', 'high'):
+            queue.push(lane, lambda lane=lane: lane)
+    queue.push('urgent', lambda: 'urgent')
+
+    order = drain(queue)
+
+    assert order[0] == 'urgent'
+    assert Counter(order[1:71]) == {'high': 40, 'normal': 20, 'low': 10}
+    assert len(order) == 211
+
+
+def test_idle_lane_does_not_bank_credit():
+    """空闲的通道不会积累额度：后来的 low 任务按当前虚拟时间排队，不会一次插到所有任务前面"""
+    queue = LaneQueue()
+    for _ in range(20):
+        queue.push('normal', lambda: 'normal')
+    drain(queue)
+    for _ in range(4):
+        queue.push('normal', lambda: 'normal')
+    queue.push('low', lambda: 'low')
+
+    assert drain(queue) == ['normal', 'normal', 'low', 'normal', 'normal']
+
+
+def test_unknown_lane_uses_default_and_config():
+    queue = LaneQueue(LaneConfig.from_dict({'default_lane': 'low', 'weights': {'high': 0}}))
+    queue.push('whatever', lambda: 'x')
+    assert queue.get_stats()['low']['queued'] == 1
+    assert queue.config.weights['high'] == 0.001
+    assert normalize_priority(' HIGH ') == 'high'
+    assert normalize_priority('asap') is None
+
+
+def test_executor_runs_urgent_first_when_worker_frees():
+    """唯一的工作线程空闲后先执行 urgent 任务，shutdown 后拒绝新任务"""
+    executor = PriorityExecutor(1)
+    release = threading.Event()
+    order = []
+    blocker = executor.submit(release.wait)
+    futures = [executor.submit(order.append, lane, lane=lane) for lane in ('low', 'normal', 'urgent')]
+    release.set()
+
+    for future in [blocker] + futures:
+        future.result(timeout=2)
+    assert order == ['urgent', 'normal', 'low']
+
+    executor.shutdown()
+    try:
+        executor.submit(order.append, 'late')
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("关闭后应拒绝新任务")
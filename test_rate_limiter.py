@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+限流器测试
+限流等待不能超过发送的截止时间：等不到令牌时立即失败，并且不占用令牌
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from deadline import Deadline, deadline_scope
+from rate_limiter import RateLimiter, RateLimitExceededError, TokenBucket
+from retry_handler import ERROR_RATE_LIMITED, classify_error
+
+
+def limiter() -> RateLimiter:
+    """每分钟一次、另有每秒十次的渠道"""
+    return RateLimiter({'smtp': [TokenBucket(10, 10), TokenBucket(1 / 60, 1)]})
+
+
+def test_wait_beyond_deadline_fails_fast():
+    """令牌要等一分钟而剩余时间只有 0.2 秒时立即失败，不在工作线程里睡眠"""
+    rate_limiter = limiter()
+    assert rate_limiter.acquire('smtp') == 0
+
+    started = time.monotonic()
+    with deadline_scope(Deadline(0.2)):
+        with pytest.raises(RateLimitExceededError) as excinfo:
+            rate_limiter.acquire('smtp')
+    assert time.monotonic() - started < 0.1
+    assert classify_error(excinfo.value) == ERROR_RATE_LIMITED
+    assert rate_limiter.get_stats()['smtp']['rejected'] == 1
+
+
+def test_rejected_reservation_keeps_tokens():
+    """被拒绝的预约归还已占用的令牌，不会推迟后续发送"""
+    rate_limiter = RateLimiter({'smtp': [TokenBucket(1, 2), TokenBucket(1 / 60, 1)]})
+    rate_limiter.acquire('smtp')
+    with deadline_scope(Deadline(0.2)):
+        with pytest.raises(RateLimitExceededError):
+            rate_limiter.acquire('smtp')
+    assert rate_limiter._buckets['smtp'][0].reserve(max_wait=0) == 0
+
+
+def test_async_wait_within_deadline():
+    rate_limiter = RateLimiter({'webhook': [TokenBucket(20, 1)]})
+
+    async def run():
+        with deadline_scope(Deadline(5)):
+            await rate_limiter.acquire_async('webhook')
+            return await rate_limiter.acquire_async('webhook')
+
+    assert 0 < asyncio.run(run()) <= 0.05
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+重试调度器测试
+覆盖到期顺序、取消、事件循环中的等待，以及关闭后拒绝新的延迟任务
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from config_manager import ConfigManager
+from notification_handler import NotificationHandler
+from retry_handler import NetworkError, RetryConfig, RetryHandler
+from retry_scheduler import DelayScheduler
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = DelayScheduler("TestScheduler")
+    yield scheduler
+    scheduler.shutdown()
+
+
+def test_callbacks_fire_in_deadline_order(scheduler):
+    """回调按到期时间执行，已取消的任务不执行"""
+    fired = []
+    done = threading.Event()
+    scheduler.call_later(0.06, fired.append, 'c')
+    scheduler.call_later(0.02, fired.append, 'a')
+    scheduler.call_later(0.04, fired.append, 'b').cancel()
+    scheduler.call_later(0.08, done.set)
+
+    assert done.wait(1)
+    assert fired == ['a', 'c']
+    assert scheduler.get_stats() == {'pending': 0, 'scheduled': 4, 'fired': 3}
+
+
+def test_sleep_async(scheduler):
+    async def run():
+        started = time.monotonic()
+        await scheduler.sleep_async(0.05)
+        return time.monotonic() - started
+
+    assert 0.04 <= asyncio.run(run()) < 0.5
+
+
+def test_call_later_refused_after_shutdown(scheduler):
+    """关闭后不会被 call_later 重新启动，显式 start() 后可以继续使用"""
+    scheduler.call_later(10, lambda: None)
+    scheduler.shutdown()
+
+    with pytest.raises(RuntimeError):
+        scheduler.call_later(0, lambda: None)
+    assert scheduler._thread is None
+
+    done = threading.Event()
+    scheduler.start().call_later(0, done.set)
+    assert done.wait(1)
+
+
+def test_submit_with_retry_resubmits_after_backoff(scheduler):
+    """失败的尝试在退避时间到期后重新提交到线程池"""
+    attempts = []
+
+    def flaky():
+        attempts.append(threading.current_thread().name)
+        if len(attempts) < 3:
+            raise NetworkError("连接失败")
+        return 'ok'
+
+    handler = RetryHandler(RetryConfig(max_attempts=3, base_delay=0.01, jitter=False,
+                                       retryable_exceptions=[NetworkError]), scheduler=scheduler)
+    with ThreadPoolExecutor(2, thread_name_prefix='worker') as executor:
+        assert handler.submit_with_retry(executor.submit, flaky).result(timeout=2) == 'ok'
+    assert len(attempts) == 3
+    assert all(name.startswith('worker') for name in attempts)
+
+
+def failing_handler(scheduler, base_delay):
+    def fail():
+        raise NetworkError("连接失败")
+
+    handler = RetryHandler(RetryConfig(max_attempts=3, base_delay=base_delay, jitter=False,
+                                       retryable_exceptions=[NetworkError]), scheduler=scheduler)
+    return handler, fail
+
+
+def test_retry_after_shutdown_settles_immediately(scheduler):
+    """调度器已关闭时无法安排重试，结果以本次的错误结束而不是一直不返回"""
+    scheduler.shutdown()
+    handler, fail = failing_handler(scheduler, 0.01)
+    with ThreadPoolExecutor(1) as executor:
+        outcome = handler.submit_with_retry(executor.submit, fail)
+        with pytest.raises(NetworkError):
+            outcome.result(timeout=1)
+
+
+def test_pending_retry_settled_on_shutdown(scheduler):
+    """关闭时尚未到期的重试被丢弃，对应的结果以最后一次的错误结束"""
+    handler, fail = failing_handler(scheduler, 10)
+    with ThreadPoolExecutor(1) as executor:
+        outcome = handler.submit_with_retry(executor.submit, fail)
+        deadline = time.monotonic() + 1
+        while scheduler.get_stats()['pending'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        scheduler.shutdown()
+        with pytest.raises(NetworkError):
+            outcome.result(timeout=1)
+
+
+def test_closed_handler_does_not_restart_pool():
+    """关闭后到期的重试不会重新创建线程池，显式 start() 后可以继续发送"""
+    handler = NotificationHandler(ConfigManager()).start()
+    handler.close()
+
+    with pytest.raises(RuntimeError):
+        handler._submit(lambda: None)
+    assert handler._executor is None
+
+    handler.start()
+    assert handler._submit(lambda: 'ok').result(timeout=1) == 'ok'
+    handler.close()
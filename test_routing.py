@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+路由测试
+编译后的路由表与按配置顺序逐条检查规则的结果一致：多条规则命中时以靠前的规则为准
+"""
+
+import random
+import re
+
+from routing import RoutingRule, RoutingTable, current_recipients, recipients_scope
+
+
+def linear_route(rules, source, severity, title):
+    """逐条检查规则，作为路由表的参照实现"""
+    severity = (severity or 'info').lower()
+    for rule in rules:
+        if rule.sources and source not in rule.sources:
+            continue
+        if rule.severities and severity not in rule.severities:
+            continue
+        if rule.title_pattern is not None and not re.search(rule.title_pattern, title):
+            continue
+        return rule
+    return None
+
+
+def test_from_config_skips_invalid_rules():
+    table = RoutingTable.from_config({'rules': [
+        {'name': 'ok', 'source': 'ci', 'channels': ['smtp']},
+        {'name': 'no-target', 'source': 'ci'},
+        {'name': 'bad-regex', 'channels': ['smtp'], 'title_pattern': '('},
+        {'name': 'bad-priority', 'priority': 'asap'},
+        'not-a-rule',
+    ]})
+
+    assert [rule.name for rule in table.rules] == ['ok']
+    assert sorted(table.errors) == [f'routing.rules[{index}]' for index in range(1, 5)]
+
+
+def test_earlier_rule_wins():
+    """靠前的带标题模式的规则优先于靠后的无条件规则，严重级别不区分大小写"""
+    table = RoutingTable.from_config({'rules': [
+        {'name': 'deploy-failed', 'source': 'ci', 'title_pattern': '部署.*失败', 'channels': ['wecom']},
+        {'name': 'critical', 'severity': 'critical', 'channels': ['smtp'], 'priority': 'high'},
+        {'name': 'ci', 'source': 'ci', 'channels': ['console']},
+        {'name': 'never', 'source': 'ci', 'title_pattern': '构建', 'channels': ['pushplus']},
+    ]})
+
+    assert table.route('ci', 'CRITICAL', '部署 v1 失败').name == 'deploy-failed'
+    assert table.route('ci', 'Critical', '构建完成').name == 'critical'
+    assert table.route('ci', None, '构建完成').name == 'ci'
+    assert table.route('cron', None, '部署失败') is None
+    assert table.route('cron', 'critical', '').priority == 'high'
+
+
+def test_matches_linear_scan():
+    """随机规则和事件下，路由表的结果与逐条检查相同"""
+    rng = random.Random(14)
+    sources, severities = ['ci', 'cron', 'ops'], ['info', 'warning', 'critical']
+    patterns = [None, None, '失败', '^部署', 'v[0-9]+', 'a|b', '完成$']
+    titles = ['部署失败', '构建完成', '部署 v2 完成', 'ab', '', '回滚 v1 失败']
+    for _ in range(200):
+        rules = []
+        for index in range(rng.randint(1, 8)):
+            rules.append(RoutingRule(
+                name=f'r{index}',
+                channels=('smtp',),
+                sources=tuple(rng.sample(sources, rng.randint(0, 2))),
+                severities=tuple(rng.sample(severities, rng.randint(0, 2))),
+                title_pattern=rng.choice(patterns),
+            ))
+        table = RoutingTable(rules)
+        for source in sources + ['other']:
+            for severity in severities + [None]:
+                for title in titles:
+                    assert table.route(source, severity, title) is linear_route(rules, source, severity, title)
+
+
+def test_recipients_scope():
+    assert current_recipients() == ()
+    with recipients_scope(['ops', 'a@example.com']):
+        with recipients_scope([]):
+            assert current_recipients() == ('ops', 'a@example.com')
+    assert current_recipients() == ()
+
+
+def test_rules_with_same_group_name():
+    """两条规则使用同名分组时路由表可以正常构建，反向引用按各自的规则匹配"""
+    table = RoutingTable.from_config({'rules': [
+        {'name': 'a', 'title_pattern': r'(?P<v>deploy)-\d', 'channels': ['smtp']},
+        {'name': 'b', 'title_pattern': r'(?P<v>build)', 'channels': ['wecom']},
+        {'name': 'c', 'title_pattern': r'(x)\1', 'channels': ['bark']},
+    ]})
+    assert table.errors == {}
+    assert table.route('ci', None, 'build').name == 'b'
+    assert table.route('ci', None, 'deploy-1').name == 'a'
+    assert table.route('ci', None, 'xx').name == 'c'
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SMTP 通知器测试
+使用进程内的简易 SMTP 服务器，覆盖流式构建的邮件内容、连接池复用、按域名分组的收件人事务和部分失败
+"""
+
+import email
+import socket
+import threading
+from email.header import decode_header, make_header
+
+import pytest
+
+from config_manager import ConfigManager
+from notification_handler import AttachmentInfo
+from notifiers import smtp_pool
+from notifiers.smtp import SMTPNotifier
+from notifiers.smtp_recipients import expand_recipients, group_recipients
+
+
+class FakeSMTPServer:
+    """
+    简易 SMTP 服务器
+
+    Args:
+        pipelining: 是否声明 PIPELINING
+        max_rcpt: 每个事务接受的收件人上限，超过时回复 452
+        fail_data_domain: 收件人包含该域名的事务在 DATA 结束后回复 554
+        drop_domain: 收到该域名的 RCPT 时直接断开连接
+        shutdown_mails: 前几个 MAIL 命令回复 421 并断开连接
+    """
+
+    def __init__(self, pipelining=True, max_rcpt=None, fail_data_domain=None, drop_domain=None, shutdown_mails=0):
+        self.pipelining = pipelining
+        self.max_rcpt = max_rcpt
+        self.fail_data_domain = fail_data_domain
+        self.drop_domain = drop_domain
+        self.shutdown_mails = shutdown_mails
+        self.messages = []
+        self.connections = 0
+        self._sock = socket.socket()
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(('127.0.0.1', 0))
+        self._sock.listen(8)
+        self.port = self._sock.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def close(self):
+        self._sock.close()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        reader = conn.makefile('rb')
+
+        def reply(line):
+            conn.sendall(line.encode() + b'\r\n')
+
+        reply('220 fake')
+        mail = None
+        with conn:
+            for raw in reader:
+                command = raw.decode().strip()
+                verb = command.upper()[:4]
+                if verb == 'EHLO':
+                    extensions = ['SIZE 100000000', 'AUTH PLAIN LOGIN'] + (['PIPELINING'] if self.pipelining else [])
+                    reply('250-fake')
+                    for extension in extensions[:-1]:
+                        reply('250-' + extension)
+                    reply('250 ' + extensions[-1])
+                elif verb == 'AUTH':
+                    reply('235 ok')
+                elif verb == 'MAIL':
+                    if self.shutdown_mails:
+                        self.shutdown_mails -= 1
+                        reply('421 shutting down')
+                        return
+                    mail = {'from': command, 'rcpt': []}
+                    reply('250 ok')
+                elif verb == 'RCPT':
+                    address = command[command.index('<') + 1:command.index('>')]
+                    if self.drop_domain and address.endswith('@' + self.drop_domain):
+                        return
+                    if 'bad' in address:
+                        reply('550 no such user')
+                    elif self.max_rcpt and len(mail['rcpt']) >= self.max_rcpt:
+                        reply('452 too many recipients')
+                    else:
+                        mail['rcpt'].append(address)
+                        reply('250 ok')
+                elif verb == 'DATA':
+                    reply('354 go')
+                    lines = []
+                    for line in reader:
+                        if line == b'.\r\n':
+                            break
+                        lines.append(line[1:] if line.startswith(b'..') else line)
+                    if self.fail_data_domain and any(r.endswith('@' + self.fail_data_domain) for r in mail['rcpt']):
+                        reply('554 rejected')
+                        continue
+                    mail['data'] = b''.join(lines)
+                    self.messages.append(mail)
+                    reply('250 queued')
+                elif verb in ('RSET', 'NOOP'):
+                    reply('250 ok')
+                elif verb == 'QUIT':
+                    reply('221 bye')
+                    return
+                else:
+                    reply('500 unknown')
+
+
+@pytest.fixture
+def smtp_env(monkeypatch):
+    """启动简易服务器并配置 SMTP 环境变量，返回 (服务器, 创建通知器的函数)"""
+    servers = []
+
+    def start(to=None, max_recipients=None, **options):
+        server = FakeSMTPServer(**options)
+        servers.append(server)
+        for key, value in {
+            'SMTP_SERVER': f'127.0.0.1:{server.port}', 'SMTP_SSL': 'false', 'SMTP_EMAIL': 'bot@example.com',
+            'SMTP_PASSWORD': 'password', 'SMTP_NAME': '通知服务', 'ATTACHMENT_CACHE_DIR': '',
+        }.items():
+            monkeypatch.setenv(key, value)
+        for key, value in (('SMTP_TO', to), ('SMTP_MAX_RECIPIENTS', max_recipients)):
+            if value:
+                monkeypatch.setenv(key, str(value))
+            else:
+                monkeypatch.delenv(key, raising=False)
+        smtp_pool.close_smtp_pool()
+        return server, SMTPNotifier(ConfigManager())
+
+    yield start
+    smtp_pool.close_smtp_pool()
+    for server in servers:
+        server.close()
+
+
+def test_expand_and_group_recipients():
+    groups = {'ops': ['a@x.com', 'dev'], 'dev': ['B@y.org', 'ops', 'A@X.com']}
+    assert expand_recipients(['ops', 'c@x.com'], groups) == ['a@x.com', 'B@y.org', 'c@x.com']
+    assert group_recipients(['a@x.com', 'b@y.org', 'c@x.com', 'd@x.com'], 2) == [
+        ['a@x.com', 'c@x.com'], ['d@x.com', 'b@y.org']]
+
+
+def test_message_round_trip_with_attachments(smtp_env, tmp_path):
+    """流式构建的邮件能被标准库解析，正文和附件内容不变"""
+    server, notifier = smtp_env()
+    binary = tmp_path / 'data.bin'
+    binary.write_bytes(bytes(range(256)) * 1000)
+    text = tmp_path / 'note.txt'
+    text.write_text('.leading dot\n中文\n', encoding='utf-8')
+
+    result = notifier.send_with_attachments('标题', '正文\n.以点号开头', [
+        AttachmentInfo('数据.bin', str(binary)),
+        AttachmentInfo('note.txt', str(text), 'text/plain'),
+    ])
+
+    assert result.success, result.error
+    message = email.message_from_bytes(server.messages[0]['data'])
+    assert str(make_header(decode_header(message['Subject']))) == '标题'
+    body, data_part, text_part = message.get_payload()
+    assert body.get_payload(decode=True).decode('utf-8') == '正文\n.以点号开头'
+    assert data_part.get_filename() == '数据.bin'
+    assert data_part.get_payload(decode=True) == binary.read_bytes()
+    assert text_part.get_payload(decode=True) == text.read_bytes()
+
+
+def test_pool_reuses_session(smtp_env):
+    server, notifier = smtp_env()
+    for index in range(3):
+        assert notifier.send(f'标题 {index}', '正文').success
+    assert len(server.messages) == 3
+    assert server.connections == 1
+
+
+@pytest.mark.parametrize('pipelining', [True, False])
+def test_recipients_grouped_by_domain_and_hidden(smtp_env, pipelining):
+    """收件人按域名分组、超过服务器上限的在新事务中发送；To 头部不暴露收件人名单"""
+    to = ','.join([f'u{i}@a.com' for i in range(5)] + ['v@b.org', 'U0@A.com', 'bad@a.com'])
+    server, notifier = smtp_env(to=to, pipelining=pipelining, max_rcpt=3)
+
+    result = notifier.send('标题', '正文')
+
+    assert result.success
+    assert '1 个收件人被拒绝' in result.message
+    delivered = [recipient for message in server.messages for recipient in message['rcpt']]
+    assert sorted(delivered) == sorted([f'u{i}@a.com' for i in range(5)] + ['v@b.org'])
+    assert all(len(message['rcpt']) <= 3 for message in server.messages)
+    assert len({message['data'] for message in server.messages}) == 1
+    headers = email.message_from_bytes(server.messages[0]['data'])
+    assert headers['To'].endswith('<bot@example.com>')
+    assert 'a.com' not in headers['To']
+
+
+def test_failed_transaction_does_not_fail_delivered_groups(smtp_env):
+    """后面的事务被拒绝时已投递的组计为成功，整封邮件不会被重试而重复投递"""
+    server, notifier = smtp_env(to='a@a.com,b@b.org', max_recipients=1, fail_data_domain='b.org')
+
+    result = notifier.send('标题', '正文')
+
+    assert result.success
+    assert [message['rcpt'] for message in server.messages] == [['a@a.com']]
+    assert '1 个收件人被拒绝' in result.message
+
+
+def test_connection_lost_after_partial_delivery(smtp_env):
+    """已有收件人收到邮件后连接中断，剩余收件人计为失败而不是整体失败"""
+    server, notifier = smtp_env(to='a@a.com,b@b.org', max_recipients=1, drop_domain='b.org')
+
+    result = notifier.send('标题', '正文')
+
+    assert result.success
+    assert [message['rcpt'] for message in server.messages] == [['a@a.com']]
+
+
+def test_connection_lost_before_any_delivery_fails(smtp_env):
+    _, notifier = smtp_env(to='b@b.org', drop_domain='b.org')
+    assert not notifier.send('标题', '正文').success
+
+
+@pytest.mark.parametrize('pipelining', [True, False])
+def test_session_closed_by_server_not_returned_to_pool(smtp_env, pipelining):
+    """服务器回复 421 并断开后，会话不会放回池中，下一封邮件使用新的连接"""
+    server, notifier = smtp_env(pipelining=pipelining, shutdown_mails=1)
+
+    assert not notifier.send('标题 1', '正文').success
+    assert notifier.send('标题 2', '正文').success
+    assert server.connections == 2
+    assert smtp_pool.get_smtp_pool().get_stats()['idle'] == 1
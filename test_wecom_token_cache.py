@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+企业微信 access_token 缓存测试
+并发获取只刷新一次，到期前的提前刷新窗口内重新获取，服务端判定令牌失效时刷新后重试，持久化文件可在下次运行复用
+"""
+
+import os
+import stat
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from notifiers import wecom
+from notifiers.wecom import WeComClient, WeComTokenCache
+
+
+class FakeFetch:
+    """按顺序返回 token-1、token-2……的刷新函数"""
+
+    def __init__(self, expires_in=7200, delay=0.0):
+        self.expires_in = expires_in
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self):
+        time.sleep(self.delay)
+        self.calls += 1
+        return f"token-{self.calls}", self.expires_in
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+class FakeSessionPool:
+    """gettoken 每次返回新的令牌，发送消息的响应按 send_results 依次返回"""
+
+    def __init__(self, send_results):
+        self.send_results = list(send_results)
+        self.tokens = 0
+        self.sent_tokens = []
+
+    def request(self, method, url, **kwargs):
+        if 'gettoken' in url:
+            self.tokens += 1
+            return FakeResponse({'access_token': f"token-{self.tokens}", 'expires_in': 7200})
+        self.sent_tokens.append(url.rsplit('=', 1)[1])
+        return FakeResponse(self.send_results.pop(0))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """替换 wecom 模块使用的时钟"""
+    now = [1000.0]
+    monkeypatch.setattr(wecom, 'time', SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_concurrent_get_token_fetches_once():
+    cache = WeComTokenCache()
+    fetch = FakeFetch(delay=0.05)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_token('corp', 'secret', fetch)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ['token-1'] * 8
+    assert fetch.calls == 1
+    assert cache.get_stats() == {'cached_tokens': 1, 'fetch_count': 1}
+
+
+def test_refresh_inside_margin(clock):
+    """令牌在剩余有效期大于提前刷新时间时复用，进入提前刷新窗口后重新获取"""
+    cache = WeComTokenCache(refresh_margin=300)
+    fetch = FakeFetch(expires_in=7200)
+    assert cache.get_token('corp', 'secret', fetch) == 'token-1'
+
+    clock[0] += 7200 - 301
+    assert cache.get_token('corp', 'secret', fetch) == 'token-1'
+    clock[0] += 2
+    assert cache.get_token('corp', 'secret', fetch) == 'token-2'
+    assert fetch.calls == 2
+
+    # 不同的应用密钥各自缓存
+    assert cache.get_token('corp', 'other-secret', fetch) == 'token-3'
+
+
+@pytest.mark.parametrize('errcode', WeComClient.INVALID_TOKEN_ERRCODES)
+def test_invalid_token_refreshed_and_retried_once(errcode):
+    pool = FakeSessionPool([{'errcode': errcode, 'errmsg': 'invalid access_token'}, {'errcode': 0, 'errmsg': 'ok'}])
+    client = WeComClient('corp', 'secret', '1000002', session_pool=pool, token_cache=WeComTokenCache())
+
+    assert client.send_text('内容') == 'ok'
+    assert pool.sent_tokens == ['token-1', 'token-2']
+
+
+def test_invalidate_keeps_newer_token():
+    """其他线程已刷新的令牌不会被基于旧令牌的失效请求删除"""
+    cache = WeComTokenCache()
+    fetch = FakeFetch()
+    cache.get_token('corp', 'secret', fetch)
+    cache.invalidate('corp', 'secret', 'token-1')
+    assert cache.get_token('corp', 'secret', fetch) == 'token-2'
+
+    cache.invalidate('corp', 'secret', 'token-1')
+    assert cache.get_token('corp', 'secret', fetch) == 'token-2'
+    assert fetch.calls == 2
+
+
+def test_persisted_tokens_round_trip(tmp_path, clock):
+    """令牌以 0600 权限持久化，不保存明文密钥；下次运行只加载未过期的令牌"""
+    path = str(tmp_path / 'tokens' / 'wecom.json')
+    cache = WeComTokenCache(persist_path=path)
+    cache.get_token('corp', 'secret', FakeFetch())
+    cache.get_token('corp', 'short-lived', FakeFetch(expires_in=600))
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    with open(path, encoding='utf-8') as f:
+        assert 'secret' not in f.read()
+    assert [name for name in os.listdir(tmp_path / 'tokens')] == ['wecom.json']
+
+    clock[0] += 601
+    restarted = WeComTokenCache(persist_path=path)
+    fetch = FakeFetch()
+    assert restarted.get_token('corp', 'secret', fetch) == 'token-1'
+    assert fetch.calls == 0
+    assert restarted.get_stats()['cached_tokens'] == 1